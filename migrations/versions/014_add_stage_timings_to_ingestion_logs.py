@@ -0,0 +1,48 @@
+"""Add per-stage timings and byte counts to ingestion_logs
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-18
+
+Records where each file's ingestion time went, so slow backfills can be
+attributed to hashing, decompression, Hatanaka decoding, QC or the database:
+  - worker: host:pid of the worker process that ingested the file
+  - bytes_in / bytes_out: source file size and standardized RINEX size
+  - *_sec: wall-clock seconds per stage. hash_sec is written by the scanner,
+    the rest by the worker; a stage that did not run (plain file, cache hit,
+    chain mode without stage stats) is NULL or 0.
+The ingested_at index serves the throughput summary's time-window queries.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "014"
+down_revision = "013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("ingestion_logs", sa.Column("worker",         sa.String(255), nullable=True))
+    op.add_column("ingestion_logs", sa.Column("bytes_in",       sa.BigInteger(), nullable=True))
+    op.add_column("ingestion_logs", sa.Column("bytes_out",      sa.BigInteger(), nullable=True))
+    op.add_column("ingestion_logs", sa.Column("hash_sec",       sa.Float(),     nullable=True))
+    op.add_column("ingestion_logs", sa.Column("decompress_sec", sa.Float(),     nullable=True))
+    op.add_column("ingestion_logs", sa.Column("hatanaka_sec",   sa.Float(),     nullable=True))
+    op.add_column("ingestion_logs", sa.Column("qc_sec",         sa.Float(),     nullable=True))
+    op.add_column("ingestion_logs", sa.Column("db_sec",         sa.Float(),     nullable=True))
+    op.execute(
+        "CREATE INDEX idx_ingestion_logs_ingested_at ON ingestion_logs (ingested_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_ingestion_logs_ingested_at")
+    op.drop_column("ingestion_logs", "db_sec")
+    op.drop_column("ingestion_logs", "qc_sec")
+    op.drop_column("ingestion_logs", "hatanaka_sec")
+    op.drop_column("ingestion_logs", "decompress_sec")
+    op.drop_column("ingestion_logs", "hash_sec")
+    op.drop_column("ingestion_logs", "bytes_out")
+    op.drop_column("ingestion_logs", "bytes_in")
+    op.drop_column("ingestion_logs", "worker")
@@ -0,0 +1,33 @@
+"""Add the availability inventory watermark to processing_status
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+
+available_days is now computed by the ingestion inventory
+(ingestion_pipeline.inventory) from the rinex_files catalog:
+  - available_days_as_of: newest rinex_files.date_added folded into the
+    row's available_days. An incremental run only reads catalog rows added
+    after the newest watermark, so it stays cheap as the archive grows.
+The date_added index serves that incremental query.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "015"
+down_revision = "014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "processing_status",
+        sa.Column("available_days_as_of", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.create_index("idx_rinex_files_date_added", "rinex_files", ["date_added"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_rinex_files_date_added", table_name="rinex_files")
+    op.drop_column("processing_status", "available_days_as_of")
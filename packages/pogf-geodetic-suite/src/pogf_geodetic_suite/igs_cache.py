@@ -0,0 +1,471 @@
+"""
+Shared on-disk cache of IGS orbit and clock products.
+
+Every campaign used to download its own copy of the same COD orbits and
+clocks into its ORB/ directory. ProductCache keeps one decompressed copy of
+each product per machine, in ProductDownloader's own layout, next to an
+index of what it holds:
+
+    <POGF_IGS_CACHE>/2024/100/COD0OPSFIN_20241000000_01D_05M_ORB.SP3
+    <POGF_IGS_CACHE>/index.sqlite   (ac, content, day, version) → file, size, sha256, use
+
+materialize() hardlinks cached files into a campaign directory under the
+same YYYY/DDD/<name> paths the downloader writes (a reflink, then a plain
+copy, when the campaign lives on another filesystem), so verify_igs_products
+and the PCF cannot tell the difference. Cached files are made read-only:
+through the hardlinks every campaign shares them.
+
+The version in the key is the product series taken from the file name
+("0OPSFIN" for IGS20 long names, "legacy" for pre-week-2238 short names).
+A miss takes a per-product lock file and checks the index again before
+downloading, so campaigns preparing the same day in parallel processes
+download it once.
+
+Eviction drops entries not used for POGF_IGS_CACHE_MAX_AGE_DAYS, then the
+least recently used ones until the cache is under POGF_IGS_CACHE_MAX_MB;
+entries used within the last POGF_IGS_CACHE_MIN_AGE_SEC stay, so a file a
+campaign is about to link is not deleted underneath it. Campaign links
+survive eviction. POGF_IGS_CACHE_MAX_MB=0 disables the cache.
+
+warm_ahead() (CLI: ``python -m pogf_geodetic_suite.igs_cache warm``)
+downloads the products of coming sessions before any campaign asks for them.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import click
+
+from pogf_geodetic_suite.igs_downloader import Product, ProductDownloader, products
+
+try:
+    import fcntl
+except ImportError:            # Windows: no cross-process locks or reflinks
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "POGF_IGS_CACHE",
+    str(Path.home() / ".cache" / "pogf" / "igs"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("POGF_IGS_CACHE_MAX_MB", "20480")) << 20
+DEFAULT_MAX_AGE_DAYS = float(os.environ.get("POGF_IGS_CACHE_MAX_AGE_DAYS", "365"))
+DEFAULT_MIN_AGE_SEC = float(os.environ.get("POGF_IGS_CACHE_MIN_AGE_SEC", "600"))
+
+_INDEX_NAME = "index.sqlite"
+_LOCK_DIR = ".locks"
+_HASH_BYTES = 1 << 20
+_FICLONE = 0x40049409          # linux/fs.h: clone a whole file (btrfs, XFS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    ac TEXT NOT NULL,
+    content TEXT NOT NULL,
+    day TEXT NOT NULL,
+    version TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    added REAL NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (ac, content, day, version)
+)
+"""
+
+
+def product_version(product: Product) -> str:
+    """Product series of the file the mirrors serve for product."""
+    name = product.remote_name
+    if name.endswith(".Z"):
+        return "legacy"
+    return name[len(product.ac):name.index("_")]
+
+
+def _key(product: Product) -> tuple[str, str, str, str]:
+    return (product.ac, product.content, product.date.strftime("%Y-%m-%d"),
+            product_version(product))
+
+
+@dataclass
+class CacheEntry:
+    """One indexed product."""
+    ac: str
+    content: str
+    day: str
+    version: str
+    path: str                  # relative to the cache root
+    size: int
+    sha256: str
+    added: float
+    used: float
+
+
+# ---------------------------------------------------------------------------
+# Placing files
+# ---------------------------------------------------------------------------
+
+def _reflink(src: str, dest: str) -> bool:
+    """Copy-on-write clone of src at dest, where the filesystem supports it."""
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dest):
+            os.remove(dest)
+        return False
+
+
+def link_file(src: str, dest: str) -> str:
+    """
+    Put src at dest without copying where possible. Returns how: "present"
+    (already the same file), "hardlink", "reflink" or "copy".
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    try:
+        if os.path.samefile(src, dest):
+            return "present"
+    except OSError:
+        pass
+    tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            os.link(src, tmp)
+            how = "hardlink"
+        except OSError:
+            how = "reflink" if _reflink(src, tmp) else "copy"
+            if how == "copy":
+                shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return how
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(_HASH_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class ProductCache:
+    """
+    Decompressed IGS products shared between campaigns, indexed in SQLite.
+
+    Safe to share between threads; several processes may share the root.
+    Misses are downloaded with downloader (a ProductDownloader writing into
+    root, created on first use unless one is passed in).
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        min_age_sec: float = DEFAULT_MIN_AGE_SEC,
+        downloader: ProductDownloader | None = None,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.min_age_sec = min_age_sec
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / _LOCK_DIR).mkdir(exist_ok=True)
+        self._downloader = downloader
+        self._owns_downloader = downloader is None
+        self._conn = sqlite3.connect(self.root / _INDEX_NAME, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._lock = threading.Lock()
+
+    @property
+    def downloader(self) -> ProductDownloader:
+        with self._lock:
+            if self._downloader is None:
+                self._downloader = ProductDownloader(base_dir=str(self.root))
+            return self._downloader
+
+    # -- lookups ---------------------------------------------------------------
+
+    def get(self, product: Product) -> str | None:
+        """Path of the cached product, or None. Marks the entry used."""
+        key = _key(product)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size FROM products "
+                "WHERE ac = ? AND content = ? AND day = ? AND version = ?", key,
+            ).fetchone()
+        if row is None:
+            return None
+        path = self.root / row[0]
+        try:
+            fresh = path.stat().st_size == row[1]
+        except OSError:
+            fresh = False
+        with self._lock:
+            if not fresh:
+                # Deleted or rewritten behind the index's back: fetch it again.
+                self._conn.execute(
+                    "DELETE FROM products "
+                    "WHERE ac = ? AND content = ? AND day = ? AND version = ?", key,
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE products SET used = ? "
+                    "WHERE ac = ? AND content = ? AND day = ? AND version = ?",
+                    (time.time(), *key),
+                )
+            self._conn.commit()
+        return str(path) if fresh else None
+
+    def entries(self) -> list[CacheEntry]:
+        """Every indexed product, least recently used first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ac, content, day, version, path, size, sha256, added, used "
+                "FROM products ORDER BY used"
+            ).fetchall()
+        return [CacheEntry(*row) for row in rows]
+
+    # -- filling ---------------------------------------------------------------
+
+    def fetch(
+        self,
+        wanted: Iterable[Product],
+        force: bool = False,
+        workers: int = 8,
+    ) -> dict[Product, str | None]:
+        """Cached path of each product, downloading misses; None where that failed."""
+        wanted = list(dict.fromkeys(wanted))
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="igs-cache") as pool:
+            paths = list(pool.map(lambda p: self._fetch(p, force), wanted))
+        results = dict(zip(wanted, paths, strict=True))
+        logger.info("cache_fetch products=%d failed=%d",
+                    len(wanted), sum(path is None for path in paths))
+        self.evict()
+        return results
+
+    def _fetch(self, product: Product, force: bool) -> str | None:
+        if not force and (path := self.get(product)) is not None:
+            return path
+        with self._product_lock(product):
+            # Another process may have fetched it while we waited for the lock.
+            if not force and (path := self.get(product)) is not None:
+                return path
+            path = self.downloader.download_product(
+                product.date, ac=product.ac, content=product.content, force=force
+            )
+            if path is None:
+                return None
+            self._register(product, path)
+            return path
+
+    def _register(self, product: Product, path: str) -> None:
+        size = os.path.getsize(path)
+        sha256 = _sha256(path)
+        # Campaigns hardlink this inode; nobody gets to write through it.
+        os.chmod(path, 0o444)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO products "
+                "(ac, content, day, version, path, size, sha256, added, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*_key(product), os.path.relpath(path, self.root), size, sha256, now, now),
+            )
+            self._conn.commit()
+        logger.info("cache_add file=%s bytes=%d", os.path.basename(path), size)
+
+    @contextmanager
+    def _product_lock(self, product: Product) -> Iterator[None]:
+        with open(self.root / _LOCK_DIR / f"{product.remote_name}.lock", "ab") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def materialize(
+        self,
+        wanted: Iterable[Product],
+        dest_dir: str | os.PathLike,
+        workers: int = 8,
+    ) -> dict[Product, str | None]:
+        """
+        Fetch products and link each to dest_dir/YYYY/DDD/<name>, the path
+        ProductDownloader(base_dir=dest_dir) would have written. Maps each
+        product to its path under dest_dir, or None if it could not be fetched.
+        """
+        placed: dict[Product, str | None] = {}
+        for product, path in self.fetch(wanted, workers=workers).items():
+            if path is None:
+                placed[product] = None
+                continue
+            dest = product.local_path(os.fspath(dest_dir))
+            how = link_file(path, dest)
+            logger.info("cache_materialize file=%s via=%s", os.path.basename(dest), how)
+            placed[product] = dest
+        return placed
+
+    def warm_ahead(
+        self,
+        start: datetime,
+        days: int = 7,
+        acs: Iterable[str] = ("COD",),
+        contents: Iterable[str] = ("ORB", "CLK"),
+        workers: int = 8,
+    ) -> dict[Product, str | None]:
+        """
+        Fetch the products of the days sessions starting at start, ahead of
+        the campaigns that will process them. Products the analysis centre
+        has not published yet come back as None; run again later.
+        """
+        end = start + timedelta(days=days - 1)
+        return self.fetch(products(start, end, acs, contents), workers=workers)
+
+    # -- eviction --------------------------------------------------------------
+
+    def evict(self) -> int:
+        """Drop expired, then least recently used entries. Returns bytes freed."""
+        entries = self.entries()
+        total = sum(e.size for e in entries)
+        now = time.time()
+        protected = now - self.min_age_sec
+        expired = now - self.max_age_days * 86400 if self.max_age_days > 0 else float("-inf")
+        freed = 0
+        for entry in entries:
+            if entry.used > protected:
+                break
+            if entry.used >= expired and total - freed <= self.max_bytes:
+                break
+            try:
+                os.remove(self.root / entry.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("cache_evict_failed file=%s error=%s", entry.path, e)
+                continue
+            with self._lock:
+                self._conn.execute(
+                    "DELETE FROM products "
+                    "WHERE ac = ? AND content = ? AND day = ? AND version = ?",
+                    (entry.ac, entry.content, entry.day, entry.version),
+                )
+                self._conn.commit()
+            freed += entry.size
+        if freed:
+            logger.info("cache_evicted bytes=%d left=%d", freed, total - freed)
+        return freed
+
+    def close(self) -> None:
+        if self._owns_downloader and self._downloader is not None:
+            self._downloader.close()
+        self._conn.close()
+
+
+_cache: ProductCache | None = None
+_cache_pid: int | None = None
+
+
+def default_cache() -> ProductCache | None:
+    """This process's cache at DEFAULT_CACHE_DIR, or None when POGF_IGS_CACHE_MAX_MB is 0."""
+    global _cache, _cache_pid
+    if DEFAULT_MAX_BYTES <= 0:
+        return None
+    if _cache is None or _cache_pid != os.getpid():
+        _cache = ProductCache()
+        _cache_pid = os.getpid()
+    return _cache
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+@click.group()
+@click.option("--cache-dir", default=DEFAULT_CACHE_DIR, show_default=True, help="Cache root")
+@click.pass_context
+def cli(ctx: click.Context, cache_dir: str) -> None:
+    """Shared IGS product cache."""
+    ctx.obj = ProductCache(cache_dir)
+    ctx.call_on_close(ctx.obj.close)
+
+
+@cli.command()
+@click.option("--date", "start", type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="First session day (YYYY-MM-DD)")
+@click.option("--days-ago", type=int, help="First session day, counted back from today")
+@click.option("--days", default=7, show_default=True, help="Number of session days")
+@click.option("--ac", default="COD", show_default=True, help="Analysis centre(s): IGS, COD or IGS,COD")
+@click.option("--content", default="ORB,CLK", show_default=True, help="Content type(s)")
+@click.option("--workers", default=8, show_default=True, help="Concurrent downloads")
+@click.pass_obj
+def warm(
+    cache: ProductCache,
+    start: datetime | None,
+    days_ago: int | None,
+    days: int,
+    ac: str,
+    content: str,
+    workers: int,
+) -> None:
+    """Fetch the products of coming sessions into the cache."""
+    if days_ago is not None:
+        start = datetime.combine(datetime.now().date() - timedelta(days=days_ago), datetime.min.time())
+    if start is None:
+        raise click.UsageError("provide --date or --days-ago")
+    results = cache.warm_ahead(
+        start,
+        days,
+        acs=[a.strip().upper() for a in ac.split(",")],
+        contents=[c.strip().upper() for c in content.split(",")],
+        workers=workers,
+    )
+    missing = [p.remote_name for p, path in results.items() if path is None]
+    click.echo(f"{len(results) - len(missing)}/{len(results)} products cached")
+    for name in missing:
+        click.echo(f"  not available: {name}")
+
+
+@cli.command()
+@click.pass_obj
+def evict(cache: ProductCache) -> None:
+    """Apply the size and age limits now."""
+    click.echo(f"{cache.evict()} bytes freed")
+
+
+@cli.command()
+@click.pass_obj
+def stats(cache: ProductCache) -> None:
+    """Entries and bytes held."""
+    entries = cache.entries()
+    click.echo(f"{len(entries)} products, {sum(e.size for e in entries)} bytes in {cache.root}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,11 +1,21 @@
 import gzip
 import logging
 import os
+import re
+import shutil
+import threading
+import zlib
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 
 import click
 import requests
+from requests.adapters import HTTPAdapter
+
+from pogf_geodetic_suite import lzw
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -23,6 +33,11 @@ _DEFAULT_MIRRORS = [
     "https://cddis.nasa.gov/archive/gnss/products/",
 ]
 
+# A transfer that breaks mid-chunk loses that chunk, so chunks stay small.
+_CHUNK_BYTES = 1 << 16
+_COPY_BYTES = 1 << 20
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-")
+
 # Maps (analysis_centre, content) → (sampling_interval, format_extension)
 # IGS combined uses 15-min orbit sampling; CODE uses 5-min
 _PRODUCT_TABLE: dict[tuple[str, str], tuple[str, str]] = {
@@ -57,11 +72,85 @@ def _build_legacy_filename(ac: str, gps_week: int, gps_dow: int, content: str) -
     return f"{ac_lower}{gps_week}{gps_dow}.clk.Z"
 
 
+@dataclass(frozen=True)
+class Product:
+    """One daily product: analysis centre × content × date."""
+    date: datetime
+    ac: str = "COD"
+    content: str = "ORB"
+
+    @property
+    def gps_week(self) -> int:
+        return _gps_week(self.date)
+
+    @property
+    def remote_name(self) -> str:
+        """Compressed file name on the mirrors (long IGS20 name or legacy short name)."""
+        week = self.gps_week
+        if week >= _IGS20_TRANSITION_WEEK:
+            return _build_long_filename(self.ac, self.date, self.content)
+        gps_dow = (self.date - _GPS_EPOCH).days % 7
+        return _build_legacy_filename(self.ac, week, gps_dow, self.content)
+
+    def local_path(self, base_dir: str) -> str:
+        """base_dir/YYYY/DDD/<decompressed name>."""
+        ddd = f"{_day_of_year(self.date):03d}"
+        local_name = self.remote_name.removesuffix(".gz").removesuffix(".Z")
+        return os.path.join(base_dir, str(self.date.year), ddd, local_name)
+
+
+def products(
+    start: datetime,
+    end: datetime,
+    acs: Iterable[str] = ("COD",),
+    contents: Iterable[str] = ("ORB", "CLK"),
+) -> list[Product]:
+    """Every (date, ac, content) from start to end inclusive, in date order."""
+    acs, contents = list(acs), list(contents)
+    days = (end - start).days
+    return [
+        Product(start + timedelta(days=d), ac, content)
+        for d in range(days + 1)
+        for ac in acs
+        for content in contents
+    ]
+
+
 class ProductDownloader:
-    def __init__(self, base_dir: str = "data/igs", mirrors: Optional[list[str]] = None):
+    """
+    Fetches IGS/CODE products from a list of mirrors.
+
+    Downloads stream to ``<compressed name>.part`` next to the target and are
+    decompressed only once complete; a leftover .part is resumed with an HTTP
+    Range request, on whichever mirror serves the retry. Connections are
+    pooled per mirror and at most max_per_mirror requests run against one
+    mirror at a time. A mirror that has not answered within hedge_after
+    seconds gets raced against the next one; the first to answer serves the
+    body and the other response is dropped.
+    """
+
+    def __init__(
+        self,
+        base_dir: str = "data/igs",
+        mirrors: Optional[list[str]] = None,
+        max_per_mirror: int = 4,
+        hedge_after: float = 5.0,
+        timeout: float = 30.0,
+    ):
         self.base_dir = base_dir
         self.mirrors = mirrors or _DEFAULT_MIRRORS
+        self.hedge_after = hedge_after
+        self.timeout = timeout
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.mirrors), pool_maxsize=max_per_mirror)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._slots = {mirror: threading.BoundedSemaphore(max_per_mirror) for mirror in self.mirrors}
+        # Requests are opened on their own pool so a batch worker can wait
+        # on two mirrors at once while hedging.
+        self._openers = ThreadPoolExecutor(
+            max_workers=max_per_mirror * len(self.mirrors), thread_name_prefix="igs-open"
+        )
 
     def download_product(
         self,
@@ -76,67 +165,198 @@ class ProductDownloader:
         ac: analysis centre — "IGS" or "COD"
         content: "ORB" (orbits) or "CLK" (clocks)
         """
-        week = _gps_week(date)
-        gps_dow = (date - _GPS_EPOCH).days % 7
+        return self._download(Product(date, ac, content), force)
 
-        use_long = week >= _IGS20_TRANSITION_WEEK
-        if use_long:
-            filename_gz = _build_long_filename(ac, date, content)
-        else:
-            filename_gz = _build_legacy_filename(ac, week, gps_dow, content)
+    def download_many(
+        self,
+        wanted: Iterable[Product],
+        force: bool = False,
+        workers: int = 8,
+    ) -> dict[Product, Optional[str]]:
+        """Download products concurrently; maps each product to its path or None."""
+        wanted = list(dict.fromkeys(wanted))
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="igs-dl") as pool:
+            paths = list(pool.map(lambda p: self._download(p, force), wanted))
+        results = dict(zip(wanted, paths, strict=True))
+        failed = sum(path is None for path in paths)
+        logger.info("batch_done products=%d failed=%d", len(wanted), failed)
+        return results
 
-        # Local storage path: base_dir/YYYY/DDD/<decompressed_filename>
-        ddd = f"{_day_of_year(date):03d}"
-        target_dir = os.path.join(self.base_dir, str(date.year), ddd)
-        os.makedirs(target_dir, exist_ok=True)
+    def close(self) -> None:
+        self._openers.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
 
-        # Strip .gz / .Z for the stored file
-        local_name = filename_gz.removesuffix(".gz").removesuffix(".Z")
-        local_path = os.path.join(target_dir, local_name)
+    # -- one product ---------------------------------------------------------
 
+    def _download(self, product: Product, force: bool) -> Optional[str]:
+        local_path = product.local_path(self.base_dir)
         if os.path.exists(local_path) and not force:
             logger.info("already_exists path=%s", local_path)
             return local_path
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        part = os.path.join(os.path.dirname(local_path), product.remote_name + ".part")
+        if force and os.path.exists(part):
+            os.remove(part)
 
-        for mirror in self.mirrors:
-            url = f"{mirror}{week}/{filename_gz}"
-            logger.info("attempting url=%s", url)
+        pending = list(self.mirrors)
+        while pending:
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            opened = self._open_first(product, pending, offset)
+            if opened is None:
+                break
+            mirror, response = opened
+            try:
+                self._stream(response, part, offset)
+            except (requests.RequestException, OSError) as e:
+                # Keep the .part: the next mirror resumes where this one stopped.
+                logger.warning("transfer_interrupted mirror=%s file=%s error=%s",
+                               mirror, product.remote_name, e)
+                pending.remove(mirror)
+                continue
+            finally:
+                self._release(mirror, response)
             try:
-                response = self.session.get(url, timeout=30)
-                if response.status_code == 200:
-                    raw = response.content
-                    # Decompress .gz (IGS20) or .Z (legacy, best-effort)
-                    if filename_gz.endswith(".gz"):
-                        data = gzip.decompress(raw)
-                    else:
-                        # Legacy .Z — requires unix compress; fall back to raw storage
-                        logger.warning("legacy_.Z_decompression_not_supported storing_raw")
-                        data = raw
-                    with open(local_path, "wb") as f:
-                        f.write(data)
-                    logger.info("downloaded path=%s", local_path)
-                    return local_path
-                logger.warning("http_error url=%s status=%s", url, response.status_code)
-            except Exception as e:
-                logger.error("download_error url=%s error=%s", url, e)
-
-        logger.error("all_mirrors_failed filename=%s", filename_gz)
+                self._finish(part, product.remote_name, local_path)
+            except (OSError, EOFError, ValueError, zlib.error) as e:
+                logger.warning("corrupt_download mirror=%s file=%s error=%s",
+                               mirror, product.remote_name, e)
+                os.remove(part)
+                pending.remove(mirror)
+                continue
+            logger.info("downloaded path=%s", local_path)
+            return local_path
+
+        logger.error("all_mirrors_failed filename=%s", product.remote_name)
         return None
 
+    def _open_first(self, product: Product, pending: list[str], offset: int):
+        """
+        (mirror, response) from the first of pending to answer, or None.
+
+        Mirrors are tried in order; the next one is started as soon as the
+        current one fails, or hedged in once hedge_after passes without an
+        answer. Mirrors that fail are removed from pending.
+        """
+        queue = list(pending)
+        running = {}
+
+        def start_next() -> None:
+            mirror = queue.pop(0)
+            url = f"{mirror}{product.gps_week}/{product.remote_name}"
+            running[self._openers.submit(self._open, mirror, url, offset)] = mirror
+
+        start_next()
+        while running:
+            done, _ = wait(
+                running, timeout=self.hedge_after if queue else None, return_when=FIRST_COMPLETED
+            )
+            if not done:
+                logger.info("hedging file=%s mirror=%s", product.remote_name, queue[0])
+                start_next()
+                continue
+            winner = None
+            for future in done:
+                mirror = running.pop(future)
+                response = future.result()
+                if response is None:
+                    pending.remove(mirror)
+                elif winner is None:
+                    winner = (mirror, response)
+                else:
+                    self._release(mirror, response)
+            if winner is not None:
+                for future, mirror in running.items():
+                    future.add_done_callback(lambda f, m=mirror: self._drop(m, f))
+                return winner
+            if queue and not running:
+                start_next()
+        return None
+
+    def _open(self, mirror: str, url: str, offset: int):
+        """Streaming response for url (holding a slot of mirror), or None."""
+        self._slots[mirror].acquire()
+        logger.info("attempting url=%s offset=%d", url, offset)
+        try:
+            headers = {"Range": f"bytes={offset}-"} if offset else None
+            response = self.session.get(url, timeout=self.timeout, stream=True, headers=headers)
+        except Exception as e:
+            self._slots[mirror].release()
+            logger.error("download_error url=%s error=%s", url, e)
+            return None
+        if response.status_code in (200, 206) or (offset and response.status_code == 416):
+            return response
+        response.close()
+        self._slots[mirror].release()
+        logger.warning("http_error url=%s status=%s", url, response.status_code)
+        return None
+
+    def _release(self, mirror: str, response) -> None:
+        response.close()
+        self._slots[mirror].release()
+
+    def _drop(self, mirror: str, future) -> None:
+        """Close the response of a mirror that lost a hedged race."""
+        response = future.result()
+        if response is not None:
+            self._release(mirror, response)
+
+    @staticmethod
+    def _stream(response, part: str, offset: int) -> None:
+        """Write the body to part: appended for a matching 206, from scratch for a 200."""
+        if response.status_code == 416:
+            return          # the .part already holds the whole file; _finish checks it
+        mode = "wb"
+        if response.status_code == 206:
+            first = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if first is None or int(first.group(1)) != offset:
+                raise requests.RequestException(
+                    f"unexpected Content-Range {response.headers.get('Content-Range')!r}"
+                )
+            mode = "ab"
+        with open(part, mode) as fh:
+            for chunk in response.iter_content(_CHUNK_BYTES):
+                fh.write(chunk)
+
+    @staticmethod
+    def _finish(part: str, remote_name: str, local_path: str) -> None:
+        """Decompress a complete .part (.gz or .Z) into local_path, atomically."""
+        if not os.path.getsize(part):
+            raise EOFError("empty download")
+        tmp = local_path + ".tmp"
+        try:
+            with open(part, "rb") as raw, open(tmp, "wb") as dst:
+                if remote_name.endswith(".gz"):
+                    with gzip.GzipFile(fileobj=raw) as src:
+                        shutil.copyfileobj(src, dst, _COPY_BYTES)
+                else:
+                    # Legacy products are Unix-compressed (.Z)
+                    lzw.decompress(raw, dst, _COPY_BYTES)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.remove(part)
+        os.replace(tmp, local_path)
+
 
 @click.command()
 @click.option("--date", "date_str", type=click.DateTime(formats=["%Y-%m-%d"]), help="Date (YYYY-MM-DD)")
+@click.option("--end", "end_str", type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="Last date of a range starting at --date (inclusive)")
 @click.option("--days-ago", type=int, help="Number of days ago to download")
-@click.option("--ac", default="COD", show_default=True, help="Analysis centre: IGS or COD")
-@click.option("--content", default="ORB", show_default=True, help="Content type: ORB or CLK")
+@click.option("--ac", default="COD", show_default=True, help="Analysis centre(s): IGS, COD or IGS,COD")
+@click.option("--content", default="ORB", show_default=True, help="Content type(s): ORB, CLK or ORB,CLK")
 @click.option("--output-dir", default="data/igs", show_default=True, help="Base directory for downloads")
+@click.option("--workers", default=8, show_default=True, help="Concurrent downloads")
 @click.option("--force", is_flag=True, help="Force re-download even if file exists")
 def main(
     date_str: Optional[datetime],
+    end_str: Optional[datetime],
     days_ago: Optional[int],
     ac: str,
     content: str,
     output_dir: str,
+    workers: int,
     force: bool,
 ) -> None:
     """Download IGS/CODE GNSS orbit and clock products."""
@@ -147,9 +367,18 @@ def main(
         click.echo("Error: provide --date or --days-ago", err=True)
         return
 
+    wanted = products(
+        date_str,
+        end_str or date_str,
+        acs=[a.strip().upper() for a in ac.split(",")],
+        contents=[c.strip().upper() for c in content.split(",")],
+    )
     downloader = ProductDownloader(base_dir=output_dir)
-    result = downloader.download_product(date_str, ac=ac.upper(), content=content.upper(), force=force)
-    if result is None:
+    try:
+        results = downloader.download_many(wanted, force=force, workers=workers)
+    finally:
+        downloader.close()
+    if any(path is None for path in results.values()):
         raise SystemExit(1)
 
 
@@ -0,0 +1,179 @@
+"""
+Unix compress (.Z) streams — in-process replacement for ``uncompress``.
+
+Legacy IGS products (pre-GPS-week-2238 orbits and clocks) and older RINEX
+archives (``.??d.Z``) are LZW-compressed. LZWReader decodes such a stream
+incrementally: it reads the compressed input a buffer at a time and hands out
+decoded bytes as they are produced, so a file of any size decodes in bounded
+memory. Wrap it in io.BufferedReader for line iteration, or use decompress()
+to copy a stream to disk.
+
+The downloader, the ingestion standardizer and drive-archaeologist's archive
+handler all decode through this module. compress() is the matching encoder
+(block mode, no CLEAR codes), used for test fixtures and synthetic corpora.
+"""
+from __future__ import annotations
+
+import io
+from typing import BinaryIO
+
+MAGIC = b"\x1f\x9d"
+_BLOCK_MODE = 0x80
+_CLEAR = 256
+_INIT_BITS = 9
+_READ_BYTES = 1 << 20
+
+
+class LZWReader(io.RawIOBase):
+    """
+    Streaming decoder for Unix compress (.Z) data.
+
+    compress packs codes LSB-first in groups of eight; a group of n-bit codes
+    occupies exactly n bytes. When the code width grows or a CLEAR code
+    arrives, the encoder pads out the current group, so the decoder drops the
+    rest of that group and starts reading whole groups at the new width.
+    """
+
+    def __init__(self, fileobj: BinaryIO):
+        super().__init__()
+        self._src = fileobj
+        header = fileobj.read(3)
+        if len(header) < 3 or header[:2] != MAGIC:
+            raise ValueError("not a Unix compress (.Z) stream")
+        self._max_bits = header[2] & 0x1F
+        self._block_mode = bool(header[2] & _BLOCK_MODE)
+        if not _INIT_BITS <= self._max_bits <= 16:
+            raise ValueError(f"unsupported .Z code width: {self._max_bits} bits")
+        self._max_entries = 1 << self._max_bits
+        self._reset_table()
+        self._prev: bytes | None = None
+        self._inbuf = b""
+        self._eof = False
+        self._pending = bytearray()
+
+    def _reset_table(self) -> None:
+        self._table = [bytes([i]) for i in range(256)]
+        if self._block_mode:
+            self._table.append(b"")  # slot 256 is the CLEAR code
+        self._n_bits = _INIT_BITS
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._eof:
+            chunk = self._src.read(_READ_BYTES)
+            if not chunk:
+                self._eof = True
+            self._decode(self._inbuf + chunk)
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        del self._pending[:n]
+        return n
+
+    def _decode(self, data: bytes) -> None:
+        """Decode every whole group in data (and the partial tail at EOF)."""
+        table = self._table
+        out = self._pending
+        prev = self._prev
+        n_bits = self._n_bits
+        max_entries = self._max_entries
+        max_bits = self._max_bits
+        pos, end = 0, len(data)
+        while pos < end:
+            if end - pos < n_bits and not self._eof:
+                break
+            group = data[pos:pos + n_bits]
+            pos += len(group)
+            bits = int.from_bytes(group, "little")
+            mask = (1 << n_bits) - 1
+            # The rest of a group is padding once the code width changes.
+            for _ in range(len(group) * 8 // n_bits):
+                code = bits & mask
+                bits >>= n_bits
+                if prev is None:
+                    if code > 255:
+                        raise ValueError("corrupt .Z stream: bad first code")
+                    entry = table[code]
+                elif code == _CLEAR and self._block_mode:
+                    self._reset_table()
+                    table, n_bits, prev = self._table, self._n_bits, None
+                    break
+                elif code < len(table):
+                    entry = table[code]
+                    if len(table) < max_entries:
+                        table.append(prev + entry[:1])
+                elif code == len(table):
+                    entry = prev + prev[:1]
+                    table.append(entry)
+                else:
+                    raise ValueError("corrupt .Z stream: code out of range")
+                out += entry
+                prev = entry
+                if len(table) > mask and n_bits < max_bits:
+                    n_bits += 1
+                    break
+        self._inbuf = data[pos:]
+        self._prev = prev
+        self._n_bits = n_bits
+
+
+def is_compressed(head: bytes) -> bool:
+    """True if head (the first bytes of a file) starts a .Z stream."""
+    return head[:2] == MAGIC
+
+
+def open_z(fileobj: BinaryIO, buffer_size: int = _READ_BYTES) -> io.BufferedReader:
+    """Buffered, line-iterable decoded view of a .Z stream."""
+    return io.BufferedReader(LZWReader(fileobj), buffer_size)
+
+
+def decompress(src: BinaryIO, dst: BinaryIO, chunk_size: int = _READ_BYTES) -> int:
+    """Decode the .Z stream src into dst a chunk at a time. Returns bytes written."""
+    reader = LZWReader(src)
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    written = 0
+    while n := reader.readinto(view):
+        dst.write(view[:n])
+        written += n
+    return written
+
+
+def compress(data: bytes, max_bits: int = 16) -> bytes:
+    """Unix compress (.Z, block mode, no CLEAR codes)."""
+    out = bytearray(MAGIC + bytes([_BLOCK_MODE | max_bits]))
+    table = {bytes([i]): i for i in range(256)}
+    next_code, n_bits, group = 257, _INIT_BITS, []
+
+    def flush(pad: bool) -> None:
+        bits = sum(c << (i * n_bits) for i, c in enumerate(group))
+        out.extend(bits.to_bytes(n_bits if pad else (len(group) * n_bits + 7) // 8, "little"))
+        group.clear()
+
+    def emit(code: int) -> None:
+        nonlocal n_bits
+        group.append(code)
+        if len(group) == 8:
+            flush(True)
+        if next_code > (1 << n_bits) - 1 and n_bits < max_bits:
+            if group:
+                flush(True)
+            n_bits += 1
+
+    w = b""
+    for b in data:
+        wc = w + bytes([b])
+        if wc in table:
+            w = wc
+            continue
+        emit(table[w])
+        if next_code < 1 << max_bits:
+            table[wc] = next_code
+            next_code += 1
+        w = bytes([b])
+    if w:
+        emit(table[w])
+    if group:
+        flush(False)
+    return bytes(out)
@@ -1,17 +1,18 @@
+import numpy as np
 import pymap3d
 from typing import Tuple
 
-def geodetic_to_enu(lat: float, lon: float, alt: float, 
+def geodetic_to_enu(lat: float, lon: float, alt: float,
                     lat0: float, lon0: float, alt0: float) -> Tuple[float, float, float]:
     """
     Converts geodetic coordinates (lat, lon, alt) to local ENU (East, North, Up).
-    
+
     Args:
         lat, lon: Latitude and Longitude of the target point (decimal degrees).
         alt: Ellipsoidal height of the target point (meters).
         lat0, lon0: Latitude and Longitude of the reference point (decimal degrees).
         alt0: Ellipsoidal height of the reference point (meters).
-        
+
     Returns:
         (east, north, up) in meters.
     """
@@ -20,3 +21,45 @@ def geodetic_to_enu(lat: float, lon: float, alt: float,
 def ecef_to_geodetic(x: float, y: float, z: float) -> Tuple[float, float, float]:
     """Converts ECEF coordinates (x, y, z) to geodetic (lat, lon, alt)."""
     return pymap3d.ecef2geodetic(x, y, z, deg=True)
+
+# ---------------------------------------------------------------------------
+# Array versions: N×3 in, N×3 out, one rotation per reference point
+# ---------------------------------------------------------------------------
+
+def enu_rotation(lat0: float, lon0: float) -> np.ndarray:
+    """
+    3×3 matrix R taking ECEF differences to ENU at (lat0, lon0) (decimal
+    degrees): enu = R @ (xyz - xyz0). Its transpose takes ENU back to ECEF.
+    """
+    phi, lam = np.radians(lat0), np.radians(lon0)
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+    sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+    return np.array([
+        [-sin_lam, cos_lam, 0.0],
+        [-sin_phi * cos_lam, -sin_phi * sin_lam, cos_phi],
+        [cos_phi * cos_lam, cos_phi * sin_lam, sin_phi],
+    ])
+
+def ecef_to_enu(xyz: np.ndarray, lat0: float, lon0: float, alt0: float) -> np.ndarray:
+    """
+    Converts ECEF points, shape (N, 3) in meters, to ENU relative to the
+    geodetic reference (lat0, lon0 in decimal degrees, alt0 in meters).
+
+    Returns:
+        (N, 3) array of east, north, up in meters.
+    """
+    xyz = np.asarray(xyz, dtype=float)
+    origin = np.array(pymap3d.geodetic2ecef(lat0, lon0, alt0, deg=True))
+    return (xyz - origin) @ enu_rotation(lat0, lon0).T
+
+def enu_to_ecef(enu: np.ndarray, lat0: float, lon0: float, alt0: float) -> np.ndarray:
+    """Inverse of ecef_to_enu: (N, 3) ENU in meters → (N, 3) ECEF in meters."""
+    enu = np.asarray(enu, dtype=float)
+    origin = np.array(pymap3d.geodetic2ecef(lat0, lon0, alt0, deg=True))
+    return enu @ enu_rotation(lat0, lon0) + origin
+
+def ecef_to_geodetic_array(xyz: np.ndarray) -> np.ndarray:
+    """ECEF points, shape (N, 3) → (N, 3) array of lat, lon (degrees), alt (meters)."""
+    xyz = np.asarray(xyz, dtype=float)
+    lat, lon, alt = pymap3d.ecef2geodetic(xyz[..., 0], xyz[..., 1], xyz[..., 2], deg=True)
+    return np.stack([lat, lon, alt], axis=-1)
@@ -1,7 +1,21 @@
 """
-RINEX Quality Control using teqc.
+RINEX Quality Control.
 
-teqc is the UNAVCO standard QC tool for RINEX 2 observation files.
+RinexQC is a native QC engine for RINEX 2.x / 3.x (and Compact RINEX)
+observation files. It streams the file once through
+pogf_geodetic_suite.rinex.obs, without a copy or a subprocess, and computes
+the metrics teqc +qc used to report:
+
+  - obs count    — non-blank observation values, all types
+  - cycle slips  — loss-of-lock indicators and geometry-free phase jumps
+  - MP1 / MP2    — code multipath RMS on the first / second frequency
+  - completeness — per constellation, the share of tracked satellite-epochs
+                   that carry both phases and both codes
+
+Target: a 24 h / 30 s file with ~35 satellites in view in under a second
+(about 0.5 s for plain RINEX on a current core; CRINEX adds the decode).
+
+TeqcQC keeps the old teqc +qc wrapper for cross-checks against teqc.
 Install: https://www.unavco.org/software/data-processing/teqc/teqc.html
 """
 from __future__ import annotations
@@ -10,21 +24,280 @@ import re
 import shutil
 import subprocess
 import tempfile
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import click
+import numpy as np
+
+from pogf_geodetic_suite.rinex.obs import ObsReader, open_obs
+
+_SPEED_OF_LIGHT = 299_792_458.0
+
+# Carrier frequencies (Hz) per system and RINEX band number.
+_FREQUENCIES = {
+    "G": {1: 1575.42e6, 2: 1227.60e6, 5: 1176.45e6},
+    "E": {1: 1575.42e6, 5: 1176.45e6, 6: 1278.75e6, 7: 1207.14e6, 8: 1191.795e6},
+    "C": {1: 1575.42e6, 2: 1561.098e6, 5: 1176.45e6, 6: 1268.52e6, 7: 1207.14e6},
+    "J": {1: 1575.42e6, 2: 1227.60e6, 5: 1176.45e6, 6: 1278.75e6},
+    "S": {1: 1575.42e6, 5: 1176.45e6},
+    "I": {5: 1176.45e6, 9: 2492.028e6},
+}
+# GLONASS FDMA: base + channel × step, channel from GLONASS SLOT / FRQ #.
+_GLONASS_FREQUENCIES = {1: (1602.0e6, 0.5625e6), 2: (1246.0e6, 0.4375e6)}
+
+# Band pairs used as "first / second frequency", in order of preference.
+_BAND_PAIRS = {
+    "G": [(1, 2), (1, 5)],
+    "R": [(1, 2)],
+    "E": [(1, 5), (1, 7)],
+    "C": [(2, 7), (2, 6)],
+    "J": [(1, 2), (1, 5)],
+    "S": [(1, 5)],
+    "I": [(5, 9)],
+}
 
 
 @dataclass
 class RINEXQCResult:
-    """Structured output from a teqc +qc run."""
+    """Structured output from a RINEX QC run."""
     obs_count: int | None          # total observations across all types
     cycle_slips: int | None        # number of cycle slips detected
     mp1_rms: float | None          # L1 multipath RMS in metres
     mp2_rms: float | None          # L2 multipath RMS in metres
-    raw_output: str                # full teqc output for debugging
+    raw_output: str                # QC summary (full teqc output for TeqcQC)
+    epochs: int | None = None      # observation epochs in the file
+    completeness: dict[str, float] = field(default_factory=dict)  # system → 0..1
+
+
+# ---------------------------------------------------------------------------
+# Native QC engine
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class _Selection:
+    """The observables one system contributes to QC."""
+    bands: tuple[int, int]
+    phases: tuple[str, str]
+    ranges: tuple[str | None, str | None]
+
+
+def _select(system: str, codes: list[str]) -> _Selection | None:
+    """
+    First band pair of system with a phase on both bands, or None.
 
+    Pseudoranges follow the phase's tracking mode where the file has a match
+    (L2W → C2W); otherwise P-code is preferred over C/A (RINEX 2: P1 before C1).
+    """
+    for bands in _BAND_PAIRS.get(system, []):
+        phases, ranges = [], []
+        for band in map(str, bands):
+            phase = next((c for c in codes if c[0] == "L" and c[1:2] == band), None)
+            if phase is None:
+                break
+            candidates = [c for c in codes if c[0] in "CP" and c[1:2] == band]
+            candidates.sort(key=lambda c: (c[2:] != phase[2:] or len(c) < 3, c[0] != "P"))
+            phases.append(phase)
+            ranges.append(candidates[0] if candidates else None)
+        else:
+            return _Selection(bands, tuple(phases), tuple(ranges))
+    return None
+
+
+def _frequencies(sat: str, bands: tuple[int, int], glonass_slots: dict[int, int]) -> tuple[float, float]:
+    """Carrier frequencies of sat on bands; NaN where unknown."""
+    if sat[0] == "R":
+        channel = glonass_slots.get(int(sat[1:]))
+        if channel is None:
+            return np.nan, np.nan
+        base_a, step_a = _GLONASS_FREQUENCIES[bands[0]]
+        base_b, step_b = _GLONASS_FREQUENCIES[bands[1]]
+        return base_a + channel * step_a, base_b + channel * step_b
+    table = _FREQUENCIES.get(sat[0], {})
+    return table.get(bands[0], np.nan), table.get(bands[1], np.nan)
+
+
+def _arc_rms(values: np.ndarray, arc: np.ndarray, min_len: int) -> float | None:
+    """RMS of values about their arc means, over arcs with at least min_len points."""
+    ok = ~np.isnan(values)
+    values, arc = values[ok], arc[ok]
+    if not len(values):
+        return None
+    _, arc = np.unique(arc, return_inverse=True)
+    counts = np.bincount(arc)
+    keep = counts[arc] >= min_len
+    if not keep.any():
+        return None
+    means = np.bincount(arc, weights=values) / counts
+    residual = (values - means[arc])[keep]
+    return float(np.sqrt(np.mean(residual ** 2)))
+
+
+def _format_summary(result: RINEXQCResult) -> str:
+    """teqc-style summary; _parse_teqc_output() reads the same numbers back."""
+    def metres(value: float | None) -> str:
+        return "n/a" if value is None else f"{value:.3f}"
+
+    lines = [
+        "Summary of Quality Checking (native RINEX QC):",
+        f"epochs      : {result.epochs}",
+        f"# obs       : {result.obs_count}",
+        f"# slips (all)  : {result.cycle_slips}",
+        f"MP1         : {metres(result.mp1_rms)}",
+        f"MP2         : {metres(result.mp2_rms)}",
+    ]
+    lines += [
+        f"complete {system}  : {100 * share:.1f}%"
+        for system, share in sorted(result.completeness.items())
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class RinexQC:
+    """
+    Native observation QC.
+
+    Cycle slips: a loss-of-lock bit on either phase, or a jump of more than
+    gf_jump_m in the geometry-free phase combination between consecutive
+    epochs of a satellite. A gap longer than max_gap_sec ends an arc without
+    counting as a slip.
+
+    Multipath: MP1 / MP2 per epoch minus the mean of its arc (arcs end at gaps
+    and slips; arcs shorter than min_arc_epochs are dropped), pooled into one
+    RMS over all satellites.
+    """
+
+    def __init__(
+        self,
+        max_gap_sec: float = 600.0,
+        gf_jump_m: float = 0.15,
+        min_arc_epochs: int = 10,
+    ):
+        self.max_gap_sec = max_gap_sec
+        self.gf_jump_m = gf_jump_m
+        self.min_arc_epochs = min_arc_epochs
+
+    def run_qc(self, rinex_file: str) -> RINEXQCResult:
+        """Run QC on a RINEX observation file and return structured results.
+
+        Raises FileNotFoundError if the RINEX file does not exist.
+        Raises RinexObsError (a ValueError) if it cannot be parsed.
+        Returns a RINEXQCResult with None multipath fields when the file has
+        no dual-frequency arcs long enough to measure.
+        """
+        path = Path(rinex_file)
+        if not path.exists():
+            raise FileNotFoundError(f"RINEX file not found: {rinex_file}")
+        with open(path, "rb") as fh:
+            return self._run(open_obs(fh))
+
+    # -- passes --------------------------------------------------------------
+
+    def _run(self, reader: ObsReader) -> RINEXQCResult:
+        """Stream the body once, keeping only the four QC observables per row."""
+        selections: dict[str, _Selection | None] = {}
+        columns: dict[str, np.ndarray] = {}
+        times, epoch, sat, obs, lli = [], [], [], [], []
+        obs_count = 0
+        for block in reader.blocks():
+            obs_count += int(np.count_nonzero(~np.isnan(block.values)))
+            system_of = np.array([name[0] for name in reader.satellites])[block.sat]
+            # phase a, phase b (cycles), range a, range b (m); LLI of both phases
+            rows = np.full((len(block.sat), 4), np.nan)
+            flags = np.zeros((len(block.sat), 2), dtype=np.int8)
+            for system in map(str, np.unique(system_of)):
+                if system not in selections:
+                    sel = selections[system] = _select(system, reader.header.types_for(system))
+                    if sel is not None:
+                        columns[system] = np.array(
+                            [-1 if c is None else reader.column(c) for c in sel.phases + sel.ranges]
+                        )
+                if selections[system] is None:
+                    continue
+                mask = system_of == system
+                cols = columns[system]
+                present = cols >= 0
+                rows[np.ix_(mask, present)] = block.values[np.ix_(mask, cols[present])]
+                flags[mask] = block.lli[np.ix_(mask, cols[:2])]
+            times.append(block.times)
+            epoch.append(block.epoch)
+            sat.append(block.sat)
+            obs.append(rows)
+            lli.append(flags)
+        if not times:
+            times, epoch, sat = [np.array([], "datetime64[ns]")], [np.array([], int)], [np.array([], int)]
+            obs, lli = [np.empty((0, 4))], [np.empty((0, 2), dtype=np.int8)]
+        return self._evaluate(
+            reader, selections, np.concatenate(times), np.concatenate(epoch),
+            np.concatenate(sat), np.concatenate(obs), np.concatenate(lli), obs_count,
+        )
+
+    def _evaluate(
+        self,
+        reader: ObsReader,
+        selections: dict[str, _Selection | None],
+        times: np.ndarray,
+        epoch: np.ndarray,
+        sat: np.ndarray,
+        obs: np.ndarray,
+        lli: np.ndarray,
+        obs_count: int,
+    ) -> RINEXQCResult:
+        """Slips, multipath and completeness from the collected rows."""
+        names = reader.satellites
+        seconds = (times - times[:1]) / np.timedelta64(1, "s")
+        row_t = seconds[epoch]
+
+        freq = np.full((len(names), 2), np.nan)
+        for i, name in enumerate(names):
+            sel = selections.get(name[0])
+            if sel is not None:
+                freq[i] = _frequencies(name, sel.bands, reader.header.glonass_slots)
+
+        system_of = np.array([name[0] for name in names] or [""])[sat]
+        complete = ~np.isnan(obs).any(axis=1)
+        completeness = {
+            system: float(complete[system_of == system].mean())
+            for system in map(str, np.unique(system_of))
+        }
+
+        # Arcs: rows with a phase, per satellite in time order.
+        idx = np.flatnonzero(~np.isnan(obs[:, :2]).all(axis=1))
+        idx = idx[np.lexsort((row_t[idx], sat[idx]))]
+        s, t, f = sat[idx], row_t[idx], freq[sat[idx]]
+        phase = obs[idx, :2] * (_SPEED_OF_LIGHT / f)           # metres
+        same = np.zeros(len(idx), dtype=bool)
+        same[1:] = (s[1:] == s[:-1]) & (np.diff(t) <= self.max_gap_sec)
+        jump = np.zeros(len(idx), dtype=bool)
+        jump[1:] = np.abs(np.diff(phase[:, 0] - phase[:, 1])) > self.gf_jump_m
+        lost = (np.where(np.isnan(obs[idx, :2]), 0, lli[idx]) & 1).any(axis=1)
+        slip = same & (jump | lost)
+        arc = np.cumsum(~same | slip)
+
+        # MP1 = P1 - (1 + k) Φ1 + k Φ2,  MP2 = P2 - αk Φ1 + (αk - 1) Φ2,
+        # α = (f1 / f2)², k = 2 / (α - 1); constant ambiguity terms drop out
+        # with the arc mean.
+        alpha = (f[:, 0] / f[:, 1]) ** 2
+        k = 2 / (alpha - 1)
+        mp1 = obs[idx, 2] - (1 + k) * phase[:, 0] + k * phase[:, 1]
+        mp2 = obs[idx, 3] - alpha * k * phase[:, 0] + (alpha * k - 1) * phase[:, 1]
+
+        result = RINEXQCResult(
+            obs_count=obs_count,
+            cycle_slips=int(slip.sum()),
+            mp1_rms=_arc_rms(mp1, arc, self.min_arc_epochs),
+            mp2_rms=_arc_rms(mp2, arc, self.min_arc_epochs),
+            raw_output="",
+            epochs=len(times),
+            completeness=completeness,
+        )
+        result.raw_output = _format_summary(result)
+        return result
+
+
+# ---------------------------------------------------------------------------
+# teqc wrapper
+# ---------------------------------------------------------------------------
 
 def _parse_teqc_output(text: str) -> RINEXQCResult:
     """Parse teqc summary text into a RINEXQCResult.
@@ -66,7 +339,9 @@ def _parse_teqc_output(text: str) -> RINEXQCResult:
     )
 
 
-class RinexQC:
+class TeqcQC:
+    """Run teqc +qc in a scratch copy of the file and scrape its .S summary."""
+
     def __init__(self, teqc_path: str = "teqc", timeout_sec: int = 120):
         self.teqc_path = teqc_path
         self.timeout_sec = timeout_sec
@@ -124,16 +399,18 @@ class RinexQC:
 
 @click.command()
 @click.option("--file", "-f", required=True, type=click.Path(exists=True), help="Path to RINEX file")
-@click.option("--bin", "teqc_bin", default="teqc", help="Path to teqc binary")
-def main(file: str, teqc_bin: str):
-    """RINEX Quality Control using teqc."""
-    qc = RinexQC(teqc_bin)
+@click.option("--bin", "teqc_bin", default=None, help="Run teqc at this path instead of the native QC")
+def main(file: str, teqc_bin: str | None):
+    """RINEX Quality Control."""
+    qc = TeqcQC(teqc_bin) if teqc_bin else RinexQC()
     try:
         result = qc.run_qc(file)
         click.echo(f"Observations : {result.obs_count}")
         click.echo(f"Cycle slips  : {result.cycle_slips}")
         click.echo(f"MP1 RMS (m)  : {result.mp1_rms}")
         click.echo(f"MP2 RMS (m)  : {result.mp2_rms}")
+        for system, share in sorted(result.completeness.items()):
+            click.echo(f"Complete {system}   : {100 * share:.1f}%")
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
         raise SystemExit(1) from e
@@ -0,0 +1,705 @@
+"""
+Compact RINEX (Hatanaka) decoder — in-process replacement for ``crx2rnx``.
+
+Decodes CRINEX 1.0 (RINEX 2.x) and CRINEX 3.0 (RINEX 3.x/4.x) streams and
+produces output byte-identical to RNXCMP's CRX2RNX 4.1 for well-formed input,
+including its formatting quirks (trailing blanks trimmed from every line,
+``.123`` rather than ``0.123`` for values below one).
+
+The compact format is three layers of differencing:
+
+  - epoch lines are text-differenced against the previous epoch line:
+    a space keeps the old character, ``&`` blanks it, anything else replaces
+    it; a line starting with ``&`` (CRINEX 1) or ``>`` (CRINEX 3) is sent
+    in full and resets every arc
+  - each observable is an integer (value × 1000, clock × 1e9) sent as its
+    N-th order time difference; ``N&value`` starts a new arc of order N and
+    the order builds up 0, 1, …, N over the first epochs of the arc
+  - LLI / signal-strength flags are text-differenced per satellite like the
+    epoch line
+
+Decoding runs in blocks of a few hundred epochs. A line pass in plain Python
+rebuilds the epoch lines and the receiver clock and cuts every satellite
+record into fields; an array pass then restores the observables of the whole
+block at once. Sorted by (satellite, observable, epoch) every arc is one
+contiguous run, so undoing N-th order differences is N segmented cumulative
+sums; the last values of each open arc carry over into the next block.
+"""
+from __future__ import annotations
+
+import io
+import math
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+_MAX_DIFF_ORDER = 5
+_MAX_SAT = 100
+_MAX_TYPE = 100
+_KEY_STRIDE = 128             # field key = satellite number * stride + type index
+_BLOCK_FIELDS = 1 << 15       # fields restored per array pass
+_CLK_SPLIT = 100_000_000      # clock offsets: value = hi * 1e8 + lo
+_OBS_MAX = 10**13             # F14.3 range of CRX2RNX: -999999999.999 .. 9999999999.999
+_OBS_MIN = -(10**12)
+_POW10 = 10 ** np.arange(9, -1, -1, dtype=np.int64)
+_CONTINUE = -2                # arc marker of a field that continues its arc
+_BLANK, _AMP = ord(" "), ord("&")
+_ATOI = re.compile(r"\s*([+-]?\d+)")
+
+# Row o, read right to left: the coefficients (-1)^m C(o, m) of x(t - m) in
+# the o-th backward difference of x at t.
+_BACKWARD = np.array(
+    [[(-1) ** m * math.comb(o, m) for m in range(_MAX_DIFF_ORDER, -1, -1)]
+     for o in range(_MAX_DIFF_ORDER + 1)],
+    dtype=np.int64,
+)
+
+
+class CRINEXError(ValueError):
+    """Raised for input that CRX2RNX would reject (it exits with an error)."""
+
+
+# ---------------------------------------------------------------------------
+# Small emulations of the C helpers the output format depends on
+# ---------------------------------------------------------------------------
+
+def _atoi(s: str) -> int:
+    m = _ATOI.match(s)
+    return int(m.group(1)) if m else 0
+
+
+def _chop_blank(s: str) -> str:
+    """Trim trailing blanks, but never below one character (CRX2RNX's CHOP_BLANK)."""
+    t = s.rstrip(" ")
+    return t if t or not s else " "
+
+
+def _repair(old: str, diff: str) -> str:
+    """Apply a text difference: ' ' keeps, '&' blanks, anything else replaces."""
+    n = min(len(old), len(diff))
+    pairs = zip(old[:n], diff[:n], strict=True)
+    out = [c if d == " " else (" " if d == "&" else d) for c, d in pairs]
+    return "".join(out) + old[n:] + diff[n:].replace("&", " ")
+
+
+def _split(value: int, base: int) -> tuple[int, int]:
+    """C-style truncating split: hi and lo share the sign of value."""
+    if value >= 0:
+        return divmod(value, base)
+    hi, lo = divmod(-value, base)
+    return -hi, -lo
+
+
+def _format_clock(value: int, shift: int) -> str:
+    """Receiver clock offset: F12.9 (RINEX 2, shift 1) or F15.12 (RINEX 3, shift 4)."""
+    hi, lo = _split(value, _CLK_SPLIT)
+    # One extra low digit keeps the sign of values like -0.000123 (hi == 0).
+    x = hi * 10 + (-1 if lo < 0 else 1)
+    tmp = ("-" if x < 0 else "") + f"{abs(x):0{shift + 1}d}"
+    n = len(tmp) - 1
+    head = [" ", " "]
+    if n > shift:
+        head[1] = tmp[n - shift - 1]
+        if n > shift + 1:
+            head[0] = tmp[n - shift - 2]
+            if n > shift + 2:
+                raise CRINEXError("Clock offset becomes out of range allowed in the RINEX format")
+    return f"{head[0]}{head[1]}.{tmp[n - shift:n]}{abs(lo):08d}\n"
+
+
+def _format_obs(values: np.ndarray, blank: np.ndarray, flags: np.ndarray) -> np.ndarray:
+    """
+    Render observations as an (n, 16) byte matrix: F14.3 the way CRX2RNX
+    prints it (no leading zero below one) followed by the two flags.
+    """
+    live = ~blank
+    if np.any(live & ((values >= _OBS_MAX) | (values <= _OBS_MIN))):
+        raise CRINEXError("Data record becomes out of range allowed in the RINEX format")
+    whole, frac = np.divmod(np.abs(values), 1000)
+    cells = np.empty((len(values), 16), dtype=np.uint8)
+    shown = whole[:, None] >= _POW10            # significant integer digits
+    cells[:, :10] = np.where(shown, ord("0") + whole[:, None] // _POW10 % 10, _BLANK)
+    neg = np.flatnonzero(live & (values < 0))
+    cells[neg, 9 - shown[neg].sum(axis=1)] = ord("-")
+    cells[:, 10] = ord(".")
+    cells[:, 11] = ord("0") + frac // 100
+    cells[:, 12] = ord("0") + frac // 10 % 10
+    cells[:, 13] = ord("0") + frac % 10
+    cells[blank, :14] = _BLANK
+    cells[:, 14:] = flags
+    return cells
+
+
+# ---------------------------------------------------------------------------
+# Array pass
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Carry:
+    """The fields of a block's last epoch, sorted by key, as the next block sees them."""
+
+    keys: np.ndarray         # field keys, ascending
+    flags: np.ndarray        # (n, 2) flag characters
+    live: np.ndarray         # field has an open arc (was not blank)
+    arc: np.ndarray          # arc order N
+    pos: np.ndarray          # epochs since the arc started, capped at the maximum order
+    hist: np.ndarray         # (n, 5) last values, oldest first; 0 before the arc started
+
+    @classmethod
+    def empty(cls) -> _Carry:
+        return cls(
+            keys=np.zeros(0, dtype=np.int64),
+            flags=np.zeros((0, 2), dtype=np.uint8),
+            live=np.zeros(0, dtype=bool),
+            arc=np.zeros(0, dtype=np.int64),
+            pos=np.zeros(0, dtype=np.int64),
+            hist=np.zeros((0, _MAX_DIFF_ORDER), dtype=np.int64),
+        )
+
+
+def _parse_fields(texts: list[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    """Field texts → (difference, arc marker): N for ``N&value``, -1 blank, else _CONTINUE."""
+    n = len(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.intp, count=n)
+    present = lengths > 0
+    arc_in = np.where(present, _CONTINUE, -1)
+    diffs = np.zeros(n, dtype=np.int64)
+    joined = b"".join(texts)
+    try:
+        if b"&" in joined:
+            # Find the N&value fields from the '&' positions in the joined text.
+            ends = np.cumsum(lengths)
+            amp = np.flatnonzero(np.frombuffer(joined, dtype=np.uint8) == _AMP)
+            field = np.searchsorted(ends, amp, side="right")
+            texts = list(texts)
+            for i in field[amp - (ends[field] - lengths[field]) == 1].tolist():
+                arc_in[i] = int(texts[i][:1])
+                if arc_in[i] > _MAX_DIFF_ORDER:
+                    raise CRINEXError(f"exceed maximum order of difference: {texts[i]!r}")
+                texts[i] = texts[i][2:]
+        diffs[present] = list(map(int, filter(None, texts)))
+    except (ValueError, OverflowError) as exc:
+        if isinstance(exc, CRINEXError):
+            raise
+        raise CRINEXError(f"Malformed data field: {exc}") from exc
+    return diffs, arc_in
+
+
+def _reconstruct(
+    texts: list[bytes],
+    dflags: bytes,
+    keys: np.ndarray,
+    rows: np.ndarray,
+    resets: np.ndarray,
+    carry: _Carry,
+    crinex_version: int,
+    sat_names: list[str],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, _Carry]:
+    """
+    Restore the observables and flags of one block of epochs.
+
+    Inputs are per field in file order: its text, two flag-difference
+    characters, key and epoch row within the block; resets marks epochs that
+    restart every arc. Returns values, blank mask and flags in the same
+    order, plus the carry for the next block.
+    """
+    n = len(texts)
+    diffs, arc_in = _parse_fields(texts)
+    present = arc_in != -1
+
+    # ── (field, epoch) order: a field's epochs become neighbours ─────────────
+    order = np.lexsort((rows, keys))
+    ks, rs = keys[order], rows[order]
+    pres, arc_s, d_s = present[order], arc_in[order], diffs[order]
+    chained = np.zeros(n, dtype=bool)            # same field in the previous epoch
+    chained[1:] = (ks[1:] == ks[:-1]) & (rs[1:] == rs[:-1] + 1)
+    chained &= ~resets[rs]
+    inblock = chained.copy()
+    inblock[1:] &= pres[:-1]                     # … and it was not blank there
+
+    carried = np.zeros(0, dtype=np.intp)         # first-epoch fields known to the carry
+    cpos = np.zeros(0, dtype=np.intp)
+    if not resets[0] and carry.keys.size:
+        at0 = np.flatnonzero(rs == 0)
+        pos = np.minimum(np.searchsorted(carry.keys, ks[at0]), carry.keys.size - 1)
+        found = carry.keys[pos] == ks[at0]
+        carried, cpos = at0[found], pos[found]
+    linked = inblock.copy()
+    linked[carried] = carry.live[cpos]
+
+    bad = np.flatnonzero((arc_s == _CONTINUE) & ~linked)
+    if bad.size:
+        i = int(bad[np.argmin(order[bad])])      # first in file order, like CRX2RNX
+        _raise_unlinked(int(ks[i]), int(rs[i]), keys, rows, resets, carry, sat_names)
+
+    # ── numeric differences: one segment per arc ─────────────────────────────
+    live_idx = np.flatnonzero(pres)
+    m = live_idx.size
+    d = d_s[live_idx]
+    starts = np.flatnonzero((arc_s[live_idx] >= 0) | ~inblock[live_idx])
+    seg_len = np.diff(np.append(starts, m))
+    seg = np.repeat(np.arange(starts.size), seg_len)
+
+    carry_at = np.full(n, -1, dtype=np.intp)
+    carry_at[carried] = cpos
+    first = live_idx[starts]
+    init = arc_s[first] >= 0
+    cp = carry_at[first[~init]]
+    arc = np.where(init, arc_s[first], 0)
+    arc[~init] = carry.arc[cp]
+    pos0 = np.zeros(starts.size, dtype=np.int64)
+    pos0[~init] = np.minimum(carry.pos[cp] + 1, _MAX_DIFF_ORDER)
+
+    # Replay the first epochs of each segment one at a time: while an arc
+    # builds up, the order of its differences grows by one per epoch, and an
+    # arc carried over continues from the previous block's values. Row by
+    # row, hist holds x(t-5) .. x(t-1) ahead of the values being restored;
+    # local is the same without the carried part, so e is the N-th
+    # difference of the segment taken on its own.
+    hist = np.zeros((starts.size, 2 * _MAX_DIFF_ORDER), dtype=np.int64)
+    hist[~init, :_MAX_DIFF_ORDER] = carry.hist[cp]
+    local = np.zeros_like(hist)
+    e = d.copy()
+    for i in range(_MAX_DIFF_ORDER):
+        sel = np.flatnonzero(seg_len > i)
+        if not sel.size:
+            break
+        at = starts[sel] + i
+        o = np.minimum(pos0[sel] + i, arc[sel])
+        x = d[at] - (hist[sel, i:i + _MAX_DIFF_ORDER] * _BACKWARD[o, :-1]).sum(axis=1)
+        hist[sel, _MAX_DIFF_ORDER + i] = x
+        local[sel, _MAX_DIFF_ORDER + i] = x
+        e[at] = (local[sel, i:i + _MAX_DIFF_ORDER + 1] * _BACKWARD[arc[sel]]).sum(axis=1)
+
+    # Past those epochs every field value is an N-th difference, so the whole
+    # segment is N running sums of e. Sums run across segments and are rebased
+    # at each start; int64 wrap-around cancels in the subtraction.
+    arc_of = arc[seg]
+    values_l = np.where(arc_of == 0, e, 0)
+    running = e
+    for q in range(1, int(arc.max(initial=0)) + 1):
+        c = np.cumsum(running)
+        running = c - (c[starts] - running[starts])[seg]
+        values_l = np.where(arc_of == q, running, values_l)
+        running = np.where(arc_of > q, running, 0)
+
+    # ── flags: the latest non-blank difference character wins ───────────────
+    df = np.frombuffer(dflags, dtype=np.uint8).reshape(n, 2)[order]
+    base = np.full((n, 2), _BLANK, dtype=np.uint8)
+    base[carried] = carry.flags[cpos]
+    head = ~chained
+    written = np.where(df == _AMP, _BLANK, df)
+    written = np.where(head[:, None] & (df == _BLANK), base, written)
+    writes = (df != _BLANK) | head[:, None]
+    if crinex_version == 1:
+        # CRINEX 1 assumes flags are blank whenever the data field is
+        written[~pres] = _BLANK
+        writes[~pres] = True
+    src = np.maximum.accumulate(np.where(writes, np.arange(n)[:, None], 0), axis=0)
+    flags_s = np.take_along_axis(written, src, axis=0)
+
+    # ── carry for the next block ─────────────────────────────────────────────
+    last = np.flatnonzero(rs == resets.size - 1)
+    live_last = pres[last]
+    j = (np.cumsum(pres) - 1)[last[live_last]]   # index among the live fields
+    s = seg[j]
+    k = j - starts[s]
+    hist_next = np.zeros((last.size, _MAX_DIFF_ORDER), dtype=np.int64)
+    for c in range(_MAX_DIFF_ORDER):
+        back = _MAX_DIFF_ORDER - 1 - c
+        inside = k >= back
+        hist_next[live_last, c] = np.where(
+            inside,
+            values_l[np.where(inside, j - back, 0)],
+            hist[s, np.clip(_MAX_DIFF_ORDER + k - back, 0, _MAX_DIFF_ORDER - 1)],
+        )
+    arc_next = np.zeros(last.size, dtype=np.int64)
+    arc_next[live_last] = arc[s]
+    pos_next = np.zeros(last.size, dtype=np.int64)
+    pos_next[live_last] = np.minimum(pos0[s] + k, _MAX_DIFF_ORDER)
+    carry = _Carry(
+        keys=ks[last], flags=flags_s[last], live=live_last,
+        arc=arc_next, pos=pos_next, hist=hist_next,
+    )
+
+    # ── back to file order ───────────────────────────────────────────────────
+    values_s = np.zeros(n, dtype=np.int64)
+    values_s[live_idx] = values_l
+    values = np.empty(n, dtype=np.int64)
+    values[order] = values_s
+    flags = np.empty((n, 2), dtype=np.uint8)
+    flags[order] = flags_s
+    return values, ~present, flags, carry
+
+
+def _raise_unlinked(
+    key: int,
+    row: int,
+    keys: np.ndarray,
+    rows: np.ndarray,
+    resets: np.ndarray,
+    carry: _Carry,
+    sat_names: list[str],
+) -> None:
+    """Raise CRX2RNX's message for a differenced field with no arc to continue."""
+    sat_id = key // _KEY_STRIDE
+    sat = sat_names[sat_id]
+    if resets[row]:
+        seen = False
+    elif row == 0:
+        seen = bool(np.any(carry.keys // _KEY_STRIDE == sat_id))
+    else:
+        seen = bool(np.any((keys // _KEY_STRIDE == sat_id) & (rows == row - 1)))
+    if not seen:
+        raise CRINEXError(f"New satellite {sat}, but data arc is not initialized")
+    raise CRINEXError(
+        f"{sat}: the data field in previous epoch is blank, but the arc is not initialized"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Line pass
+# ---------------------------------------------------------------------------
+
+class _Block:
+    """Epochs cut into fields, waiting for the array pass."""
+
+    def __init__(self) -> None:
+        # Event records as bytes, epochs as (epoch record, [(sat, first field, ntype)])
+        self.items: list[bytes | tuple[bytes, list[tuple[bytes, int, int]]]] = []
+        self.texts: list[bytes] = []
+        self.dflags: list[bytes] = []
+        self.keys: list[int] = []
+        self.counts: list[int] = []           # fields per epoch
+        self.resets: list[bool] = []
+
+    def render(self, decoder: _Decoder) -> bytes:
+        if not self.counts:
+            return b"".join(self.items)
+        values, blank, flags, decoder.carry = _reconstruct(
+            self.texts,
+            b"".join(self.dflags),
+            np.array(self.keys, dtype=np.int64),
+            np.repeat(np.arange(len(self.counts)), self.counts),
+            np.array(self.resets),
+            decoder.carry,
+            decoder.crinex_version,
+            decoder.sat_names,
+        )
+        cells = _format_obs(values, blank, flags).tobytes()
+        v2 = decoder.rinex_version == 2
+        out: list[bytes] = []
+        for item in self.items:
+            if isinstance(item, bytes):
+                out.append(item)
+                continue
+            head, records = item
+            out.append(head)
+            for sat, first, ntype in records:
+                if v2:
+                    for k in range(first, first + ntype, 5):
+                        chunk = cells[16 * k:16 * min(k + 5, first + ntype)]
+                        out.append(chunk.rstrip(b" ") + b"\n")
+                else:
+                    chunk = cells[16 * first:16 * (first + ntype)]
+                    out.append(sat + chunk.rstrip(b" ") + b"\n")
+        return b"".join(out)
+
+
+class _Decoder:
+    """State of one CRINEX stream; iter_decode() drives it line by line."""
+
+    def __init__(self, lines: Iterator[bytes]):
+        self._lines = lines
+        self.crinex_version = 0
+        self.rinex_version = 0
+        self.ntype = 0                      # RINEX 2: one type list for all systems
+        self.ntype_gnss: dict[str, int] = {}  # RINEX 3: per-system type count
+        self.sat_keys: dict[str, tuple[int, bytes]] = {}
+        self.sat_names: list[str] = []
+        self.carry = _Carry.empty()
+
+    # -- input ---------------------------------------------------------------
+
+    def _next(self) -> str | None:
+        raw = next(self._lines, None)
+        if raw is None:
+            return None
+        raw = raw.decode("latin-1")
+        if raw.endswith("\n"):
+            raw = raw[:-1]
+            if raw.endswith("\r"):
+                raw = raw[:-1]
+        return raw
+
+    def _require_raw(self) -> bytes:
+        """The next line without its ending; a missing or unterminated line is truncation."""
+        raw = next(self._lines, b"")
+        if raw[-1:] != b"\n":
+            raise CRINEXError("The file seems to be truncated in the middle")
+        return raw[:-2] if raw[-2:-1] == b"\r" else raw[:-1]
+
+    def _require(self) -> str:
+        return self._require_raw().decode("latin-1")
+
+    def _note_types(self, line: str) -> None:
+        label = line[60:]
+        if label.startswith("# / TYPES OF OBSERV") and line[5:6] != " ":
+            self.ntype = _atoi(line)
+            if self.ntype > _MAX_TYPE:
+                raise CRINEXError(f"Number of data types exceed MAXTYPE: {line}")
+        elif label.startswith("SYS / # / OBS TYPES") and line[:1] != " ":
+            n = _atoi(line[3:])
+            if n > _MAX_TYPE:
+                raise CRINEXError(f"Number of data types exceed MAXTYPE: {line}")
+            self.ntype_gnss[line[0]] = n
+
+    def _sat_key(self, sat: str) -> tuple[int, bytes]:
+        """First field key and encoded name of sat, numbering it on first sight."""
+        self.sat_keys[sat] = (len(self.sat_names) * _KEY_STRIDE, sat.encode("latin-1"))
+        self.sat_names.append(sat)
+        return self.sat_keys[sat]
+
+    # -- header --------------------------------------------------------------
+
+    def header(self) -> Iterator[bytes]:
+        line = self._next()
+        if (
+            line is None
+            or line[:3] not in ("1.0", "3.0")
+            or not line[60:].startswith("CRINEX VERS   / TYPE")
+        ):
+            raise CRINEXError("not a Compact RINEX 1.0/3.0 file")
+        self.crinex_version = _atoi(line)
+        self._require()  # CRINEX PROG / DATE
+
+        line = _chop_blank(self._require())
+        if not line[60:].startswith("RINEX VERSION / TYPE") or line[5:6] not in ("2", "3", "4"):
+            raise CRINEXError("The format version of the original RINEX file is not valid")
+        self.rinex_version = _atoi(line)
+        yield (line + "\n").encode("latin-1")
+        while True:
+            line = _chop_blank(self._require())
+            yield (line + "\n").encode("latin-1")
+            self._note_types(line)
+            if line[60:].startswith("END OF HEADER"):
+                return
+
+    # -- body ----------------------------------------------------------------
+
+    def body(self) -> Iterator[bytes]:
+        for block in self._blocks():
+            yield block.render(self)
+
+    def _blocks(self) -> Iterator[_Block]:
+        v2 = self.rinex_version == 2
+        top_from, top_to = ("&", " ") if v2 else (">", ">")
+        ev_idx, nsat_idx, sats_idx = (28, 29, 32) if v2 else (31, 32, 41)
+        offset, shift = (3, 1) if v2 else (6, 4)
+
+        line = ""                                    # epoch line being rebuilt
+        clk = [0] * (_MAX_DIFF_ORDER + 1)
+        clk_order = clk_arc_order = 0
+        block = _Block()
+        reset = False
+        lines = self._lines
+        sat_keys = self.sat_keys
+
+        dline = self._next()
+        while dline is not None:
+            if self.crinex_version == 3:
+                while dline is not None and dline[:1] == "&":  # escape lines
+                    dline = self._next()
+                if dline is None:
+                    break
+            if dline[:1] == top_from:
+                dline = top_to + dline[1:]
+                if dline[ev_idx:ev_idx + 1] not in ("0", "1"):
+                    dline = self._events(dline, top_from, top_to, ev_idx, block.items)
+                    if dline is None:
+                        break
+                    continue
+                line = ""                             # reset every arc
+                reset = True
+            elif dline[:1] == "\x1a":
+                break                                 # DOS EOF
+
+            line = _repair(line, dline)
+            p = line[offset:]
+            if (
+                line[:1] != top_to or len(p) < 26
+                or p[23] != " " or p[24] != " " or not p[25].isdigit()
+            ):
+                raise CRINEXError(f"Malformed epoch line: {line!r}")
+            line = _chop_blank(line)
+
+            nsat = _atoi(line[nsat_idx:])
+            if nsat > _MAX_SAT:
+                raise CRINEXError(f"exceed maximum number of satellites: {line!r}")
+            satlst = line[sats_idx:sats_idx + 3 * nsat]
+            sats = [satlst[k:k + 3] for k in range(0, 3 * nsat, 3)]
+            if v2:
+                ntypes = [self.ntype] * nsat
+            else:
+                try:
+                    ntypes = [self.ntype_gnss[sat[:1]] for sat in sats]
+                except KeyError as exc:
+                    raise CRINEXError(f"A GNSS type not defined in the header is found: {line!r}") from exc
+
+            # ── receiver clock offset ──────────────────────────────────────
+            cline = self._require()
+            if not cline:
+                clk_order = -1
+            else:
+                if cline[1:2] == "&":                 # arc initialization
+                    clk_arc_order = _atoi(cline)
+                    if clk_arc_order > _MAX_DIFF_ORDER:
+                        raise CRINEXError(f"exceed maximum order of difference: {cline!r}")
+                    clk_order = -1
+                    cline = cline[2:]
+                old, clk = clk, [int(cline)] + [0] * _MAX_DIFF_ORDER
+                if clk_order < clk_arc_order:
+                    clk_order += 1
+                    for k in range(clk_order):
+                        clk[k + 1] = clk[k] + old[k]
+                else:
+                    for k in range(clk_order):
+                        clk[k + 1] = clk[k] + old[k + 1]
+
+            # ── epoch record ───────────────────────────────────────────────
+            if v2:
+                if clk_order >= 0:
+                    head = [line[:68].ljust(68), _format_clock(clk[clk_order], shift)]
+                else:
+                    head = [line[:68], "\n"]
+                for k in range(68, 68 + 36 * ((nsat - 1) // 12), 36):
+                    head.append(" " * 32 + line[k:k + 36] + "\n")
+            elif clk_order >= 0:
+                head = [line[:41], _format_clock(clk[clk_order], shift)]
+            else:
+                head = [_chop_blank(line[:41]), "\n"]
+
+            # ── satellite records: fields and flag differences ─────────────
+            texts, dflags, keys = block.texts, block.dflags, block.keys
+            first = len(texts)
+            records = []
+            for sat, ntype in zip(sats, ntypes, strict=True):
+                raw = next(lines, b"")
+                if raw[-1:] != b"\n":
+                    raise CRINEXError("The file seems to be truncated in the middle")
+                fields = (raw[:-2] if raw[-2:-1] == b"\r" else raw[:-1]).split(b" ", ntype)
+                width = 2 * ntype
+                dflags.append(fields.pop()[:width].ljust(width) if len(fields) > ntype else b" " * width)
+                if len(fields) < ntype:
+                    fields.extend([b""] * (ntype - len(fields)))
+                key, name = sat_keys.get(sat) or self._sat_key(sat)
+                keys.extend(range(key, key + ntype))
+                records.append((name, len(texts), ntype))
+                texts.extend(fields)
+            block.items.append(("".join(head).encode("latin-1"), records))
+            block.counts.append(len(texts) - first)
+            block.resets.append(reset)
+            reset = False
+
+            if len(texts) >= _BLOCK_FIELDS:
+                yield block
+                block = _Block()
+            dline = self._next()
+        yield block
+
+    def _events(
+        self, dline: str, top_from: str, top_to: str, ev_idx: int, out: list
+    ) -> str | None:
+        """
+        Copy special-event records (flag > 1) and their header lines to out.
+
+        Returns the next regular epoch line, or None at end of input.
+        """
+        while True:
+            dline = _chop_blank(top_to + dline[1:])
+            out.append((dline + "\n").encode("latin-1"))
+            if len(dline) > 29:
+                for _ in range(_atoi(dline[ev_idx + 1:])):
+                    line = _chop_blank(self._require())
+                    out.append((line + "\n").encode("latin-1"))
+                    self._note_types(line)
+            while True:
+                dline = self._next()
+                if dline is None:
+                    return None
+                if not (self.crinex_version >= 3 and dline[:1] == "&"):
+                    break
+            event = dline[ev_idx:ev_idx + 1]
+            if dline[:1] != top_from or len(dline) < 29 or not event.isdigit():
+                raise CRINEXError(f"The arc should be initialized, but not: {dline!r}")
+            if event in ("0", "1"):
+                return dline
+
+
+def iter_decode(lines: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Decode CRINEX lines (as read from a binary file, endings kept) into RINEX.
+
+    Yields the header line by line, then the records of each block of epochs.
+    """
+    decoder = _Decoder(iter(lines))
+    yield from decoder.header()
+    yield from decoder.body()
+
+
+# ---------------------------------------------------------------------------
+# Byte-stream wrappers
+# ---------------------------------------------------------------------------
+
+class HatanakaReader(io.RawIOBase):
+    """Read-only file object yielding the RINEX bytes of a CRINEX byte stream."""
+
+    def __init__(self, fileobj: BinaryIO):
+        super().__init__()
+        self._chunks = iter_decode(fileobj)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def decompress(src: BinaryIO, dst: BinaryIO) -> None:
+    """Stream-decode CRINEX from src into RINEX on dst (both binary)."""
+    dst.writelines(iter_decode(src))
+
+
+def crx2rnx(path: str | Path, out_path: str | Path | None = None) -> Path:
+    """
+    Decode a .crx / .??d file next to itself (.rnx / .??o) like ``crx2rnx``.
+
+    Returns the output path.
+    """
+    path = Path(path)
+    if out_path is None:
+        suffix = path.suffix
+        if suffix.lower() == ".crx":
+            new_suffix = ".rnx" if suffix == ".crx" else ".RNX"
+        elif len(suffix) == 4 and suffix[3] in "dD":
+            new_suffix = suffix[:3] + ("o" if suffix[3] == "d" else "O")
+        else:
+            raise CRINEXError(f"invalid file name {path.name}: expected .??d or .crx")
+        out_path = path.with_suffix(new_suffix)
+    out_path = Path(out_path)
+    with open(path, "rb") as src, open(out_path, "wb") as dst:
+        decompress(src, dst)
+    return out_path
@@ -0,0 +1,228 @@
+"""
+Single-pass RINEX header parser with a persistent cache.
+
+Ingestion, its validation step and the Bernese pre-BPE validator all need a
+few header records (version, marker, receiver, antenna, interval, first and
+last epoch). read_header() reads a bounded binary prefix of the file — 64 KiB,
+extended only for headers that do not end within it — and picks every label
+out of it in one pass, for RINEX 2/3 observation files and their compact
+(CRINEX) form alike.
+
+Results go through a HeaderStore: an in-process LRU in front of a small
+SQLite table (POGF_HEADER_CACHE, default ~/.cache/pogf/rinex-headers.sqlite).
+Entries are keyed by the caller's content hash when it has one (ingestion
+passes the file's SHA-256), otherwise by path, size and mtime, so a file
+that changes is parsed again. The two kinds of key never meet: an entry
+ingestion stored under a hash is not found by a caller that has none.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+_PREFIX_BYTES = 64 << 10
+_MAX_HEADER_BYTES = 1 << 20
+_VERSION_PROBE_LINES = 10      # a RINEX/CRINEX version line must be this early
+_TYPE_SLICE = slice(20, 40)    # receiver / antenna type in REC # and ANT # records
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "POGF_HEADER_CACHE",
+    str(Path.home() / ".cache" / "pogf" / "rinex-headers.sqlite"),
+)
+
+
+@dataclass
+class RinexHeader:
+    """Header records of one RINEX file. Fields absent from the header are None."""
+    is_rinex: bool = False            # RINEX/CRINEX version line within the first lines
+    crinex: bool = False
+    version: float | None = None
+    file_type: str = ""               # "O", "N", … from RINEX VERSION / TYPE
+    satellite_system: str = ""
+    marker_name: str | None = None
+    receiver_type: str | None = None
+    antenna_type: str | None = None
+    interval: float | None = None
+    first_obs: str | None = None      # raw TIME OF FIRST OBS value field
+    last_obs: str | None = None
+    complete: bool = False            # END OF HEADER found
+
+    @property
+    def station_code(self) -> str | None:
+        """First token of MARKER NAME, if any."""
+        if not self.marker_name:
+            return None
+        parts = self.marker_name.split()
+        return parts[0] if parts else None
+
+
+def _read_prefix(path: str) -> bytes:
+    """The header bytes of path: a 64 KiB prefix, grown until END OF HEADER."""
+    with open(path, "rb") as f:
+        buf = f.read(_PREFIX_BYTES)
+        while b"END OF HEADER" not in buf and len(buf) < _MAX_HEADER_BYTES:
+            chunk = f.read(_PREFIX_BYTES)
+            if not chunk:
+                break
+            buf += chunk
+    end = buf.find(b"END OF HEADER")
+    if end >= 0:
+        eol = buf.find(b"\n", end)
+        buf = buf[:eol + 1] if eol >= 0 else buf
+    return buf
+
+
+def parse_header(data: bytes) -> RinexHeader:
+    """Parse header records out of the leading bytes of a RINEX file."""
+    h = RinexHeader()
+    for n, raw in enumerate(data.split(b"\n")):
+        line = raw.decode("latin-1").rstrip("\r")
+        label = line[60:80].strip()
+        if not label:
+            continue
+        value = line[:60]
+        if label == "CRINEX VERS   / TYPE":
+            h.crinex = True
+            h.is_rinex = h.is_rinex or n < _VERSION_PROBE_LINES
+        elif label == "RINEX VERSION / TYPE":
+            h.is_rinex = h.is_rinex or n < _VERSION_PROBE_LINES
+            try:
+                h.version = float(value[:9])
+            except ValueError:
+                pass
+            h.file_type = value[20:21].strip()
+            h.satellite_system = value[40:41].strip()
+        elif label == "MARKER NAME":
+            h.marker_name = value.strip()
+        elif label == "REC # / TYPE / VERS":
+            h.receiver_type = line[_TYPE_SLICE].strip()
+        elif label == "ANT # / TYPE":
+            h.antenna_type = line[_TYPE_SLICE].strip()
+        elif label == "INTERVAL":
+            try:
+                h.interval = float(value.strip())
+            except ValueError:
+                pass
+        elif label == "TIME OF FIRST OBS":
+            h.first_obs = value.strip()
+        elif label == "TIME OF LAST OBS":
+            h.last_obs = value.strip()
+        elif label == "END OF HEADER":
+            h.complete = True
+            break
+    return h
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class HeaderStore:
+    """
+    key → RinexHeader, in memory (LRU of memory_entries) and in SQLite.
+
+    The table is trimmed to max_entries, oldest use first. Safe to share
+    between threads; several processes may share the file.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STORE_PATH,
+        memory_entries: int = 4096,
+        max_entries: int = 200_000,
+    ):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS headers (key TEXT PRIMARY KEY, data TEXT, used REAL)"
+        )
+        self._memory: OrderedDict[str, RinexHeader] = OrderedDict()
+        self._memory_entries = memory_entries
+        self._max_entries = max_entries
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> RinexHeader | None:
+        with self._lock:
+            header = self._memory.get(key)
+            if header is not None:
+                self._memory.move_to_end(key)
+                return header
+            row = self._conn.execute("SELECT data FROM headers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE headers SET used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            header = RinexHeader(**json.loads(row[0]))
+            self._remember(key, header)
+            return header
+
+    def put(self, key: str, header: RinexHeader) -> None:
+        with self._lock:
+            self._remember(key, header)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO headers (key, data, used) VALUES (?, ?, ?)",
+                (key, json.dumps(asdict(header)), time.time()),
+            )
+            self._puts += 1
+            if self._puts % 1000 == 0:
+                self._conn.execute(
+                    "DELETE FROM headers WHERE key IN (SELECT key FROM headers "
+                    "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self._max_entries,),
+                )
+            self._conn.commit()
+
+    def _remember(self, key: str, header: RinexHeader) -> None:
+        self._memory[key] = header
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_entries:
+            self._memory.popitem(last=False)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_store: HeaderStore | None = None
+_store_pid: int | None = None
+
+
+def default_store() -> HeaderStore:
+    """This process's HeaderStore at DEFAULT_STORE_PATH."""
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        _store = HeaderStore(DEFAULT_STORE_PATH)
+        _store_pid = os.getpid()
+    return _store
+
+
+def read_header(
+    path: str | os.PathLike,
+    key: str | None = None,
+    store: HeaderStore | None = None,
+) -> RinexHeader:
+    """
+    Header of the RINEX file at path, from store when possible.
+
+    key is a content hash of the file if the caller has one; otherwise the
+    entry is keyed by path, size and mtime. Pass store=None to use the
+    process default; raises OSError if the file cannot be read.
+    """
+    path = os.fspath(path)
+    if key is None:
+        st = os.stat(path)
+        key = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+    store = store or default_store()
+    header = store.get(key)
+    if header is None:
+        header = parse_header(_read_prefix(path))
+        store.put(key, header)
+    return header
@@ -0,0 +1,387 @@
+"""
+Streaming RINEX 2.x / 3.x observation reader.
+
+Reads an observation file in blocks of satellite records and hands each block
+over as NumPy arrays, so per-satellite work (QC, time series) runs on arrays
+rather than on lines. Compact RINEX input is decoded on the fly.
+
+Like the Hatanaka decoder, a block is cut in two passes: a line pass in plain
+Python parses the epoch lines and copies every satellite record into a
+fixed-width byte row; an array pass then reads all F14.3 fields of the block
+at once from an (n, fields, 16) byte matrix. Fields that are not written in
+the standard F14.3 layout fall back to float().
+
+Columns are the union of the observation codes in the header (RINEX 3: over
+all systems), so a value of ``C1C`` lands in the same column whether it came
+from a GPS or a Galileo record; codes a system does not observe are NaN.
+"""
+from __future__ import annotations
+
+import io
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import BinaryIO
+
+import numpy as np
+
+from pogf_geodetic_suite.rinex.hatanaka import HatanakaReader
+
+_BLOCK_ROWS = 1 << 14          # satellite records per block
+_READ_BUFSIZE = 1 << 20
+_FIELD = 16                    # F14.3 value + LLI + signal strength
+_V2_FIELDS_PER_LINE = 5
+_SPECIAL_FLAGS = (2, 3, 4, 5)  # followed by header lines, not observations
+_SLIP_FLAG = 6                 # cycle-slip records; repeated observations
+
+# F14.3: ten integer digits, the point in column 11, three decimals.
+_POINT = 10
+_DIGIT_WEIGHTS = np.array(
+    [10 ** (12 - p) for p in range(_POINT)] + [0, 100, 10, 1], dtype=np.int64
+)
+_GLONASS_SLOT = re.compile(r"R\s?(\d{1,2})\s+(-?\d+)")
+
+
+class RinexObsError(ValueError):
+    """The input is not a readable RINEX observation file."""
+
+
+# ---------------------------------------------------------------------------
+# Header
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ObsHeader:
+    """The parts of an observation header the reader and QC need."""
+    version: float
+    marker_name: str = ""
+    interval: float | None = None
+    # RINEX 3: codes per system letter. RINEX 2: one shared list under "".
+    obs_types: dict[str, list[str]] = field(default_factory=dict)
+    glonass_slots: dict[int, int] = field(default_factory=dict)   # slot → channel k
+
+    def types_for(self, system: str) -> list[str]:
+        """Observation codes recorded for satellites of system."""
+        if self.version < 3:
+            return self.obs_types.get("", [])
+        return self.obs_types.get(system, [])
+
+
+def _read_header(lines: Iterator[bytes]) -> ObsHeader:
+    first = next(lines, b"").decode("latin-1")
+    if not first[60:].startswith("RINEX VERSION / TYPE"):
+        raise RinexObsError("missing RINEX VERSION / TYPE line")
+    if first[20:21] != "O":
+        raise RinexObsError(f"not an observation file (type {first[20:21]!r})")
+    try:
+        header = ObsHeader(version=float(first[:9]))
+    except ValueError as exc:
+        raise RinexObsError(f"bad RINEX version: {first[:9]!r}") from exc
+
+    pending_system = ""
+    for raw in lines:
+        line = raw.decode("latin-1").rstrip("\r\n")
+        label = line[60:].strip()
+        if label == "END OF HEADER":
+            return header
+        if label == "MARKER NAME":
+            header.marker_name = line[:60].strip()
+        elif label == "INTERVAL":
+            try:
+                header.interval = float(line[:10])
+            except ValueError:
+                pass
+        elif label == "# / TYPES OF OBSERV":
+            header.obs_types.setdefault("", []).extend(line[6:60].split())
+        elif label == "SYS / # / OBS TYPES":
+            if line[:1].strip():
+                pending_system = line[0]
+            header.obs_types.setdefault(pending_system, []).extend(line[7:60].split())
+        elif label == "GLONASS SLOT / FRQ #":
+            for slot, channel in _GLONASS_SLOT.findall(line[4:60]):
+                header.glonass_slots[int(slot)] = int(channel)
+    raise RinexObsError("no END OF HEADER line")
+
+
+# ---------------------------------------------------------------------------
+# Field decoding
+# ---------------------------------------------------------------------------
+
+def _parse_fields(cells: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode an (..., 16) byte array of observation fields.
+
+    Returns (values, lli, snr): float64 with NaN for blank fields, and the two
+    flag digits as int8 (0 where blank).
+    """
+    number = cells[..., :14]
+    blank = (number == ord(" ")).all(axis=-1)
+    digits = number.astype(np.int64) - ord("0")
+    is_digit = (digits >= 0) & (digits <= 9)
+    allowed = is_digit | (number == ord(" ")) | (number == ord("-"))
+    allowed[..., _POINT] = number[..., _POINT] == ord(".")
+    standard = allowed.all(axis=-1)
+    mantissa = np.where(is_digit, digits, 0) @ _DIGIT_WEIGHTS
+    sign = np.where((number == ord("-")).any(axis=-1), -1.0, 1.0)
+    values = sign * mantissa / 1000.0
+    values[blank] = np.nan
+
+    odd = ~blank & ~standard
+    if odd.any():
+        for idx in zip(*np.nonzero(odd), strict=True):
+            text = number[idx].tobytes().decode("latin-1")
+            try:
+                values[idx] = float(text)
+            except ValueError as exc:
+                raise RinexObsError(f"malformed observation field {text!r}") from exc
+
+    def flag(col: int) -> np.ndarray:
+        d = cells[..., col].astype(np.int8) - ord("0")
+        return np.where((d >= 0) & (d <= 9), d, 0).astype(np.int8)
+
+    return values, flag(14), flag(15)
+
+
+# ---------------------------------------------------------------------------
+# Blocks
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ObsBlock:
+    """
+    Satellite records of consecutive epochs, one row per (epoch, satellite).
+
+    epoch indexes the file-wide epoch counter; times holds the epochs first
+    seen in this block, starting at epoch_offset.
+    """
+    epoch_offset: int
+    times: np.ndarray      # (n_epochs,) datetime64[ns]
+    epoch: np.ndarray      # (n,) int64
+    sat: np.ndarray        # (n,) int32 index into ObsReader.satellites
+    values: np.ndarray     # (n, n_columns) float64, NaN = blank
+    lli: np.ndarray        # (n, n_columns) int8
+    snr: np.ndarray        # (n, n_columns) int8
+
+
+def _v2_satellite(name: str) -> str:
+    """Normalise a RINEX 2 satellite field: ' 5' and 'G 5' both become 'G05'."""
+    try:
+        return f"{name[0] if name[0] != ' ' else 'G'}{int(name[1:]):02d}"
+    except ValueError as exc:
+        raise RinexObsError(f"malformed satellite number: {name!r}") from exc
+
+
+def _v3_satellite(name: str) -> str:
+    if not name[:1].isalpha():
+        raise RinexObsError(f"malformed satellite record: {name!r}")
+    return name.replace(" ", "0")
+
+
+def _epoch_time(y: int, mo: int, d: int, h: int, mi: int, sec: float) -> np.datetime64:
+    if y < 100:
+        y += 2000 if y < 80 else 1900
+    base = np.datetime64(f"{y:04d}-{mo:02d}-{d:02d}T{h:02d}:{mi:02d}", "ns")
+    return base + np.timedelta64(round(sec * 1e9), "ns")
+
+
+def _epoch_header(line: bytes, v2: bool) -> tuple[int, int, np.datetime64 | None]:
+    """(flag, count, time) of an epoch line; time is None for special events."""
+    try:
+        if v2:
+            flag = int(line[28:29].strip() or b"0")
+            count = int(line[29:32].strip() or b"0")
+            fields = (line[1:3], line[4:6], line[7:9], line[10:12], line[13:15])
+            sec = line[15:26]
+        else:
+            flag = int(line[31:32].strip() or b"0")
+            count = int(line[32:35].strip() or b"0")
+            fields = (line[2:6], line[7:9], line[10:12], line[13:15], line[16:18])
+            sec = line[18:29]
+        if flag in _SPECIAL_FLAGS:
+            return flag, count, None
+        return flag, count, _epoch_time(*map(int, fields), float(sec))
+    except ValueError as exc:
+        raise RinexObsError(f"malformed epoch line: {line!r}") from exc
+
+
+class ObsReader:
+    """
+    Block-wise reader over a RINEX observation byte stream.
+
+    The header is read on construction; blocks() then streams the body.
+    """
+
+    def __init__(self, fileobj: BinaryIO, systems: str | None = None):
+        self._lines = iter(fileobj)
+        self.header = _read_header(self._lines)
+        self.satellites: list[str] = []
+        self._sat_index: dict[bytes, int] = {}
+        self._by_name: dict[str, int] = {}
+        # Constellation filter: records of other systems are dropped in the
+        # line pass, before any field is decoded.
+        self._systems = systems.encode("ascii") if systems else None
+        obs_types = self.header.obs_types
+        if self.header.version < 3:
+            self.columns = list(self.header.types_for(""))
+        else:
+            if systems:
+                obs_types = {s: codes for s, codes in obs_types.items() if s in systems}
+            self.columns = list(dict.fromkeys(
+                code for codes in obs_types.values() for code in codes
+            ))
+        position = {code: i for i, code in enumerate(self.columns)}
+        self._column_map = {
+            system: np.array([position[c] for c in codes], dtype=np.intp)
+            for system, codes in obs_types.items()
+        }
+        self._n_epochs = 0
+
+    def column(self, code: str) -> int | None:
+        """Column of an observation code, or None if no system records it."""
+        try:
+            return self.columns.index(code)
+        except ValueError:
+            return None
+
+    def _index(self, field: bytes, normalise) -> int:
+        """Satellite index for a raw satellite field, numbering new satellites."""
+        idx = self._sat_index.get(field)
+        if idx is None:
+            name = normalise(field.decode("latin-1"))
+            idx = self._by_name.get(name)
+            if idx is None:
+                idx = self._by_name[name] = len(self.satellites)
+                self.satellites.append(name)
+            self._sat_index[field] = idx
+        return idx
+
+    def _take(self, n: int) -> list[bytes]:
+        """The next n lines, endings kept; running out is truncation."""
+        lines = list(islice(self._lines, n))
+        if len(lines) < n:
+            raise RinexObsError("file ends in the middle of an epoch")
+        return lines
+
+    def blocks(self, max_rows: int = _BLOCK_ROWS) -> Iterator[ObsBlock]:
+        """Yield the body as ObsBlocks of about max_rows satellite records."""
+        if self.header.version < 3:
+            epochs = self._epochs_v2()
+        else:
+            epochs = self._epochs_v3()
+        yield from self._collect(epochs, max_rows)
+
+    # -- line pass -----------------------------------------------------------
+
+    def _collect(self, epochs, max_rows: int) -> Iterator[ObsBlock]:
+        times: list[np.datetime64] = []
+        epoch: list[int] = []
+        sats: list[int] = []
+        rows = bytearray()
+        width = 0
+        offset = self._n_epochs
+        for time, sat_ids, records, width in epochs:
+            times.append(time)
+            sats += sat_ids
+            rows += records
+            epoch += [self._n_epochs] * len(sat_ids)
+            self._n_epochs += 1
+            if len(sats) >= max_rows:
+                yield self._build(offset, times, epoch, sats, rows, width)
+                times, epoch, sats, rows = [], [], [], bytearray()
+                offset = self._n_epochs
+        if times:
+            yield self._build(offset, times, epoch, sats, rows, width)
+
+    def _epochs_v2(self):
+        """(time, satellite indices, fixed-width records, record width) per epoch."""
+        lines_per_sat = max(1, -(-len(self.columns) // _V2_FIELDS_PER_LINE))
+        width = _V2_FIELDS_PER_LINE * _FIELD * lines_per_sat
+        for raw in self._lines:
+            line = raw.rstrip(b"\r\n")
+            if not line.strip():
+                continue
+            flag, count, time = _epoch_header(line, v2=True)
+            if time is None:
+                self._take(count)
+                continue
+            sat_field = line[32:68]
+            for cont in self._take((count - 1) // 12):
+                sat_field += cont.rstrip(b"\r\n")[32:68]
+            lines = self._take(count * lines_per_sat)
+            if flag == _SLIP_FLAG:
+                continue
+            fields = [sat_field[i:i + 3] for i in range(0, 3 * count, 3)]
+            if self._systems is not None:
+                keep = [k for k, f in enumerate(fields) if (f[:1].strip() or b"G") in self._systems]
+                fields = [fields[k] for k in keep]
+                lines = [
+                    ln for k in keep for ln in lines[k * lines_per_sat:(k + 1) * lines_per_sat]
+                ]
+            sat_ids = [self._index(f, _v2_satellite) for f in fields]
+            records = b"".join([ln.rstrip(b"\r\n")[:80].ljust(80) for ln in lines])
+            yield time, sat_ids, records, width
+
+    def _epochs_v3(self):
+        """(time, satellite indices, fixed-width records, record width) per epoch."""
+        width = _FIELD * max((len(c) for c in self.header.obs_types.values()), default=0)
+        for raw in self._lines:
+            line = raw.rstrip(b"\r\n")
+            if not line.strip():
+                continue
+            if line[:1] != b">":
+                raise RinexObsError(f"expected an epoch line, got {line[:40]!r}")
+            flag, count, time = _epoch_header(line, v2=False)
+            lines = self._take(count)
+            if time is None or flag == _SLIP_FLAG:
+                continue
+            if self._systems is not None:
+                lines = [ln for ln in lines if ln[:1] in self._systems]
+            sat_ids = [self._index(ln[:3], _v3_satellite) for ln in lines]
+            records = b"".join([ln.rstrip(b"\r\n")[3:3 + width].ljust(width) for ln in lines])
+            yield time, sat_ids, records, width
+
+    # -- array pass ----------------------------------------------------------
+
+    def _build(self, offset, times, epochs, sats, rows, width) -> ObsBlock:
+        n = len(sats)
+        sat = np.array(sats, dtype=np.int32)
+        values = np.full((n, len(self.columns)), np.nan)
+        lli = np.zeros((n, len(self.columns)), dtype=np.int8)
+        snr = np.zeros((n, len(self.columns)), dtype=np.int8)
+        if n and width:
+            cells = np.frombuffer(bytes(rows), dtype=np.uint8).reshape(n, -1, _FIELD)
+            v, f, s = _parse_fields(cells)
+            if self.header.version < 3:
+                k = len(self.columns)
+                values[:], lli[:], snr[:] = v[:, :k], f[:, :k], s[:, :k]
+            else:
+                row_system = np.array([name[0] for name in self.satellites])[sat]
+                for system, cols in self._column_map.items():
+                    mask = row_system == system
+                    if not mask.any() or not len(cols):
+                        continue
+                    sel = np.ix_(mask, cols)
+                    k = len(cols)
+                    values[sel], lli[sel], snr[sel] = v[mask, :k], f[mask, :k], s[mask, :k]
+        return ObsBlock(
+            epoch_offset=offset,
+            times=np.array(times, dtype="datetime64[ns]"),
+            epoch=np.array(epochs, dtype=np.int64),
+            sat=sat,
+            values=values,
+            lli=lli,
+            snr=snr,
+        )
+
+
+def open_obs(fileobj: BinaryIO, systems: str | None = None) -> ObsReader:
+    """
+    ObsReader over a binary stream, decoding Compact RINEX transparently.
+
+    systems ("GE", …) restricts the reader to those constellations.
+    """
+    stream = io.BufferedReader(fileobj, _READ_BUFSIZE) if not hasattr(fileobj, "peek") else fileobj
+    if b"CRINEX VERS" in stream.peek(80)[:80]:
+        stream = io.BufferedReader(HatanakaReader(stream), _READ_BUFSIZE)
+    return ObsReader(stream, systems)
@@ -0,0 +1,335 @@
+"""
+Random access to RINEX 2.x / 3.x observation files through an epoch index.
+
+ObsReader streams a whole file from the top. For work that needs one hour of
+a 1 Hz day, or only the Galileo satellites, ObsFile memory-maps the file and
+keeps an index of the byte offset, time and satellite count of every epoch:
+
+    with ObsFile("PBIS00USA_R_20230010000_01D_01S_MO.rnx") as obs:
+        hour = obs.read("2023-01-01T06:00", "2023-01-01T07:00", systems="E")
+        l1 = hour.observable("L1C")            # (time, sat)
+
+read() hands only the bytes of the selected epochs to an ObsReader, so the
+cost of a window is proportional to the window, and a constellation filter
+drops foreign records before any field is decoded. The result is dense
+(time × sat × obs) arrays; iter_windows() streams a file window by window
+when a whole day at that shape would not fit in memory.
+
+Building the index is a newline scan in NumPy plus one parse per epoch line.
+It is saved next to the file (or under index_dir) as ``<name>.epochs.npy``
+and opened again with np.load(mmap_mode="r") while it is newer than the file
+and records the file's size. Only plain RINEX can be indexed: compressed and
+Compact RINEX files must be decoded first (hatanaka.decompress).
+"""
+from __future__ import annotations
+
+import io
+import mmap
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+
+from pogf_geodetic_suite.rinex.obs import (
+    _SLIP_FLAG,
+    _V2_FIELDS_PER_LINE,
+    ObsHeader,
+    ObsReader,
+    RinexObsError,
+    _epoch_header,
+    _read_header,
+)
+
+INDEX_SUFFIX = ".epochs.npy"
+
+# One row per observation epoch plus a final row whose offset is the file
+# size; the sentinel closes the byte range of the last epoch.
+_INDEX_DTYPE = np.dtype([
+    ("offset", "<i8"),
+    ("time", "<M8[ns]"),
+    ("count", "<i4"),      # satellites in the epoch
+    ("flag", "i1"),
+])
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"\x1f\x9d", b"PK\x03\x04")
+
+TimeLike = datetime | np.datetime64 | str
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+def _body_offset(mm: mmap.mmap) -> int:
+    """Byte offset of the first line after END OF HEADER."""
+    head = mm[:80]
+    if head[:4] in _COMPRESSED_MAGIC or head[:2] in _COMPRESSED_MAGIC:
+        raise RinexObsError("compressed file; decompress it before indexing")
+    if b"CRINEX VERS" in head:
+        raise RinexObsError("Compact RINEX cannot be indexed; decode it with hatanaka.decompress")
+    pos = mm.find(b"END OF HEADER")
+    if pos < 0:
+        raise RinexObsError("no END OF HEADER line")
+    end = mm.find(b"\n", pos)
+    return len(mm) if end < 0 else end + 1
+
+
+def _line_bounds(mm: mmap.mmap, body: int) -> tuple[list[int], list[int]]:
+    """Start and end (exclusive, newline stripped) of every body line."""
+    buf = np.frombuffer(mm, dtype=np.uint8, offset=body)
+    newlines = np.flatnonzero(buf == ord("\n")) + body
+    del buf                           # the mmap cannot close while exported
+    starts = np.concatenate(([body], newlines + 1))
+    ends = newlines
+    if starts[-1] < len(mm):          # last line without a newline
+        ends = np.append(ends, len(mm))
+    else:
+        starts = starts[:-1]
+    return starts.tolist(), ends.tolist()
+
+
+def build_index(mm: mmap.mmap, header: ObsHeader, body: int) -> np.ndarray:
+    """Scan a mapped observation file into an _INDEX_DTYPE array."""
+    v2 = header.version < 3
+    lines_per_sat = max(1, -(-len(header.types_for("")) // _V2_FIELDS_PER_LINE))
+    starts, ends = _line_bounds(mm, body)
+    rows: list[tuple[int, np.datetime64, int, int]] = []
+    i, n_lines = 0, len(starts)
+    while i < n_lines:
+        line = mm[starts[i]:ends[i]].rstrip(b"\r")
+        if not line.strip():
+            i += 1
+            continue
+        if not v2 and line[:1] != b">":
+            raise RinexObsError(f"expected an epoch line, got {line[:40]!r}")
+        flag, count, time = _epoch_header(line, v2)
+        if time is None or not v2:
+            skip = count
+        else:
+            skip = max(0, (count - 1) // 12) + count * lines_per_sat
+        if i + 1 + skip > n_lines:
+            raise RinexObsError("file ends in the middle of an epoch")
+        if time is not None and flag != _SLIP_FLAG:
+            rows.append((starts[i], time, count, flag))
+        i += 1 + skip
+    rows.append((len(mm), np.datetime64("NaT", "ns"), -1, -1))
+    return np.array(rows, dtype=_INDEX_DTYPE)
+
+
+def index_path(path: str | Path, index_dir: str | Path | None = None) -> Path:
+    """Where the epoch index of path is kept."""
+    path = Path(path)
+    directory = Path(index_dir) if index_dir is not None else path.parent
+    return directory / (path.name + INDEX_SUFFIX)
+
+
+def _load_index(path: Path, source: os.stat_result) -> np.ndarray | None:
+    """The saved index if it is current for source, else None."""
+    try:
+        if path.stat().st_mtime_ns < source.st_mtime_ns:
+            return None
+        index = np.load(path, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    if index.dtype != _INDEX_DTYPE or not len(index) or index["offset"][-1] != source.st_size:
+        return None
+    return index
+
+
+def _save_index(path: Path, index: np.ndarray) -> None:
+    """Write index atomically; an unwritable location only costs a rebuild."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as fh:
+            np.save(fh, index, allow_pickle=False)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def _as_datetime64(value: TimeLike) -> np.datetime64:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return np.datetime64(value, "ns")
+
+
+# ---------------------------------------------------------------------------
+# Arrays
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ObsArrays:
+    """
+    Dense observations of a window: values[t, s, o] is column o of satellite
+    s at times[t]. Satellites are sorted by name; missing values are NaN.
+    """
+    times: np.ndarray          # (T,) datetime64[ns]
+    satellites: list[str]      # (S,)
+    columns: list[str]         # (O,)
+    values: np.ndarray         # (T, S, O) float64
+    lli: np.ndarray            # (T, S, O) int8
+    snr: np.ndarray            # (T, S, O) int8
+
+    def observable(self, code: str) -> np.ndarray:
+        """(T, S) values of one observation code."""
+        try:
+            return self.values[:, :, self.columns.index(code)]
+        except ValueError:
+            raise KeyError(code) from None
+
+    def satellite(self, name: str) -> np.ndarray:
+        """(T, O) values of one satellite."""
+        try:
+            return self.values[:, self.satellites.index(name), :]
+        except ValueError:
+            raise KeyError(name) from None
+
+
+def _assemble(times: list[np.ndarray], columns: list[str], blocks: list) -> ObsArrays:
+    """Scatter (epoch, satellite name, block) triples into dense arrays."""
+    names = sorted({name for _, sat_names, _ in blocks for name in sat_names})
+    position = {name: i for i, name in enumerate(names)}
+    all_times = np.concatenate(times) if times else np.array([], dtype="datetime64[ns]")
+    shape = (len(all_times), len(names), len(columns))
+    out = ObsArrays(
+        times=all_times,
+        satellites=names,
+        columns=columns,
+        values=np.full(shape, np.nan),
+        lli=np.zeros(shape, dtype=np.int8),
+        snr=np.zeros(shape, dtype=np.int8),
+    )
+    for epoch, sat_names, block in blocks:
+        sat = np.array([position[s] for s in sat_names], dtype=np.intp)[block.sat]
+        out.values[epoch, sat] = block.values
+        out.lli[epoch, sat] = block.lli
+        out.snr[epoch, sat] = block.snr
+    return out
+
+
+# ---------------------------------------------------------------------------
+# File
+# ---------------------------------------------------------------------------
+
+class ObsFile:
+    """
+    A memory-mapped RINEX observation file with its epoch index.
+
+    index_dir places the saved index elsewhere (read-only archives);
+    save_index=False keeps a freshly built index in memory only.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        index_dir: str | Path | None = None,
+        save_index: bool = True,
+    ):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            stat = os.fstat(fh.fileno())
+            if not stat.st_size:
+                raise RinexObsError("empty file")
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            body = _body_offset(self._mm)
+            self._header_bytes = self._mm[:body]
+            self.header = _read_header(iter(io.BytesIO(self._header_bytes)))
+            saved = index_path(self.path, index_dir)
+            index = _load_index(saved, stat)
+            if index is None:
+                index = build_index(self._mm, self.header, body)
+                if save_index:
+                    _save_index(saved, index)
+        except BaseException:
+            self._mm.close()
+            raise
+        self._offsets = index["offset"]
+        self.times = index["time"][:-1]
+        self.counts = index["count"][:-1]
+
+    def __enter__(self) -> ObsFile:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def select(self, start: TimeLike | None = None, end: TimeLike | None = None) -> np.ndarray:
+        """Indices of the epochs with start <= time < end."""
+        keep = np.ones(len(self.times), dtype=bool)
+        if start is not None:
+            keep &= self.times >= _as_datetime64(start)
+        if end is not None:
+            keep &= self.times < _as_datetime64(end)
+        return np.flatnonzero(keep)
+
+    def read(
+        self,
+        start: TimeLike | None = None,
+        end: TimeLike | None = None,
+        systems: str | None = None,
+    ) -> ObsArrays:
+        """Observations of the epochs in [start, end), optionally of some systems only."""
+        return self.read_epochs(self.select(start, end), systems)
+
+    def read_epochs(self, epochs: np.ndarray, systems: str | None = None) -> ObsArrays:
+        """Observations of the given epoch indices, in index order."""
+        epochs = np.asarray(epochs, dtype=np.int64)
+        # Runs of consecutive epochs are contiguous byte ranges; a file whose
+        # clock stepped back gives more than one run for a time window.
+        breaks = np.flatnonzero(np.diff(epochs) != 1) + 1
+        times: list[np.ndarray] = []
+        blocks: list = []
+        columns: list[str] = []
+        base = 0
+        for run in np.split(epochs, breaks) if len(epochs) else []:
+            first, stop = int(run[0]), int(run[-1]) + 1
+            body = io.BytesIO(self._mm[self._offsets[first]:self._offsets[stop]])
+            reader = ObsReader(chain(io.BytesIO(self._header_bytes), body), systems)
+            columns = reader.columns
+            for block in reader.blocks():
+                times.append(block.times)
+                blocks.append((block.epoch + base, reader.satellites, block))
+            base += stop - first
+        if not columns:
+            columns = ObsReader(io.BytesIO(self._header_bytes), systems).columns
+        return _assemble(times, columns, blocks)
+
+    def iter_windows(
+        self,
+        span: timedelta | float,
+        systems: str | None = None,
+    ) -> Iterator[ObsArrays]:
+        """Consecutive windows of span (seconds or timedelta) covering the file."""
+        if not len(self.times):
+            return
+        seconds = span.total_seconds() if isinstance(span, timedelta) else float(span)
+        if seconds <= 0:
+            raise ValueError("span must be positive")
+        step = np.timedelta64(round(seconds * 1e9), "ns")
+        start = self.times.min()
+        slot = (self.times - start) // step
+        for k in np.unique(slot):
+            yield self.read_epochs(np.flatnonzero(slot == k), systems)
+
+
+def read_obs(
+    path: str | Path,
+    start: TimeLike | None = None,
+    end: TimeLike | None = None,
+    systems: str | None = None,
+    index_dir: str | Path | None = None,
+) -> ObsArrays:
+    """One-shot ObsFile(path).read(start, end, systems)."""
+    with ObsFile(path, index_dir=index_dir) as obs:
+        return obs.read(start, end, systems)
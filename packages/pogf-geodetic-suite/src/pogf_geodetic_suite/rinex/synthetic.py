@@ -0,0 +1,395 @@
+"""
+Synthetic RINEX observation files for tests and benchmarks.
+
+generate() builds a reproducible observation file (RINEX 2.11 or 3.04) from
+a seed: satellites rise and set on smooth arcs, the second frequency drops
+out near the horizon, and code, phase and signal strength carry noise on top
+of a smooth geometric range, so both the values and the way they compress
+look like a receiver's output. Each file is rendered as plain RINEX or as
+Compact RINEX, and write_file() stacks the usual wrappers on top:
+
+    plain    .23o / .rnx
+    hatanaka .23d / .crx
+    gzip     .gz       unix compress  .Z       zip  .zip
+
+Values are written the way CRX2RNX prints them (no leading zero below one,
+trailing blanks trimmed), so the Compact RINEX rendering decodes back to
+exactly the plain one with hatanaka.decompress.
+
+The CRINEX encoder here is deliberately small — third-order differences, no
+clock offsets, no event records — and only meant for files made by this
+module; it is not a replacement for rnx2crx.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import math
+import zipfile
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from pogf_geodetic_suite.lzw import compress as compress_z
+
+_DIFF_ORDER = 3
+_SPEED_OF_LIGHT = 299_792_458.0
+_FREQUENCY = {  # carrier frequency (Hz) per system and band
+    "G": {1: 1575.42e6, 2: 1227.60e6},
+    "E": {1: 1575.42e6, 5: 1176.45e6},
+}
+_GLONASS_FREQUENCY = {1: (1602.0e6, 0.5625e6), 2: (1246.0e6, 0.4375e6)}  # base, step
+_OBS_TYPES_V2 = ["C1", "P2", "L1", "L2", "S1", "S2"]
+_OBS_TYPES_V3 = {
+    "G": ["C1C", "L1C", "S1C", "C2W", "L2W", "S2W"],
+    "R": ["C1C", "L1C", "S1C", "C2P", "L2P", "S2P"],
+    "E": ["C1C", "L1C", "S1C", "C5Q", "L5Q", "S5Q"],
+}
+_ORBIT_PERIOD = {"G": 43_082.0, "R": 40_544.0, "E": 50_680.0}   # seconds
+
+
+@dataclass
+class SyntheticSpec:
+    """What to generate. The same spec always produces the same bytes."""
+    station: str = "SYN1"
+    version: int = 3                      # 2 → RINEX 2.11, 3 → RINEX 3.04
+    start: datetime = datetime(2023, 1, 1)
+    epochs: int = 2880
+    interval: float = 30.0
+    systems: str = "GRE"                  # RINEX 2 files use the G satellites only
+    satellites: dict[str, int] = field(default_factory=lambda: {"G": 31, "R": 24, "E": 24})
+    seed: int = 0
+
+    @property
+    def used_systems(self) -> str:
+        return "G" if self.version == 2 else self.systems
+
+
+# ---------------------------------------------------------------------------
+# Observations
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Epoch:
+    time: datetime
+    sats: list[str]
+    values: list[list[int | None]]        # per satellite, per type: value × 1000 or None
+    flags: list[str]                      # per satellite: 2 characters per type
+
+
+def _obs_types(spec: SyntheticSpec) -> dict[str, list[str]]:
+    if spec.version == 2:
+        return {"G": _OBS_TYPES_V2}
+    return {s: _OBS_TYPES_V3[s] for s in spec.used_systems}
+
+
+def _band(code: str) -> int:
+    return int(code[1])
+
+
+def _glonass_channel(prn: int) -> int:
+    return prn % 14 - 7
+
+
+def _wavelength(sat: str, band: int) -> float:
+    if sat[0] == "R":
+        base, step = _GLONASS_FREQUENCY[band]
+        return _SPEED_OF_LIGHT / (base + _glonass_channel(int(sat[1:])) * step)
+    return _SPEED_OF_LIGHT / _FREQUENCY[sat[0]][band]
+
+
+def _epochs(spec: SyntheticSpec) -> Iterator[_Epoch]:
+    """Observation epochs of spec, one at a time."""
+    rng = np.random.default_rng(spec.seed)
+    types = _obs_types(spec)
+    sats = [
+        (f"{s}{prn:02d}", s, rng.uniform(0, 2 * math.pi), rng.uniform(1e6, 4e6))
+        for s in spec.used_systems
+        for prn in range(1, spec.satellites.get(s, 0) + 1)
+    ]
+    ambiguity = {name: rng.integers(-10**6, 10**6, size=2).tolist() for name, *_ in sats}
+    ntypes = max(len(codes) for codes in types.values())
+    t0 = spec.start.hour * 3600 + spec.start.minute * 60 + spec.start.second
+    for k in range(spec.epochs):
+        sec = t0 + k * spec.interval
+        noise = rng.standard_normal((len(sats), ntypes)).tolist()
+        visible, values, flags = [], [], []
+        for j, (name, system, phase, amplitude) in enumerate(sats):
+            # Elevation proxy: a satellite is in view while this is above 0.
+            elev = math.sin(2 * math.pi * sec / _ORBIT_PERIOD[system] + phase) - 0.25
+            if elev <= 0:
+                continue
+            rho = 2.02e7 + amplitude * math.cos(2 * math.pi * sec / _ORBIT_PERIOD[system] + phase)
+            iono = 3.0 + 2.0 * (1 - elev)
+            snr = 30.0 + 20.0 * min(elev, 0.75) / 0.75
+            second_ok = elev > 0.05
+            row, row_flags = [], []
+            for i, code in enumerate(types[system]):
+                band = 1 if _band(code) == 1 else 2
+                lam = _wavelength(name, _band(code))
+                ion = iono * (1.0 if band == 1 else 1.65)
+                if band == 2 and not second_ok:
+                    row.append(None)
+                    row_flags.append("  ")
+                    continue
+                kind = code[0]
+                if kind in "CP":
+                    v = rho + ion + 0.3 * noise[j][i]
+                elif kind == "L":
+                    v = (rho - ion) / lam + ambiguity[name][band - 1] + 0.002 * noise[j][i]
+                else:
+                    v = snr - (3.0 if band == 2 else 0.0) + 0.5 * noise[j][i]
+                row.append(int(round(v * 1000)))
+                ssi = min(9, max(1, int(snr / 6)))
+                row_flags.append(f" {ssi}" if kind == "L" else "  ")
+            visible.append(name)
+            values.append(row)
+            flags.append("".join(row_flags))
+        yield _Epoch(spec.start + timedelta(seconds=k * spec.interval), visible, values, flags)
+
+
+def _f14_3(value: int | None) -> str:
+    """F14.3 the way CRX2RNX prints it (``.123``, ``-.123`` below one)."""
+    if value is None:
+        return " " * 14
+    whole, frac = divmod(abs(value), 1000)
+    text = f"{'-' if value < 0 else ''}{whole if whole else ''}.{frac:03d}"
+    return text.rjust(14)
+
+
+# ---------------------------------------------------------------------------
+# Header
+# ---------------------------------------------------------------------------
+
+def _rec(value: str, label: str) -> str:
+    return f"{value:<60.60}{label:<20}".rstrip() + "\n"
+
+
+def _header(spec: SyntheticSpec) -> str:
+    t = spec.start
+    last = spec.start + timedelta(seconds=(spec.epochs - 1) * spec.interval)
+    if spec.version == 2:
+        vers = _rec(f"{'2.11':>9}{'':11}{'OBSERVATION DATA':<20}{'G (GPS)':<20}",
+                    "RINEX VERSION / TYPE")
+    else:
+        system = spec.used_systems if len(spec.used_systems) == 1 else "M"
+        vers = _rec(f"{'3.04':>9}{'':11}{'OBSERVATION DATA':<20}{system:<20}",
+                    "RINEX VERSION / TYPE")
+    lines = [
+        vers,
+        _rec(f"{'pogf synthetic':<20}{'POGF':<20}{'20230101 000000 UTC':<20}", "PGM / RUN BY / DATE"),
+        _rec(spec.station, "MARKER NAME"),
+        _rec(f"{'':20}{'SYNTHETIC RX':<20}{'1.0':<20}", "REC # / TYPE / VERS"),
+        _rec(f"{'':20}{'TRM59800.00     NONE':<20}", "ANT # / TYPE"),
+        _rec(f"{-3185000.0:14.4f}{5290000.0:14.4f}{1620000.0:14.4f}", "APPROX POSITION XYZ"),
+        _rec(f"{0.0:14.4f}{0.0:14.4f}{0.0:14.4f}", "ANTENNA: DELTA H/E/N"),
+    ]
+    types = _obs_types(spec)
+    if spec.version == 2:
+        codes = types["G"]
+        for i in range(0, len(codes), 9):
+            head = f"{len(codes):6d}" if i == 0 else " " * 6
+            lines.append(_rec(head + "".join(f"{c:>6}" for c in codes[i:i + 9]),
+                              "# / TYPES OF OBSERV"))
+    else:
+        for system, codes in types.items():
+            for i in range(0, len(codes), 13):
+                head = f"{system}  {len(codes):3d}" if i == 0 else " " * 6
+                lines.append(_rec(head + "".join(f" {c}" for c in codes[i:i + 13]),
+                                  "SYS / # / OBS TYPES"))
+    lines.append(_rec(f"{spec.interval:10.3f}", "INTERVAL"))
+    for when, label in ((t, "TIME OF FIRST OBS"), (last, "TIME OF LAST OBS")):
+        sec = when.second + when.microsecond / 1e6
+        lines.append(_rec(
+            f"{when.year:6d}{when.month:6d}{when.day:6d}{when.hour:6d}{when.minute:6d}"
+            f"{sec:13.7f}     GPS", label,
+        ))
+    if spec.version == 3 and "R" in spec.used_systems:
+        n = spec.satellites.get("R", 0)
+        slots = [(prn, _glonass_channel(prn)) for prn in range(1, n + 1)]
+        for i in range(0, len(slots), 8):
+            head = f"{n:3d} " if i == 0 else " " * 4
+            body = "".join(f"R{prn:02d} {k:2d} " for prn, k in slots[i:i + 8])
+            lines.append(_rec(head + body, "GLONASS SLOT / FRQ #"))
+    lines.append(_rec("", "END OF HEADER"))
+    return "".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Renderers
+# ---------------------------------------------------------------------------
+
+def _epoch_line(spec: SyntheticSpec, epoch: _Epoch) -> str:
+    """The epoch record with every satellite on one line, as CRINEX carries it."""
+    t = epoch.time
+    sec = t.second + t.microsecond / 1e6
+    sats = "".join(epoch.sats)
+    if spec.version == 2:
+        return (f" {t.year % 100:02d}{t.month:3d}{t.day:3d}{t.hour:3d}{t.minute:3d}"
+                f"{sec:11.7f}  0{len(epoch.sats):3d}{sats}")
+    head = (f"> {t.year:4d} {t.month:02d} {t.day:02d} {t.hour:02d} {t.minute:02d}"
+            f"{sec:11.7f}  0{len(epoch.sats):3d}")
+    return f"{head:<41}{sats}"
+
+
+def _rinex_records(spec: SyntheticSpec, epoch: _Epoch) -> Iterator[str]:
+    line = _epoch_line(spec, epoch)
+    if spec.version == 2:
+        yield line[:68].rstrip() + "\n"
+        for k in range(68, len(line), 36):
+            yield " " * 32 + line[k:k + 36] + "\n"
+        for values, flags in zip(epoch.values, epoch.flags, strict=True):
+            cells = [_f14_3(v) + flags[2 * i:2 * i + 2] for i, v in enumerate(values)]
+            for i in range(0, len(cells), 5):
+                yield "".join(cells[i:i + 5]).rstrip() + "\n"
+    else:
+        yield line[:41].rstrip() + "\n"
+        for sat, values, flags in zip(epoch.sats, epoch.values, epoch.flags, strict=True):
+            cells = "".join(_f14_3(v) + flags[2 * i:2 * i + 2] for i, v in enumerate(values))
+            yield (sat + cells).rstrip() + "\n"
+
+
+def _text_diff(old: str, new: str) -> str:
+    """CRINEX text difference: ' ' keeps a character, '&' blanks it."""
+    out = []
+    for i in range(max(len(old), len(new))):
+        o = old[i] if i < len(old) else " "
+        c = new[i] if i < len(new) else " "
+        out.append(" " if c == o else ("&" if c == " " else c))
+    return "".join(out).rstrip()
+
+
+def _backward_difference(history: list[int], order: int) -> int:
+    """order-th backward difference at the last element of history."""
+    return sum(
+        (-1) ** m * math.comb(order, m) * history[-1 - m] for m in range(order + 1)
+    )
+
+
+def _crinex_records(spec: SyntheticSpec, epochs: Iterator[_Epoch]) -> Iterator[str]:
+    prev_line = None
+    # (satellite, type index) → values of the open arc, newest last
+    arcs: dict[tuple[str, int], list[int]] = {}
+    prev_flags: dict[str, str] = {}
+    for epoch in epochs:
+        line = _epoch_line(spec, epoch).rstrip()
+        if prev_line is None:
+            yield ("&" + line[1:] if spec.version == 2 else line) + "\n"
+        else:
+            yield _text_diff(prev_line, line) + "\n"
+        prev_line = line
+        yield "\n"                                    # no receiver clock offset
+
+        open_arcs = {}
+        flags_now = {}
+        for sat, values, flags in zip(epoch.sats, epoch.values, epoch.flags, strict=True):
+            fields = []
+            for i, v in enumerate(values):
+                if v is None:
+                    fields.append("")
+                    continue
+                history = arcs.get((sat, i), []) + [v]
+                if len(history) == 1:
+                    fields.append(f"{_DIFF_ORDER}&{v}")
+                else:
+                    order = min(len(history) - 1, _DIFF_ORDER)
+                    fields.append(str(_backward_difference(history, order)))
+                open_arcs[(sat, i)] = history[-_DIFF_ORDER - 1:]
+            dflags = _text_diff(prev_flags.get(sat, ""), flags)
+            flags_now[sat] = flags
+            record = " ".join(fields)
+            yield (record + " " + dflags if dflags else record.rstrip()) + "\n"
+        arcs = open_arcs
+        prev_flags = flags_now
+
+
+def _crinex_header(spec: SyntheticSpec) -> str:
+    vers = "1.0" if spec.version == 2 else "3.0"
+    return (
+        _rec(f"{vers:<20}{'COMPACT RINEX FORMAT':<20}", "CRINEX VERS   / TYPE")
+        + _rec(f"{'pogf synthetic':<40}{'01-Jan-23 00:00':<20}", "CRINEX PROG / DATE")
+    )
+
+
+def iter_rinex(spec: SyntheticSpec, hatanaka: bool = False) -> Iterator[bytes]:
+    """The file of spec, in chunks: plain RINEX, or Compact RINEX if hatanaka."""
+    header = _header(spec)
+    if hatanaka:
+        yield (_crinex_header(spec) + header).encode("ascii")
+        records = _crinex_records(spec, _epochs(spec))
+    else:
+        yield header.encode("ascii")
+        records = (r for e in _epochs(spec) for r in _rinex_records(spec, e))
+    chunk: list[str] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= 4096:
+            yield "".join(chunk).encode("ascii")
+            chunk.clear()
+    yield "".join(chunk).encode("ascii")
+
+
+def generate(spec: SyntheticSpec, hatanaka: bool = False) -> bytes:
+    """The whole file of spec as bytes."""
+    return b"".join(iter_rinex(spec, hatanaka))
+
+
+# ---------------------------------------------------------------------------
+# File names and wrappers
+# ---------------------------------------------------------------------------
+
+def file_name(spec: SyntheticSpec, hatanaka: bool = False) -> str:
+    """IGS-style name: ssssdddh.yyo/d (RINEX 2) or the RINEX 3 long name."""
+    doy = spec.start.timetuple().tm_yday
+    if spec.version == 2:
+        return f"{spec.station.lower()}{doy:03d}0.{spec.start.year % 100:02d}{'d' if hatanaka else 'o'}"
+    span = spec.epochs * spec.interval
+    period = f"{round(span / 86400):02d}D" if span >= 86400 else f"{round(span / 3600):02d}H"
+    rate = f"{round(spec.interval):02d}S" if spec.interval < 60 else f"{round(spec.interval / 60):02d}M"
+    return (f"{spec.station.upper()}00SYN_R_{spec.start.year}{doy:03d}"
+            f"{spec.start.hour:02d}{spec.start.minute:02d}_{period}_{rate}_MO."
+            f"{'crx' if hatanaka else 'rnx'}")
+
+
+def write_file(
+    spec: SyntheticSpec,
+    out_dir: str | Path,
+    hatanaka: bool = False,
+    wrappers: tuple[str, ...] = (),
+) -> Path:
+    """
+    Write spec into out_dir and return the path.
+
+    wrappers are applied innermost first, from "gz", "Z" and "zip", e.g.
+    ("gz",) for a .crx.gz or ("Z",) for a .23d.Z.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    name = file_name(spec, hatanaka)
+    if not wrappers:
+        path = out_dir / name
+        with open(path, "wb") as f:
+            f.writelines(iter_rinex(spec, hatanaka))
+        return path
+    data = generate(spec, hatanaka)
+    for wrapper in wrappers:
+        if wrapper == "gz":
+            data = gzip.compress(data, mtime=0)
+            name += ".gz"
+        elif wrapper == "Z":
+            data = compress_z(data)
+            name += ".Z"
+        elif wrapper == "zip":
+            buf = io.BytesIO()
+            with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(zipfile.ZipInfo(name, date_time=(2023, 1, 1, 0, 0, 0)), data)
+            data = buf.getvalue()
+            name += ".zip"
+        else:
+            raise ValueError(f"unknown wrapper {wrapper!r}; expected gz, Z or zip")
+    path = out_dir / name
+    path.write_bytes(data)
+    return path
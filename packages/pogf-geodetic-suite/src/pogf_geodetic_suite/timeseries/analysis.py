@@ -6,16 +6,26 @@ Ports the core algorithm of vel_line_v8_newvelduetooffset_v4.m:
   - Least-squares linear regression → velocity + 1-sigma standard error
   - Offset-aware segmentation: fit each interval between discontinuities
     independently; final_velocity refers to the last (most recent) segment
+
+estimate_velocities() applies the same algorithm to a whole network at
+once: segment labels, IQR bounds and the closed-form regression sums are
+computed for every (station, segment) group in one set of array operations,
+optionally split across a process pool by station.
 """
 from __future__ import annotations
 
 from collections.abc import Callable
-from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import numpy as np
 
+if TYPE_CHECKING:
+    from pogf_geodetic_suite.timeseries.crd_pipeline import EnuSeries
+
 
 class OffsetType(str, Enum):
     EQ = "EQ"   # earthquake
@@ -218,6 +228,388 @@ def estimate_velocity(
     return VelocityResult(station=station, segments=segments)
 
 
+# ---------------------------------------------------------------------------
+# Network (batch) estimation
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class VelocityTable:
+    """
+    Velocities of many stations as columns, one row per fitted segment,
+    sorted by (station, segment). Stations whose fit failed are left out
+    and listed in failed with the reason estimate_velocity would raise.
+    """
+    station: np.ndarray         # (M,) station codes
+    segment: np.ndarray         # (M,) 0-based segment number within the station
+    t_start: np.ndarray         # (M,) decimal years, first epoch incl. outliers
+    t_end: np.ndarray           # (M,)
+    n_points: np.ndarray        # (M,) epochs fitted after outlier removal
+    vel_mm_yr: np.ndarray       # (M, 3) East/North/Up velocity
+    sig_mm_yr: np.ndarray       # (M, 3) 1-sigma standard error of the slope
+    r2: np.ndarray              # (M, 3)
+    failed: dict[str, str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.station)
+
+    def take(self, rows: np.ndarray) -> VelocityTable:
+        """The table restricted to rows (index or boolean mask)."""
+        return VelocityTable(
+            station=self.station[rows], segment=self.segment[rows],
+            t_start=self.t_start[rows], t_end=self.t_end[rows],
+            n_points=self.n_points[rows], vel_mm_yr=self.vel_mm_yr[rows],
+            sig_mm_yr=self.sig_mm_yr[rows], r2=self.r2[rows], failed=dict(self.failed),
+        )
+
+    def final(self) -> VelocityTable:
+        """One row per station: its last (most recent) segment."""
+        last = np.ones(len(self.station), dtype=bool)
+        last[:-1] = self.station[1:] != self.station[:-1]
+        return self.take(last)
+
+    def result(self, station: str, outlier_epochs: dict | None = None) -> VelocityResult:
+        """
+        The rows of one station as a VelocityResult. outlier_epochs maps
+        segment number → outlier epochs (see NetworkVelocities.outlier_epochs).
+        """
+        rows = np.flatnonzero(self.station == station)
+        if not len(rows):
+            raise KeyError(station)
+        outlier_epochs = outlier_epochs or {}
+        return VelocityResult(station=station, segments=[
+            SegmentVelocity(
+                ve_mm_yr=float(self.vel_mm_yr[i, 0]),
+                vn_mm_yr=float(self.vel_mm_yr[i, 1]),
+                vu_mm_yr=float(self.vel_mm_yr[i, 2]),
+                sig_ve=float(self.sig_mm_yr[i, 0]),
+                sig_vn=float(self.sig_mm_yr[i, 1]),
+                sig_vu=float(self.sig_mm_yr[i, 2]),
+                r2_e=float(self.r2[i, 0]),
+                r2_n=float(self.r2[i, 1]),
+                r2_u=float(self.r2[i, 2]),
+                n_points=int(self.n_points[i]),
+                t_start=float(self.t_start[i]),
+                t_end=float(self.t_end[i]),
+                outlier_epochs=outlier_epochs.get(int(self.segment[i]), ()),
+            )
+            for i in rows
+        ])
+
+
+@dataclass
+class SegmentSums:
+    """
+    Sufficient statistics of the straight-line fit of each (station, segment),
+    one row per fitted segment, sorted by (station, t_start). Times and
+    displacements are taken relative to the segment's first epoch (t_start,
+    d0), which keeps the sums well conditioned over decades of data. Adding
+    an epoch to a segment updates them in O(1); table() turns them into
+    velocities.
+    """
+    station: np.ndarray         # (M,) station codes
+    label: np.ndarray           # (M,) number of the station's offsets at or before t_start
+    t_start: np.ndarray         # (M,) first epoch, outliers included
+    t_end: np.ndarray           # (M,) last epoch, outliers included
+    n_rows: np.ndarray          # (M,) epochs, outliers included
+    lower: np.ndarray           # (M, 3) IQR outlier bounds, metres
+    upper: np.ndarray           # (M, 3)
+    d0: np.ndarray              # (M, 3) ENU at t_start, metres
+    n: np.ndarray               # (M,) epochs kept after outlier removal
+    st: np.ndarray              # (M,) Σt
+    stt: np.ndarray             # (M,) Σt²
+    sd: np.ndarray              # (M, 3) Σd
+    std: np.ndarray             # (M, 3) Σtd
+    sdd: np.ndarray             # (M, 3) Σd²
+
+    def __len__(self) -> int:
+        return len(self.station)
+
+    @classmethod
+    def columns(cls) -> list[str]:
+        return [f.name for f in fields(cls)]
+
+    @classmethod
+    def concat(cls, parts: list[SegmentSums]) -> SegmentSums:
+        return cls(*(np.concatenate([getattr(p, name) for p in parts])
+                     for name in cls.columns()))
+
+    def take(self, rows: np.ndarray) -> SegmentSums:
+        """The rows (index or boolean mask) of every column."""
+        return SegmentSums(*(getattr(self, name)[rows] for name in self.columns()))
+
+    def table(self, failed: dict[str, str] | None = None) -> VelocityTable:
+        """Slopes, standard errors and R² of every segment, as _fit_segment computes them."""
+        n = self.n.astype(float)
+        safe_n = np.maximum(n, 1.0)
+        s_tt = self.stt - self.st * self.st / safe_n
+        s_td = self.std - self.st[:, None] * self.sd / safe_n[:, None]
+        s_dd = self.sdd - self.sd * self.sd / safe_n[:, None]
+        ok = (s_tt > 0)[:, None]
+        slope = np.divide(s_td, s_tt[:, None], out=np.zeros_like(s_td), where=ok)
+        ssr = np.maximum(s_dd - slope * s_td, 0.0)
+        mse = ssr / np.maximum(n - 2, 1)[:, None]
+        sig = np.sqrt(np.divide(mse, s_tt[:, None], out=np.zeros_like(mse), where=ok))
+        unexplained = np.divide(ssr, s_dd, out=np.zeros_like(ssr), where=s_dd > 0)
+        r2 = np.where(s_dd > 0, 1.0 - unexplained, 0.0)
+
+        # Segment numbers count fitted segments only, as VelocityResult.segments does
+        first = np.ones(len(self), dtype=bool)
+        first[1:] = self.station[1:] != self.station[:-1]
+        run_start = np.maximum.accumulate(np.where(first, np.arange(len(self)), 0))
+        return VelocityTable(
+            station=self.station,
+            segment=np.arange(len(self)) - run_start,
+            t_start=self.t_start,
+            t_end=self.t_end,
+            n_points=self.n,
+            vel_mm_yr=slope * 1000.0,   # m/yr → mm/yr
+            sig_mm_yr=sig * 1000.0,
+            r2=r2,
+            failed=dict(failed or {}),
+        )
+
+
+def _segment_labels(
+    station_idx: np.ndarray, t: np.ndarray, off_station: np.ndarray, off_date: np.ndarray
+) -> np.ndarray:
+    """
+    Per-row segment number within its station: how many distinct offset dates
+    of that station are ≤ t. Rows must be sorted by (station, t). Same split
+    as estimate_velocity, whose boundaries are searchsorted(t, date).
+    """
+    if not len(off_date):
+        return np.zeros(len(t), dtype=np.int64)
+    # Encode (station, date) in one sortable float; dates are < 10000.
+    keys = np.unique(off_station * 1e4 + off_date)
+    row_keys = station_idx * 1e4 + t
+    counted = np.searchsorted(keys, row_keys, side="right")
+    before_station = np.searchsorted(keys, station_idx * 1e4, side="left")
+    return counted - before_station
+
+
+def _group_quartiles(values: np.ndarray, starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """(2, G, 3): 25th and 75th percentiles of values within each row group."""
+    out = np.empty((2, len(starts), values.shape[1]))
+    # One call per (station, segment) — a few hundred, each on a contiguous slice
+    for g, (a, n) in enumerate(zip(starts.tolist(), sizes.tolist(), strict=True)):
+        out[:, g] = np.percentile(values[a:a + n], [25, 75], axis=0)
+    return out
+
+
+def _offset_arrays(
+    codes: np.ndarray, offsets: dict[str, list[OffsetEvent]]
+) -> tuple[np.ndarray, np.ndarray]:
+    """(station index into codes, date) of every offset event, for _segment_labels."""
+    off = [(i, ev.date) for i, code in enumerate(codes.tolist())
+           for ev in offsets.get(code, ())]
+    return (np.array([o[0] for o in off], dtype=float),
+            np.array([o[1] for o in off], dtype=float))
+
+
+def _segment_sums(
+    codes: np.ndarray,
+    station_idx: np.ndarray,
+    t: np.ndarray,
+    enu_m: np.ndarray,
+    offsets: dict[str, list[OffsetEvent]],
+    outlier_iqr_factor: float,
+) -> tuple[SegmentSums, dict[str, str], np.ndarray]:
+    """
+    Outlier removal and regression sums for rows sorted by (station, t);
+    station_idx indexes codes. Returns the sums of every fitted segment,
+    the failed stations and the (N,) outlier mask.
+    """
+    seg = _segment_labels(station_idx, t, *_offset_arrays(codes, offsets))
+
+    # Groups are runs of equal (station, segment)
+    new = np.ones(len(t), dtype=bool)
+    new[1:] = (station_idx[1:] != station_idx[:-1]) | (seg[1:] != seg[:-1])
+    group = np.cumsum(new) - 1
+    starts = np.flatnonzero(new)
+    sizes = np.diff(np.append(starts, len(t)))
+    g_station = station_idx[starts]
+
+    # Segments of < 3 epochs are skipped, as in estimate_velocity
+    usable = sizes >= 3
+    row_usable = usable[group]
+
+    q1 = np.full((len(starts), 3), np.nan)
+    q3 = np.full((len(starts), 3), np.nan)
+    q1[usable], q3[usable] = _group_quartiles(enu_m, starts[usable], sizes[usable])
+    iqr = q3 - q1
+    lower, upper = q1 - outlier_iqr_factor * iqr, q3 + outlier_iqr_factor * iqr
+    outlier = row_usable & np.any((enu_m < lower[group]) | (enu_m > upper[group]), axis=1)
+    keep = row_usable & ~outlier
+
+    # Sums relative to each group's first epoch
+    n_groups = len(starts)
+    t0, d0 = t[starts], enu_m[starts]
+    tr = np.where(keep, t - t0[group], 0.0)
+    n = np.bincount(group, weights=keep, minlength=n_groups)
+    st = np.bincount(group, weights=tr, minlength=n_groups)
+    stt = np.bincount(group, weights=tr * tr, minlength=n_groups)
+    sd = np.empty((n_groups, 3))
+    std = np.empty((n_groups, 3))
+    sdd = np.empty((n_groups, 3))
+    for c in range(3):
+        dr = np.where(keep, enu_m[:, c] - d0[group, c], 0.0)
+        sd[:, c] = np.bincount(group, weights=dr, minlength=n_groups)
+        std[:, c] = np.bincount(group, weights=tr * dr, minlength=n_groups)
+        sdd[:, c] = np.bincount(group, weights=dr * dr, minlength=n_groups)
+
+    # A station fails as a whole, like estimate_velocity raising for it
+    failed: dict[str, str] = {}
+    too_few = usable & (n < 3)
+    for gi in np.flatnonzero(too_few):
+        code = str(codes[g_station[gi]])
+        if code not in failed:
+            a, b = starts[gi], starts[gi] + sizes[gi] - 1
+            failed[code] = (
+                f"Station {code!r}: segment [{t[a]:.4f}, {t[b]:.4f}] has only "
+                f"{int(n[gi])} point(s) after outlier removal (need ≥ 3)."
+            )
+    has_usable = np.bincount(g_station, weights=usable, minlength=len(codes)) > 0
+    for i in np.flatnonzero(~has_usable):
+        code = str(codes[i])
+        failed[code] = (
+            f"Station {code!r}: no segment has ≥ 3 points — cannot estimate velocity."
+        )
+    station_ok = ~np.isin(codes, list(failed))
+    fitted = usable & station_ok[g_station]
+
+    sums = SegmentSums(
+        station=codes[g_station[fitted]],
+        label=seg[starts[fitted]],
+        t_start=t0[fitted],
+        t_end=t[(starts + sizes - 1)[fitted]],
+        n_rows=sizes[fitted].astype(np.int64),
+        lower=lower[fitted],
+        upper=upper[fitted],
+        d0=d0[fitted],
+        n=n[fitted].astype(np.int64),
+        st=st[fitted], stt=stt[fitted],
+        sd=sd[fitted], std=std[fitted], sdd=sdd[fitted],
+    )
+    return sums, failed, outlier & station_ok[station_idx]
+
+
+def _estimate_block(
+    codes: np.ndarray,
+    station_idx: np.ndarray,
+    t: np.ndarray,
+    enu_m: np.ndarray,
+    offsets: dict[str, list[OffsetEvent]],
+    outlier_iqr_factor: float,
+) -> tuple[VelocityTable, np.ndarray]:
+    """estimate_velocities() in this process; arguments as for _segment_sums."""
+    sums, failed, outliers = _segment_sums(
+        codes, station_idx, t, enu_m, offsets, outlier_iqr_factor
+    )
+    return sums.table(failed), outliers
+
+
+def _estimate_block_star(args):
+    return _estimate_block(*args)
+
+
+@dataclass
+class NetworkVelocities:
+    """estimate_velocities() result: the velocity table and the outlier mask."""
+    table: VelocityTable
+    outliers: np.ndarray        # (N,) True where an input row was rejected as outlier
+    decimal_year: np.ndarray    # (N,) input epochs, for outlier_epochs()
+    station: np.ndarray         # (N,)
+
+    def outlier_epochs(self, station: str) -> dict[int, tuple[float, ...]]:
+        """Segment number → epochs rejected as outliers, for one station."""
+        # In time order, as estimate_velocity reports them, whatever the row order
+        years = np.sort(self.decimal_year[self.outliers & (self.station == station)])
+        seg_of = self.table.segment[self.table.station == station]
+        t_start = self.table.t_start[self.table.station == station]
+        found: dict[int, tuple[float, ...]] = dict.fromkeys(seg_of.tolist(), ())
+        for year in years.tolist():
+            seg = seg_of[np.searchsorted(t_start, year, side="right") - 1]
+            found[int(seg)] += (year,)
+        return found
+
+    def result(self, station: str) -> VelocityResult:
+        """VelocityResult for one station, as estimate_velocity returns it."""
+        return self.table.result(station, self.outlier_epochs(station))
+
+
+def estimate_velocities(
+    series: EnuSeries,
+    offsets: dict[str, list[OffsetEvent]] | None = None,
+    *,
+    outlier_iqr_factor: float = 3.0,
+    workers: int = 1,
+) -> NetworkVelocities:
+    """
+    estimate_velocity() for every station of a network in one pass.
+
+    Args:
+        series:             Columnar ENU series (station, decimal_year, enu_m
+                            columns), e.g. crd_pipeline.crd_directory_to_enu_series().
+        offsets:            Station → discontinuity events, as returned by
+                            parse_offsets_file().  None → single segments.
+        outlier_iqr_factor: Multiplier on IQR for outlier detection.
+        workers:            > 1 splits the stations across that many processes.
+
+    Returns:
+        NetworkVelocities; .table.final() gives one velocity per station.
+        Stations estimate_velocity would raise for are in .table.failed.
+    """
+    station = np.asarray(series.station)
+    t = np.asarray(series.decimal_year, dtype=float)
+    enu_m = np.asarray(series.enu_m, dtype=float)
+    if enu_m.ndim != 2 or enu_m.shape[1] != 3:
+        raise ValueError("enu_m must be shape (N, 3)")
+    if not len(station) == len(t) == len(enu_m):
+        raise ValueError("station, decimal_year and enu_m must have the same number of rows")
+    offsets = offsets or {}
+
+    codes, station_idx = np.unique(station, return_inverse=True)
+    order = np.lexsort((t, station_idx))
+    sorted_already = bool(np.all(order == np.arange(len(order))))
+    if not sorted_already:
+        station_idx, t, enu_m = station_idx[order], t[order], enu_m[order]
+
+    if workers > 1 and len(codes) > 1:
+        # Contiguous row blocks of whole stations, one per worker
+        cut = np.linspace(0, len(codes), min(workers, len(codes)) + 1, dtype=int)
+        rows = np.searchsorted(station_idx, cut)
+        blocks = [
+            (codes[c0:c1], station_idx[r0:r1] - c0, t[r0:r1], enu_m[r0:r1],
+             offsets, outlier_iqr_factor)
+            for c0, c1, r0, r1 in zip(cut[:-1], cut[1:], rows[:-1], rows[1:], strict=True)
+        ]
+        with ProcessPoolExecutor(max_workers=len(blocks)) as pool:
+            parts = list(pool.map(_estimate_block_star, blocks))
+        failed: dict[str, str] = {}
+        for part, _ in parts:
+            failed.update(part.failed)
+        tables = [part for part, _ in parts]
+        table = VelocityTable(
+            *(np.concatenate([getattr(p, name) for p in tables]) for name in (
+                "station", "segment", "t_start", "t_end", "n_points",
+                "vel_mm_yr", "sig_mm_yr", "r2",
+            )),
+            failed=failed,
+        )
+        outliers = np.concatenate([mask for _, mask in parts])
+    else:
+        table, outliers = _estimate_block(codes, station_idx, t, enu_m, offsets,
+                                          outlier_iqr_factor)
+
+    if not sorted_already:
+        unsorted = np.empty_like(outliers)
+        unsorted[order] = outliers
+        outliers = unsorted
+        t = np.asarray(series.decimal_year, dtype=float)
+    return NetworkVelocities(table=table, outliers=outliers, decimal_year=t, station=station)
+
+
 def parse_offsets_file(path: Path) -> dict[str, list[OffsetEvent]]:
     """
     Parse a PHIVOLCS offsets text file into per-station OffsetEvent lists.
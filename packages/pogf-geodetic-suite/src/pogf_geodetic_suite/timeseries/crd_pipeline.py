@@ -5,6 +5,11 @@ Reads Bernese 5.4 CRD files from a campaign directory, extracts ECEF
 coordinates per station per session, and transforms to local ENU coordinates
 relative to a chosen reference station.
 
+crd_directory_to_enu_series() returns the result as columns (EnuSeries);
+the transform runs once over every (station, epoch) row with the rotation
+computed once for the reference. crd_directory_to_enu() returns the same
+rows as StationEpoch records.
+
 File naming convention assumed: the 5-char YYDDD session code appears at
 the end of the filename stem, e.g. ``F1_23001.CRD`` → session ``23001``.
 A custom extractor can be supplied if the campaign uses a different scheme.
@@ -12,11 +17,13 @@ A custom extractor can be supplied if the campaign uses a different scheme.
 from __future__ import annotations
 
 import re
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from pathlib import Path
 
-import pymap3d
+import numpy as np
+
+from pogf_geodetic_suite.modeling.coordinates import ecef_to_enu, ecef_to_geodetic
 
 
 @dataclass(frozen=True)
@@ -29,6 +36,51 @@ class StationEpoch:
     up_m: float
 
 
+@dataclass
+class EnuSeries:
+    """
+    ENU displacements of many stations as columns, one row per station epoch,
+    sorted by (station, decimal_year).
+    """
+    station: np.ndarray         # (N,) station codes
+    decimal_year: np.ndarray    # (N,)
+    enu_m: np.ndarray           # (N, 3) east, north, up in metres
+
+    def __len__(self) -> int:
+        return len(self.station)
+
+    @property
+    def east_m(self) -> np.ndarray:
+        return self.enu_m[:, 0]
+
+    @property
+    def north_m(self) -> np.ndarray:
+        return self.enu_m[:, 1]
+
+    @property
+    def up_m(self) -> np.ndarray:
+        return self.enu_m[:, 2]
+
+    def stations(self) -> list[str]:
+        """Station codes present, sorted."""
+        return np.unique(self.station).tolist()
+
+    def for_station(self, code: str) -> tuple[np.ndarray, np.ndarray]:
+        """(decimal_year (n,), enu_m (n, 3)) of one station, in time order."""
+        lo = np.searchsorted(self.station, code, side="left")
+        hi = np.searchsorted(self.station, code, side="right")
+        return self.decimal_year[lo:hi], self.enu_m[lo:hi]
+
+    def to_epochs(self) -> list[StationEpoch]:
+        """The rows as StationEpoch records."""
+        return [
+            StationEpoch(station=code, decimal_year=t, east_m=e, north_m=n, up_m=u)
+            for code, t, (e, n, u) in zip(
+                self.station.tolist(), self.decimal_year.tolist(), self.enu_m.tolist(), strict=True
+            )
+        ]
+
+
 # ---------------------------------------------------------------------------
 # CRD file parser
 # ---------------------------------------------------------------------------
@@ -50,28 +102,33 @@ def read_crd_file(path: Path) -> list[tuple[str, float, float, float]]:
 
     Both are handled by trying to parse the third field as a float.
     """
-    results: list[tuple[str, float, float, float]] = []
     with path.open(encoding="ascii", errors="replace") as fh:
-        for line in fh:
-            parts = line.split()
-            if len(parts) < 5:
-                continue
+        return parse_crd_lines(fh)
+
+
+def parse_crd_lines(lines: Iterable[str]) -> list[tuple[str, float, float, float]]:
+    """read_crd_file() for lines already in memory."""
+    results: list[tuple[str, float, float, float]] = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) < 5:
+            continue
+        try:
+            int(parts[0])   # sequence number filters header/blank lines
+        except ValueError:
+            continue
+        station = parts[1][:4].upper()
+        # Detect whether dome is present: if parts[2] is not a float, it is.
+        try:
+            x = float(parts[2])
+            y, z = float(parts[3]), float(parts[4])
+        except ValueError:
+            # parts[2] is the dome number (e.g. "00000S000")
             try:
-                int(parts[0])   # sequence number filters header/blank lines
-            except ValueError:
+                x, y, z = float(parts[3]), float(parts[4]), float(parts[5])
+            except (ValueError, IndexError):
                 continue
-            station = parts[1][:4].upper()
-            # Detect whether dome is present: if parts[2] is not a float, it is.
-            try:
-                x = float(parts[2])
-                y, z = float(parts[3]), float(parts[4])
-            except ValueError:
-                # parts[2] is the dome number (e.g. "00000S000")
-                try:
-                    x, y, z = float(parts[3]), float(parts[4]), float(parts[5])
-                except (ValueError, IndexError):
-                    continue
-            results.append((station, x, y, z))
+        results.append((station, x, y, z))
     return results
 
 
@@ -132,12 +189,14 @@ def _extract_session_from_filename(filename: str) -> str | None:
 # ---------------------------------------------------------------------------
 
 
-def crd_directory_to_enu(
+def crd_directory_to_enu_series(
     crd_dir: Path,
     reference_station: str,
     *,
     session_extractor: Callable[[str], str | None] | None = None,
-) -> list[StationEpoch]:
+    store_path: Path | None = None,
+    workers: int | None = None,
+) -> EnuSeries:
     """
     Read all *.CRD files in crd_dir; return ENU time series for all stations.
 
@@ -152,69 +211,71 @@ def crd_directory_to_enu(
         reference_station:  4-char station code used as the ENU origin.
         session_extractor:  Optional callable mapping filename → YYDDD session
                             string.  Defaults to the built-in pattern matcher.
+        store_path:         Optional NPZ store of parsed files (see crd_store);
+                            only new or changed CRD files are parsed.
+        workers:            Parser processes (see crd_store.load_crd_directory).
 
     Returns:
-        List of StationEpoch, sorted by (station, decimal_year).
+        EnuSeries, sorted by (station, decimal_year).
 
     Raises:
         ValueError: if no usable CRD files are found, or if the reference
                     station does not appear in any CRD file.
     """
+    from pogf_geodetic_suite.timeseries.crd_store import load_crd_directory
+
     if session_extractor is None:
         session_extractor = _extract_session_from_filename
 
     ref = reference_station.upper()[:4]
 
-    # Pass 1: collect all epochs
-    epochs: list[tuple[float, list[tuple[str, float, float, float]]]] = []
-    for crd_path in sorted(crd_dir.glob("*.CRD")):
-        session = session_extractor(crd_path.name)
+    # Pass 1: parse (or load from the store) every file; date each file once
+    table = load_crd_directory(crd_dir, store_path, workers=workers)
+    file_years = np.full(len(table.files), np.nan)
+    for i, name in enumerate(table.files):
+        session = session_extractor(name)
         if session is None:
             continue
         try:
-            decimal_year = session_to_decimal_year(session)
+            file_years[i] = session_to_decimal_year(session)
         except ValueError:
             continue
-        stations = read_crd_file(crd_path)
-        if stations:
-            epochs.append((decimal_year, stations))
+    decimal_year = file_years[table.file]
+    dated = ~np.isnan(decimal_year)
+    station, decimal_year, xyz = table.station[dated], decimal_year[dated], table.xyz[dated]
 
-    if not epochs:
+    if not len(station):
         raise ValueError(f"No usable *.CRD files found in {crd_dir}")
 
-    # Pass 2: locate reference station geodetic coordinates
-    ref_lat = ref_lon = ref_alt = None
-    for _, stations in epochs:
-        for code, x, y, z in stations:
-            if code == ref:
-                ref_lat, ref_lon, ref_alt = pymap3d.ecef2geodetic(x, y, z, deg=True)
-                break
-        if ref_lat is not None:
-            break
-
-    if ref_lat is None:
+    # Pass 2: reference station geodetic coordinates, from its first epoch
+    is_ref = station == ref
+    if not is_ref.any():
         raise ValueError(
             f"Reference station {ref!r} not found in any CRD file in {crd_dir}"
         )
+    ref_lat, ref_lon, ref_alt = ecef_to_geodetic(*xyz[np.argmax(is_ref)])
 
-    # Pass 3: transform all non-reference stations to ENU
-    results: list[StationEpoch] = []
-    for decimal_year, stations in epochs:
-        for code, x, y, z in stations:
-            if code == ref:
-                continue
-            east, north, up = pymap3d.ecef2enu(
-                x, y, z, ref_lat, ref_lon, ref_alt, deg=True
-            )
-            results.append(
-                StationEpoch(
-                    station=code,
-                    decimal_year=decimal_year,
-                    east_m=float(east),
-                    north_m=float(north),
-                    up_m=float(up),
-                )
-            )
+    # Pass 3: transform all non-reference stations to ENU in one go
+    keep = ~is_ref
+    station, decimal_year = station[keep], decimal_year[keep]
+    enu = ecef_to_enu(xyz[keep], ref_lat, ref_lon, ref_alt)
+
+    order = np.lexsort((decimal_year, station))
+    return EnuSeries(station=station[order], decimal_year=decimal_year[order], enu_m=enu[order])
+
+
+def crd_directory_to_enu(
+    crd_dir: Path,
+    reference_station: str,
+    *,
+    session_extractor: Callable[[str], str | None] | None = None,
+    store_path: Path | None = None,
+) -> list[StationEpoch]:
+    """
+    crd_directory_to_enu_series() as a list of StationEpoch, sorted by
+    (station, decimal_year). Raises ValueError in the same cases.
+    """
+    return crd_directory_to_enu_series(
+        crd_dir, reference_station, session_extractor=session_extractor, store_path=store_path
+    ).to_epochs()
 
-    results.sort(key=lambda ep: (ep.station, ep.decimal_year))
-    return results
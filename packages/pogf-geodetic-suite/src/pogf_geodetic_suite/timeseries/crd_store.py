@@ -0,0 +1,192 @@
+"""
+Parsed Bernese CRD coordinates, cached per file in one columnar NPZ store.
+
+The post-BPE velocity step reads decades of daily *.CRD files after every
+run, although only the newest one changed. load_crd_directory() keeps what
+it parsed in a single .npz:
+
+    names, sizes, mtimes, hashes, counts   one entry per CRD file
+    stations                               distinct station codes
+    station, xyz                           one row per (file, station), in file order
+
+On each call the directory is stat'ed. Files whose size and mtime match
+their entry are taken from the store as is. A changed mtime is checked
+against the stored SHA-256, so a file that was only touched keeps its rows.
+New and changed files are parsed (in a process pool when there are many),
+vanished files are dropped, and the store is rewritten atomically. After a
+daily run adds one CRD, only that file is read.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from pogf_geodetic_suite.timeseries.crd_pipeline import parse_crd_lines
+
+logger = logging.getLogger(__name__)
+
+_STORE_VERSION = 1
+_POOL_MIN_FILES = 32           # below this a process pool costs more than it saves
+
+
+@dataclass
+class CrdTable:
+    """ECEF coordinates of every station in every CRD file, as columns."""
+    files: list[str]            # CRD file names, sorted
+    station: np.ndarray         # (N,) station codes
+    file: np.ndarray            # (N,) index into files
+    xyz: np.ndarray             # (N, 3) ECEF metres
+
+    def __len__(self) -> int:
+        return len(self.station)
+
+
+@dataclass
+class _FileRows:
+    size: int
+    mtime_ns: int
+    sha256: str
+    station: np.ndarray         # (n,)
+    xyz: np.ndarray             # (n, 3)
+
+
+def _parse(path: str) -> _FileRows:
+    """Hash and parse one CRD file (runs in a worker process)."""
+    st = os.stat(path)          # before reading: a later write shows up as a newer mtime
+    data = Path(path).read_bytes()
+    rows = parse_crd_lines(data.decode("ascii", errors="replace").splitlines())
+    return _FileRows(
+        size=st.st_size,
+        mtime_ns=st.st_mtime_ns,
+        sha256=hashlib.sha256(data).hexdigest(),
+        station=np.array([r[0] for r in rows], dtype="<U4"),
+        xyz=np.array([r[1:] for r in rows], dtype=float).reshape(-1, 3),
+    )
+
+
+def _read_store(path: Path) -> dict[str, _FileRows]:
+    """Entries of the store at path; empty if it is missing, stale or unreadable."""
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            if int(npz["version"]) != _STORE_VERSION:
+                return {}
+            names, sizes, mtimes = npz["names"], npz["sizes"], npz["mtimes"]
+            hashes, counts = npz["hashes"], npz["counts"]
+            station = npz["stations"][npz["station"]]
+            xyz = npz["xyz"]
+    except (OSError, KeyError, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logger.warning("Ignoring unreadable CRD store %s: %s", path, e)
+        return {}
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    return {
+        name: _FileRows(int(size), int(mtime), sha, station[lo:hi], xyz[lo:hi])
+        for name, size, mtime, sha, lo, hi in zip(
+            names.tolist(), sizes, mtimes, hashes.tolist(), bounds[:-1], bounds[1:], strict=True
+        )
+    }
+
+
+def _write_store(path: Path, entries: dict[str, _FileRows]) -> None:
+    names = sorted(entries)
+    rows = [entries[n] for n in names]
+    station = np.concatenate([r.station for r in rows]) if rows else np.array([], dtype="<U4")
+    stations, station_idx = np.unique(station, return_inverse=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                version=np.array(_STORE_VERSION),
+                names=np.array(names, dtype=str),
+                sizes=np.array([r.size for r in rows], dtype=np.int64),
+                mtimes=np.array([r.mtime_ns for r in rows], dtype=np.int64),
+                hashes=np.array([r.sha256 for r in rows], dtype="<U64"),
+                counts=np.array([len(r.station) for r in rows], dtype=np.int64),
+                stations=stations,
+                station=station_idx.astype(np.int32),
+                xyz=np.concatenate([r.xyz for r in rows]) if rows else np.empty((0, 3)),
+            )
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_crd_directory(
+    crd_dir: Path,
+    store_path: Path | None = None,
+    *,
+    workers: int | None = None,
+) -> CrdTable:
+    """
+    Coordinates from every *.CRD file in crd_dir.
+
+    Args:
+        crd_dir:     Directory containing Bernese *.CRD files.
+        store_path:  NPZ store to reuse and update; None parses everything
+                     and keeps nothing.
+        workers:     Parser processes; None → os.cpu_count(), 1 → in-process.
+
+    Returns:
+        CrdTable with rows grouped by file, files in name order.
+    """
+    crd_dir = Path(crd_dir)
+    paths = sorted(crd_dir.glob("*.CRD"))
+    cached = _read_store(Path(store_path)) if store_path is not None else {}
+
+    entries: dict[str, _FileRows] = {}
+    to_parse: list[Path] = []
+    touched = False
+    for path in paths:
+        old = cached.get(path.name)
+        st = path.stat()
+        if old is not None and (old.size, old.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            entries[path.name] = old
+        elif old is not None and old.size == st.st_size and old.sha256 == _sha256(path):
+            old.mtime_ns = st.st_mtime_ns
+            entries[path.name] = old
+            touched = True
+        else:
+            to_parse.append(path)
+
+    workers = workers or os.cpu_count() or 1
+    if len(to_parse) >= _POOL_MIN_FILES and workers > 1:
+        chunksize = max(1, len(to_parse) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse, map(str, to_parse), chunksize=chunksize))
+    else:
+        parsed = [_parse(str(p)) for p in to_parse]
+    entries.update(zip((p.name for p in to_parse), parsed, strict=True))
+
+    dropped = len(cached.keys() - entries.keys())
+    logger.info(
+        "CRD files: %d total, %d parsed, %d from store, %d dropped",
+        len(paths), len(to_parse), len(paths) - len(to_parse), dropped,
+    )
+    if store_path is not None and (to_parse or touched or dropped):
+        _write_store(Path(store_path), entries)
+
+    files = [p.name for p in paths]
+    rows = [entries[name] for name in files]
+    if not rows:
+        return CrdTable(files, np.array([], dtype="<U4"), np.array([], dtype=np.int64),
+                        np.empty((0, 3)))
+    counts = [len(r.station) for r in rows]
+    return CrdTable(
+        files=files,
+        station=np.concatenate([r.station for r in rows]),
+        file=np.repeat(np.arange(len(rows)), counts),
+        xyz=np.concatenate([r.xyz for r in rows]),
+    )
@@ -0,0 +1,401 @@
+"""
+Trajectory models — one fit over a station's whole ENU series.
+
+    d(t) = a + v·(t − t_ref)
+         + Σ_j b_j·H(t − t_j)                          step at each offset
+         + Σ_k s_k·sin(2πkt) + c_k·cos(2πkt)           annual, semiannual, ...
+         + Σ_q A_q·f((t − t_q) / τ_q)·H(t − t_q)       postseismic relaxation
+
+with f(x) = log(1 + x) or 1 − exp(−x), after earthquakes (OffsetType.EQ).
+
+estimate_velocity() fits independent lines between offsets and ignores
+seasonal and postseismic signals; the displacement scripts in
+analysis/04 Displacement extend those lines by hand across two earthquakes.
+Here every epoch constrains one shared velocity, and the coseismic steps
+come out as parameters.
+
+For fixed τ the model is linear in its parameters and is solved by least
+squares for E, N and U at once. Each earthquake's τ is searched on a
+log-spaced grid — every grid value solved in one stacked set of normal
+equations — and refined by a parabola through the best three in log τ;
+with several earthquakes the searches alternate until the τs settle.
+fit_trajectories() fits a network, optionally across a process pool.
+"""
+from __future__ import annotations
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+
+from pogf_geodetic_suite.timeseries.analysis import OffsetEvent, OffsetType, VelocityTable
+
+if TYPE_CHECKING:
+    from pogf_geodetic_suite.timeseries.crd_pipeline import EnuSeries
+
+Relaxation = Literal["log", "exp"]
+
+# τ from one day to ten years
+DEFAULT_TAU_GRID = np.geomspace(1.0 / 365.25, 10.0, 31)
+_TAU_PASSES = 3                 # alternating searches when there are several earthquakes
+
+
+# ---------------------------------------------------------------------------
+# Design matrix
+# ---------------------------------------------------------------------------
+
+
+def _relaxation(x: np.ndarray, kind: Relaxation) -> np.ndarray:
+    """f(x) for x = (t − t_q)/τ; zero before the event."""
+    x = np.maximum(x, 0.0)
+    return np.log1p(x) if kind == "log" else -np.expm1(-x)
+
+
+def design_matrix(
+    t: np.ndarray,
+    *,
+    t_ref: float,
+    steps: tuple[float, ...] = (),
+    harmonics: int = 2,
+    taus: dict[float, float] | None = None,
+    relaxation: Relaxation = "log",
+) -> tuple[np.ndarray, list[str]]:
+    """
+    Columns of the trajectory model at epochs t.
+
+    Args:
+        t:          Decimal years, shape (N,).
+        t_ref:      Epoch of the velocity term's zero.
+        steps:      Offset dates, one Heaviside step each.
+        harmonics:  Number of seasonal frequencies (1/yr, 2/yr, ...).
+        taus:       Earthquake date → relaxation time τ in years.
+        relaxation: "log" or "exp".
+
+    Returns:
+        G, shape (N, P), and the P column names.
+    """
+    t = np.asarray(t, dtype=float)
+    taus = taus or {}
+    k = np.arange(1, harmonics + 1)
+    phase = 2.0 * np.pi * t[:, None] * k[None, :]
+    step_dates = np.array(steps, dtype=float)
+    q_dates = np.array(list(taus), dtype=float)
+    q_taus = np.array(list(taus.values()), dtype=float)
+
+    G = np.hstack([
+        np.ones((len(t), 1)),
+        (t - t_ref)[:, None],
+        (t[:, None] >= step_dates[None, :]).astype(float),
+        np.sin(phase),
+        np.cos(phase),
+        _relaxation((t[:, None] - q_dates[None, :]) / q_taus[None, :], relaxation),
+    ])
+    names = (
+        ["offset", "velocity"]
+        + [f"step {d:.4f}" for d in step_dates]
+        + [f"sin {i}/yr" for i in k] + [f"cos {i}/yr" for i in k]
+        + [f"{relaxation} {d:.4f}" for d in q_dates]
+    )
+    return G, names
+
+
+def _stacked_rss(G: np.ndarray, col: int, dt: np.ndarray, d: np.ndarray,
+                 taus: np.ndarray, relaxation: Relaxation) -> np.ndarray:
+    """
+    Residual sum of squares (over E, N and U) of the fit with column col of G
+    replaced by the relaxation of dt for each τ in taus — one stacked solve.
+    Only that row and column of the normal equations change with τ.
+    """
+    F = _relaxation(dt[None, :] / taus[:, None], relaxation)        # (T, N)
+    FG = F @ G
+    GtG = np.repeat((G.T @ G)[None], len(taus), axis=0)
+    GtG[:, col, :] = FG
+    GtG[:, :, col] = FG
+    GtG[:, col, col] = np.einsum("tn,tn->t", F, F)
+    Gtd = np.repeat((G.T @ d)[None], len(taus), axis=0)
+    Gtd[:, col, :] = F @ d
+    # pinv: a very short exp relaxation is almost the step it follows
+    m = np.linalg.pinv(GtG) @ Gtd
+    return np.sum(d * d) - np.einsum("tpc,tpc->t", m, Gtd)
+
+
+def _search_tau(G: np.ndarray, col: int, dt: np.ndarray, d: np.ndarray,
+                grid: np.ndarray, relaxation: Relaxation) -> float:
+    """τ minimising the residuals: best grid value, refined by a parabola in log τ."""
+    rss = _stacked_rss(G, col, dt, d, grid, relaxation)
+    i = int(np.argmin(rss))
+    if not 0 < i < len(grid) - 1:
+        return float(grid[i])
+    x0, x1, x2 = np.log(grid[i - 1:i + 2])
+    y0, y1, y2 = rss[i - 1:i + 2]
+    den = (x1 - x0) * (y1 - y2) - (x1 - x2) * (y1 - y0)
+    if den == 0:
+        return float(grid[i])
+    x = x1 - 0.5 * ((x1 - x0) ** 2 * (y1 - y2) - (x1 - x2) ** 2 * (y1 - y0)) / den
+    tau = float(np.exp(np.clip(x, x0, x2)))
+    best = _stacked_rss(G, col, dt, d, np.array([tau]), relaxation)[0]
+    return tau if best < y1 else float(grid[i])
+
+
+# ---------------------------------------------------------------------------
+# Fit
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class TrajectoryFit:
+    """Trajectory model of one station. Parameters are per ENU component."""
+    station: str
+    t_ref: float
+    names: list[str]            # P column names, see design_matrix()
+    params: np.ndarray          # (P, 3) metres; velocity in m/yr
+    sigma: np.ndarray           # (P, 3) 1-sigma, same units
+    steps: tuple[float, ...]    # offset dates with a step term
+    taus: dict[float, float]    # earthquake date → τ (years)
+    harmonics: int
+    relaxation: Relaxation
+    n_points: int               # epochs fitted after outlier removal
+    t_start: float
+    t_end: float
+    rms_m: np.ndarray           # (3,) residual RMS
+    r2: np.ndarray              # (3,)
+    outlier_epochs: tuple[float, ...] = ()
+
+    @property
+    def velocity_mm_yr(self) -> np.ndarray:
+        return self.params[1] * 1000.0
+
+    @property
+    def sig_velocity_mm_yr(self) -> np.ndarray:
+        return self.sigma[1] * 1000.0
+
+    def term(self, name: str) -> np.ndarray:
+        """(3,) ENU parameter of one column, e.g. "step 2019.8000" or "annual"."""
+        if name == "annual":
+            return np.hypot(self.term("sin 1/yr"), self.term("cos 1/yr"))
+        return self.params[self.names.index(name)]
+
+    def design(self, t: np.ndarray) -> np.ndarray:
+        G, _ = design_matrix(t, t_ref=self.t_ref, steps=self.steps, harmonics=self.harmonics,
+                             taus=self.taus, relaxation=self.relaxation)
+        return G
+
+    def predict(self, t: np.ndarray) -> np.ndarray:
+        """Modelled ENU displacement (N, 3) in metres at epochs t."""
+        return self.design(t) @ self.params
+
+
+def _solve(G: np.ndarray, d: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Least-squares parameters (P, 3), their 1-sigma (P, 3) and residuals (N, 3)."""
+    params, _, _, _ = np.linalg.lstsq(G, d, rcond=None)
+    resid = d - G @ params
+    dof = max(len(d) - G.shape[1], 1)
+    cov = np.linalg.pinv(G.T @ G)
+    sigma = np.sqrt(np.outer(np.diag(cov).clip(min=0.0), np.sum(resid ** 2, axis=0) / dof))
+    return params, sigma, resid
+
+
+def _fit(t: np.ndarray, d: np.ndarray, steps: tuple[float, ...], quakes: tuple[float, ...],
+         harmonics: int, relaxation: Relaxation | None, tau_grid: np.ndarray):
+    """Solve the model for sorted t; searches τ when there are quakes."""
+    t_ref = float(t.mean())
+    taus = {q: float(math.sqrt(tau_grid[0] * tau_grid[-1])) for q in quakes}
+    kind: Relaxation = relaxation or "log"
+    if taus:
+        G, _ = design_matrix(t, t_ref=t_ref, steps=steps, harmonics=harmonics,
+                             taus=taus, relaxation=kind)
+        first = G.shape[1] - len(taus)
+        for _ in range(_TAU_PASSES if len(taus) > 1 else 1):
+            before = dict(taus)
+            for j, q in enumerate(quakes):
+                taus[q] = _search_tau(G, first + j, t - q, d, tau_grid, kind)
+                G[:, first + j] = _relaxation((t - q) / taus[q], kind)
+            if all(math.isclose(taus[q], before[q], rel_tol=1e-3) for q in quakes):
+                break
+    G, names = design_matrix(t, t_ref=t_ref, steps=steps, harmonics=harmonics,
+                             taus=taus, relaxation=kind)
+    params, sigma, resid = _solve(G, d)
+    return t_ref, names, taus, params, sigma, resid
+
+
+def fit_trajectory(
+    t: np.ndarray,
+    enu_m: np.ndarray,
+    *,
+    offsets: list[OffsetEvent] | None = None,
+    harmonics: int = 2,
+    relaxation: Relaxation | None = None,
+    tau_grid: np.ndarray | None = None,
+    outlier_iqr_factor: float | None = 3.0,
+    station: str = "",
+) -> TrajectoryFit:
+    """
+    Fit a trajectory model to one station's ENU series.
+
+    Args:
+        t:                  Decimal years, shape (N,).
+        enu_m:              ENU displacements in metres, shape (N, 3).
+        offsets:            Discontinuity events; each inside the series gets
+                            a step. None → no steps.
+        harmonics:          Seasonal frequencies: 2 → annual + semiannual.
+        relaxation:         "log" or "exp" postseismic term after each
+                            OffsetType.EQ event; None → steps only.
+        tau_grid:           τ values (years) to search; DEFAULT_TAU_GRID.
+        outlier_iqr_factor: Epochs whose residual from a first fit lies
+                            beyond this many IQRs in any component are
+                            dropped and the model refit. None → no removal.
+        station:            Label for the returned TrajectoryFit.
+
+    Returns:
+        TrajectoryFit; .velocity_mm_yr is the shared velocity.
+
+    Raises:
+        ValueError: if there are fewer epochs than model parameters + 1.
+    """
+    t = np.asarray(t, dtype=float)
+    enu_m = np.asarray(enu_m, dtype=float)
+    if enu_m.ndim != 2 or enu_m.shape[1] != 3:
+        raise ValueError("enu_m must be shape (N, 3)")
+    if len(t) != enu_m.shape[0]:
+        raise ValueError("t and enu_m must have the same number of rows")
+    order = np.argsort(t, kind="stable")
+    t, enu_m = t[order], enu_m[order]
+    grid = np.asarray(DEFAULT_TAU_GRID if tau_grid is None else tau_grid, dtype=float)
+
+    # Only offsets with epochs on both sides can be estimated
+    inside = sorted({ev.date for ev in offsets or () if len(t) and t[0] < ev.date <= t[-1]})
+    steps = tuple(inside)
+    quakes = tuple(sorted({ev.date for ev in offsets or ()
+                           if ev.offset_type == OffsetType.EQ and ev.date in inside}))
+    if relaxation is None:
+        quakes = ()
+    n_params = 2 + len(steps) + 2 * harmonics + len(quakes)
+
+    def check(n: int) -> None:
+        if n <= n_params:
+            raise ValueError(
+                f"Station {station!r}: {n} point(s) for {n_params} trajectory "
+                f"parameters (need ≥ {n_params + 1})."
+            )
+
+    check(len(t))
+    t_ref, names, taus, params, sigma, resid = _fit(
+        t, enu_m, steps, quakes, harmonics, relaxation, grid
+    )
+    outlier = np.zeros(len(t), dtype=bool)
+    if outlier_iqr_factor is not None:
+        q1, q3 = np.percentile(resid, [25, 75], axis=0)
+        spread = outlier_iqr_factor * (q3 - q1)
+        outlier = np.any((resid < q1 - spread) | (resid > q3 + spread), axis=1)
+        if outlier.any():
+            check(int((~outlier).sum()))
+            t_ref, names, taus, params, sigma, resid = _fit(
+                t[~outlier], enu_m[~outlier], steps, quakes, harmonics, relaxation, grid
+            )
+
+    kept = enu_m[~outlier]
+    sst = np.sum((kept - kept.mean(axis=0)) ** 2, axis=0)
+    ssr = np.sum(resid ** 2, axis=0)
+    return TrajectoryFit(
+        station=station,
+        t_ref=t_ref,
+        names=names,
+        params=params,
+        sigma=sigma,
+        steps=steps,
+        taus=taus,
+        harmonics=harmonics,
+        relaxation=relaxation or "log",
+        n_points=int(len(kept)),
+        t_start=float(t[0]),
+        t_end=float(t[-1]),
+        rms_m=np.sqrt(ssr / len(kept)),
+        r2=np.where(sst > 0, 1.0 - ssr / np.where(sst > 0, sst, 1.0), 0.0),
+        outlier_epochs=tuple(float(v) for v in t[outlier]),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Network
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class NetworkTrajectories:
+    """fit_trajectories() result."""
+    fits: dict[str, TrajectoryFit]
+    failed: dict[str, str]      # station → reason fit_trajectory raised
+
+    def velocity_table(self) -> VelocityTable:
+        """The shared velocities as a VelocityTable, one segment per station."""
+        fits = [self.fits[code] for code in sorted(self.fits)]
+        return VelocityTable(
+            station=np.array([f.station for f in fits], dtype="<U4"),
+            segment=np.zeros(len(fits), dtype=np.int64),
+            t_start=np.array([f.t_start for f in fits]),
+            t_end=np.array([f.t_end for f in fits]),
+            n_points=np.array([f.n_points for f in fits], dtype=np.int64),
+            vel_mm_yr=np.array([f.velocity_mm_yr for f in fits]).reshape(-1, 3),
+            sig_mm_yr=np.array([f.sig_velocity_mm_yr for f in fits]).reshape(-1, 3),
+            r2=np.array([f.r2 for f in fits]).reshape(-1, 3),
+            failed=dict(self.failed),
+        )
+
+
+def _fit_station(args) -> TrajectoryFit | str:
+    code, t, enu_m, kwargs = args
+    try:
+        return fit_trajectory(t, enu_m, station=code, **kwargs)
+    except ValueError as e:
+        return str(e)
+
+
+def fit_trajectories(
+    series: EnuSeries,
+    offsets: dict[str, list[OffsetEvent]] | None = None,
+    *,
+    workers: int = 1,
+    **kwargs,
+) -> NetworkTrajectories:
+    """
+    fit_trajectory() for every station of series.
+
+    Args:
+        series:   Columnar ENU series, e.g. crd_pipeline.crd_directory_to_enu_series().
+        offsets:  Station → discontinuity events, as returned by parse_offsets_file().
+        workers:  > 1 fits stations in that many processes.
+        **kwargs: harmonics, relaxation, tau_grid, outlier_iqr_factor — as
+                  for fit_trajectory().
+
+    Returns:
+        NetworkTrajectories; stations fit_trajectory raises for are in .failed.
+    """
+    offsets = offsets or {}
+    station = np.asarray(series.station)
+    t = np.asarray(series.decimal_year, dtype=float)
+    enu_m = np.asarray(series.enu_m, dtype=float)
+    codes, station_idx = np.unique(station, return_inverse=True)
+    order = np.argsort(station_idx, kind="stable")
+    bounds = np.searchsorted(station_idx[order], np.arange(len(codes) + 1))
+    tasks = [
+        (str(code), t[order[a:b]], enu_m[order[a:b]],
+         {"offsets": offsets.get(str(code)), **kwargs})
+        for code, a, b in zip(codes, bounds[:-1], bounds[1:], strict=True)
+    ]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            results = list(pool.map(_fit_station, tasks, chunksize=chunksize))
+    else:
+        results = [_fit_station(task) for task in tasks]
+
+    fits: dict[str, TrajectoryFit] = {}
+    failed: dict[str, str] = {}
+    for (code, *_), result in zip(tasks, results, strict=True):
+        if isinstance(result, str):
+            failed[code] = result
+        else:
+            fits[code] = result
+    return NetworkTrajectories(fits=fits, failed=failed)
@@ -0,0 +1,308 @@
+"""
+Network velocities kept up to date from running sums, one day at a time.
+
+estimate_velocities() refits every segment from the whole series. After a
+daily run each station gains a single epoch, and a straight-line fit only
+needs n, Σt, Σt², Σd, Σtd and Σd² per segment. RunningVelocities keeps those
+sums (analysis.SegmentSums) together with the IQR outlier bounds of the last
+full fit, and persists them in one .npz:
+
+    stations, offsets, rows, t_last, failed    one entry per station
+    station, label, t_start, ... sdd           one row per fitted segment
+
+A new epoch that falls inside its station's current segment and outlier
+bounds is added to the sums in O(1). A station is refit from its full series
+instead when:
+
+    - it is new, or its offset dates changed;
+    - an epoch arrives at or before its last one, or its history no longer
+      has the number of epochs the sums were built from;
+    - a new epoch starts a new segment or lies outside the outlier bounds;
+    - its last fit failed (it may have enough epochs now).
+
+Between refits the outlier bounds stay those of the last full fit, so a
+running estimate can differ from estimate_velocities() only when a new epoch
+moves the quartiles enough to flip an old epoch in or out; refit() restores
+the exact result.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from pogf_geodetic_suite.timeseries.analysis import (
+    OffsetEvent,
+    SegmentSums,
+    VelocityTable,
+    _offset_arrays,
+    _segment_labels,
+    _segment_sums,
+)
+
+if TYPE_CHECKING:
+    from pogf_geodetic_suite.timeseries.crd_pipeline import EnuSeries
+
+logger = logging.getLogger(__name__)
+
+_STORE_VERSION = 1
+
+
+def _offsets_key(events: list[OffsetEvent]) -> str:
+    """What about a station's offsets changes its segments: the dates."""
+    return ",".join(f"{d:.6f}" for d in sorted({ev.date for ev in events}))
+
+
+def _empty_sums() -> SegmentSums:
+    return SegmentSums(
+        station=np.array([], dtype="<U4"), label=np.array([], dtype=np.int64),
+        t_start=np.empty(0), t_end=np.empty(0), n_rows=np.array([], dtype=np.int64),
+        lower=np.empty((0, 3)), upper=np.empty((0, 3)), d0=np.empty((0, 3)),
+        n=np.array([], dtype=np.int64), st=np.empty(0), stt=np.empty(0),
+        sd=np.empty((0, 3)), std=np.empty((0, 3)), sdd=np.empty((0, 3)),
+    )
+
+
+class RunningVelocities:
+    """
+    Per-segment regression sums of a network, updated as epochs arrive.
+
+    Typical daily use::
+
+        running = RunningVelocities.load(store)
+        running.update(series, offsets)       # full EnuSeries; only new rows are used
+        running.save(store)
+        table = running.table()
+
+    or, with only the newest epochs at hand, append() them and refit() the
+    stations it hands back.
+    """
+
+    def __init__(self, outlier_iqr_factor: float = 3.0):
+        self.outlier_iqr_factor = outlier_iqr_factor
+        self.sums = _empty_sums()
+        self.stations: dict[str, tuple[str, int, float]] = {}  # code → (offsets, rows, t_last)
+        self.failed: dict[str, str] = {}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: Path, *, outlier_iqr_factor: float = 3.0) -> RunningVelocities:
+        """The state saved at path; empty if it is missing, stale or unreadable."""
+        running = cls(outlier_iqr_factor)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                if int(npz["version"]) != _STORE_VERSION:
+                    return running
+                if float(npz["outlier_iqr_factor"]) != outlier_iqr_factor:
+                    logger.info("Velocity store %s used another outlier factor; refitting", path)
+                    return running
+                sums = SegmentSums(*(npz[name] for name in SegmentSums.columns()))
+                codes, keys = npz["stations"].tolist(), npz["offsets"].tolist()
+                rows, t_last, failed = npz["rows"], npz["t_last"], npz["failed"].tolist()
+        except (OSError, KeyError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning("Ignoring unreadable velocity store %s: %s", path, e)
+            return running
+        running.sums = sums
+        running.stations = {
+            code: (key, int(n), float(t))
+            for code, key, n, t in zip(codes, keys, rows, t_last, strict=True)
+        }
+        running.failed = {code: msg for code, msg in zip(codes, failed, strict=True) if msg}
+        return running
+
+    def save(self, path: Path) -> None:
+        """Write the state to path atomically."""
+        path = Path(path)
+        codes = sorted(self.stations)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as fh:
+                np.savez(
+                    fh,
+                    version=np.array(_STORE_VERSION),
+                    outlier_iqr_factor=np.array(self.outlier_iqr_factor),
+                    stations=np.array(codes, dtype="<U4"),
+                    offsets=np.array([self.stations[c][0] for c in codes], dtype=str),
+                    rows=np.array([self.stations[c][1] for c in codes], dtype=np.int64),
+                    t_last=np.array([self.stations[c][2] for c in codes], dtype=float),
+                    failed=np.array([self.failed.get(c, "") for c in codes], dtype=str),
+                    **{name: getattr(self.sums, name) for name in SegmentSums.columns()},
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def table(self) -> VelocityTable:
+        """Current velocities, as estimate_velocities(...).table."""
+        return self.sums.table(self.failed)
+
+    def append(
+        self,
+        series: EnuSeries,
+        offsets: dict[str, list[OffsetEvent]] | None = None,
+    ) -> list[str]:
+        """
+        Add new epochs (rows later than each station's last epoch) to the sums.
+
+        Returns:
+            Stations whose rows could not be added; refit() them from their
+            full series. Their rows in series are ignored.
+        """
+        station = np.asarray(series.station)
+        t = np.asarray(series.decimal_year, dtype=float)
+        enu_m = np.asarray(series.enu_m, dtype=float)
+        return self._append(station, t, enu_m, offsets or {}, refit=set())
+
+    def refit(
+        self,
+        series: EnuSeries,
+        offsets: dict[str, list[OffsetEvent]] | None = None,
+        stations: list[str] | None = None,
+    ) -> None:
+        """Rebuild the sums of stations (None → all in series) from their full series."""
+        offsets = offsets or {}
+        station = np.asarray(series.station)
+        codes = np.unique(station) if stations is None else np.unique(np.asarray(stations))
+        rows = np.isin(station, codes)
+        station = station[rows]
+        t = np.asarray(series.decimal_year, dtype=float)[rows]
+        enu_m = np.asarray(series.enu_m, dtype=float)[rows]
+
+        codes, station_idx = np.unique(np.concatenate([codes, station]), return_inverse=True)
+        station_idx = station_idx[len(station_idx) - len(station):]
+        order = np.lexsort((t, station_idx))
+        station_idx, t, enu_m = station_idx[order], t[order], enu_m[order]
+        sums, failed, _ = _segment_sums(
+            codes, station_idx, t, enu_m, offsets, self.outlier_iqr_factor
+        )
+
+        kept = self.sums.take(~np.isin(self.sums.station, codes))
+        merged = SegmentSums.concat([kept, sums])
+        self.sums = merged.take(np.lexsort((merged.t_start, merged.station)))
+        counts = np.bincount(station_idx, minlength=len(codes))
+        for i, code in enumerate(codes.tolist()):
+            if not counts[i]:
+                self.stations.pop(code, None)
+                self.failed.pop(code, None)
+                continue
+            t_last = float(t[np.searchsorted(station_idx, i, side="right") - 1])
+            self.stations[code] = (_offsets_key(offsets.get(code, [])), int(counts[i]), t_last)
+            if code in failed:
+                self.failed[code] = failed[code]
+            else:
+                self.failed.pop(code, None)
+
+    def update(
+        self,
+        series: EnuSeries,
+        offsets: dict[str, list[OffsetEvent]] | None = None,
+    ) -> list[str]:
+        """
+        Bring the sums up to date with series, the full history of every
+        station: rows after each station's last epoch are appended, stations
+        that cannot be appended are refit from series.
+
+        Returns:
+            The stations that were refit.
+        """
+        offsets = offsets or {}
+        station = np.asarray(series.station)
+        t = np.asarray(series.decimal_year, dtype=float)
+        enu_m = np.asarray(series.enu_m, dtype=float)
+
+        # Histories must still hold the epochs the sums were built from
+        refit = set(self.stations.keys() - set(np.unique(station).tolist()))
+        codes, station_idx = np.unique(station, return_inverse=True)
+        known = [self.stations.get(code) for code in codes.tolist()]
+        t_last = np.array([s[2] if s else -np.inf for s in known])
+        seen = np.bincount(station_idx, weights=t <= t_last[station_idx], minlength=len(codes))
+        for i, state in enumerate(known):
+            if state is not None and int(seen[i]) != state[1]:
+                refit.add(str(codes[i]))
+
+        new = t > t_last[station_idx]
+        refit.update(self._append(station[new], t[new], enu_m[new], offsets, refit=refit))
+        if refit:
+            self.refit(series, offsets, sorted(refit))
+        logger.info(
+            "Velocities: %d stations, %d new epochs, %d stations refit",
+            len(codes), int(new.sum()), len(refit),
+        )
+        return sorted(refit)
+
+    def _append(
+        self,
+        station: np.ndarray,
+        t: np.ndarray,
+        enu_m: np.ndarray,
+        offsets: dict[str, list[OffsetEvent]],
+        refit: set[str],
+    ) -> list[str]:
+        """append() for the given rows, skipping stations already in refit."""
+        codes, station_idx = np.unique(station, return_inverse=True)
+        order = np.lexsort((t, station_idx))
+        station_idx, t, enu_m = station_idx[order], t[order], enu_m[order]
+
+        # Row of each station's last segment in self.sums, -1 if none
+        last = np.ones(len(self.sums), dtype=bool)
+        last[:-1] = self.sums.station[1:] != self.sums.station[:-1]
+        last_row = dict(zip(self.sums.station[last].tolist(), np.flatnonzero(last), strict=True))
+        seg_row = np.array([last_row.get(code, -1) for code in codes.tolist()], dtype=np.int64)
+
+        bad = np.zeros(len(codes), dtype=bool)
+        for i, code in enumerate(codes.tolist()):
+            state = self.stations.get(code)
+            bad[i] = (code in refit or state is None or code in self.failed or seg_row[i] < 0
+                      or state[0] != _offsets_key(offsets.get(code, [])))
+        if len(t) and len(self.sums):
+            rows = np.maximum(seg_row[station_idx], 0)
+            label = _segment_labels(station_idx, t, *_offset_arrays(codes, offsets))
+            t_last = np.array([self.stations[c][2] if c in self.stations else np.inf
+                               for c in codes.tolist()])
+            row_bad = (
+                (t <= t_last[station_idx])
+                | (label != self.sums.label[rows])
+                | np.any((enu_m < self.sums.lower[rows]) | (enu_m > self.sums.upper[rows]),
+                         axis=1)
+            )
+            bad |= np.bincount(station_idx, weights=row_bad, minlength=len(codes)) > 0
+
+        take = ~bad[station_idx]
+        self._add_rows(seg_row[station_idx[take]], t[take], enu_m[take])
+        for i in np.flatnonzero(~bad):
+            code = str(codes[i])
+            key, n_rows, _ = self.stations[code]
+            mine = station_idx == i
+            self.stations[code] = (key, n_rows + int(mine.sum()), float(t[mine].max()))
+        return [str(code) for code in codes[bad]]
+
+    def _add_rows(self, seg_row: np.ndarray, t: np.ndarray, enu_m: np.ndarray) -> None:
+        """Fold epochs into the sums of the segments at seg_row, O(1) per epoch."""
+        s = self.sums
+        m = len(s)
+        tr = t - s.t_start[seg_row]
+        dr = enu_m - s.d0[seg_row]
+        count = np.bincount(seg_row, minlength=m)
+        s.n = s.n + count
+        s.n_rows = s.n_rows + count
+        s.st = s.st + np.bincount(seg_row, weights=tr, minlength=m)
+        s.stt = s.stt + np.bincount(seg_row, weights=tr * tr, minlength=m)
+        for c in range(3):
+            s.sd[:, c] += np.bincount(seg_row, weights=dr[:, c], minlength=m)
+            s.std[:, c] += np.bincount(seg_row, weights=tr * dr[:, c], minlength=m)
+            s.sdd[:, c] += np.bincount(seg_row, weights=dr[:, c] * dr[:, c], minlength=m)
+        if len(t):
+            np.maximum.at(s.t_end, seg_row, t)
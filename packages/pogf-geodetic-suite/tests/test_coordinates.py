@@ -0,0 +1,54 @@
+"""Tests for modeling.coordinates — scalar wrappers and N×3 array transforms."""
+import numpy as np
+import pymap3d
+import pytest
+from pogf_geodetic_suite.modeling.coordinates import (
+    ecef_to_enu,
+    ecef_to_geodetic,
+    ecef_to_geodetic_array,
+    enu_rotation,
+    enu_to_ecef,
+    geodetic_to_enu,
+)
+
+REF = (14.6537, 121.0687, 95.0)      # Quezon City
+
+
+def _points(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = REF[0] + rng.uniform(-8, 8, n)
+    lon = REF[1] + rng.uniform(-6, 6, n)
+    alt = rng.uniform(-50, 3000, n)
+    return np.stack(pymap3d.geodetic2ecef(lat, lon, alt, deg=True), axis=1)
+
+
+def test_ecef_to_enu_matches_pymap3d():
+    xyz = _points()
+    enu = ecef_to_enu(xyz, *REF)
+    expected = np.stack(pymap3d.ecef2enu(xyz[:, 0], xyz[:, 1], xyz[:, 2], *REF, deg=True), axis=1)
+    assert enu.shape == (500, 3)
+    np.testing.assert_allclose(enu, expected, atol=1e-6)
+
+
+def test_enu_to_ecef_round_trip():
+    xyz = _points()
+    np.testing.assert_allclose(enu_to_ecef(ecef_to_enu(xyz, *REF), *REF), xyz, atol=1e-6)
+
+
+def test_rotation_is_orthonormal():
+    r = enu_rotation(REF[0], REF[1])
+    np.testing.assert_allclose(r @ r.T, np.eye(3), atol=1e-15)
+
+
+def test_geodetic_array_matches_scalar_wrapper():
+    xyz = _points(20)
+    geo = ecef_to_geodetic_array(xyz)
+    for row, (x, y, z) in zip(geo, xyz, strict=True):
+        np.testing.assert_allclose(row, ecef_to_geodetic(x, y, z), rtol=1e-12)
+
+
+def test_scalar_wrapper_agrees_with_array_version():
+    lat, lon, alt = 14.7, 121.1, 120.0
+    e, n, u = geodetic_to_enu(lat, lon, alt, *REF)
+    xyz = np.array([pymap3d.geodetic2ecef(lat, lon, alt, deg=True)])
+    assert ecef_to_enu(xyz, *REF)[0] == pytest.approx([e, n, u], abs=1e-6)
@@ -3,11 +3,14 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
+import pymap3d
 import pytest
 from pogf_geodetic_suite.timeseries.crd_pipeline import (
     StationEpoch,
     _extract_session_from_filename,
     crd_directory_to_enu,
+    crd_directory_to_enu_series,
     read_crd_file,
     session_to_decimal_year,
 )
@@ -251,3 +254,37 @@ def test_crd_directory_to_enu_custom_session_extractor(tmp_path):
     )
     assert len(results) == 1
     assert results[0].station == "PBIS"
+
+
+# ---------------------------------------------------------------------------
+# crd_directory_to_enu_series
+# ---------------------------------------------------------------------------
+
+def test_series_matches_scalar_transform(tmp_path):
+    for session, dx in [("23002", 0.002), ("23001", 0.0)]:
+        _write_crd(tmp_path / f"F1_{session}.CRD", [
+            {"name": "PBIS", "x": PBIS_X + dx, "y": PBIS_Y, "z": PBIS_Z},
+            {"name": "BOST", "x": BOST_X, "y": BOST_Y, "z": BOST_Z},
+            {"name": "ALBU", "x": PBIS_X + 1000, "y": PBIS_Y, "z": PBIS_Z},
+        ])
+    series = crd_directory_to_enu_series(tmp_path, reference_station="bost")
+
+    assert len(series) == 4
+    assert series.station.tolist() == ["ALBU", "ALBU", "PBIS", "PBIS"]
+    assert series.stations() == ["ALBU", "PBIS"]
+    ref = pymap3d.ecef2geodetic(BOST_X, BOST_Y, BOST_Z, deg=True)
+    expected = pymap3d.ecef2enu(PBIS_X + 0.002, PBIS_Y, PBIS_Z, *ref, deg=True)
+    t, enu = series.for_station("PBIS")
+    assert t.tolist() == sorted(t.tolist())
+    np.testing.assert_allclose(enu[1], expected, atol=1e-6)
+    assert series.east_m[3] == enu[1, 0]
+
+
+def test_series_and_epoch_list_agree(tmp_path):
+    _write_crd(tmp_path / "F1_23001.CRD", [
+        {"name": "BOST", "x": BOST_X, "y": BOST_Y, "z": BOST_Z},
+        {"name": "PBIS", "x": PBIS_X, "y": PBIS_Y, "z": PBIS_Z},
+    ])
+    epochs = crd_directory_to_enu(tmp_path, reference_station="BOST")
+    assert crd_directory_to_enu_series(tmp_path, "BOST").to_epochs() == epochs
+    assert type(epochs[0].station) is str and type(epochs[0].up_m) is float
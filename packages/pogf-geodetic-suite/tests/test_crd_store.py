@@ -0,0 +1,133 @@
+"""Tests for timeseries.crd_store — cached, parallel CRD parsing."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pogf_geodetic_suite.timeseries import crd_store
+from pogf_geodetic_suite.timeseries.crd_pipeline import crd_directory_to_enu_series
+from pogf_geodetic_suite.timeseries.crd_store import load_crd_directory
+
+BASE = {"BOST": (-3186600.123, 5765432.679, 567890.456),
+        "PBIS": (-3100000.000, 5700000.000, 600000.000),
+        "ALBU": (-3099000.000, 5700000.000, 600000.000)}
+
+
+def _write_crd(path: Path, shift: float = 0.0) -> None:
+    rows = [
+        f"  {i:3d}  {code} 00000S000  {x + shift:>15.5f} {y:>15.5f}  {z:>15.5f}    IGS14"
+        for i, (code, (x, y, z)) in enumerate(BASE.items(), start=1)
+    ]
+    header = "PHIVOLCS CORS NETWORK\n----\nLOCAL GEODETIC DATUM: IGS14\n\n NUM  STATION\n\n"
+    path.write_text(header + "\n".join(rows) + "\n", encoding="ascii")
+
+
+@pytest.fixture
+def crd_dir(tmp_path):
+    d = tmp_path / "CRD"
+    d.mkdir()
+    for doy in range(1, 6):
+        _write_crd(d / f"F1_23{doy:03d}.CRD", shift=doy * 0.001)
+    return d
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Names of the files actually parsed (in-process parsing only)."""
+    names: list[str] = []
+    real = crd_store._parse
+
+    def counting(path):
+        names.append(Path(path).name)
+        return real(path)
+
+    monkeypatch.setattr(crd_store, "_parse", counting)
+    return names
+
+
+def test_second_load_parses_nothing(crd_dir, tmp_path, parsed):
+    store = tmp_path / "store.npz"
+    first = load_crd_directory(crd_dir, store, workers=1)
+    assert len(parsed) == 5 and store.exists()
+
+    parsed.clear()
+    second = load_crd_directory(crd_dir, store, workers=1)
+    assert parsed == []
+    assert second.files == first.files
+    np.testing.assert_array_equal(second.station, first.station)
+    np.testing.assert_array_equal(second.file, first.file)
+    np.testing.assert_array_equal(second.xyz, first.xyz)
+
+
+def test_new_day_parses_only_the_new_file(crd_dir, tmp_path, parsed):
+    store = tmp_path / "store.npz"
+    load_crd_directory(crd_dir, store, workers=1)
+    _write_crd(crd_dir / "F1_23006.CRD", shift=0.006)
+
+    parsed.clear()
+    table = load_crd_directory(crd_dir, store, workers=1)
+    assert parsed == ["F1_23006.CRD"]
+    assert len(table) == 18
+    assert table.files[table.file[-1]] == "F1_23006.CRD"
+
+
+def test_touched_file_keeps_rows_edited_file_is_reparsed(crd_dir, tmp_path, parsed):
+    store = tmp_path / "store.npz"
+    load_crd_directory(crd_dir, store, workers=1)
+    touched, edited = crd_dir / "F1_23001.CRD", crd_dir / "F1_23002.CRD"
+    later = touched.stat().st_mtime_ns + 5_000_000_000
+    os.utime(touched, ns=(later, later))
+    _write_crd(edited, shift=0.5)
+    os.utime(edited, ns=(later, later))
+
+    parsed.clear()
+    table = load_crd_directory(crd_dir, store, workers=1)
+    assert parsed == ["F1_23002.CRD"]
+    rows = table.file == table.files.index("F1_23002.CRD")
+    assert table.xyz[rows][0, 0] == pytest.approx(BASE["BOST"][0] + 0.5)
+
+    parsed.clear()
+    load_crd_directory(crd_dir, store, workers=1)
+    assert parsed == []                      # new mtimes were recorded
+
+
+def test_removed_files_are_dropped(crd_dir, tmp_path):
+    store = tmp_path / "store.npz"
+    load_crd_directory(crd_dir, store, workers=1)
+    (crd_dir / "F1_23003.CRD").unlink()
+    table = load_crd_directory(crd_dir, store, workers=1)
+    assert "F1_23003.CRD" not in table.files
+    assert len(table) == 12
+
+
+def test_unreadable_store_is_rebuilt(crd_dir, tmp_path, parsed):
+    store = tmp_path / "store.npz"
+    store.write_bytes(b"not an npz")
+    assert len(load_crd_directory(crd_dir, store, workers=1)) == 15
+    assert len(parsed) == 5
+    parsed.clear()
+    load_crd_directory(crd_dir, store, workers=1)
+    assert parsed == []
+
+
+def test_process_pool_matches_serial(tmp_path):
+    d = tmp_path / "many"
+    d.mkdir()
+    for doy in range(1, crd_store._POOL_MIN_FILES + 9):
+        _write_crd(d / f"F1_23{doy:03d}.CRD", shift=doy * 0.001)
+    pooled = load_crd_directory(d, workers=2)
+    serial = load_crd_directory(d, workers=1)
+    np.testing.assert_array_equal(pooled.station, serial.station)
+    np.testing.assert_array_equal(pooled.xyz, serial.xyz)
+
+
+def test_series_from_store_matches_fresh_parse(crd_dir, tmp_path):
+    store = tmp_path / "store.npz"
+    fresh = crd_directory_to_enu_series(crd_dir, "BOST")
+    crd_directory_to_enu_series(crd_dir, "BOST", store_path=store)
+    cached = crd_directory_to_enu_series(crd_dir, "BOST", store_path=store)
+    np.testing.assert_array_equal(cached.station, fresh.station)
+    np.testing.assert_array_equal(cached.enu_m, fresh.enu_m)
+
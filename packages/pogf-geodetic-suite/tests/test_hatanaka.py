@@ -0,0 +1,248 @@
+"""Tests for the in-process Hatanaka (CRINEX) decoder."""
+import io
+
+import pytest
+from pogf_geodetic_suite.rinex import hatanaka
+from pogf_geodetic_suite.rinex.hatanaka import (
+    CRINEXError,
+    HatanakaReader,
+    crx2rnx,
+    decompress,
+)
+
+# ---------------------------------------------------------------------------
+# Fixtures: rnx2crx 4.1 output and the matching crx2rnx 4.1 decode.
+# V3 covers a missing clock, a blank field re-initialised mid-arc, an LLI flag
+# and sub-unit clock/observation formatting; V2 covers 5-field line wrapping,
+# an event record with a comment, and a satellite appearing mid-file.
+# ---------------------------------------------------------------------------
+CRX_V3 = """\
+3.0                 COMPACT RINEX FORMAT                    CRINEX VERS   / TYPE
+RNX2CRX ver.4.1.0                       18-Oct-26 23:25     CRINEX PROG / DATE
+     3.04           OBSERVATION DATA    M                   RINEX VERSION / TYPE
+PBIS                                                        MARKER NAME
+G    4 C1C L1C D1C S1C                                      SYS / # / OBS TYPES
+E    3 C1C L1C S1C                                          SYS / # / OBS TYPES
+    30.000                                                  INTERVAL
+                                                            END OF HEADER
+> 2023 01 01 00 00  0.0000000  0  3      G05G12E11
+3&-12345678
+3&23000000500 3&120000000750 3&-2200125 3&44000 &&1&&&&&
+3&25000000000 3&-5000000000 3&0 3&35500 &&&&&&&&
+3&26000000125 3&136000000875 3&40000 &&&&&&
+                   3
+1
+80250 420500 500 0
+-65000 300000 -250 0
+1000 5000 0
+                 1 &
+0
+0 0 0 0
+0  0 0
+0 0 0
+                   3
+
+0 0 0 0
+0 3&-4999100000 0 0
+0 0 0
+                 2 &
+3&-12345674
+0 0 0 0
+0 300000 0 0
+0 0 0
+"""
+
+RNX_V3 = """\
+     3.04           OBSERVATION DATA    M                   RINEX VERSION / TYPE
+PBIS                                                        MARKER NAME
+G    4 C1C L1C D1C S1C                                      SYS / # / OBS TYPES
+E    3 C1C L1C S1C                                          SYS / # / OBS TYPES
+    30.000                                                  INTERVAL
+                                                            END OF HEADER
+> 2023 01 01 00 00  0.0000000  0  3       -.000012345678
+G05  23000000.500   120000000.7501      -2200.125          44.000
+G12  25000000.000    -5000000.000            .000          35.500
+E11  26000000.125   136000000.875          40.000
+> 2023 01 01 00 00 30.0000000  0  3       -.000012345677
+G05  23000080.750   120000421.2501      -2199.625          44.000
+G12  24999935.000    -4999700.000           -.250          35.500
+E11  26000001.125   136000005.875          40.000
+> 2023 01 01 00 01  0.0000000  0  3       -.000012345676
+G05  23000161.000   120000841.7501      -2199.125          44.000
+G12  24999870.000                           -.500          35.500
+E11  26000002.125   136000010.875          40.000
+> 2023 01 01 00 01 30.0000000  0  3
+G05  23000241.250   120001262.2501      -2198.625          44.000
+G12  24999805.000    -4999100.000           -.750          35.500
+E11  26000003.125   136000015.875          40.000
+> 2023 01 01 00 02  0.0000000  0  3       -.000012345674
+G05  23000321.500   120001682.7501      -2198.125          44.000
+G12  24999740.000    -4998800.000          -1.000          35.500
+E11  26000004.125   136000020.875          40.000
+"""
+
+CRX_V2 = """\
+1.0                 COMPACT RINEX FORMAT                    CRINEX VERS   / TYPE
+RNX2CRX ver.4.1.0                       18-Oct-26 23:26     CRINEX PROG / DATE
+     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE
+PBIS                                                        MARKER NAME
+     5    L1    L2    C1    P2    S1                        # / TYPES OF OBSERV
+    30.0000                                                 INTERVAL
+                                                            END OF HEADER
+&23  1  1  0  0  0.0000000  0  3G01G07R09
+3&123456
+3&120000000125 3&93500000500 3&22800000250 3&22800003750 3&45000          7
+3&-3500000750 3&-2700000500 3&24100000000 3&24100002000 3&38250
+3&110000000000 3&85500000000 3&21900000500 3&21900001500 3&41000
+                3
+-1
+3615000 2797500 682500 682500 0  1
+-25507500 -19875000 -4845000 -4845000 0
+450000 348750 75000 75000 0
+              1 &
+
+0 0 0 0 0  &
+0 0 0 0 0
+0 0 0 0 0
+                3              4         G23
+3&123453
+0 0 0 0 0
+0 0 0  0
+0 0 0 0 0
+3&3123 3&-500 3&21000000125  3&30000
+&                           4  1
+ANTENNA SWAP AT SITE                                        COMMENT
+&23  1  1  0  2  0.0000000  0  4G01G07R09G23
+3&123452
+3&120014460125 3&93511190500 3&22802730250 3&22802733750 3&45000          7
+3&-3602030750 3&-2779500500 3&24080620000 3&24080622000 3&38250
+3&110001800000 3&85501395000 3&21900300500 3&21900301500 3&41000
+3&4123 3&-500 3&21000000125  3&30000
+                3
+-1
+3615000 2797500 682500 682500 0
+-25507500 -19875000 -4845000 -4845000 0
+450000 348750 75000 75000 0
+1000 0 0  0
+"""
+
+RNX_V2 = """\
+     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE
+PBIS                                                        MARKER NAME
+     5    L1    L2    C1    P2    S1                        # / TYPES OF OBSERV
+    30.0000                                                 INTERVAL
+                                                            END OF HEADER
+ 23  1  1  0  0  0.0000000  0  3G01G07R09                             .000123456
+ 120000000.125    93500000.500    22800000.250    22800003.750          45.000 7
+  -3500000.750    -2700000.500    24100000.000    24100002.000          38.250
+ 110000000.000    85500000.000    21900000.500    21900001.500          41.000
+ 23  1  1  0  0 30.0000000  0  3G01G07R09                             .000123455
+ 120003615.125 1  93502798.000    22800682.750    22800686.250          45.000 7
+  -3525508.250    -2719875.500    24095155.000    24095157.000          38.250
+ 110000450.000    85500348.750    21900075.500    21900076.500          41.000
+ 23  1  1  0  1  0.0000000  0  3G01G07R09
+ 120007230.125    93505595.500    22801365.250    22801368.750          45.000 7
+  -3551015.750    -2739750.500    24090310.000    24090312.000          38.250
+ 110000900.000    85500697.500    21900150.500    21900151.500          41.000
+ 23  1  1  0  1 30.0000000  0  4G01G07R09G23                          .000123453
+ 120010845.125    93508393.000    22802047.750    22802051.250          45.000 7
+  -3576523.250    -2759625.500    24085465.000                          38.250
+ 110001350.000    85501046.250    21900225.500    21900226.500          41.000
+         3.123           -.500    21000000.125                          30.000
+                            4  1
+ANTENNA SWAP AT SITE                                        COMMENT
+ 23  1  1  0  2  0.0000000  0  4G01G07R09G23                          .000123452
+ 120014460.125    93511190.500    22802730.250    22802733.750          45.000 7
+  -3602030.750    -2779500.500    24080620.000    24080622.000          38.250
+ 110001800.000    85501395.000    21900300.500    21900301.500          41.000
+         4.123           -.500    21000000.125                          30.000
+ 23  1  1  0  2 30.0000000  0  4G01G07R09G23                          .000123451
+ 120018075.125    93513988.000    22803412.750    22803416.250          45.000 7
+  -3627538.250    -2799375.500    24075775.000    24075777.000          38.250
+ 110002250.000    85501743.750    21900375.500    21900376.500          41.000
+         5.123           -.500    21000000.125                          30.000
+"""
+
+
+def _decode(text: str) -> str:
+    dst = io.BytesIO()
+    decompress(io.BytesIO(text.encode()), dst)
+    return dst.getvalue().decode()
+
+
+# ---------------------------------------------------------------------------
+# Byte-identity with crx2rnx
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("crx, rnx", [(CRX_V3, RNX_V3), (CRX_V2, RNX_V2)], ids=["v3", "v2"])
+def test_decode_matches_crx2rnx(crx, rnx):
+    assert _decode(crx) == rnx
+
+
+@pytest.mark.parametrize("block_fields", [1, 5])
+def test_block_boundaries_do_not_change_output(monkeypatch, block_fields):
+    """Arcs carried across tiny blocks must reconstruct exactly as in one block."""
+    monkeypatch.setattr(hatanaka, "_BLOCK_FIELDS", block_fields)
+    assert _decode(CRX_V3) == RNX_V3
+    assert _decode(CRX_V2) == RNX_V2
+
+
+def test_reader_streams_through_buffered_io():
+    reader = io.BufferedReader(HatanakaReader(io.BytesIO(CRX_V2.encode())), 64)
+    chunks = iter(lambda: reader.read(37), b"")
+    assert b"".join(chunks).decode() == RNX_V2
+
+
+def test_crlf_input_decodes_to_same_output():
+    assert _decode(CRX_V3.replace("\n", "\r\n")) == RNX_V3
+
+
+# ---------------------------------------------------------------------------
+# Errors
+# ---------------------------------------------------------------------------
+
+def test_rejects_non_crinex_input():
+    with pytest.raises(CRINEXError, match="not a Compact RINEX"):
+        _decode(RNX_V3)
+
+
+def test_truncated_file_raises():
+    lines = CRX_V3.splitlines(keepends=True)
+    with pytest.raises(CRINEXError, match="truncated"):
+        _decode("".join(lines[:-2]))
+
+
+def test_uninitialised_arc_raises():
+    # Drop the "3&" arc initialiser of G05's first observable.
+    bad = CRX_V3.replace("3&23000000500 ", "23000000500 ", 1)
+    with pytest.raises(CRINEXError, match="G05"):
+        _decode(bad)
+
+
+def test_is_a_value_error():
+    assert issubclass(CRINEXError, ValueError)
+
+
+# ---------------------------------------------------------------------------
+# crx2rnx() file naming
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("name, expected, crx, rnx", [
+    ("PBIS001a.23d", "PBIS001a.23o", CRX_V2, RNX_V2),
+    ("PBIS00PHL_R_20230010000_01D_30S_MO.crx", "PBIS00PHL_R_20230010000_01D_30S_MO.rnx",
+     CRX_V3, RNX_V3),
+    ("PBIS001A.23D", "PBIS001A.23O", CRX_V2, RNX_V2),
+])
+def test_crx2rnx_writes_next_to_source(tmp_path, name, expected, crx, rnx):
+    src = tmp_path / name
+    src.write_text(crx)
+    out = crx2rnx(src)
+    assert out == tmp_path / expected
+    assert out.read_text() == rnx
+
+
+def test_crx2rnx_rejects_unknown_suffix(tmp_path):
+    src = tmp_path / "PBIS001a.23o"
+    src.write_text(CRX_V2)
+    with pytest.raises(CRINEXError, match="invalid file name"):
+        crx2rnx(src)
@@ -0,0 +1,180 @@
+"""Tests for the shared IGS product cache."""
+import os
+import stat
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from pogf_geodetic_suite import igs_cache
+from pogf_geodetic_suite.igs_cache import ProductCache, link_file, product_version
+from pogf_geodetic_suite.igs_downloader import Product
+
+DAY = datetime(2024, 4, 9)
+ORB = Product(DAY, "COD", "ORB")
+CLK = Product(DAY, "COD", "CLK")
+
+
+class _FakeDownloader:
+    """Writes products where ProductDownloader would; counts downloads."""
+
+    def __init__(self, root, unpublished=(), delay=0.0):
+        self.root = str(root)
+        self.unpublished = set(unpublished)
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def download_product(self, date, ac="COD", content="ORB", force=False):
+        product = Product(date, ac, content)
+        with self._lock:
+            self.calls.append(product)
+        time.sleep(self.delay)
+        if product in self.unpublished:
+            return None
+        path = product.local_path(self.root)
+        if os.path.exists(path) and not force:
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(f"{product.remote_name}\n".encode() * 100)
+        os.replace(tmp, path)
+        return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    root = tmp_path / "cache"
+    c = ProductCache(root, min_age_sec=0, downloader=_FakeDownloader(root))
+    yield c
+    c.close()
+
+
+def test_version_is_the_product_series():
+    assert product_version(ORB) == "0OPSFIN"
+    assert product_version(Product(datetime(2022, 11, 20), "COD", "ORB")) == "legacy"
+
+
+def test_products_are_downloaded_once_across_instances(cache):
+    first = cache.fetch([ORB, CLK, ORB])
+    assert set(first) == {ORB, CLK}
+    assert len(cache.downloader.calls) == 2
+
+    assert cache.fetch([ORB, CLK]) == first
+    other = ProductCache(cache.root, downloader=_FakeDownloader(cache.root))
+    try:
+        assert other.fetch([ORB]) == {ORB: first[ORB]}
+        assert other.downloader.calls == []
+    finally:
+        other.close()
+
+    entry = next(e for e in cache.entries() if e.content == "ORB")
+    assert (entry.ac, entry.day, entry.version) == ("COD", "2024-04-09", "0OPSFIN")
+    assert entry.size == os.path.getsize(first[ORB])
+
+
+def test_materialize_hardlinks_into_downloader_layout(cache, tmp_path):
+    orb_dir = tmp_path / "campaign" / "ORB"
+    placed = cache.materialize([ORB, CLK], orb_dir)
+
+    dest = placed[ORB]
+    assert dest == str(orb_dir / "2024" / "100" / "COD0OPSFIN_20241000000_01D_05M_ORB.SP3")
+    assert os.path.samefile(dest, cache.get(ORB))
+    assert not os.stat(dest).st_mode & stat.S_IWUSR
+    # A second campaign shares the same inode; materializing again is a no-op.
+    assert cache.materialize([ORB], orb_dir) == {ORB: dest}
+    assert os.stat(dest).st_nlink == 2
+
+
+def test_materialize_copies_across_filesystems(cache, tmp_path, monkeypatch):
+    def cross_device(src, dst):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", cross_device)
+    monkeypatch.setattr(igs_cache, "_reflink", lambda src, dest: False)
+
+    dest = cache.materialize([ORB], tmp_path / "ORB")[ORB]
+    assert not os.path.samefile(dest, cache.get(ORB))
+    assert open(dest, "rb").read() == open(cache.get(ORB), "rb").read()
+
+
+def test_link_file_replaces_a_stale_copy(tmp_path):
+    src = tmp_path / "a"
+    src.write_text("new")
+    dest = tmp_path / "out" / "a"
+    dest.parent.mkdir()
+    dest.write_text("old")
+    assert link_file(str(src), str(dest)) == "hardlink"
+    assert dest.read_text() == "new"
+    assert link_file(str(src), str(dest)) == "present"
+
+
+def test_missing_file_is_fetched_again(cache):
+    path = cache.fetch([ORB])[ORB]
+    os.remove(path)
+    assert cache.get(ORB) is None
+    assert cache.fetch([ORB])[ORB] == path
+    assert len(cache.downloader.calls) == 2
+
+
+def test_concurrent_misses_download_once(cache):
+    slow = _FakeDownloader(cache.root, delay=0.2)
+    caches = [ProductCache(cache.root, downloader=slow) for _ in range(3)]
+    results = []
+    threads = [threading.Thread(target=lambda c=c: results.append(c.fetch([ORB])))
+               for c in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for c in caches:
+        c.close()
+
+    assert slow.calls == [ORB]
+    assert len({r[ORB] for r in results}) == 1
+
+
+def test_evict_least_recently_used_down_to_size(cache):
+    wanted = [Product(datetime(2024, 4, d), "COD", "ORB") for d in (8, 9, 10)]
+    paths = cache.fetch(wanted)
+    size = os.path.getsize(paths[wanted[0]])
+    cache.get(wanted[0])                     # most recently used now
+
+    cache.max_bytes = size
+    assert cache.evict() == 2 * size
+    assert [e.day for e in cache.entries()] == ["2024-04-08"]
+    assert not os.path.exists(paths[wanted[1]])
+
+
+def test_evict_by_age_keeps_materialized_links(cache, tmp_path):
+    dest = cache.materialize([ORB], tmp_path / "ORB")[ORB]
+    cache.max_age_days = 1
+    cache._conn.execute("UPDATE products SET used = ?", (time.time() - 2 * 86400,))
+
+    assert cache.evict() > 0
+    assert cache.entries() == []
+    assert os.path.exists(dest)
+
+
+def test_recently_used_entries_are_not_evicted(cache):
+    cache.fetch([ORB])
+    cache.min_age_sec = 600
+    cache.max_bytes = 0
+    assert cache.evict() == 0
+
+
+def test_warm_ahead_tolerates_unpublished_days(cache):
+    late = Product(datetime(2024, 4, 11), "COD", "CLK")
+    cache.downloader.unpublished.add(late)
+
+    results = cache.warm_ahead(datetime(2024, 4, 9), days=3)
+
+    assert len(results) == 6
+    assert results[late] is None
+    assert sum(path is not None for path in results.values()) == 5
+
+
+def test_default_cache_disabled_by_zero_size(monkeypatch):
+    monkeypatch.setattr(igs_cache, "DEFAULT_MAX_BYTES", 0)
+    assert igs_cache.default_cache() is None
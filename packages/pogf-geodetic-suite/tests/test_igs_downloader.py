@@ -2,17 +2,23 @@
 
 import gzip
 import os
+import threading
+import time
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from pogf_geodetic_suite import lzw
 from pogf_geodetic_suite.igs_downloader import (
+    Product,
     ProductDownloader,
     _build_long_filename,
     _build_legacy_filename,
     _day_of_year,
     _gps_week,
+    products,
 )
 
 
@@ -92,7 +98,7 @@ class TestMirrorFallback:
     def _make_response(self, status_code: int, content: bytes = b"") -> MagicMock:
         r = MagicMock()
         r.status_code = status_code
-        r.content = content
+        r.iter_content.return_value = [content]
         return r
 
     def test_first_mirror_success(self, tmp_path):
@@ -162,7 +168,7 @@ class TestIGS20Transition:
             captured_urls.append(url)
             r = MagicMock()
             r.status_code = 200
-            r.content = payload
+            r.iter_content.return_value = [payload]
             return r
 
         with patch.object(downloader.session, "get", side_effect=_fake_get):
@@ -203,7 +209,7 @@ class TestDecompression:
 
         r = MagicMock()
         r.status_code = 200
-        r.content = payload
+        r.iter_content.return_value = [payload]
 
         with patch.object(downloader.session, "get", return_value=r):
             local = downloader.download_product(datetime(2024, 4, 9), ac="COD", content="ORB")
@@ -212,6 +218,22 @@ class TestDecompression:
         assert not local.endswith(".gz")
         assert open(local, "rb").read() == inner
 
+    def test_legacy_z_content_is_decompressed_on_disk(self, tmp_path):
+        inner = b"#cP2022 11 20  0  0  0.00000000     289 ORBIT IGb14 HLM  COD\n" * 500
+        downloader = ProductDownloader(base_dir=str(tmp_path), mirrors=["https://m1/"])
+
+        r = MagicMock()
+        r.status_code = 200
+        r.iter_content.return_value = [lzw.compress(inner)]
+
+        with patch.object(downloader.session, "get", return_value=r):
+            local = downloader.download_product(datetime(2022, 11, 20), ac="COD", content="ORB")
+
+        assert local is not None
+        assert local.endswith(".sp3")
+        assert open(local, "rb").read() == inner
+        assert os.listdir(os.path.dirname(local)) == [os.path.basename(local)]
+
     def test_skip_download_if_file_exists(self, tmp_path):
         downloader = ProductDownloader(base_dir=str(tmp_path), mirrors=["https://m1/"])
 
@@ -227,3 +249,180 @@ class TestDecompression:
 
         mock_get.assert_not_called()
         assert result == str(existing)
+
+
+# ---------------------------------------------------------------------------
+# Batch downloads against a local HTTP server standing in for the mirrors
+# ---------------------------------------------------------------------------
+
+class _Mirrors:
+    """Two mirrors (/m1/, /m2/) on one server with per-mirror misbehaviour."""
+
+    def __init__(self, files: dict[str, bytes]):
+        self.files = files
+        self.delay = {"m1": 0.0, "m2": 0.0}          # seconds before answering
+        self.truncate = {"m1": None, "m2": None}     # drop the connection after n bytes
+        self.honour_range = True
+        self.requests: list[tuple[str, str, str | None]] = []
+        self.active = {"m1": 0, "m2": 0}
+        self.peak = {"m1": 0, "m2": 0}
+        self.lock = threading.Lock()
+
+
+def _handler(state: _Mirrors):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            mirror, _, name = self.path.strip("/").partition("/")
+            name = name.rsplit("/", 1)[-1]
+            with state.lock:
+                state.requests.append((mirror, name, self.headers.get("Range")))
+                state.active[mirror] += 1
+                state.peak[mirror] = max(state.peak[mirror], state.active[mirror])
+            try:
+                time.sleep(state.delay[mirror])
+                self._serve(mirror, name)
+            finally:
+                with state.lock:
+                    state.active[mirror] -= 1
+
+        def _serve(self, mirror, name):
+            body = state.files.get(name)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start = 0
+            ranged = self.headers.get("Range")
+            if ranged and state.honour_range:
+                start = int(ranged.removeprefix("bytes=").rstrip("-"))
+                if start >= len(body):
+                    self.send_response(416)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            else:
+                self.send_response(200)
+            payload = body[start:]
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            cut = state.truncate[mirror]
+            if cut is not None:
+                self.wfile.write(payload[:cut])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(payload)
+
+    return Handler
+
+
+DAYS = products(datetime(2024, 4, 8), datetime(2024, 4, 10), acs=("COD", "IGS"))
+CONTENT = {
+    p: "".join(f"{p.ac} {p.content} {p.date:%Y-%j} {i:06d} {i * 7919 % 100003:06d}\n"
+               for i in range(20_000)).encode()
+    for p in DAYS
+}
+
+
+COMPRESSED = {p.remote_name: gzip.compress(CONTENT[p], compresslevel=1) for p in DAYS}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass            # clients hanging up on a hedged or cut-off response
+
+
+@pytest.fixture
+def mirrors():
+    state = _Mirrors(COMPRESSED)
+    server = _Server(("127.0.0.1", 0), _handler(state))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    state.urls = [f"{base}/m1/", f"{base}/m2/"]
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _downloader(tmp_path, state, **kwargs):
+    return ProductDownloader(base_dir=str(tmp_path), mirrors=state.urls, **kwargs)
+
+
+class TestBatchDownload:
+    def test_products_expand_dates_centres_and_contents(self):
+        assert len(DAYS) == 3 * 2 * 2
+        assert DAYS[0] == Product(datetime(2024, 4, 8), "COD", "ORB")
+        assert DAYS[-1] == Product(datetime(2024, 4, 10), "IGS", "CLK")
+
+    def test_download_many_fetches_every_product(self, tmp_path, mirrors):
+        dl = _downloader(tmp_path, mirrors, max_per_mirror=3)
+        results = dl.download_many(DAYS, workers=6)
+        dl.close()
+
+        assert all(open(results[p], "rb").read() == CONTENT[p] for p in DAYS)
+        assert not list(tmp_path.rglob("*.part"))
+        assert {m for m, _, _ in mirrors.requests} == {"m1"}
+        assert mirrors.peak["m1"] <= 3
+
+    def test_leftover_part_is_resumed_with_range(self, tmp_path, mirrors):
+        product = DAYS[0]
+        local = product.local_path(str(tmp_path))
+        os.makedirs(os.path.dirname(local))
+        body = mirrors.files[product.remote_name]
+        with open(os.path.join(os.path.dirname(local), product.remote_name + ".part"), "wb") as fh:
+            fh.write(body[:1000])
+
+        dl = _downloader(tmp_path, mirrors)
+        assert dl.download_many([product])[product] == local
+        assert mirrors.requests == [("m1", product.remote_name, "bytes=1000-")]
+        assert open(local, "rb").read() == CONTENT[product]
+
+    def test_server_ignoring_range_restarts_from_scratch(self, tmp_path, mirrors):
+        mirrors.honour_range = False
+        product = DAYS[0]
+        local = product.local_path(str(tmp_path))
+        os.makedirs(os.path.dirname(local))
+        with open(os.path.join(os.path.dirname(local), product.remote_name + ".part"), "wb") as fh:
+            fh.write(b"stale bytes")
+
+        assert _downloader(tmp_path, mirrors).download_product(product.date) == local
+        assert open(local, "rb").read() == CONTENT[product]
+
+    def test_interrupted_transfer_resumes_on_next_mirror(self, tmp_path, mirrors):
+        mirrors.truncate["m1"] = 100_000
+        product = DAYS[0]
+
+        path = _downloader(tmp_path, mirrors).download_product(product.date)
+
+        assert open(path, "rb").read() == CONTENT[product]
+        (m1, _, first), (m2, _, resumed) = mirrors.requests
+        assert (m1, first, m2) == ("m1", None, "m2")
+        assert 0 < int(resumed.removeprefix("bytes=").rstrip("-")) <= 100_000
+
+    def test_slow_mirror_is_hedged(self, tmp_path, mirrors):
+        mirrors.delay["m1"] = 2.0
+        dl = _downloader(tmp_path, mirrors, hedge_after=0.1)
+
+        started = time.monotonic()
+        path = dl.download_product(DAYS[0].date)
+        elapsed = time.monotonic() - started
+
+        assert open(path, "rb").read() == CONTENT[DAYS[0]]
+        assert elapsed < 1.5
+        assert [m for m, _, _ in mirrors.requests] == ["m1", "m2"]
+
+    def test_missing_everywhere_returns_none(self, tmp_path, mirrors):
+        missing = Product(datetime(2024, 5, 1))
+        assert _downloader(tmp_path, mirrors).download_many([missing]) == {missing: None}
+        assert [m for m, _, _ in mirrors.requests] == ["m1", "m2"]
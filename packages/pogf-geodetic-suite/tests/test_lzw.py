@@ -0,0 +1,57 @@
+"""Tests for the streaming Unix compress (.Z) decoder."""
+import gzip
+import io
+import shutil
+import subprocess
+
+import pytest
+from pogf_geodetic_suite import lzw
+
+
+def _payload(n: int = 200_000) -> bytes:
+    # Repetitive RINEX-like text with enough variety to fill the code table
+    lines = [f"G{i % 32 + 1:02d}  {20_000_000 + i * 7919 % 99991:14.3f}  {i % 9}\n" for i in range(n // 30)]
+    return "".join(lines).encode()
+
+
+@pytest.mark.parametrize("max_bits", [9, 12, 16])
+def test_round_trip(max_bits):
+    data = _payload()
+    z = lzw.compress(data, max_bits=max_bits)
+    assert lzw.is_compressed(z)
+    assert len(z) < len(data)
+    assert lzw.open_z(io.BytesIO(z)).read() == data
+
+
+def test_empty_and_single_byte():
+    assert lzw.open_z(io.BytesIO(lzw.compress(b""))).read() == b""
+    assert lzw.open_z(io.BytesIO(lzw.compress(b"x"))).read() == b"x"
+
+
+def test_decompress_streams_in_chunks():
+    data = _payload()
+    dst = io.BytesIO()
+    written = lzw.decompress(io.BytesIO(lzw.compress(data)), dst, chunk_size=4096)
+    assert written == len(data)
+    assert dst.getvalue() == data
+
+
+def test_lines_are_iterable():
+    data = _payload(30_000)
+    assert list(lzw.open_z(io.BytesIO(lzw.compress(data)))) == data.splitlines(keepends=True)
+
+
+def test_rejects_other_formats():
+    assert not lzw.is_compressed(gzip.compress(b"x"))
+    with pytest.raises(ValueError, match="not a Unix compress"):
+        lzw.LZWReader(io.BytesIO(gzip.compress(b"x")))
+    with pytest.raises(ValueError, match="code width"):
+        lzw.LZWReader(io.BytesIO(lzw.MAGIC + bytes([0x80 | 20])))
+
+
+@pytest.mark.skipif(shutil.which("compress") is None, reason="ncompress not installed")
+def test_decodes_system_compress_output():
+    # compress(1) emits CLEAR codes once the table fills and compression drops
+    data = _payload(2_000_000)
+    z = subprocess.run(["compress", "-c"], input=data, capture_output=True, check=True).stdout
+    assert lzw.open_z(io.BytesIO(z)).read() == data
@@ -0,0 +1,155 @@
+"""Tests for the shared single-pass RINEX header parser and its cache."""
+import os
+from unittest.mock import patch
+
+import pytest
+from pogf_geodetic_suite.rinex import header as header_mod
+from pogf_geodetic_suite.rinex.header import (
+    HeaderStore,
+    RinexHeader,
+    parse_header,
+    read_header,
+)
+
+
+def _rec(value: str, label: str) -> str:
+    return f"{value:<60}{label:<20}\n"
+
+
+V2_HEADER = (
+    _rec("     2.11           OBSERVATION DATA    G (GPS)", "RINEX VERSION / TYPE")
+    + _rec("PBIS", "MARKER NAME")
+    + _rec(f"{'1234':<20}{'LEICA GR50':<20}{'4.50':<20}", "REC # / TYPE / VERS")
+    + _rec(f"{'5678':<20}{'LEIAR20         NONE':<20}", "ANT # / TYPE")
+    + _rec("    30.000", "INTERVAL")
+    + _rec("  2023     1     1     0     0    0.0000000     GPS", "TIME OF FIRST OBS")
+    + _rec("", "END OF HEADER")
+)
+
+V3_HEADER = (
+    _rec("     3.04           OBSERVATION DATA    M", "RINEX VERSION / TYPE")
+    + _rec("SEMA00USA", "MARKER NAME")
+    + _rec(f"{'':20}{'TRIMBLE NETR9':<20}", "REC # / TYPE / VERS")
+    + _rec(f"{'':20}{'TRM59800.00     SCIS':<20}", "ANT # / TYPE")
+    + _rec("  2023     1     1    23    59   30.0000000     GPS", "TIME OF LAST OBS")
+    + _rec("", "END OF HEADER")
+)
+
+BODY = " 23  1  1  0  0  0.0000000  0  1G05\n  23000000.500\n"
+
+
+@pytest.fixture
+def store():
+    s = HeaderStore(":memory:")
+    yield s
+    s.close()
+
+
+def test_parse_rinex2_header():
+    h = parse_header((V2_HEADER + BODY).encode())
+    assert h.is_rinex and not h.crinex and h.complete
+    assert h.version == pytest.approx(2.11)
+    assert h.file_type == "O"
+    assert h.satellite_system == "G"
+    assert h.station_code == "PBIS"
+    assert h.receiver_type == "LEICA GR50"
+    assert h.antenna_type == "LEIAR20         NONE"
+    assert h.interval == 30.0
+    assert h.first_obs.startswith("2023")
+    assert h.last_obs is None
+
+
+def test_parse_rinex3_header_with_crlf():
+    h = parse_header(V3_HEADER.replace("\n", "\r\n").encode())
+    assert h.version == pytest.approx(3.04)
+    assert h.satellite_system == "M"
+    assert h.marker_name == "SEMA00USA"
+    assert h.receiver_type == "TRIMBLE NETR9"
+    assert h.last_obs.startswith("2023")
+    assert h.complete
+
+
+def test_parse_crinex_header():
+    crx = _rec("3.0                 COMPACT RINEX FORMAT", "CRINEX VERS   / TYPE") + V3_HEADER
+    h = parse_header(crx.encode())
+    assert h.is_rinex and h.crinex
+    assert h.version == pytest.approx(3.04)
+
+
+def test_parse_stops_at_end_of_header():
+    trailing = _rec("XXXX", "MARKER NAME")
+    h = parse_header((V2_HEADER + trailing).encode())
+    assert h.marker_name == "PBIS"
+
+
+def test_non_rinex_and_late_version_line():
+    assert not parse_header(b"hello world\n").is_rinex
+    late = "".join(_rec("", "COMMENT") for _ in range(12)) + V2_HEADER
+    assert not parse_header(late.encode()).is_rinex
+
+
+def test_prefix_stops_at_end_of_header(tmp_path):
+    path = tmp_path / "pbis0010.23o"
+    path.write_text(V2_HEADER + BODY * 10000)
+    assert header_mod._read_prefix(str(path)) == V2_HEADER.encode()
+
+
+def test_prefix_grows_for_long_headers(tmp_path):
+    comments = "".join(_rec("x", "COMMENT") for _ in range(1200))  # ~97 KiB
+    path = tmp_path / "long0010.23o"
+    path.write_text(V2_HEADER.replace(_rec("", "END OF HEADER"), comments + _rec("", "END OF HEADER")))
+    h = read_header(path, store=HeaderStore(":memory:"))
+    assert h.complete and h.interval == 30.0
+
+
+def test_read_header_caches_by_key(tmp_path, store):
+    path = tmp_path / "pbis0010.23o"
+    path.write_text(V2_HEADER + BODY)
+    first = read_header(path, key="abc", store=store)
+    with patch.object(header_mod, "_read_prefix") as read_prefix:
+        again = read_header(path, key="abc", store=store)
+    read_prefix.assert_not_called()
+    assert again == first
+
+
+def test_stat_key_changes_when_file_changes(tmp_path, store):
+    path = tmp_path / "pbis0010.23o"
+    path.write_text(V2_HEADER + BODY)
+    assert read_header(path, store=store).marker_name == "PBIS"
+    path.write_text(V2_HEADER.replace("PBIS", "SEMA") + BODY + BODY)
+    assert read_header(path, store=store).marker_name == "SEMA"
+
+
+def test_store_persists_across_instances(tmp_path):
+    db = str(tmp_path / "headers.sqlite")
+    s = HeaderStore(db)
+    s.put("k", RinexHeader(is_rinex=True, marker_name="PBIS", version=2.11))
+    s.close()
+    s = HeaderStore(db)
+    h = s.get("k")
+    s.close()
+    assert h == RinexHeader(is_rinex=True, marker_name="PBIS", version=2.11)
+
+
+def test_store_memory_lru_falls_back_to_sqlite(store):
+    small = HeaderStore(":memory:", memory_entries=1)
+    small.put("a", RinexHeader(marker_name="AAAA"))
+    small.put("b", RinexHeader(marker_name="BBBB"))
+    assert "a" not in small._memory
+    assert small.get("a").marker_name == "AAAA"
+    small.close()
+
+
+def test_read_header_missing_file_raises(tmp_path, store):
+    with pytest.raises(OSError):
+        read_header(tmp_path / "nope.23o", store=store)
+
+
+def test_default_store_is_per_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(header_mod, "DEFAULT_STORE_PATH", str(tmp_path / "h.sqlite"))
+    monkeypatch.setattr(header_mod, "_store", None)
+    monkeypatch.setattr(header_mod, "_store_pid", None)
+    first = header_mod.default_store()
+    assert header_mod.default_store() is first
+    monkeypatch.setattr(header_mod, "_store_pid", os.getpid() + 1)
+    assert header_mod.default_store() is not first
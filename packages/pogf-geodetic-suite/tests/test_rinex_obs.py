@@ -0,0 +1,133 @@
+"""Tests for the streaming RINEX observation reader."""
+import io
+
+import numpy as np
+import pytest
+from pogf_geodetic_suite.rinex.obs import RinexObsError, open_obs
+
+SATS_V2 = [f"G{i:02d}" for i in range(1, 15)]   # 14 satellites: one continuation line
+
+HEADER_V2 = (
+    f"{'     2.11           OBSERVATION DATA    M (MIXED)':<60}RINEX VERSION / TYPE\n"
+    f"{'PBIS':<60}MARKER NAME\n"
+    f"{'     6    L1    L2    C1    P2    S1':<60}# / TYPES OF OBSERV\n"
+    f"{'          S2':<60}# / TYPES OF OBSERV\n"
+    f"{'    30.000':<60}INTERVAL\n"
+    f"{'':<60}END OF HEADER\n"
+)
+
+
+def _epoch_v2(second: int, sats: list[str], flag: int = 0) -> str:
+    names = "".join(sats)
+    out = f" 23  1  1  0  0{second:11.7f}  {flag}{len(sats):3d}{names[:36]}\n"
+    for i in range(36, len(names), 36):
+        out += " " * 32 + names[i:i + 36] + "\n"
+    for n, sat in enumerate(sats):
+        base = 1000.0 * int(sat[1:]) + second
+        out += f"{base:14.3f}1 {base + 0.5:14.3f}  {base + 0.25:14.3f}  {'':16}{45.0:14.3f}  \n"
+        out += f"{40.0 + n:14.3f} 7\n"
+    return out
+
+
+V2 = (
+    HEADER_V2
+    + _epoch_v2(0, SATS_V2)
+    + f"{'':26}  4  2\n"
+    + f"{'ANTENNA SWAP':<60}COMMENT\n"
+    + f"{'':<60}MARKER NAME\n"
+    + _epoch_v2(30, SATS_V2[:3])
+    + _epoch_v2(30, SATS_V2[:1], flag=6)
+)
+
+V3 = (
+    f"{'     3.04           OBSERVATION DATA    M':<60}RINEX VERSION / TYPE\n"
+    f"{'G    2 C1C L1C':<60}SYS / # / OBS TYPES\n"
+    f"{'E    3 C1C C5Q L5Q':<60}SYS / # / OBS TYPES\n"
+    f"{'':<60}END OF HEADER\n"
+    "> 2023 01 01 00 00  0.0000000  0  2\n"
+    "G05  23000000.500   120000000.7501\n"
+    "E11  26000000.125    25000000.000   136000000.875\n"
+    "> 2023 01 01 00 00 30.0000000  0  1\n"
+    "G05    23000001.5\n"           # not F14.3: point two columns right
+)
+
+
+def _read(text: str, max_rows: int = 1 << 14):
+    reader = open_obs(io.BytesIO(text.encode()))
+    return reader, list(reader.blocks(max_rows))
+
+
+def test_rinex2_wrapped_records_and_continued_satellite_list():
+    reader, blocks = _read(V2)
+    block = blocks[0]
+
+    assert reader.columns == ["L1", "L2", "C1", "P2", "S1", "S2"]
+    assert reader.satellites == SATS_V2
+    assert list(block.epoch) == [0] * 14 + [1] * 3
+    g03 = block.values[2]
+    assert g03[:3].tolist() == [3000.0, 3000.5, 3000.25]
+    assert np.isnan(g03[3])
+    assert g03[5] == 42.0
+    assert block.lli[2, 0] == 1 and block.snr[2, 5] == 7
+
+
+def test_rinex2_event_and_slip_records_are_skipped():
+    _, blocks = _read(V2)
+    times = np.concatenate([b.times for b in blocks])
+    assert times.tolist() == [
+        np.datetime64("2023-01-01T00:00:00", "ns").item(),
+        np.datetime64("2023-01-01T00:00:30", "ns").item(),
+    ]
+
+
+def test_rinex3_columns_are_the_union_of_systems():
+    reader, (block,) = _read(V3)
+
+    assert reader.columns == ["C1C", "L1C", "C5Q", "L5Q"]
+    assert reader.satellites == ["G05", "E11"]
+    np.testing.assert_array_equal(block.values[0, :2], [23000000.5, 120000000.75])
+    assert np.isnan(block.values[0, 2:]).all()
+    np.testing.assert_array_equal(block.values[1, [0, 2, 3]], [26000000.125, 25000000.0, 136000000.875])
+    assert np.isnan(block.values[1, 1])
+    assert block.lli[0, 1] == 1
+
+
+def test_non_f14_3_fields_fall_back_to_float():
+    _, (block,) = _read(V3)
+    assert block.values[2, 0] == pytest.approx(23000001.5)
+
+
+def test_blocks_split_on_epoch_boundaries():
+    _, blocks = _read(V2, max_rows=5)
+    assert [b.epoch_offset for b in blocks] == [0, 1]
+    assert [len(b.sat) for b in blocks] == [14, 3]
+
+
+def test_truncated_epoch_raises():
+    with pytest.raises(RinexObsError, match="ends in the middle"):
+        _read(V3.rsplit("\n", 2)[0] + "\n")
+
+
+def test_navigation_file_is_rejected():
+    nav = f"{'     3.04           N: GNSS NAV DATA    M':<60}RINEX VERSION / TYPE\n"
+    with pytest.raises(RinexObsError, match="not an observation file"):
+        open_obs(io.BytesIO(nav.encode()))
+
+
+def test_systems_filter_drops_other_constellations():
+    reader = open_obs(io.BytesIO(V3.encode()), systems="E")
+    (block,) = list(reader.blocks())
+
+    assert reader.columns == ["C1C", "C5Q", "L5Q"]
+    assert reader.satellites == ["E11"]
+    assert block.values.tolist() == [[26000000.125, 25000000.0, 136000000.875]]
+    assert block.times.size == 2
+
+
+def test_rinex2_systems_filter_keeps_wrapped_records_aligned():
+    text = V2.replace("G02", "R02")
+    reader = open_obs(io.BytesIO(text.encode()), systems="R")
+    (block,) = list(reader.blocks())
+    assert reader.satellites == ["R02"]
+    assert block.values[:, 0].tolist() == [2000.0, 2030.0]
+    assert block.values[:, 5].tolist() == [41.0, 41.0]
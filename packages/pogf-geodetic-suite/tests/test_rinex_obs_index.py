@@ -0,0 +1,137 @@
+"""Tests for the memory-mapped epoch index and windowed observation arrays."""
+import io
+import os
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+from pogf_geodetic_suite.rinex.obs import RinexObsError, open_obs
+from pogf_geodetic_suite.rinex.obs_index import ObsFile, index_path, read_obs
+from pogf_geodetic_suite.rinex.synthetic import SyntheticSpec, generate
+
+SPEC = SyntheticSpec(version=3, epochs=240, satellites={"G": 8, "R": 4, "E": 5}, seed=1)
+
+
+@pytest.fixture
+def rnx(tmp_path):
+    path = tmp_path / "SYN100XXX_R_20230010000_01H_30S_MO.rnx"
+    path.write_bytes(generate(SPEC))
+    return path
+
+
+def _dense_from_reader(data: bytes, systems=None):
+    reader = open_obs(io.BytesIO(data), systems)
+    blocks = list(reader.blocks())
+    names = sorted(reader.satellites)
+    perm = np.array([names.index(n) for n in reader.satellites])
+    n_epochs = sum(len(b.times) for b in blocks)
+    values = np.full((n_epochs, len(names), len(reader.columns)), np.nan)
+    for b in blocks:
+        values[b.epoch, perm[b.sat]] = b.values
+    return names, reader.columns, values
+
+
+@pytest.mark.parametrize("version", [2, 3])
+def test_full_read_matches_streaming_reader(tmp_path, version):
+    spec = SyntheticSpec(version=version, epochs=120, satellites={"G": 14, "R": 3, "E": 3})
+    data = generate(spec)
+    path = tmp_path / "obs.rnx"
+    path.write_bytes(data)
+
+    with ObsFile(path) as obs:
+        arrays = obs.read()
+
+    names, columns, values = _dense_from_reader(data)
+    assert arrays.satellites == names
+    assert arrays.columns == columns
+    assert arrays.values.shape == (120, len(names), len(columns))
+    np.testing.assert_array_equal(arrays.values, values)
+
+
+def test_time_window_reads_only_its_epochs(rnx):
+    with ObsFile(rnx) as obs:
+        window = obs.read("2023-01-01T00:30", datetime(2023, 1, 1, 0, 35, tzinfo=UTC))
+        full = obs.read()
+
+    assert len(window.times) == 10
+    assert window.times[0] == np.datetime64("2023-01-01T00:30")
+    rows = slice(60, 70)
+    cols = [full.satellites.index(s) for s in window.satellites]
+    np.testing.assert_array_equal(window.values, full.values[rows][:, cols])
+
+
+def test_constellation_filter(rnx):
+    with ObsFile(rnx) as obs:
+        galileo = obs.read(systems="E")
+    assert {s[0] for s in galileo.satellites} == {"E"}
+    assert galileo.columns == ["C1C", "L1C", "S1C", "C5Q", "L5Q", "S5Q"]
+    assert galileo.observable("L5Q").shape == (240, len(galileo.satellites))
+    with pytest.raises(KeyError):
+        galileo.observable("L2W")
+
+
+def test_index_is_saved_and_reused(rnx, tmp_path):
+    saved = index_path(rnx, tmp_path / "idx")
+    with ObsFile(rnx, index_dir=tmp_path / "idx") as obs:
+        times = obs.times.copy()
+    assert saved.exists()
+
+    saved_mtime = saved.stat().st_mtime_ns
+    with ObsFile(rnx, index_dir=tmp_path / "idx") as obs:
+        assert isinstance(obs.times, np.memmap)
+        np.testing.assert_array_equal(obs.times, times)
+    assert saved.stat().st_mtime_ns == saved_mtime
+
+
+def test_stale_index_is_rebuilt(rnx):
+    with ObsFile(rnx):
+        pass
+    shorter = SyntheticSpec(version=3, epochs=100, satellites=SPEC.satellites, seed=1)
+    rnx.write_bytes(generate(shorter))
+    later = index_path(rnx).stat().st_mtime_ns + 1_000_000_000
+    os.utime(rnx, ns=(later, later))
+
+    with ObsFile(rnx) as obs:
+        assert len(obs) == 100
+
+
+def test_iter_windows_covers_the_file(rnx):
+    with ObsFile(rnx, save_index=False) as obs:
+        windows = list(obs.iter_windows(timedelta(minutes=15), systems="G"))
+    assert [len(w.times) for w in windows] == [30, 30, 30, 30, 30, 30, 30, 30]
+    assert not index_path(rnx).exists()
+
+
+def test_special_events_and_slips_are_not_indexed(tmp_path):
+    text = (
+        f"{'     3.04           OBSERVATION DATA    M':<60}RINEX VERSION / TYPE\n"
+        f"{'G    2 C1C L1C':<60}SYS / # / OBS TYPES\n"
+        f"{'':<60}END OF HEADER\n"
+        "> 2023 01 01 00 00  0.0000000  0  1\n"
+        "G05  23000000.500   120000000.750\n"
+        ">                              4  1\n"
+        f"{'ANTENNA SWAP':<60}COMMENT\n"
+        "> 2023 01 01 00 00 30.0000000  6  1\n"
+        "G05  23000000.500   120000000.750\n"
+        "> 2023 01 01 00 00 30.0000000  0  1\n"
+        "G05  23000001.500   120000001.750"          # no final newline
+    )
+    path = tmp_path / "events.rnx"
+    path.write_text(text)
+
+    arrays = read_obs(path)
+    assert len(arrays.times) == 2
+    assert arrays.values[:, 0, 0].tolist() == [23000000.5, 23000001.5]
+
+
+def test_truncated_file_raises(rnx):
+    rnx.write_bytes(rnx.read_bytes().rsplit(b"\n", 3)[0] + b"\n")
+    with pytest.raises(RinexObsError, match="ends in the middle"):
+        ObsFile(rnx, save_index=False)
+
+
+def test_compact_rinex_is_rejected(tmp_path):
+    path = tmp_path / "obs.crx"
+    path.write_bytes(generate(SPEC, hatanaka=True))
+    with pytest.raises(RinexObsError, match="hatanaka.decompress"):
+        ObsFile(path)
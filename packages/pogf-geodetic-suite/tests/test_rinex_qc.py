@@ -1,10 +1,16 @@
-"""Tests for RinexQC / teqc +qc wrapper."""
+"""Tests for the native RinexQC engine and the TeqcQC (teqc +qc) wrapper."""
 import subprocess
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
-from pogf_geodetic_suite.qc.rinex_qc import RinexQC, RINEXQCResult, _parse_teqc_output
+from pogf_geodetic_suite.qc.rinex_qc import (
+    RinexQC,
+    RINEXQCResult,
+    TeqcQC,
+    _parse_teqc_output,
+)
+from pogf_geodetic_suite.rinex.obs import RinexObsError
 
 # ---------------------------------------------------------------------------
 # Fixture: representative teqc .S output (teqc 2019-era format)
@@ -73,7 +79,7 @@ def test_parse_preserves_raw_output():
 # ---------------------------------------------------------------------------
 
 def test_run_qc_file_not_found():
-    qc = RinexQC()
+    qc = TeqcQC()
     with pytest.raises(FileNotFoundError):
         qc.run_qc("/nonexistent/path/file.rnx")
 
@@ -94,7 +100,7 @@ def test_run_qc_reads_s_file(tmp_path):
         return result
 
     with patch("pogf_geodetic_suite.qc.rinex_qc.subprocess.run", side_effect=fake_run):
-        qc = RinexQC()
+        qc = TeqcQC()
         result = qc.run_qc(str(rinex))
 
     assert result.obs_count == 85321
@@ -112,7 +118,7 @@ def test_run_qc_falls_back_to_stderr(tmp_path):
     mock_proc.stderr = SAMPLE_TEQC_OUTPUT
 
     with patch("pogf_geodetic_suite.qc.rinex_qc.subprocess.run", return_value=mock_proc):
-        qc = RinexQC()
+        qc = TeqcQC()
         result = qc.run_qc(str(rinex))
 
     assert result.obs_count == 85321
@@ -127,7 +133,7 @@ def test_run_qc_raises_when_teqc_not_found(tmp_path):
         "pogf_geodetic_suite.qc.rinex_qc.subprocess.run",
         side_effect=FileNotFoundError("teqc not found"),
     ):
-        qc = RinexQC()
+        qc = TeqcQC()
         with pytest.raises(RuntimeError, match="teqc not found"):
             qc.run_qc(str(rinex))
 
@@ -142,7 +148,7 @@ def test_run_qc_raises_on_fatal_exit_code(tmp_path):
     mock_proc.stdout = ""
 
     with patch("pogf_geodetic_suite.qc.rinex_qc.subprocess.run", return_value=mock_proc):
-        qc = RinexQC()
+        qc = TeqcQC()
         with pytest.raises(RuntimeError):
             qc.run_qc(str(rinex))
 
@@ -155,13 +161,13 @@ def test_run_qc_raises_on_timeout(tmp_path):
         "pogf_geodetic_suite.qc.rinex_qc.subprocess.run",
         side_effect=subprocess.TimeoutExpired(cmd="teqc", timeout=30),
     ):
-        qc = RinexQC(timeout_sec=30)
+        qc = TeqcQC(timeout_sec=30)
         with pytest.raises(RuntimeError, match="timed out after 30s"):
             qc.run_qc(str(rinex))
 
 
-def test_rinex_qc_custom_timeout():
-    qc = RinexQC(timeout_sec=30)
+def test_teqc_qc_custom_timeout():
+    qc = TeqcQC(timeout_sec=30)
     assert qc.timeout_sec == 30
 
 
@@ -171,3 +177,136 @@ def test_rinex_qc_result_dataclass_fields():
     assert r.cycle_slips == 5
     assert r.mp1_rms == 0.3
     assert r.mp2_rms == 0.4
+
+
+# ---------------------------------------------------------------------------
+# Native engine — synthetic observations with known slips and multipath
+# ---------------------------------------------------------------------------
+
+C = 299_792_458.0
+FREQ = {
+    "G": (1575.42e6, 1227.60e6),
+    "E": (1575.42e6, 1176.45e6),
+    "R": (1602.0e6 - 0.5625e6, 1246.0e6 - 0.4375e6),   # channel -1
+}
+TYPES_V3 = {"G": "C1C L1C C2W L2W", "E": "C1C L1C C5Q L5Q", "R": "C1C L1C C2P L2P"}
+N_EPOCHS = 40
+
+
+def _synthetic_obs(sat: str, epoch: int) -> tuple[list[float | None], list[int]]:
+    """(C1, L1, C2, L2) with MP1 = ±0.3 m, MP2 = ±0.4 m and slow ionosphere."""
+    f1, f2 = FREQ[sat[0]]
+    t = 30.0 * epoch
+    rho = 2.1e7 + 1e5 * int(sat[1:]) + 300.0 * t
+    i1 = 2.0 + 0.001 * t
+    i2 = i1 * (f1 / f2) ** 2
+    sign = 1 if epoch % 2 == 0 else -1
+    n1 = 1000 + (7 if sat == "G02" and epoch >= 20 else 0)   # G02 slips 7 cycles
+    l1 = (rho - i1) * f1 / C + n1
+    l2 = (rho - i2) * f2 / C + 2000
+    values = [rho + i1 + 0.3 * sign, l1, rho + i2 + 0.4 * sign, l2]
+    lli = [0, 1 if sat == "E05" and epoch == 10 else 0, 0, 0]   # E05 loses lock
+    if sat == "G01" and epoch >= 30:
+        values[2] = values[3] = None                            # G01 drops L2
+    return values, lli
+
+
+def _field(value: float | None, lli: int = 0) -> str:
+    return " " * 16 if value is None else f"{value:14.3f}{lli or ' '} "
+
+
+SATS = ["G01", "G02", "E05", "R03"]
+
+
+def _write_rinex3(path: Path) -> Path:
+    lines = [
+        f"{'     3.04           OBSERVATION DATA    M':<60}RINEX VERSION / TYPE",
+        f"{'PBIS':<60}MARKER NAME",
+        *(f"{s}    4 {t:<53}SYS / # / OBS TYPES" for s, t in TYPES_V3.items()),
+        f"{'  1 R03 -1':<60}GLONASS SLOT / FRQ #",
+        f"{'    30.000':<60}INTERVAL",
+        f"{'':<60}END OF HEADER",
+    ]
+    for e in range(N_EPOCHS):
+        lines.append(f"> 2023 01 01 00 {e // 2:02d} {30 * (e % 2):10.7f}  0  4")
+        for sat in SATS:
+            values, lli = _synthetic_obs(sat, e)
+            lines.append(sat + "".join(_field(v, f) for v, f in zip(values, lli, strict=True)).rstrip())
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def _write_rinex2(path: Path) -> Path:
+    """GPS only, types L1 L2 C1 P2 — same G01/G02 data as _write_rinex3."""
+    lines = [
+        f"{'     2.11           OBSERVATION DATA    G (GPS)':<60}RINEX VERSION / TYPE",
+        f"{'PBIS':<60}MARKER NAME",
+        f"{'     4    L1    L2    C1    P2':<60}# / TYPES OF OBSERV",
+        f"{'':<60}END OF HEADER",
+    ]
+    for e in range(N_EPOCHS):
+        lines.append(f" 23  1  1  0{e // 2:3d}{30 * (e % 2):11.7f}  0  2G01G02")
+        for sat in ("G01", "G02"):
+            (c1, l1, c2, l2), (_, lli1, _, _) = _synthetic_obs(sat, e)
+            lines.append("".join([_field(l1, lli1), _field(l2), _field(c1), _field(c2)]).rstrip())
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_native_qc_rinex3_metrics(tmp_path):
+    result = RinexQC().run_qc(str(_write_rinex3(tmp_path / "PBIS00XXX_R_20230010000_01D_30S_MO.rnx")))
+
+    assert result.epochs == N_EPOCHS
+    assert result.obs_count == len(SATS) * N_EPOCHS * 4 - 2 * 10
+    assert result.cycle_slips == 2                       # G02 jump + E05 LLI
+    assert result.mp1_rms == pytest.approx(0.3, abs=1e-3)
+    assert result.mp2_rms == pytest.approx(0.4, abs=1e-3)
+    assert result.completeness == {"E": 1.0, "G": pytest.approx(70 / 80), "R": 1.0}
+
+
+def test_native_qc_rinex2_matches_rinex3(tmp_path):
+    result = RinexQC().run_qc(str(_write_rinex2(tmp_path / "PBIS001a.23o")))
+
+    assert result.obs_count == 2 * N_EPOCHS * 4 - 2 * 10
+    assert result.cycle_slips == 1
+    assert result.mp1_rms == pytest.approx(0.3, abs=1e-3)
+    assert result.mp2_rms == pytest.approx(0.4, abs=1e-3)
+
+
+def test_native_qc_gap_ends_arc_without_slip(tmp_path):
+    path = _write_rinex3(tmp_path / "obs.rnx")
+    result = RinexQC(max_gap_sec=10.0, min_arc_epochs=1).run_qc(str(path))
+    assert result.cycle_slips == 0    # every epoch starts a new arc; the LLI is not a slip
+    assert result.mp1_rms == pytest.approx(0.0, abs=1e-3)
+
+
+def test_native_qc_summary_parses_like_teqc(tmp_path):
+    result = RinexQC().run_qc(str(_write_rinex3(tmp_path / "obs.rnx")))
+    parsed = _parse_teqc_output(result.raw_output)
+    assert parsed.obs_count == result.obs_count
+    assert parsed.cycle_slips == result.cycle_slips
+    assert parsed.mp1_rms == pytest.approx(result.mp1_rms, abs=1e-3)
+
+
+def test_native_qc_header_only_file(tmp_path):
+    path = tmp_path / "PBIS001a.23o"
+    path.write_text(
+        f"{'     2.11           OBSERVATION DATA    G (GPS)':<60}RINEX VERSION / TYPE\n"
+        f"{'     2    L1    C1':<60}# / TYPES OF OBSERV\n"
+        f"{'':<60}END OF HEADER\n"
+    )
+    result = RinexQC().run_qc(str(path))
+    assert (result.epochs, result.obs_count, result.cycle_slips) == (0, 0, 0)
+    assert result.mp1_rms is None and result.completeness == {}
+
+
+def test_native_qc_rejects_non_rinex(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("not a RINEX file\n")
+    with pytest.raises(RinexObsError):
+        RinexQC().run_qc(str(path))
+
+
+def test_native_qc_file_not_found():
+    with pytest.raises(FileNotFoundError):
+        RinexQC().run_qc("/nonexistent/path/file.rnx")
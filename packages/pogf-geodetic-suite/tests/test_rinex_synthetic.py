@@ -0,0 +1,93 @@
+"""Tests for the synthetic RINEX generator used by tests and benchmarks."""
+import gzip
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+from pogf_geodetic_suite.qc.rinex_qc import RinexQC
+from pogf_geodetic_suite.rinex.hatanaka import decompress
+from pogf_geodetic_suite.rinex.header import parse_header
+from pogf_geodetic_suite.rinex.synthetic import (
+    SyntheticSpec,
+    compress_z,
+    file_name,
+    generate,
+    write_file,
+)
+
+
+def _decode(crx: bytes) -> bytes:
+    out = io.BytesIO()
+    decompress(io.BytesIO(crx), out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("version", [2, 3])
+def test_compact_rinex_decodes_to_plain(version):
+    spec = SyntheticSpec(version=version, epochs=400, seed=3)
+    assert _decode(generate(spec, hatanaka=True)) == generate(spec)
+
+
+def test_rinex2_wraps_more_than_twelve_satellites():
+    spec = SyntheticSpec(version=2, epochs=60, satellites={"G": 40})
+    text = generate(spec).decode()
+    assert "\n" + " " * 32 + "G" in text                # epoch continuation line
+    assert _decode(generate(spec, hatanaka=True)) == generate(spec)
+
+
+def test_same_spec_same_bytes_and_seed_changes_them():
+    spec = SyntheticSpec(epochs=20)
+    assert generate(spec) == generate(SyntheticSpec(epochs=20))
+    assert generate(spec) != generate(SyntheticSpec(epochs=20, seed=1))
+
+
+def test_header_fields():
+    spec = SyntheticSpec(station="PBIS", version=3, epochs=10)
+    h = parse_header(generate(spec))
+    assert h.is_rinex and h.complete
+    assert h.version == 3.04 and h.satellite_system == "M"
+    assert h.marker_name == "PBIS"
+    assert h.interval == 30.0
+    assert h.last_obs.startswith("2023     1     1     0     4   30")
+
+
+def test_qc_sees_realistic_multipath(tmp_path):
+    path = write_file(SyntheticSpec(version=3, epochs=240), tmp_path, hatanaka=True)
+    result = RinexQC().run_qc(str(path))
+    assert result.obs_count > 0
+    assert result.cycle_slips == 0
+    assert 0.1 < result.mp1_rms < 1.0
+    assert 0.1 < result.mp2_rms < 1.0
+    assert set(result.completeness) == {"G", "R", "E"}
+
+
+def test_file_names():
+    day = datetime(2023, 2, 1)
+    assert file_name(SyntheticSpec(station="PBIS", version=2, start=day)) == "pbis0320.23o"
+    assert file_name(SyntheticSpec(station="PBIS", version=2, start=day), True) == "pbis0320.23d"
+    assert file_name(SyntheticSpec(station="PBIS", start=day), True) == (
+        "PBIS00SYN_R_20230320000_01D_30S_MO.crx"
+    )
+    assert file_name(SyntheticSpec(epochs=3600, interval=1.0)).endswith("_01H_01S_MO.rnx")
+
+
+def test_wrappers_stack_innermost_first(tmp_path):
+    spec = SyntheticSpec(version=2, epochs=10)
+    path = write_file(spec, tmp_path, hatanaka=True, wrappers=("gz", "zip"))
+    assert path.name == "syn10010.23d.gz.zip"
+    with zipfile.ZipFile(path) as zf:
+        (member,) = zf.namelist()
+        assert member == "syn10010.23d.gz"
+        assert gzip.decompress(zf.read(member)) == generate(spec, hatanaka=True)
+
+
+def test_unknown_wrapper_rejected(tmp_path):
+    with pytest.raises(ValueError, match="unknown wrapper"):
+        write_file(SyntheticSpec(epochs=1), tmp_path, wrappers=("bz2",))
+
+
+def test_compress_z_header():
+    data = compress_z(b"abcabcabc" * 100)
+    assert data[:3] == b"\x1f\x9d\x90"
+    assert len(data) < 900
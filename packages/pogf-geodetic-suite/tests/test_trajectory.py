@@ -0,0 +1,120 @@
+"""Tests for timeseries.trajectory — steps, seasonal and postseismic models."""
+import numpy as np
+import pytest
+from pogf_geodetic_suite.timeseries.analysis import OffsetEvent, OffsetType
+from pogf_geodetic_suite.timeseries.crd_pipeline import EnuSeries
+from pogf_geodetic_suite.timeseries.trajectory import (
+    design_matrix,
+    fit_trajectories,
+    fit_trajectory,
+)
+
+T = 2010.0 + np.arange(10 * 365) / 365.25
+VEL = np.array([10.0, -4.0, 2.0]) / 1000.0          # m/yr
+ANNUAL = np.array([3.0, 1.5, 6.0]) / 1000.0
+STEP = np.array([20.0, -10.0, -30.0]) / 1000.0
+POST = np.array([15.0, 5.0, -4.0]) / 1000.0
+
+
+def _truth(t, quakes=((2015.0, 0.3),), kind="log"):
+    d = (t - 2010.0)[:, None] * VEL + np.sin(2 * np.pi * t)[:, None] * ANNUAL
+    for date, tau in quakes:
+        x = np.maximum(t - date, 0.0) / tau
+        f = np.log1p(x) if kind == "log" else -np.expm1(-x)
+        d += (t >= date)[:, None] * STEP + f[:, None] * POST
+    return d
+
+
+def _noisy(d, seed=0):
+    return d + np.random.default_rng(seed).normal(0.0, 0.001, d.shape)
+
+
+@pytest.mark.parametrize("kind", ["log", "exp"])
+def test_recovers_velocity_step_and_relaxation(kind):
+    enu = _noisy(_truth(T, kind=kind))
+    fit = fit_trajectory(T, enu, offsets=[OffsetEvent(2015.0, OffsetType.EQ)],
+                         relaxation=kind, station="TEST")
+
+    np.testing.assert_allclose(fit.velocity_mm_yr, VEL * 1000.0, atol=0.15)
+    np.testing.assert_allclose(fit.term("step 2015.0000"), STEP, atol=0.001)
+    np.testing.assert_allclose(fit.term(f"{kind} 2015.0000"), POST, atol=0.001)
+    np.testing.assert_allclose(fit.term("annual"), ANNUAL, atol=0.0003)
+    assert fit.taus[2015.0] == pytest.approx(0.3, rel=0.1)
+    np.testing.assert_allclose(fit.rms_m, 0.001, rtol=0.1)
+    assert np.all(fit.sig_velocity_mm_yr > 0)
+
+
+def test_two_earthquakes_get_their_own_time_constants():
+    quakes = ((2014.0, 0.1), (2017.0, 1.0))
+    enu = _noisy(_truth(T, quakes=quakes), seed=1)
+    offsets = [OffsetEvent(date, OffsetType.EQ) for date, _ in quakes]
+    fit = fit_trajectory(T, enu, offsets=offsets, relaxation="log")
+
+    assert fit.taus[2014.0] == pytest.approx(0.1, rel=0.25)
+    assert fit.taus[2017.0] == pytest.approx(1.0, rel=0.25)
+    np.testing.assert_allclose(fit.velocity_mm_yr, VEL * 1000.0, atol=0.3)
+
+
+def test_equipment_change_is_a_step_without_relaxation():
+    enu = _noisy(_truth(T, quakes=()))
+    enu[T >= 2016.0] += STEP
+    fit = fit_trajectory(T, enu, offsets=[OffsetEvent(2016.0, OffsetType.CE)],
+                         relaxation="log")
+
+    assert fit.taus == {}
+    assert not any(name.startswith("log") for name in fit.names)
+    np.testing.assert_allclose(fit.term("step 2016.0000"), STEP, atol=0.0005)
+
+
+def test_offsets_outside_the_series_are_ignored():
+    fit = fit_trajectory(T, _noisy(_truth(T, quakes=())),
+                         offsets=[OffsetEvent(2005.0, OffsetType.EQ),
+                                  OffsetEvent(2030.0, OffsetType.EQ)],
+                         relaxation="exp")
+    assert fit.steps == ()
+    assert fit.names == ["offset", "velocity", "sin 1/yr", "sin 2/yr", "cos 1/yr", "cos 2/yr"]
+
+
+def test_outliers_are_dropped_and_the_model_refit():
+    enu = _noisy(_truth(T, quakes=()))
+    enu[100] += 0.2
+    fit = fit_trajectory(T, enu)
+
+    assert fit.outlier_epochs == (T[100],)
+    assert fit.n_points == len(T) - 1
+    misfit = fit.predict(T) - _truth(T, quakes=())      # constant up to the noise
+    assert np.all(np.abs(misfit - misfit.mean(axis=0)) < 0.001)
+
+
+def test_design_matrix_columns():
+    t = np.array([2014.0, 2015.0, 2016.0])
+    G, names = design_matrix(t, t_ref=2015.0, steps=(2015.0,), harmonics=1,
+                             taus={2015.0: 1.0}, relaxation="exp")
+    assert names == ["offset", "velocity", "step 2015.0000", "sin 1/yr", "cos 1/yr",
+                     "exp 2015.0000"]
+    np.testing.assert_allclose(G[:, 1], [-1.0, 0.0, 1.0])
+    np.testing.assert_allclose(G[:, 2], [0.0, 1.0, 1.0])
+    np.testing.assert_allclose(G[:, 5], [0.0, 0.0, 1.0 - np.exp(-1.0)])
+
+
+def test_too_few_points_raise():
+    with pytest.raises(ValueError, match="trajectory parameters"):
+        fit_trajectory(T[:6], np.zeros((6, 3)))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_fit_trajectories_network(workers):
+    station = np.repeat(["ALPH", "BRAV", "SHRT"], [len(T), len(T), 5])
+    t = np.concatenate([T, T, T[:5]])
+    enu = np.vstack([_noisy(_truth(T)), _noisy(_truth(T, quakes=()), seed=2), np.zeros((5, 3))])
+    offsets = {"ALPH": [OffsetEvent(2015.0, OffsetType.EQ)]}
+
+    result = fit_trajectories(EnuSeries(station, t, enu), offsets, relaxation="log",
+                              workers=workers)
+
+    assert sorted(result.fits) == ["ALPH", "BRAV"]
+    assert "SHRT" in result.failed
+    table = result.velocity_table()
+    assert table.station.tolist() == ["ALPH", "BRAV"]
+    np.testing.assert_allclose(table.vel_mm_yr, [VEL * 1000.0] * 2, atol=0.2)
+    assert table.failed == result.failed
@@ -12,10 +12,11 @@ from pogf_geodetic_suite.timeseries.analysis import (
     VelocityResult,
     _detect_outliers_iqr,
     _fit_segment,
+    estimate_velocities,
     estimate_velocity,
     parse_offsets_file,
 )
-
+from pogf_geodetic_suite.timeseries.crd_pipeline import EnuSeries
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -228,6 +229,98 @@ def test_segment_velocity_dataclass_frozen():
         sv.ve_mm_yr = 99.0  # frozen dataclass
 
 
+# ---------------------------------------------------------------------------
+# estimate_velocities — whole network in one pass
+# ---------------------------------------------------------------------------
+
+def _network(rng: np.random.Generator) -> tuple[EnuSeries, dict[str, list[OffsetEvent]]]:
+    """Four stations, shuffled rows, one offset, one spike, one hopeless station."""
+    codes, t_all, enu_all = [], [], []
+    for i, code in enumerate(["ALPH", "BRAV", "CHAR"]):
+        t = np.linspace(2010, 2020, 120 + 10 * i)
+        enu = _synthetic_enu(t, ve=5.0 * (i + 1), vn=-2.0 * i, rng=rng)
+        if code == "BRAV":
+            enu[40] += 0.5                                   # spike
+        codes += [code] * len(t)
+        t_all.append(t)
+        enu_all.append(enu)
+    codes += ["DELT"] * 2                                    # too short to fit
+    t_all.append(np.array([2011.0, 2012.0]))
+    enu_all.append(np.zeros((2, 3)))
+
+    perm = rng.permutation(len(codes))
+    series = EnuSeries(
+        station=np.array(codes)[perm],
+        decimal_year=np.concatenate(t_all)[perm],
+        enu_m=np.vstack(enu_all)[perm],
+    )
+    offsets = {"CHAR": [OffsetEvent(date=2015.0, offset_type=OffsetType.EQ)]}
+    return series, offsets
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_estimate_velocities_matches_estimate_velocity(workers):
+    series, offsets = _network(np.random.default_rng(3))
+    result = estimate_velocities(series, offsets, workers=workers)
+
+    for code in ["ALPH", "BRAV", "CHAR"]:
+        m = series.station == code
+        ref = estimate_velocity(series.decimal_year[m], series.enu_m[m],
+                                offsets=offsets.get(code), station=code)
+        got = result.result(code)
+        assert len(got.segments) == len(ref.segments)
+        for a, b in zip(got.segments, ref.segments, strict=True):
+            assert a.ve_mm_yr == pytest.approx(b.ve_mm_yr, rel=1e-9)
+            assert a.vn_mm_yr == pytest.approx(b.vn_mm_yr, rel=1e-9, abs=1e-9)
+            assert a.sig_vu == pytest.approx(b.sig_vu, rel=1e-9)
+            assert a.r2_e == pytest.approx(b.r2_e, rel=1e-9)
+            assert (a.n_points, a.t_start, a.t_end) == (b.n_points, b.t_start, b.t_end)
+            assert sorted(a.outlier_epochs) == sorted(b.outlier_epochs)
+    assert len(result.outlier_epochs("BRAV")[0]) == 1
+
+
+def test_estimate_velocities_outlier_epochs_in_time_order():
+    rng = np.random.default_rng(5)
+    t = np.linspace(2010, 2020, 120)
+    enu = _synthetic_enu(t, ve=5.0, vn=-2.0, rng=rng)
+    enu[[30, 90]] += 0.5                                     # two spikes
+    perm = np.concatenate([[90, 30], np.delete(np.arange(len(t)), [30, 90])])
+    series = EnuSeries(station=np.array(["ALPH"] * len(t)), decimal_year=t[perm],
+                       enu_m=enu[perm])
+
+    got = estimate_velocities(series).result("ALPH")
+    ref = estimate_velocity(t, enu, station="ALPH")
+
+    assert got.segments[0].outlier_epochs == ref.segments[0].outlier_epochs == (t[30], t[90])
+
+
+def test_estimate_velocities_reports_failed_stations():
+    series, offsets = _network(np.random.default_rng(3))
+    result = estimate_velocities(series, offsets)
+
+    m = series.station == "DELT"
+    with pytest.raises(ValueError) as exc:
+        estimate_velocity(series.decimal_year[m], series.enu_m[m], station="DELT")
+    assert result.table.failed == {"DELT": str(exc.value)}
+    assert "DELT" not in set(result.table.station.tolist())
+
+
+def test_estimate_velocities_final_is_last_segment_per_station():
+    series, offsets = _network(np.random.default_rng(3))
+    final = estimate_velocities(series, offsets).table.final()
+
+    assert final.station.tolist() == ["ALPH", "BRAV", "CHAR"]
+    assert final.segment.tolist() == [0, 0, 1]
+    assert final.t_start[2] >= 2015.0
+    assert final.vel_mm_yr[:, 0] == pytest.approx([5.0, 10.0, 15.0], abs=1.0)
+
+
+def test_estimate_velocities_raises_on_wrong_shape():
+    series = EnuSeries(np.array(["ALPH"] * 3), np.arange(3.0), np.zeros((3, 2)))
+    with pytest.raises(ValueError, match="shape"):
+        estimate_velocities(series)
+
+
 # ---------------------------------------------------------------------------
 # parse_offsets_file
 # ---------------------------------------------------------------------------
@@ -0,0 +1,127 @@
+"""Tests for timeseries.velocity_store — running network velocities."""
+import numpy as np
+import pytest
+from pogf_geodetic_suite.timeseries.analysis import OffsetEvent, OffsetType, estimate_velocities
+from pogf_geodetic_suite.timeseries.crd_pipeline import EnuSeries
+from pogf_geodetic_suite.timeseries.velocity_store import RunningVelocities
+
+CODES = ["ALPH", "BRAV", "CHAR"]
+OFFSETS = {"CHAR": [OffsetEvent(date=2015.0, offset_type=OffsetType.EQ)]}
+
+
+def _series(n_days: int, seed: int = 1) -> EnuSeries:
+    """Daily epochs from 2010.0, a different trend per station, 1 mm noise."""
+    rng = np.random.default_rng(seed)
+    t = 2010.0 + np.arange(n_days) / 365.25
+    station = np.repeat(CODES, n_days)
+    t_all = np.tile(t, len(CODES))
+    trend = np.array([[5.0, -3.0, 1.0], [12.0, 8.0, -2.0], [20.0, 0.5, 0.0]]) / 1000.0
+    enu = np.repeat(trend, n_days, axis=0) * (t_all - 2010.0)[:, None]
+    enu += rng.normal(0.0, 0.001, enu.shape)
+    return EnuSeries(station=station, decimal_year=t_all, enu_m=enu)
+
+
+def _head(series: EnuSeries, t_max: float) -> EnuSeries:
+    m = series.decimal_year <= t_max
+    return EnuSeries(series.station[m], series.decimal_year[m], series.enu_m[m])
+
+
+def _assert_tables_equal(a, b):
+    assert a.station.tolist() == b.station.tolist()
+    assert a.segment.tolist() == b.segment.tolist()
+    assert a.n_points.tolist() == b.n_points.tolist()
+    np.testing.assert_array_equal(a.t_end, b.t_end)
+    np.testing.assert_allclose(a.vel_mm_yr, b.vel_mm_yr, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(a.sig_mm_yr, b.sig_mm_yr, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(a.r2, b.r2, rtol=1e-9, atol=1e-12)
+    assert a.failed == b.failed
+
+
+@pytest.fixture
+def full():
+    return _series(7 * 365)
+
+
+def test_daily_updates_match_a_full_fit(full):
+    running = RunningVelocities()
+    assert running.update(_head(full, 2016.0), OFFSETS) == CODES
+
+    for day in (2016.5, 2016.9, 2017.0):
+        assert running.update(_head(full, day), OFFSETS) == []
+    _assert_tables_equal(running.table(), estimate_velocities(full, OFFSETS).table)
+
+
+def test_append_only_new_epochs(full):
+    running = RunningVelocities()
+    running.refit(_head(full, 2016.0), OFFSETS)
+    m = (full.decimal_year > 2016.0) & (full.decimal_year <= 2016.01)
+
+    assert running.append(EnuSeries(full.station[m], full.decimal_year[m], full.enu_m[m]),
+                          OFFSETS) == []
+    _assert_tables_equal(running.table(), estimate_velocities(_head(full, 2016.01),
+                                                              OFFSETS).table)
+    # The same epochs again are not new
+    assert running.append(EnuSeries(full.station[m], full.decimal_year[m], full.enu_m[m]),
+                          OFFSETS) == CODES
+
+
+def test_save_and_load_round_trip(full, tmp_path):
+    store = tmp_path / "velocities.npz"
+    running = RunningVelocities()
+    running.update(_head(full, 2016.0), OFFSETS)
+    running.save(store)
+
+    loaded = RunningVelocities.load(store)
+    assert loaded.update(full, OFFSETS) == []
+    _assert_tables_equal(loaded.table(), estimate_velocities(full, OFFSETS).table)
+
+
+def test_load_with_other_outlier_factor_starts_empty(full, tmp_path):
+    store = tmp_path / "velocities.npz"
+    running = RunningVelocities()
+    running.update(_head(full, 2016.0), OFFSETS)
+    running.save(store)
+
+    assert len(RunningVelocities.load(store, outlier_iqr_factor=2.0).table()) == 0
+    assert len(RunningVelocities.load(tmp_path / "missing.npz").table()) == 0
+
+
+def test_outlier_triggers_refit(full):
+    running = RunningVelocities()
+    running.update(_head(full, 2016.0), OFFSETS)
+    spiked = EnuSeries(full.station, full.decimal_year, full.enu_m.copy())
+    row = np.flatnonzero((full.station == "BRAV") & (full.decimal_year > 2016.0))[0]
+    spiked.enu_m[row] += 1.0
+
+    assert running.update(_head(spiked, 2016.01), OFFSETS) == ["BRAV"]
+    result = estimate_velocities(_head(spiked, 2016.01), OFFSETS)
+    _assert_tables_equal(running.table(), result.table)
+    assert result.outlier_epochs("BRAV") == {0: (full.decimal_year[row],)}
+
+
+def test_offset_and_history_changes_trigger_refit(full):
+    running = RunningVelocities()
+    running.update(_head(full, 2016.0), OFFSETS)
+
+    moved = {**OFFSETS, "ALPH": [OffsetEvent(date=2013.0, offset_type=OffsetType.CE)]}
+    assert running.update(_head(full, 2016.01), moved) == ["ALPH"]
+    assert running.table().segment[running.table().station == "ALPH"].tolist() == [0, 1]
+
+    # An epoch of CHAR disappears from its history
+    head = _head(full, 2016.02)
+    keep = np.ones(len(head), dtype=bool)
+    keep[np.flatnonzero(head.station == "CHAR")[500]] = False
+    edited = EnuSeries(head.station[keep], head.decimal_year[keep], head.enu_m[keep])
+    assert running.update(edited, moved) == ["CHAR"]
+    _assert_tables_equal(running.table(), estimate_velocities(edited, moved).table)
+
+
+def test_failed_station_is_refit_until_it_has_enough_epochs():
+    series = _series(2)
+    running = RunningVelocities()
+    running.update(series)
+    assert set(running.table().failed) == set(CODES)
+
+    assert running.update(_series(30)) == CODES
+    assert running.table().failed == {}
+    assert running.update(_series(31)) == []
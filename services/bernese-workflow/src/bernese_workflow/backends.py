@@ -176,6 +176,7 @@ class LinuxBPEBackend:
         sessions_template: str | Path | None = None,
         prefetch_products: bool = False,
         product_ac: str = "COD",
+        warm_ahead_days: int = 0,
         **kwargs: object,
     ) -> None:
         """Create campaign subdirectories, stage the GEN/SESSIONS.SES session
@@ -193,7 +194,8 @@ class LinuxBPEBackend:
         When *prefetch_products* is set, IGS orbit/clock products for the session are
         pre-downloaded into ORB/ via ``igs_downloader`` (Option B — replaces the retired
         in-BPE FTP_DWLD step) and a pre-flight existence check runs; a missing/incomplete
-        product set raises here, BEFORE the BPE is launched.
+        product set raises here, BEFORE the BPE is launched. Products are linked from the
+        shared product cache; *warm_ahead_days* also caches the following sessions' days.
         """
         from .campaign_builder import (
             generate_abb,
@@ -222,7 +224,9 @@ class LinuxBPEBackend:
             from .campaign_builder import prefetch_igs_products, verify_igs_products
             doy = int(session[:3])
             orb_dir = campaign_path / "ORB"
-            prefetch_igs_products(orb_dir, year, doy, ac=product_ac)
+            prefetch_igs_products(
+                orb_dir, year, doy, ac=product_ac, warm_ahead_days=warm_ahead_days
+            )
             missing = verify_igs_products(orb_dir, year, doy, ac=product_ac)
             if missing:
                 raise RuntimeError(
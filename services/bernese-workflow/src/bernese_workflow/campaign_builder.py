@@ -12,11 +12,15 @@ import logging
 import shutil
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import pymap3d
 
 from .campaign_models import StationRecord
 
+if TYPE_CHECKING:
+    from pogf_geodetic_suite.igs_cache import ProductCache
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -337,28 +341,55 @@ def prefetch_igs_products(
     year: int,
     doy: int,
     ac: str = "COD",
+    *,
+    warm_ahead_days: int = 0,
+    cache: ProductCache | None = None,
 ) -> None:
     """
     Pre-download IGS SP3 + CLK products for the given date into *campaign_orb_dir*.
 
     This bypasses BPE step 000 (FTP_DWLD) so the network dependency is
     isolated and reproducible.  Raises if download fails.
+
+    Products come from the shared ``igs_cache`` (*cache*, default the
+    process-wide one) and are hardlinked into ORB/, so campaigns and reruns
+    on the same days download and store them once.  *warm_ahead_days* > 0
+    also pulls the following days into the cache for the next sessions
+    (failures there are only logged).  With the cache disabled
+    (POGF_IGS_CACHE_MAX_MB=0) products are downloaded straight into ORB/.
     """
-    from datetime import datetime
+    from datetime import timedelta
 
-    from pogf_geodetic_suite.igs_downloader import ProductDownloader
+    from pogf_geodetic_suite.igs_cache import default_cache
+    from pogf_geodetic_suite.igs_downloader import Product, ProductDownloader
 
     campaign_orb_dir.mkdir(parents=True, exist_ok=True)
-    date = datetime(year, 1, 1) + __import__("datetime").timedelta(days=doy - 1)
+    date = datetime(year, 1, 1) + timedelta(days=doy - 1)
+    wanted = [Product(date, ac, content) for content in ("ORB", "CLK")]
+
+    cache = cache or default_cache()
+    if cache is None:
+        dl = ProductDownloader(base_dir=str(campaign_orb_dir))
+        try:
+            paths = dl.download_many(wanted, workers=len(wanted))
+        finally:
+            dl.close()
+    else:
+        paths = cache.materialize(wanted, campaign_orb_dir)
 
-    dl = ProductDownloader(base_dir=str(campaign_orb_dir))
-    for content in ("ORB", "CLK"):
-        path = dl.download_product(date, ac=ac, content=content)
+    for product, path in paths.items():
         if path is None:
             raise RuntimeError(
-                f"IGS {content} download failed for {date.strftime('%Y-%j')} (AC={ac})"
+                f"IGS {product.content} download failed for {date.strftime('%Y-%j')} (AC={ac})"
             )
-        logger.info("IGS %s: %s", content, path)
+        logger.info("IGS %s: %s", product.content, path)
+
+    if cache is not None and warm_ahead_days > 0:
+        warmed = cache.warm_ahead(date + timedelta(days=1), warm_ahead_days, acs=(ac,))
+        logger.info(
+            "IGS warm-ahead: %d/%d products cached for the next %d days",
+            sum(path is not None for path in warmed.values()), len(warmed), warm_ahead_days,
+        )
 
 
 def verify_igs_products(
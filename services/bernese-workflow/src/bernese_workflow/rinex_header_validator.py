@@ -22,10 +22,6 @@ _STA_NAME_SLICE = slice(0, 4)
 _STA_REC_SLICE = slice(69, 89)
 _STA_ANT_SLICE = slice(121, 141)
 
-# Fixed-column slices in RINEX OBS header records (0-indexed)
-# Both REC # / TYPE / VERS and ANT # / TYPE put their type field in cols 20-39
-_RNX_TYPE_SLICE = slice(20, 40)
-
 
 # ---------------------------------------------------------------------------
 # Public data types
@@ -136,6 +132,11 @@ def _parse_rinex_headers(
 ) -> dict[str, dict[str, str]]:
     """Scan RAW/ recursively for RINEX observation files; extract REC/ANT types.
 
+    Headers are read with the shared parser in pogf_geodetic_suite.rinex.header.
+    RAW/ files are keyed by path, size and mtime there, not by the SHA-256
+    ingestion uses, so each is parsed once on its first validation and served
+    from the cache on re-runs.
+
     Returns a dict keyed by 4-char station code:
         {"receiver": "<type>", "antenna": "<type>"}
 
@@ -145,6 +146,8 @@ def _parse_rinex_headers(
     When both ``year`` and ``session`` are given, only files belonging to that
     session are parsed (per-session validation against a multi-day source dir).
     """
+    from pogf_geodetic_suite.rinex.header import read_header
+
     result: dict[str, dict[str, str]] = {}
     filter_session = year is not None and session is not None
 
@@ -155,30 +158,14 @@ def _parse_rinex_headers(
             continue
 
         station_code = p.name[:4].upper()
-        rec_type = ""
-        ant_type = ""
-        marker_name = ""
-
         try:
-            with p.open(encoding="ascii", errors="replace") as fh:
-                for raw_line in fh:
-                    line = raw_line.rstrip("\n")
-                    if len(line) < 60:
-                        if "END OF HEADER" in line:
-                            break
-                        continue
-                    label = line[60:].strip()
-                    if label == "MARKER NAME":
-                        marker_name = line[:60].strip()
-                    elif label == "REC # / TYPE / VERS":
-                        rec_type = line[_RNX_TYPE_SLICE].strip()
-                    elif label == "ANT # / TYPE":
-                        ant_type = line[_RNX_TYPE_SLICE].strip()
-                    elif label == "END OF HEADER":
-                        break
+            header = read_header(p)
         except OSError as exc:
             logger.warning("Cannot read %s: %s", p, exc)
             continue
+        rec_type = header.receiver_type or ""
+        ant_type = header.antenna_type or ""
+        marker_name = header.marker_name or ""
 
         if marker_name and len(marker_name) >= 4:
             station_code = marker_name[:4].upper()
@@ -3,10 +3,12 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
-from bernese_workflow.campaign_builder import verify_igs_products
-from pogf_geodetic_suite.igs_downloader import _build_long_filename
+from bernese_workflow.campaign_builder import prefetch_igs_products, verify_igs_products
+from pogf_geodetic_suite.igs_cache import ProductCache
+from pogf_geodetic_suite.igs_downloader import Product, _build_long_filename
 
 
 def _stage_product(orb: Path, year: int, doy: int, ac: str, content: str) -> Path:
@@ -49,6 +51,50 @@ def test_verify_legacy_era_raises(tmp_path):
         verify_igs_products(tmp_path / "ORB", 2020, 1)
 
 
+# ---------------------------------------------------------------------------
+# prefetch_igs_products through the shared product cache
+# ---------------------------------------------------------------------------
+
+class _FakeDownloader:
+    def __init__(self, root):
+        self.root = str(root)
+        self.calls = 0
+
+    def download_product(self, date, ac="COD", content="ORB", force=False):
+        self.calls += 1
+        path = Product(date, ac, content).local_path(self.root)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text("product")
+        return path
+
+
+def test_prefetch_links_from_cache_once_per_day(tmp_path):
+    root = tmp_path / "cache"
+    fake = _FakeDownloader(root)
+    cache = ProductCache(root, downloader=fake)
+    try:
+        for campaign in ("PAGENET", "RERUN"):
+            orb = tmp_path / campaign / "ORB"
+            prefetch_igs_products(orb, 2026, 87, cache=cache)
+            assert verify_igs_products(orb, 2026, 87) == []
+    finally:
+        cache.close()
+    assert fake.calls == 2  # ORB + CLK, shared by both campaigns
+
+
+def test_prefetch_warm_ahead_and_failure(tmp_path):
+    cache = MagicMock()
+    cache.materialize.side_effect = lambda wanted, dest: {p: f"{dest}/{p.content}" for p in wanted}
+    cache.warm_ahead.return_value = {}
+    prefetch_igs_products(tmp_path / "ORB", 2026, 87, warm_ahead_days=3, cache=cache)
+    start, days = cache.warm_ahead.call_args.args
+    assert start == datetime(2026, 3, 29) and days == 3
+
+    cache.materialize.side_effect = lambda wanted, dest: dict.fromkeys(wanted)
+    with pytest.raises(RuntimeError, match="IGS ORB download failed for 2026-087"):
+        prefetch_igs_products(tmp_path / "ORB", 2026, 87, cache=cache)
+
+
 # ---------------------------------------------------------------------------
 # Template: FTP_DWLD retired
 # ---------------------------------------------------------------------------
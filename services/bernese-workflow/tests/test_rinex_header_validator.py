@@ -1,6 +1,7 @@
 """Tests for the pre-BPE RINEX header validator (BRN-006)."""
 from __future__ import annotations
 
+import os
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -15,6 +16,15 @@ from bernese_workflow.rinex_header_validator import (
     _parse_sta_type002,
     validate_rinex_headers,
 )
+from pogf_geodetic_suite.rinex.header import HeaderStore
+
+
+@pytest.fixture(autouse=True)
+def header_store(monkeypatch):
+    """Keep parsed headers out of the user's persistent header cache."""
+    monkeypatch.setattr("pogf_geodetic_suite.rinex.header._store", HeaderStore(":memory:"))
+    monkeypatch.setattr("pogf_geodetic_suite.rinex.header._store_pid", os.getpid())
+
 
 # ---------------------------------------------------------------------------
 # Minimal RINEX 2 observation header (80-col fixed width)
@@ -0,0 +1,457 @@
+"""
+Benchmark corpus and harness for the ingestion pipeline.
+
+Every change to the pipeline should come with a before/after number on the
+same input. This module makes both:
+
+  corpus  — writes a reproducible set of synthetic RINEX files
+            (pogf_geodetic_suite.rinex.synthetic) covering RINEX 2.11 and
+            3.04 in every wrapper the pipeline accepts (.gz, .Z, .zip, .crx,
+            .??d and the stacked .crx.gz / .??d.Z of IGS archives), plus a
+            manifest.json describing them.
+  run     — runs the plain stage functions in this process, file by file:
+            hash (the scanner's SHA-256), _standardize_format (split into
+            decompress and Hatanaka), _validate_rinex and, unless --no-db,
+            _load_to_postgres against the configured Postgres. Loads are
+            committed every INGEST_DISPATCH_BATCH files, as an ingest_batch
+            task would, and each file's load time includes its share of the
+            commit; rows that fail to commit are reported as failed files.
+  celery  — regenerates the corpus under <corpus>/runs/ with a new seed
+            (same profile, fresh hashes and paths, so no worker cache or
+            catalogued row can serve it), dispatches it through
+            pipeline.trigger_ingest (fused or chain mode) to running workers
+            on the local Redis, waits until every ingestion_logs row is
+            committed and reads the per-stage columns back.
+
+Both report, per stage, total seconds, files/s, MB/s of source data and
+p50/p95 latency; --json writes the report and --compare prints the change
+against an earlier one:
+
+    python -m ingestion_pipeline.bench corpus /tmp/corpus --profile daily --stations 4
+    python -m ingestion_pipeline.bench run /tmp/corpus --no-db --json before.json
+    python -m ingestion_pipeline.bench run /tmp/corpus --no-db --compare before.json
+    python -m ingestion_pipeline.bench celery /tmp/corpus --mode chain
+
+The standardized-file and header caches are bypassed in `run` and never
+hit in `celery`, so every pass decodes and parses from scratch. Corpus files are dated in 2023 and go
+to the ingest.backfill queue; in chain mode the stage queues need workers
+too (see celery.py).
+"""
+
+import json
+import os
+import shutil
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from pogf_geodetic_suite.rinex import header as rinex_header
+from pogf_geodetic_suite.rinex.synthetic import SyntheticSpec, write_file
+
+from .scanner import DISPATCH_BATCH, _sha256
+from .standardize import release
+from .tasks import _load_to_postgres, _standardize_format, _validate_rinex
+from .throughput import percentile
+
+MANIFEST = "manifest.json"
+
+# (label, RINEX version, Hatanaka, wrappers innermost first)
+VARIANTS = [
+    ("v2 plain", 2, False, ()),
+    ("v2 gz", 2, False, ("gz",)),
+    ("v2 hatanaka Z", 2, True, ("Z",)),
+    ("v3 crx", 3, True, ()),
+    ("v3 crx gz", 3, True, ("gz",)),
+    ("v3 rnx zip", 3, False, ("zip",)),
+]
+# epochs, interval (s)
+PROFILES = {
+    "hourly": (120, 30.0),
+    "daily": (2880, 30.0),
+    "highrate": (3600, 1.0),
+}
+RUN_STAGES = ("hash", "decompress", "hatanaka", "validate", "load")
+RUNS_DIR = "runs"
+POLL_SEC = 0.5
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def build_corpus(
+    out_dir: str,
+    stations: int = 2,
+    days: int = 1,
+    profile: str = "hourly",
+    seed: int = 0,
+    start: datetime = datetime(2023, 1, 1),
+) -> dict:
+    """Write stations × days × every variant into out_dir; returns the manifest."""
+    epochs, interval = PROFILES[profile]
+    root = Path(out_dir)
+    files = []
+    for s in range(stations):
+        code = f"BN{s:02d}"
+        for d in range(days):
+            for v, (label, version, hatanaka, wrappers) in enumerate(VARIANTS):
+                spec = SyntheticSpec(
+                    station=code,
+                    version=version,
+                    start=start + timedelta(days=d),
+                    epochs=epochs,
+                    interval=interval,
+                    seed=seed * 1_000_003 + (s * days + d) * len(VARIANTS) + v,
+                )
+                path = write_file(spec, root / code / label.replace(" ", "_"), hatanaka, wrappers)
+                files.append({
+                    "path": str(path.relative_to(root)),
+                    "station": code,
+                    "variant": label,
+                    "bytes": path.stat().st_size,
+                })
+    manifest = {
+        "profile": profile, "stations": stations, "days": days, "seed": seed,
+        "epochs": epochs, "interval": interval, "files": files,
+    }
+    (root / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load_manifest(corpus_dir: str) -> dict:
+    return json.loads((Path(corpus_dir) / MANIFEST).read_text())
+
+
+def fresh_corpus(corpus_dir: str) -> str:
+    """A new corpus like corpus_dir's, with a new seed, under corpus_dir/runs/."""
+    manifest = load_manifest(corpus_dir)
+    seed = time.time_ns()
+    run_dir = Path(corpus_dir) / RUNS_DIR / str(seed)
+    build_corpus(str(run_dir), manifest["stations"], manifest["days"], manifest["profile"], seed)
+    return str(run_dir)
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+@dataclass
+class StageReport:
+    files: int = 0
+    total_sec: float = 0.0
+    files_per_sec: float = 0.0
+    mb_per_sec: float = 0.0
+    p50_sec: float | None = None
+    p95_sec: float | None = None
+
+
+@dataclass
+class BenchReport:
+    mode: str
+    files: int
+    bytes: int
+    wall_sec: float
+    stages: dict[str, StageReport] = field(default_factory=dict)
+    variants: dict[str, float] = field(default_factory=dict)   # variant → seconds, hash..validate
+    failures: list[str] = field(default_factory=list)
+
+
+def _stage_report(seconds: list[float], source_bytes: int) -> StageReport:
+    total = sum(seconds)
+    return StageReport(
+        files=len(seconds),
+        total_sec=total,
+        files_per_sec=len(seconds) / total if total else 0.0,
+        mb_per_sec=source_bytes / 1e6 / total if total else 0.0,
+        p50_sec=statistics.median(seconds) if seconds else None,
+        p95_sec=percentile(seconds, 95),
+    )
+
+
+# ---------------------------------------------------------------------------
+# In-process run
+# ---------------------------------------------------------------------------
+
+def run_functions(
+    corpus_dir: str, db: bool = True, batch_size: int = DISPATCH_BATCH
+) -> BenchReport:
+    """
+    Run every corpus file through the stage functions in this process,
+    committing loads every batch_size files.
+    """
+    manifest = load_manifest(corpus_dir)
+    root = Path(corpus_dir)
+    if db:
+        ensure_stations({f["station"] for f in manifest["files"]})
+    # A private header cache, so every run parses every header.
+    rinex_header._store = rinex_header.HeaderStore(":memory:")
+    rinex_header._store_pid = os.getpid()
+
+    seconds: dict[str, list[float]] = {s: [] for s in RUN_STAGES}
+    variants: dict[str, float] = {}
+    failures = []
+    loaded: list[tuple[int, str, str]] = []     # (index in seconds["load"], hash, path)
+    total_bytes = 0
+    wall = time.perf_counter()
+    for entry in manifest["files"]:
+        path = str(root / entry["path"])
+        total_bytes += entry["bytes"]
+        local = None
+        try:
+            start = time.perf_counter()
+            file_hash = _sha256(path)
+            seconds["hash"].append(time.perf_counter() - start)
+
+            stats: dict = {}
+            local = _standardize_format(path, None, stats)
+            seconds["decompress"].append(stats["decompress_sec"])
+            seconds["hatanaka"].append(stats["hatanaka_sec"])
+
+            start = time.perf_counter()
+            validated = _validate_rinex(local)
+            seconds["validate"].append(time.perf_counter() - start)
+
+            if db:
+                start = time.perf_counter()
+                _load_to_postgres(validated, file_hash, source_path=path, stats=stats)
+                seconds["load"].append(time.perf_counter() - start)
+                loaded.append((len(seconds["load"]) - 1, file_hash, entry["path"]))
+        except Exception as exc:
+            failures.append(f"{entry['path']}: {exc}")
+            continue
+        finally:
+            if local is not None:
+                release(local)
+        variants[entry["variant"]] = variants.get(entry["variant"], 0.0) + sum(
+            seconds[s][-1] for s in ("hash", "decompress", "hatanaka", "validate")
+        )
+        if len(loaded) >= max(1, batch_size):
+            _commit(loaded, seconds["load"], failures)
+    if loaded:
+        _commit(loaded, seconds["load"], failures)
+
+    report = BenchReport(
+        mode="functions", files=len(manifest["files"]), bytes=total_bytes,
+        wall_sec=time.perf_counter() - wall, variants=variants, failures=failures,
+    )
+    for stage, values in seconds.items():
+        if values:
+            report.stages[stage] = _stage_report(values, total_bytes)
+    return report
+
+
+def _commit(loaded: list[tuple[int, str, str]], load_sec: list[float], failures: list[str]) -> None:
+    """Commit the queued loads, sharing the time out over their files; empties loaded."""
+    from .loader import commit_loaded
+
+    start = time.perf_counter()
+    errors = commit_loaded(h for _, h, _ in loaded)
+    share = (time.perf_counter() - start) / len(loaded)
+    for index, file_hash, path in loaded:
+        load_sec[index] += share
+        if file_hash in errors:
+            failures.append(f"{path}: {errors[file_hash]}")
+    loaded.clear()
+
+
+def ensure_stations(codes: set[str]) -> None:
+    """Register the corpus stations in public.stations if they are missing."""
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    from src.db.models import Station
+
+    from .database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        session.execute(
+            pg_insert(Station.__table__)
+            .values([{"station_code": c, "name": f"Benchmark {c}"} for c in sorted(codes)])
+            .on_conflict_do_nothing(index_elements=["station_code"])
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+# ---------------------------------------------------------------------------
+# Celery run
+# ---------------------------------------------------------------------------
+
+def run_celery(corpus_dir: str, mode: str = "fused", timeout: float = 3600) -> BenchReport:
+    """
+    Dispatch a fresh copy of the corpus to running workers and wait until
+    every file's ingestion_logs row is committed. The copy is deleted after.
+    """
+    from . import pipeline
+    from .celery import app
+    from .throughput import STAGES
+
+    root = Path(fresh_corpus(corpus_dir))
+    try:
+        manifest = load_manifest(str(root))
+        ensure_stations({f["station"] for f in manifest["files"]})
+        pipeline.PIPELINE_MODE = mode
+
+        entries = [(str(root / f["path"]), f) for f in manifest["files"]]
+        hashes = {path: _sha256(path) for path, _ in entries}
+        started = datetime.now(UTC)
+        wall = time.perf_counter()
+        pending = {pipeline.trigger_ingest(path, hashes[path]): path for path, _ in entries}
+        failures = []
+        deadline = time.monotonic() + timeout
+        for task_id, path in pending.items():
+            try:
+                app.AsyncResult(task_id).get(timeout=max(1.0, deadline - time.monotonic()))
+            except Exception as exc:
+                failures.append(f"{path}: {exc}")
+        rows = wait_for_logs(hashes, started, deadline, failures)
+        wall_sec = time.perf_counter() - wall
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    total_bytes = sum(f["bytes"] for f in manifest["files"])
+    report = BenchReport(
+        mode=f"celery-{mode}", files=len(entries), bytes=total_bytes,
+        wall_sec=wall_sec, failures=failures,
+    )
+    report.stages["end-to-end"] = StageReport(
+        files=len(entries) - len(failures),
+        total_sec=wall_sec,
+        files_per_sec=(len(entries) - len(failures)) / wall_sec if wall_sec else 0.0,
+        mb_per_sec=total_bytes / 1e6 / wall_sec if wall_sec else 0.0,
+    )
+    for stage in STAGES:
+        values = [r[f"{stage}_sec"] for r in rows if r[f"{stage}_sec"] is not None]
+        if values:
+            report.stages[stage] = _stage_report(values, total_bytes)
+    return report
+
+
+def wait_for_logs(
+    hashes: dict[str, str], started: datetime, deadline: float, failures: list[str]
+) -> list[dict]:
+    """
+    Poll ingestion_logs until every file's row is final — success with an
+    ingested_at from this run, or failed — or the deadline passes. Files whose
+    task already reported a failure are not waited for: a file that fails
+    before loading never gets a row. Returns the success rows; files that
+    failed or never finished are added to failures (unless already there).
+    """
+    from sqlalchemy import select
+
+    from .database import SessionLocal
+    from .models import IngestionLog
+    from .throughput import STAGES
+
+    columns = [IngestionLog.file_hash, IngestionLog.status, IngestionLog.ingested_at,
+               IngestionLog.error_message] + [getattr(IngestionLog, f"{s}_sec") for s in STAGES]
+    reported = {f.split(": ", 1)[0] for f in failures}
+    expected = {h for path, h in hashes.items() if path not in reported}
+    rows: dict[str, dict] = {}
+    waiting: list[str] = []
+    while expected:
+        session = SessionLocal()
+        try:
+            result = session.execute(
+                select(*columns).where(IngestionLog.file_hash.in_(expected))
+            )
+            rows = {r.file_hash: r._asdict() for r in result}
+        finally:
+            session.close()
+        waiting = [
+            h for h in expected
+            if h not in rows or rows[h]["status"] not in ("success", "failed")
+            or (rows[h]["status"] == "success" and rows[h]["ingested_at"] < started)
+        ]
+        if not waiting or time.monotonic() >= deadline:
+            break
+        time.sleep(POLL_SEC)
+
+    for path, file_hash in hashes.items():
+        if path in reported:
+            continue
+        row = rows.get(file_hash)
+        if row is None or file_hash in waiting:
+            failures.append(f"{path}: not committed before the timeout")
+        elif row["status"] == "failed":
+            failures.append(f"{path}: {row['error_message']}")
+    return [r for h, r in rows.items() if r["status"] == "success" and h not in waiting]
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def format_report(report: BenchReport, before: dict | None = None) -> str:
+    """A table of the report; with before (an earlier --json), the change in files/s."""
+    lines = [
+        f"{report.mode}: {report.files} files, {report.bytes / 1e6:.1f} MB, "
+        f"{report.wall_sec:.2f}s wall",
+        f"{'stage':<12}{'total s':>10}{'files/s':>10}{'MB/s':>10}{'p50 s':>10}{'p95 s':>10}"
+        + (f"{'Δ files/s':>12}" if before else ""),
+    ]
+    for stage, s in report.stages.items():
+        line = (f"{stage:<12}{s.total_sec:>10.3f}{s.files_per_sec:>10.1f}{s.mb_per_sec:>10.1f}"
+                f"{_opt(s.p50_sec):>10}{_opt(s.p95_sec):>10}")
+        old = (before or {}).get("stages", {}).get(stage)
+        if old and old["files_per_sec"]:
+            line += f"{(s.files_per_sec / old['files_per_sec'] - 1) * 100:>+11.1f}%"
+        lines.append(line)
+    for variant, sec in sorted(report.variants.items()):
+        lines.append(f"  {variant:<16}{sec:>10.3f}s")
+    lines += [f"FAILED {f}" for f in report.failures]
+    return "\n".join(lines)
+
+
+def _opt(value: float | None) -> str:
+    return "-" if value is None else f"{value:.4f}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingestion pipeline benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("corpus", help="write a synthetic corpus")
+    p.add_argument("dir")
+    p.add_argument("--profile", choices=sorted(PROFILES), default="hourly")
+    p.add_argument("--stations", type=int, default=2)
+    p.add_argument("--days", type=int, default=1)
+    p.add_argument("--seed", type=int, default=0)
+
+    for name, help_text in (("run", "stage functions in this process"),
+                            ("celery", "dispatch to running Celery workers")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("dir")
+        p.add_argument("--json", help="write the report here")
+        p.add_argument("--compare", help="an earlier --json report to compare with")
+        if name == "run":
+            p.add_argument("--no-db", action="store_true", help="skip the load stage")
+        else:
+            p.add_argument("--mode", choices=("fused", "chain"), default="fused")
+            p.add_argument("--timeout", type=float, default=3600)
+
+    args = parser.parse_args(argv)
+    if args.command == "corpus":
+        manifest = build_corpus(args.dir, args.stations, args.days, args.profile, args.seed)
+        size = sum(f["bytes"] for f in manifest["files"])
+        print(f"Wrote {len(manifest['files'])} files ({size / 1e6:.1f} MB) to {args.dir}")
+        return 0
+
+    if args.command == "run":
+        report = run_functions(args.dir, db=not args.no_db)
+    else:
+        report = run_celery(args.dir, args.mode, args.timeout)
+    before = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print(format_report(report, before))
+    if args.json:
+        Path(args.json).write_text(json.dumps(asdict(report), indent=2))
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
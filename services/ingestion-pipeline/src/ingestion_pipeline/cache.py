@@ -0,0 +1,264 @@
+"""
+Content-addressed cache of standardized RINEX files.
+
+Every retry of a file — a flaky DB, a station registered after the first
+attempt, a re-queue by the scanner — used to decompress, Hatanaka-decode
+and QC it again. The decoded file only depends on the source bytes, so it
+is kept here under the source SHA-256 (the same hash ingestion_logs is
+keyed by) together with its QC metrics:
+
+    <INGEST_CACHE_DIR>/ab/abcdef…/PBIS0010.23o    standardized RINEX
+                                 /qc.json         _validate_rinex QC metrics
+
+standardize() serves hits straight from the entry and writes misses into
+it; validate finds the QC sidecar next to the file it was handed. Entries
+are immutable once published (written under a temporary name, then renamed
+into place), so concurrent workers never see a partial file. Parsed headers
+are cached separately, under the same hash, by the shared header parser.
+
+Pinning:
+  standardize() pins the entry it hands out (an empty .pin-* file in the
+  entry) and release() drops one pin once the consuming task is done with
+  the file — in chain mode that is load_to_postgres, possibly on another
+  worker, however long the validate task waited in its queue. Pins older
+  than INGEST_CACHE_PIN_MAX_SEC are taken to belong to a consumer that died
+  and are removed.
+
+Eviction is LRU by last use (the entry directory's mtime, bumped on every
+hit) down to INGEST_CACHE_MAX_MB, skipping pinned entries and entries used
+within the last INGEST_CACHE_MIN_AGE_SEC (which covers the moment between
+publishing an entry and pinning it). The walk over every entry is not
+repeated on every put: a process evicts at most every
+INGEST_CACHE_EVICT_SEC, or sooner once it has itself added a tenth of the
+limit since its last walk. INGEST_CACHE_MAX_MB=0 disables the cache and
+standardize() goes back to per-file scratch copies.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_ROOT = os.environ.get(
+    "INGEST_CACHE_DIR",
+    os.path.join(os.environ.get("INGEST_SCRATCH_DIR", tempfile.gettempdir()), "pogf_cache"),
+)
+CACHE_MAX_BYTES = int(os.environ.get("INGEST_CACHE_MAX_MB", "10240")) << 20
+CACHE_MIN_AGE_SEC = float(os.environ.get("INGEST_CACHE_MIN_AGE_SEC", "600"))
+CACHE_EVICT_SEC = float(os.environ.get("INGEST_CACHE_EVICT_SEC", "60"))
+CACHE_PIN_MAX_SEC = float(os.environ.get("INGEST_CACHE_PIN_MAX_SEC", "86400"))
+
+_TMP_PREFIX = ".tmp-"
+_PIN_PREFIX = ".pin-"
+
+_cache: "StandardizedCache | None" = None
+
+
+class StandardizedCache:
+    """Standardized files and their sidecars, keyed by source SHA-256."""
+
+    def __init__(
+        self,
+        root: str = CACHE_ROOT,
+        max_bytes: int = CACHE_MAX_BYTES,
+        min_age_sec: float = CACHE_MIN_AGE_SEC,
+        evict_sec: float = CACHE_EVICT_SEC,
+        pin_max_sec: float = CACHE_PIN_MAX_SEC,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.min_age_sec = min_age_sec
+        self.evict_sec = evict_sec
+        self.pin_max_sec = pin_max_sec
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._added = 0              # bytes this process published since its last walk
+        self._next_evict = 0.0       # time.monotonic() of the next periodic walk
+
+    def _entry(self, file_hash: str) -> Path:
+        return self.root / file_hash[:2] / file_hash
+
+    # -- files -----------------------------------------------------------------
+
+    def get(self, file_hash: str) -> str | None:
+        """Path of the cached standardized file, or None. Marks the entry used."""
+        entry = self._entry(file_hash)
+        data = _data_file(entry)
+        if data is None:
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            return None                                   # evicted just now
+        return str(data)
+
+    def put(self, file_hash: str, produce: Callable[[Path], Path]) -> str:
+        """
+        Publish the file produce(tmp_dir) writes into tmp_dir under file_hash.
+
+        Returns the cached path. If another worker published the same hash
+        first, its copy wins and ours is discarded.
+        """
+        entry = self._entry(file_hash)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=_TMP_PREFIX, dir=entry.parent))
+        try:
+            name = produce(tmp).name
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                if _data_file(entry) is None:
+                    raise
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        try:
+            self._added += _entry_size(entry)
+        except OSError:
+            pass
+        if self._added * 10 >= self.max_bytes or time.monotonic() >= self._next_evict:
+            self.evict()
+        return str(entry / name)
+
+    # -- pins ------------------------------------------------------------------
+
+    def pin(self, file_path: str) -> None:
+        """Keep the entry holding file_path from eviction until unpin()."""
+        entry = self.entry_of(file_path)
+        if entry is None:
+            return
+        try:
+            (entry / f"{_PIN_PREFIX}{uuid.uuid4().hex}").touch()
+        except OSError as e:
+            logger.warning("Could not pin %s: %s", file_path, e)
+
+    def unpin(self, file_path: str) -> None:
+        """Drop one pin of the entry holding file_path (pins are interchangeable)."""
+        entry = self.entry_of(file_path)
+        if entry is None:
+            return
+        for pin in _pins(entry):
+            try:
+                pin.unlink()
+                return
+            except FileNotFoundError:
+                continue                                  # another consumer took it
+
+    def pinned(self, entry: Path) -> bool:
+        """True if entry has a live pin; stale pins are removed on the way."""
+        cutoff = time.time() - self.pin_max_sec
+        live = False
+        for pin in _pins(entry):
+            try:
+                if pin.stat().st_mtime > cutoff:
+                    live = True
+                else:
+                    pin.unlink()
+                    logger.warning("Dropped stale cache pin %s", pin)
+            except OSError:
+                continue
+        return live
+
+    # -- sidecars --------------------------------------------------------------
+
+    def entry_of(self, file_path: str) -> Path | None:
+        """The entry directory holding file_path, if file_path is a cached file."""
+        entry = Path(file_path).parent
+        if entry.parent.parent != self.root or entry.name.startswith(_TMP_PREFIX):
+            return None
+        return entry
+
+    def read_json(self, file_path: str, kind: str) -> dict | None:
+        entry = self.entry_of(file_path)
+        if entry is None:
+            return None
+        try:
+            return json.loads((entry / f"{kind}.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def write_json(self, file_path: str, kind: str, data: dict) -> None:
+        entry = self.entry_of(file_path)
+        if entry is None:
+            return
+        tmp = entry / f".{kind}.json.{os.getpid()}"
+        try:
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, entry / f"{kind}.json")
+        except OSError as e:
+            logger.warning("Could not write %s sidecar for %s: %s", kind, file_path, e)
+
+    # -- eviction --------------------------------------------------------------
+
+    def usage(self) -> list[tuple[float, int, Path]]:
+        """(last use, bytes, entry) for every published entry."""
+        entries = []
+        for shard in self.root.iterdir():
+            if not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                if entry.name.startswith(_TMP_PREFIX):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, _entry_size(entry), entry))
+                except OSError:
+                    continue
+        return entries
+
+    def evict(self) -> int:
+        """
+        Drop least recently used unpinned entries until under max_bytes.
+        Returns bytes freed.
+        """
+        self._added = 0
+        self._next_evict = time.monotonic() + self.evict_sec
+        entries = sorted(self.usage())
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - self.min_age_sec
+        freed = 0
+        for last_used, size, entry in entries:
+            if total - freed <= self.max_bytes or last_used > cutoff:
+                break
+            if self.pinned(entry):
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            freed += size
+        if freed:
+            logger.info("Cache evicted %d bytes (%d left)", freed, total - freed)
+        return freed
+
+
+def _entry_size(entry: Path) -> int:
+    return sum(f.stat().st_size for f in entry.iterdir())
+
+
+def _pins(entry: Path) -> list[Path]:
+    try:
+        return [f for f in entry.iterdir() if f.name.startswith(_PIN_PREFIX)]
+    except OSError:
+        return []
+
+
+def _data_file(entry: Path) -> Path | None:
+    try:
+        for f in entry.iterdir():
+            if not f.name.endswith(".json") and not f.name.startswith("."):
+                return f
+    except OSError:
+        pass
+    return None
+
+
+def get_cache() -> StandardizedCache | None:
+    """The process-wide cache, or None when INGEST_CACHE_MAX_MB is 0."""
+    global _cache
+    if _cache is None and CACHE_MAX_BYTES > 0:
+        _cache = StandardizedCache()
+    return _cache
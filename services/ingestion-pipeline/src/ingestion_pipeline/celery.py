@@ -16,6 +16,50 @@ if REDIS_PASSWORD:
 else:
     redis_url = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
 
+# Queues and worker pools
+#
+# Files are dispatched to one of two lanes (see dispatch.py): live daily files
+# go to ingest.live, everything older to ingest.backfill, so a multi-year
+# backfill queues behind itself instead of in front of the live stream.
+#
+# Fused mode (the default, INGEST_PIPELINE_MODE=fused) runs every stage of a
+# file inside the lane task, so the lane pools do all the CPU-heavy work and
+# are the ones to size to the host:
+#
+#   celery -A ingestion_pipeline.celery worker -Q ingest.live -c $(nproc)
+#   celery -A ingestion_pipeline.celery worker -Q ingest.backfill -c $(( $(nproc) / 2 ))
+#
+# The per-stage queues below only exist in chain mode (INGEST_PIPELINE_MODE=
+# chain), where each stage is its own task; a fused deployment leaves them
+# empty, and the standardize/validate rate limits do not apply to it. Chain
+# mode needs a pool per stage queue as well:
+#
+#   celery -A ingestion_pipeline.celery worker -Q ingest.standardize,ingest.validate -c $(nproc)
+#   celery -A ingestion_pipeline.celery worker -Q ingest.load -c 2
+LIVE_QUEUE = "ingest.live"
+BACKFILL_QUEUE = "ingest.backfill"
+LANE_PRIORITY = {"live": 0, "backfill": 9}  # Redis transport: 0 is served first
+
+# Chain-mode stage tasks only; ingest_file/ingest_batch go to the lane queues.
+TASK_ROUTES = {
+    "ingestion_pipeline.tasks.standardize_format": {"queue": "ingest.standardize"},
+    "ingestion_pipeline.tasks.validate_rinex": {"queue": "ingest.validate"},
+    "ingestion_pipeline.tasks.load_to_postgres": {"queue": "ingest.load"},
+}
+
+# Optional per-worker rate limits ("60/m") for the heavy tasks; the first two
+# are chain-mode stages, INGEST_BATCH_RATE limits fused ingest_batch tasks
+_RATE_LIMIT_ENV = {
+    "ingestion_pipeline.tasks.standardize_format": "INGEST_STANDARDIZE_RATE",
+    "ingestion_pipeline.tasks.validate_rinex": "INGEST_VALIDATE_RATE",
+    "ingestion_pipeline.tasks.ingest_batch": "INGEST_BATCH_RATE",
+}
+TASK_ANNOTATIONS = {
+    task: {"rate_limit": os.environ[env]}
+    for task, env in _RATE_LIMIT_ENV.items()
+    if os.environ.get(env)
+}
+
 app = Celery(
     "ingestion_pipeline",
     broker=redis_url,
@@ -25,6 +69,15 @@ app = Celery(
 
 app.conf.update(
     result_expires=3600,
+    task_default_queue=BACKFILL_QUEUE,
+    task_routes=TASK_ROUTES,
+    task_annotations=TASK_ANNOTATIONS,
+    # One task in flight per worker process, acked when done: a long backfill
+    # task never sits prefetched in front of a live one, and a crashed worker's
+    # task is redelivered (the load stage upserts, so a re-run is harmless).
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    broker_transport_options={"priority_steps": list(range(10)), "queue_order_strategy": "priority"},
 )
 
 if __name__ == "__main__":
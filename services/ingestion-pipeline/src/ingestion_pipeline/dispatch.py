@@ -0,0 +1,136 @@
+"""
+Lane classification and per-station fair-share dispatch.
+
+Every file is put in one of two lanes, each with its own Celery queue (see
+celery.py):
+
+  live      — observation date within INGEST_LIVE_DAYS of today
+  backfill  — anything older
+
+The date comes from the RINEX file name (SSSSDDDh.YYo for RINEX 2, the
+SSSSMRCCC_R_YYYYDDDHHMM_… long name for RINEX 3); for names that carry no
+date, a recently modified file counts as live.
+
+Within a lane, FairDispatcher sends files round-robin across stations, so a
+scan that turns up years of one station's archive next to a few days from
+every other station interleaves them instead of queueing the big one first.
+Fairness holds within the dispatcher's window (INGEST_FAIR_WINDOW files):
+it drains whenever that many files are buffered, and at the end of a scan.
+"""
+
+import os
+import re
+import time
+from collections import deque
+from collections.abc import Callable
+from datetime import UTC, date, datetime, timedelta
+
+LIVE = "live"
+BACKFILL = "backfill"
+
+LIVE_DAYS = int(os.environ.get("INGEST_LIVE_DAYS", "3"))
+FAIR_WINDOW = int(os.environ.get("INGEST_FAIR_WINDOW", "2000"))
+
+# PBIS00USA_R_20230010000_01D_30S_MO.crx.gz
+_RINEX3_NAME = re.compile(r"^([A-Z0-9]{4})\d{2}[A-Z]{3}_[A-Z]_(\d{4})(\d{3})", re.IGNORECASE)
+# pbis001a.23o, pbis001a15.23d.Z
+_RINEX2_NAME = re.compile(r"^([A-Z0-9]{4})(\d{3})[A-X0]\d{0,2}\.(\d{2})[OD]", re.IGNORECASE)
+
+
+def station_of(file_path: str) -> str:
+    """Four-character station code from a RINEX file name (upper case)."""
+    return os.path.basename(file_path)[:4].upper()
+
+
+def observation_date(file_path: str) -> date | None:
+    """Observation day encoded in a RINEX 2 or 3 file name, if any."""
+    name = os.path.basename(file_path)
+    m = _RINEX3_NAME.match(name)
+    if m:
+        year, doy = int(m.group(2)), int(m.group(3))
+    else:
+        m = _RINEX2_NAME.match(name)
+        if not m:
+            return None
+        yy, doy = int(m.group(3)), int(m.group(2))
+        year = 1900 + yy if yy >= 80 else 2000 + yy
+    if not 1 <= doy <= 366:
+        return None
+    return date(year, 1, 1) + timedelta(days=doy - 1)
+
+
+def classify(file_path: str, today: date | None = None) -> str:
+    """LIVE or BACKFILL for file_path."""
+    today = today or datetime.now(UTC).date()
+    obs_day = observation_date(file_path)
+    if obs_day is not None:
+        return LIVE if (today - obs_day).days <= LIVE_DAYS else BACKFILL
+    try:
+        age_days = (time.time() - os.stat(file_path).st_mtime) / 86400
+    except OSError:
+        return BACKFILL
+    return LIVE if age_days <= LIVE_DAYS else BACKFILL
+
+
+class FairDispatcher:
+    """
+    Buffers (file_path, file_hash) pairs and dispatches them live lane first,
+    round-robin across stations within each lane.
+
+    send(file_path, file_hash, lane=...) and send_batch(files, lane=...) are
+    the pipeline's trigger_ingest / trigger_ingest_batch; they are passed in
+    so callers (and tests) decide what dispatching means. With batch_size > 1
+    the round-robin order is cut into batches of that size.
+    """
+
+    def __init__(
+        self,
+        send: Callable,
+        send_batch: Callable,
+        batch_size: int = 1,
+        window: int = FAIR_WINDOW,
+    ):
+        self._send = send
+        self._send_batch = send_batch
+        self.batch_size = batch_size
+        self.window = max(1, window)
+        self._lanes: dict[str, dict[str, deque]] = {LIVE: {}, BACKFILL: {}}
+        self._count = 0
+
+    def add(self, file_path: str, file_hash: str) -> None:
+        lane = classify(file_path)
+        station = station_of(file_path)
+        self._lanes[lane].setdefault(station, deque()).append((file_path, file_hash))
+        self._count += 1
+        if self._count >= self.window:
+            self.drain()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def drain(self) -> int:
+        """Dispatch everything buffered. Returns the number of files sent."""
+        sent = 0
+        for lane in (LIVE, BACKFILL):
+            files = _round_robin(self._lanes[lane])
+            if self.batch_size > 1:
+                for i in range(0, len(files), self.batch_size):
+                    self._send_batch(files[i:i + self.batch_size], lane=lane)
+            else:
+                for file_path, file_hash in files:
+                    self._send(file_path, file_hash, lane=lane)
+            sent += len(files)
+        self._count = 0
+        return sent
+
+
+def _round_robin(buckets: dict[str, deque]) -> list[tuple[str, str]]:
+    """Empty buckets one item per station per pass, in station order."""
+    order = []
+    while buckets:
+        for station in list(buckets):
+            queue = buckets[station]
+            order.append(queue.popleft())
+            if not queue:
+                del buckets[station]
+    return order
@@ -0,0 +1,397 @@
+"""
+Data-completeness inventory: which days each station has RINEX data for.
+
+Replaces the hand-run RINEX2 checker scripts (analysis/10 RINEX Checker),
+which walked one folder for one station and one year at a time. The
+inventory builds per-station, per-year day bitmaps for the whole archive and
+writes them to processing_status.available_days, the int4range[] column the
+Bernese orchestrator plans runs from:
+
+  catalog     rinex_files ⋈ stations — every UTC day a file's
+              [start_time, end_time] touches, at most MAX_FILE_DAYS from the
+              first. One query; rows are collapsed to distinct (station,
+              first day, last day) in the database.
+  filesystem  optional fallback for archives not (yet) ingested: RINEX file
+              names under the given roots (station and day from the name, see
+              dispatch.observation_date), walked one top-level directory per
+              thread (INGEST_INVENTORY_WORKERS).
+
+A bitmap is a plain int with bit d-1 set when day-of-year d has data.
+
+Incremental runs (the default) read only rinex_files rows added after the
+newest processing_status.available_days_as_of (less a small overlap) and OR
+their days into the stored ranges, so a run after a day's ingestion takes
+seconds. --full recomputes every row from scratch, dropping days whose files
+have gone. A --year run covers only those years and leaves the watermark
+where it was, so the next unrestricted run still reads every year's new rows.
+From a shell or cron:
+
+    python -m ingestion_pipeline.inventory [--full] [--root DIR ...] [--year 2024 ...]
+"""
+
+import logging
+import os
+import re
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .database import SessionLocal
+from .dispatch import observation_date, station_of
+from .scanner import _is_rinex_file, _iter_rinex_files
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_WORKERS = int(
+    os.environ.get("INGEST_INVENTORY_WORKERS", str(min(8, os.cpu_count() or 1)))
+)
+UPSERT_BATCH = 1000
+# Catalog rows committed just before the previous run's snapshot may carry an
+# older date_added; re-reading this much of the past is harmless (OR is
+# idempotent) and closes that gap.
+WATERMARK_OVERLAP = timedelta(hours=1)
+# Days a single observation file may touch (a 24 h file not starting at
+# midnight spans two). load_to_postgres stores the ingestion time as
+# end_time when the header has no TIME OF LAST OBS; the clamp keeps such a
+# file from marking every day up to its ingestion.
+MAX_FILE_DAYS = 2
+
+Bitmaps = dict[tuple[str, int], int]
+
+# Data type of a RINEX 3 long name (…_01D_30S_MO.crx.gz): only *O counts.
+_RINEX3_TYPE = re.compile(r"_[A-Z]([A-Z])\.(?:rnx|crx)", re.IGNORECASE)
+
+
+# ---------------------------------------------------------------------------
+# Bitmaps and ranges
+# ---------------------------------------------------------------------------
+
+def mark_days(bitmaps: Bitmaps, station: str, first: date, last: date) -> None:
+    """Set every day from first to last (inclusive) for station."""
+    for year in range(first.year, last.year + 1):
+        lo = first if year == first.year else date(year, 1, 1)
+        hi = last if year == last.year else date(year, 12, 31)
+        lo_doy, hi_doy = lo.timetuple().tm_yday, hi.timetuple().tm_yday
+        span = ((1 << (hi_doy - lo_doy + 1)) - 1) << (lo_doy - 1)
+        key = (station, year)
+        bitmaps[key] = bitmaps.get(key, 0) | span
+
+
+def merge(into: Bitmaps, other: Bitmaps) -> Bitmaps:
+    """OR other into into; returns into."""
+    for key, bits in other.items():
+        into[key] = into.get(key, 0) | bits
+    return into
+
+
+def day_ranges(bits: int) -> list[tuple[int, int]]:
+    """Inclusive (first, last) day-of-year runs of a bitmap."""
+    runs = []
+    day = 1
+    while bits:
+        if bits & 1:
+            start = day
+            while bits & 1:
+                bits >>= 1
+                day += 1
+            runs.append((start, day - 1))
+        else:
+            skip = (bits & -bits).bit_length() - 1     # trailing zeros
+            bits >>= skip
+            day += skip
+    return runs
+
+
+def to_int4ranges(bits: int) -> list[Range]:
+    """available_days value of a bitmap: canonical [first, last + 1) ranges."""
+    return [Range(lo, hi + 1, bounds="[)") for lo, hi in day_ranges(bits)]
+
+
+def from_int4ranges(ranges: Iterable | None) -> int:
+    """Bitmap of an available_days value (Range or psycopg2 NumericRange items)."""
+    bits = 0
+    for r in ranges or ():
+        if getattr(r, "isempty", False) or r.lower is None or r.upper is None:
+            continue
+        bounds = getattr(r, "bounds", None)
+        if bounds is None:                           # psycopg2 NumericRange
+            bounds = ("[" if r.lower_inc else "(") + ("]" if r.upper_inc else ")")
+        lo = r.lower + (bounds[0] == "(")
+        hi = r.upper - (bounds[1] == ")")
+        if hi >= lo:
+            bits |= ((1 << (hi - lo + 1)) - 1) << (lo - 1)
+    return bits
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+def catalog_days(
+    session, since: datetime | None = None, years: Iterable[int] | None = None
+) -> tuple[Bitmaps, datetime | None]:
+    """
+    (bitmaps, as_of) from rinex_files, only rows added after since if given.
+
+    as_of is the newest date_added read — the next run's watermark.
+    """
+    from src.db.models import RinexFile, Station  # central ORM (public schema)
+
+    first_day = func.date(func.timezone("UTC", RinexFile.start_time))
+    # A file ending exactly at midnight does not cover the next day.
+    last_day = func.date(
+        func.timezone("UTC", RinexFile.end_time - timedelta(microseconds=1))
+    )
+    stmt = (
+        select(
+            Station.station_code,
+            first_day.label("first_day"),
+            last_day.label("last_day"),
+            func.max(RinexFile.date_added).label("as_of"),
+        )
+        .join(Station, Station.id == RinexFile.station_id)
+        .group_by(Station.station_code, first_day, last_day)
+    )
+    if since is not None:
+        stmt = stmt.where(RinexFile.date_added > since)
+    if years:
+        years = sorted(set(years))
+        stmt = stmt.where(
+            RinexFile.end_time >= datetime(years[0], 1, 1),
+            RinexFile.start_time < datetime(years[-1] + 1, 1, 1),
+        )
+
+    bitmaps: Bitmaps = {}
+    as_of = None
+    for row in session.execute(stmt):
+        first = row.first_day
+        last = min(max(first, row.last_day), first + timedelta(days=MAX_FILE_DAYS - 1))
+        mark_days(bitmaps, row.station_code.upper(), first, last)
+        if row.as_of is not None and (as_of is None or row.as_of > as_of):
+            as_of = row.as_of
+    if years:
+        bitmaps = {k: v for k, v in bitmaps.items() if k[1] in years}
+    return bitmaps, as_of
+
+
+def _mark_file(bitmaps: Bitmaps, path: str) -> None:
+    """Mark the observation day named by a RINEX file name, if it is one."""
+    m = _RINEX3_TYPE.search(os.path.basename(path))
+    if m and m.group(1).upper() != "O":
+        return
+    day = observation_date(path)
+    if day is not None:
+        mark_days(bitmaps, station_of(path), day, day)
+
+
+def _scan_tree(root: str) -> Bitmaps:
+    bitmaps: Bitmaps = {}
+    for path, _ in _iter_rinex_files(root):
+        _mark_file(bitmaps, path)
+    return bitmaps
+
+
+def _scan_roots(roots: Iterable[str]) -> Iterator[str]:
+    """The subtrees to walk in parallel: each top-level directory of each root."""
+    for root in roots:
+        try:
+            with os.scandir(root) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            logger.warning("inventory_root_unreadable root=%s", root)
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield entry.path
+            except OSError:
+                continue
+
+
+def _scan_top_level(root: str) -> Bitmaps:
+    """Files directly inside root (subdirectories are walked separately)."""
+    bitmaps: Bitmaps = {}
+    try:
+        with os.scandir(root) as it:
+            paths = [e.path for e in it if e.is_file() and _is_rinex_file(e.name)]
+    except OSError:
+        return bitmaps
+    for path in paths:
+        _mark_file(bitmaps, path)
+    return bitmaps
+
+
+def filesystem_days(
+    roots: Iterable[str], years: Iterable[int] | None = None, workers: int = INVENTORY_WORKERS
+) -> Bitmaps:
+    """Bitmaps from RINEX file names under roots, one subtree per thread."""
+    roots = list(roots)
+    bitmaps: Bitmaps = {}
+    for root in roots:
+        merge(bitmaps, _scan_top_level(root))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for partial in pool.map(_scan_tree, _scan_roots(roots)):
+            merge(bitmaps, partial)
+    if years:
+        years = set(years)
+        bitmaps = {k: v for k, v in bitmaps.items() if k[1] in years}
+    return bitmaps
+
+
+# ---------------------------------------------------------------------------
+# processing_status
+# ---------------------------------------------------------------------------
+
+def _watermark(session) -> datetime | None:
+    from src.db.models import ProcessingStatus
+
+    return session.execute(select(func.max(ProcessingStatus.available_days_as_of))).scalar()
+
+
+def _stored(session, keys: list[tuple[str, int]]) -> Bitmaps:
+    """Current available_days of the given (station, year) rows, as bitmaps."""
+    from src.db.models import ProcessingStatus
+
+    stored: Bitmaps = {}
+    pair = tuple_(ProcessingStatus.station_code, ProcessingStatus.processing_year)
+    for i in range(0, len(keys), UPSERT_BATCH):
+        rows = session.execute(
+            select(
+                ProcessingStatus.station_code,
+                ProcessingStatus.processing_year,
+                ProcessingStatus.available_days,
+            ).where(pair.in_(keys[i:i + UPSERT_BATCH]))
+        )
+        for station, year, ranges in rows:
+            stored[(station, year)] = from_int4ranges(ranges)
+    return stored
+
+
+def _all_rows(session, years: Iterable[int] | None) -> list[tuple[str, int]]:
+    from src.db.models import ProcessingStatus
+
+    stmt = select(ProcessingStatus.station_code, ProcessingStatus.processing_year)
+    if years:
+        stmt = stmt.where(ProcessingStatus.processing_year.in_(sorted(set(years))))
+    return [tuple(row) for row in session.execute(stmt)]
+
+
+def write_available_days(session, bitmaps: Bitmaps, as_of: datetime | None) -> int:
+    """
+    Upsert available_days (and the watermark) for every key of bitmaps.
+
+    as_of None leaves each stored watermark as it is (GREATEST skips NULL).
+    """
+    from src.db.models import ProcessingStatus
+
+    rows = [
+        {
+            "station_code": station,
+            "processing_year": year,
+            "available_days": to_int4ranges(bits),
+            "available_days_as_of": as_of,
+        }
+        for (station, year), bits in sorted(bitmaps.items())
+    ]
+    for i in range(0, len(rows), UPSERT_BATCH):
+        stmt = pg_insert(ProcessingStatus).values(rows[i:i + UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_processing_status",
+            set_={
+                "available_days": stmt.excluded.available_days,
+                "available_days_as_of": func.greatest(
+                    stmt.excluded.available_days_as_of,
+                    ProcessingStatus.available_days_as_of,
+                ),
+            },
+        )
+        session.execute(stmt)
+    return len(rows)
+
+
+def update_inventory(
+    roots: Iterable[str] = (),
+    full: bool = False,
+    years: Iterable[int] | None = None,
+    session_factory=SessionLocal,
+) -> dict:
+    """
+    Bring processing_status.available_days up to date.
+
+    Incremental: OR the days of rinex_files rows added since the watermark
+    (and of files under roots) into the stored ranges. full: replace every
+    row — including rows that no longer have any data — with the union of the
+    whole catalog and roots. With years, only those years are touched and
+    the watermark is not advanced: it is one for the whole table, and moving
+    it would hide other years' new rows from the next run. Returns counts for
+    logging.
+    """
+    years = sorted(set(years)) if years else None
+    roots = list(roots)
+    session = session_factory()
+    try:
+        since = None
+        if not full:
+            watermark = _watermark(session)
+            since = watermark - WATERMARK_OVERLAP if watermark is not None else None
+        found, as_of = catalog_days(session, since, years)
+        catalog_rows = len(found)
+        if roots:
+            merge(found, filesystem_days(roots, years))
+        if full:
+            for key in _all_rows(session, years):
+                found.setdefault(key, 0)
+        else:
+            found = merge(_stored(session, sorted(found)), found)
+        written = write_available_days(session, found, None if years else as_of)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    logger.info(
+        "inventory_updated full=%s since=%s catalog_rows=%d written=%d",
+        full, since, catalog_rows, written,
+    )
+    return {
+        "full": full,
+        "since": since.isoformat() if since else None,
+        "as_of": as_of.isoformat() if as_of else None,
+        "catalog_station_years": catalog_rows,
+        "rows_written": written,
+    }
+
+
+def availability(year: int, session_factory=SessionLocal) -> dict[str, list[tuple[int, int]]]:
+    """Network-wide availability for year: station → inclusive day-of-year runs."""
+    from src.db.models import ProcessingStatus
+
+    session = session_factory()
+    try:
+        rows = session.execute(
+            select(ProcessingStatus.station_code, ProcessingStatus.available_days)
+            .where(ProcessingStatus.processing_year == year)
+            .order_by(ProcessingStatus.station_code)
+        ).all()
+    finally:
+        session.close()
+    return {station: day_ranges(from_int4ranges(ranges)) for station, ranges in rows}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Update processing_status.available_days")
+    parser.add_argument("--full", action="store_true", help="recompute every row from scratch")
+    parser.add_argument("--root", action="append", default=[],
+                        help="also count RINEX files under this directory (repeatable)")
+    parser.add_argument("--year", type=int, action="append", help="limit to year (repeatable)")
+    args = parser.parse_args()
+    print(json.dumps(update_inventory(args.root, args.full, args.year), indent=2))
@@ -0,0 +1,391 @@
+"""
+Batched loader for rinex_files and ingestion_logs.
+
+_load_to_postgres used to open a session per file, look the station up,
+look the hash up, insert, update the log and commit — three round trips and
+a transaction for every file. At backfill rates that is most of the DB load.
+
+Here each worker process keeps one BulkLoader. load_to_postgres resolves the
+station from an in-process cache of public.stations and hands the finished
+row to the loader; the loader writes everything it holds in one transaction
+when it has INGEST_LOAD_BATCH rows or its oldest row is INGEST_LOAD_FLUSH_SEC
+old (a timer thread covers quiet periods):
+
+    SELECT hash_sha256 FROM rinex_files WHERE hash_sha256 IN (…)   -- skip catalogued
+    INSERT INTO rinex_files … VALUES (…), (…) ON CONFLICT (filepath) DO NOTHING
+        RETURNING hash_sha256
+    INSERT INTO ingestion_logs … VALUES (…), (…) ON CONFLICT (file_hash) DO UPDATE …
+
+A catalogued row is never overwritten: a file whose path already holds a
+different hash is logged as a conflict and its ingestion_logs entry is
+marked failed. If a batch fails, its rows are retried one by one so that a
+single bad row marks only its own ingestion_logs entry failed.
+INGEST_LOAD_BATCH=1 gives the old write-per-file behaviour.
+
+ingestion_logs reaches 'success' in the same transaction that writes the
+rinex_files row, and a task reports success only after commit_loaded() has
+flushed its rows and found no failure for them. The scanner dispatches
+ingest_batch tasks by default (INGEST_DISPATCH_BATCH, scanner.py), so the
+rows of a batch accumulate here, are written every INGEST_LOAD_BATCH files
+or INGEST_LOAD_FLUSH_SEC seconds while the batch runs, and the remainder
+once at its end. Single-file tasks (load_to_postgres, ingest_file) commit at
+their end, one transaction per file; that is the chain-mode and
+INGEST_DISPATCH_BATCH=1 path. Rows still buffered when a worker process exits are flushed from the worker_process_shutdown hook in
+tasks.py; a process that dies hard loses them, and the scanner re-queues
+those files because their logs never reached 'success'.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .database import SessionLocal
+from .models import IngestionLog
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH_SIZE = int(os.environ.get("INGEST_LOAD_BATCH", "200"))
+LOAD_FLUSH_SEC = float(os.environ.get("INGEST_LOAD_FLUSH_SEC", "5"))
+STATION_REFRESH_SEC = 60.0
+
+_loader: "BulkLoader | None" = None
+_loader_pid: int | None = None
+_loader_lock = threading.Lock()
+
+
+@dataclass
+class LoadRecord:
+    """One validated file, ready to be written."""
+    file_hash: str
+    filepath: str
+    station_id: int
+    station_code: str
+    start_time: datetime
+    end_time: datetime
+    sampling_interval: float | None
+    receiver_type: str | None
+    antenna_type: str | None
+    ingested_at: datetime
+    qc_obs_count: int | None = None
+    qc_cycle_slips: int | None = None
+    qc_mp1_rms: float | None = None
+    qc_mp2_rms: float | None = None
+    worker: str | None = None
+    bytes_in: int | None = None
+    bytes_out: int | None = None
+    decompress_sec: float | None = None
+    hatanaka_sec: float | None = None
+    qc_sec: float | None = None
+
+
+# ---------------------------------------------------------------------------
+# Station FK cache
+# ---------------------------------------------------------------------------
+
+class StationCache:
+    """
+    station_code → stations.id for this process.
+
+    Loaded on first use. A code that is not in the cache triggers a reload,
+    at most once per refresh_sec, so a station registered while the worker
+    runs is picked up without a query per unknown file.
+    """
+
+    def __init__(self, session_factory=SessionLocal, refresh_sec: float = STATION_REFRESH_SEC):
+        self._session_factory = session_factory
+        self._refresh_sec = refresh_sec
+        self._ids: dict[str, int] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def get(self, station_code: str | None) -> int | None:
+        """stations.id for station_code, or None if it is not registered."""
+        if not station_code:
+            return None
+        with self._lock:
+            if station_code not in self._ids and self._stale():
+                self._reload()
+            return self._ids.get(station_code)
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self._refresh_sec
+
+    def _reload(self) -> None:
+        from src.db.models import Station  # central ORM (public schema)
+
+        session = self._session_factory()
+        try:
+            rows = session.execute(select(Station.station_code, Station.id)).all()
+        finally:
+            session.close()
+        self._ids = dict(rows)
+        self._loaded_at = time.monotonic()
+        logger.info("Station cache loaded: %d stations", len(self._ids))
+
+
+# ---------------------------------------------------------------------------
+# Bulk loader
+# ---------------------------------------------------------------------------
+
+_LOG_UPDATE_COLUMNS = (
+    "status", "station_code", "ingested_at", "error_message",
+    "qc_obs_count", "qc_cycle_slips", "qc_mp1_rms", "qc_mp2_rms",
+    "worker", "bytes_in", "bytes_out", "decompress_sec", "hatanaka_sec", "qc_sec", "db_sec",
+)
+
+
+class BulkLoader:
+    """Buffers LoadRecords and writes them in multi-row upserts."""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = LOAD_BATCH_SIZE,
+        flush_sec: float = LOAD_FLUSH_SEC,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_sec = flush_sec
+        self._pending: dict[str, LoadRecord] = {}   # file_hash → record
+        self._oldest: float | None = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._timer: threading.Thread | None = None
+        self._failures: dict[str, str] = {}        # file_hash → error, until taken
+
+    # -- buffering -----------------------------------------------------------
+
+    def add(self, record: LoadRecord) -> None:
+        """Queue record; flush if the batch is full or has waited long enough."""
+        with self._lock:
+            self._pending[record.file_hash] = record
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self._due():
+                self.flush()
+        self._ensure_timer()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _due(self) -> bool:
+        return len(self._pending) >= self.batch_size or (
+            self._oldest is not None and time.monotonic() - self._oldest >= self.flush_sec
+        )
+
+    def _ensure_timer(self) -> None:
+        if self._timer is None and self.batch_size > 1:
+            self._timer = threading.Thread(
+                target=self._run_timer, name="ingest-bulk-loader", daemon=True
+            )
+            self._timer.start()
+
+    def _run_timer(self) -> None:
+        while not self._stop.wait(min(self.flush_sec, 1.0)):
+            with self._lock:
+                if self._pending and self._due():
+                    try:
+                        self.flush()
+                    except Exception:
+                        logger.exception("Timed flush of %d rows failed", len(self._pending))
+
+    def take_failures(self, file_hashes: Iterable[str]) -> dict[str, str]:
+        """Errors of those file_hashes whose rows failed to load (forgotten once taken)."""
+        with self._lock:
+            return {h: self._failures.pop(h) for h in file_hashes if h in self._failures}
+
+    def close(self) -> None:
+        """Stop the timer thread and write whatever is still buffered."""
+        self._stop.set()
+        self.flush()
+
+    # -- writing -------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Write every buffered record. Returns the number written successfully."""
+        with self._lock:
+            batch = list(self._pending.values())
+            self._pending.clear()
+            self._oldest = None
+        if not batch:
+            return 0
+        try:
+            conflicts = self._write(batch)
+            self._record_conflicts(conflicts)
+            logger.info("Bulk load: %d files", len(batch) - len(conflicts))
+            return len(batch) - len(conflicts)
+        except Exception:
+            if len(batch) == 1:
+                self._mark_failed(batch[0].file_hash, "bulk load failed")
+                logger.exception("Load failed for %s", batch[0].filepath)
+                return 0
+            logger.exception("Bulk load of %d files failed; retrying one by one", len(batch))
+        written = 0
+        for record in batch:
+            try:
+                conflicts = self._write([record])
+                self._record_conflicts(conflicts)
+                written += not conflicts
+            except Exception as exc:
+                logger.error("Load failed for %s: %s", record.filepath, exc)
+                self._mark_failed(record.file_hash, str(exc))
+        return written
+
+    def _write(self, batch: list[LoadRecord]) -> dict[str, str]:
+        """
+        Write batch in one transaction. Returns file_hash → error for files
+        whose path is already catalogued with another hash; their log rows
+        are written as failed.
+        """
+        from src.db.models import RinexFile  # central ORM (public schema)
+
+        session = self._session_factory()
+        start = time.perf_counter()
+        try:
+            hashes = [r.file_hash for r in batch]
+            catalogued = set(session.execute(
+                select(RinexFile.hash_sha256).where(RinexFile.hash_sha256.in_(hashes))
+            ).scalars())
+            # One row per filepath: ON CONFLICT cannot touch a row twice.
+            new_files = {
+                r.filepath: r for r in batch if r.file_hash not in catalogued
+            }.values()
+            if new_files:
+                stmt = pg_insert(RinexFile.__table__).values([
+                    {
+                        "station_id": r.station_id,
+                        "filepath": r.filepath,
+                        "start_time": r.start_time,
+                        "end_time": r.end_time,
+                        "sampling_interval": r.sampling_interval,
+                        "receiver_type": r.receiver_type,
+                        "antenna_type": r.antenna_type,
+                        "hash_sha256": r.file_hash,
+                    }
+                    for r in new_files
+                ])
+                inserted = set(session.execute(
+                    stmt.on_conflict_do_nothing(index_elements=["filepath"])
+                    .returning(RinexFile.__table__.c.hash_sha256)
+                ).scalars())
+            else:
+                inserted = set()
+            conflicts = {
+                r.file_hash: f"{r.filepath} is already catalogued with a different file"
+                for r in batch if r.file_hash not in catalogued and r.file_hash not in inserted
+            }
+
+            # Each file's share of the batch's rinex_files round trips; the
+            # log upsert below cannot time itself.
+            db_sec = (time.perf_counter() - start) / len(batch)
+            stmt = pg_insert(IngestionLog.__table__).values([
+                {
+                    "file_hash": r.file_hash,
+                    "filename": os.path.basename(r.filepath),
+                    "filepath": r.filepath,
+                    "status": "failed" if r.file_hash in conflicts else "success",
+                    "station_code": r.station_code,
+                    "ingested_at": r.ingested_at,
+                    "error_message": conflicts.get(r.file_hash),
+                    "qc_obs_count": r.qc_obs_count,
+                    "qc_cycle_slips": r.qc_cycle_slips,
+                    "qc_mp1_rms": r.qc_mp1_rms,
+                    "qc_mp2_rms": r.qc_mp2_rms,
+                    "worker": r.worker,
+                    "bytes_in": r.bytes_in,
+                    "bytes_out": r.bytes_out,
+                    "decompress_sec": r.decompress_sec,
+                    "hatanaka_sec": r.hatanaka_sec,
+                    "qc_sec": r.qc_sec,
+                    "db_sec": db_sec,
+                }
+                for r in batch
+            ])
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=["file_hash"],
+                set_={c: stmt.excluded[c] for c in _LOG_UPDATE_COLUMNS},
+            ))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return conflicts
+
+    def _record_conflicts(self, conflicts: dict[str, str]) -> None:
+        for error in conflicts.values():
+            logger.warning("Not loaded: %s", error)
+        with self._lock:
+            self._failures.update(conflicts)
+
+    def _mark_failed(self, file_hash: str, error: str) -> None:
+        with self._lock:
+            self._failures[file_hash] = error
+        mark_failed(file_hash, error, self._session_factory)
+
+
+def mark_failed(file_hash: str, error: str, session_factory=SessionLocal) -> None:
+    """Set one ingestion_logs row to failed (best effort)."""
+    session = session_factory()
+    try:
+        session.execute(
+            update(IngestionLog)
+            .where(IngestionLog.file_hash == file_hash)
+            .values(status="failed", error_message=error)
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Could not mark %s failed", file_hash)
+    finally:
+        session.close()
+
+
+# ---------------------------------------------------------------------------
+# Per-process instances
+# ---------------------------------------------------------------------------
+
+_stations: StationCache | None = None
+
+
+def get_loader() -> BulkLoader:
+    """This worker process's BulkLoader (recreated after a fork)."""
+    global _loader, _loader_pid
+    with _loader_lock:
+        if _loader is None or _loader_pid != os.getpid():
+            _loader = BulkLoader()
+            _loader_pid = os.getpid()
+        return _loader
+
+
+def get_station_cache() -> StationCache:
+    global _stations
+    if _stations is None:
+        _stations = StationCache()
+    return _stations
+
+
+def flush_loader() -> int:
+    """Flush this process's loader, if it has one."""
+    if _loader is None or _loader_pid != os.getpid():
+        return 0
+    return _loader.flush()
+
+
+def commit_loaded(file_hashes: Iterable[str]) -> dict[str, str]:
+    """
+    Flush this process's loader and return file_hash → error for those of
+    file_hashes whose rows did not load. The others are committed.
+    """
+    if _loader is None or _loader_pid != os.getpid():
+        return {}
+    _loader.flush()
+    return _loader.take_failures(file_hashes)
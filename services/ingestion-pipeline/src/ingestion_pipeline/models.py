@@ -8,7 +8,7 @@ is created by migration 006 in the root Alembic history.
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text
+from sqlalchemy import BigInteger, Column, DateTime, Float, Integer, String, Text
 
 from src.db.models import Base
 
@@ -38,6 +38,15 @@ class IngestionLog(Base):
     qc_cycle_slips  = Column(Integer)
     qc_mp1_rms      = Column(Float)
     qc_mp2_rms      = Column(Float)
+    # Where the time went (migration 014); seconds per stage, NULL if not run
+    worker          = Column(String(255))       # host:pid
+    bytes_in        = Column(BigInteger)
+    bytes_out       = Column(BigInteger)
+    hash_sec        = Column(Float)             # written by the scanner
+    decompress_sec  = Column(Float)
+    hatanaka_sec    = Column(Float)
+    qc_sec          = Column(Float)
+    db_sec          = Column(Float)
 
     def __repr__(self) -> str:
         return f"<IngestionLog {self.filename} [{self.status}]>"
@@ -1,30 +1,77 @@
 """
-Celery chain orchestration for the RINEX ingestion pipeline.
+Celery orchestration for the RINEX ingestion pipeline.
 
-The ingestion pipeline runs three tasks in sequence:
+The ingestion pipeline runs three stages in sequence:
   1. standardize_format — decompress and convert to plain RINEX 3.x
-  2. validate_rinex     — check RINEX header + run teqc QC (stubbed)
+  2. validate_rinex     — check RINEX header + run native RINEX QC
   3. load_to_postgres   — write RinexFile row + update IngestionLog
 
 Each task receives the output path of the previous task as its first argument
 (Celery's signature chaining via .s()). file_hash is passed as a keyword
-argument to load_to_postgres so it survives the chain.
+argument to load_to_postgres so it survives the chain, together with the
+original file_path: standardize_format may hand back a scratch copy, and
+rinex_files should record where the file actually lives.
+
+INGEST_PIPELINE_MODE selects how the stages are dispatched:
+  fused (default) — one ingest_file task runs all three stages in the worker
+                    that picks it up; one broker round trip per file, and the
+                    scratch copy never has to be found on another node.
+  chain           — the three-task Celery chain above, one hop per stage.
+
+trigger_ingest_batch always uses the fused ingest_batch task.
+
+Each dispatch goes to its lane's queue (ingest.live / ingest.backfill, see
+dispatch.classify) with the lane's priority; in chain mode the stage tasks
+are routed to their own queues by celery.TASK_ROUTES and carry the priority.
+The per-stage pools are therefore only used in chain mode: fused tasks run
+every stage, the CPU-heavy ones included, on the lane pools.
 """
 
+import os
+
 from celery import chain
 
-from .tasks import load_to_postgres, standardize_format, validate_rinex
+from .celery import LANE_PRIORITY
+from .dispatch import classify
+from .tasks import (
+    ingest_batch,
+    ingest_file,
+    load_to_postgres,
+    standardize_format,
+    validate_rinex,
+)
+
+PIPELINE_MODE = os.environ.get("INGEST_PIPELINE_MODE", "fused")
 
 
-def trigger_ingest(file_path: str, file_hash: str) -> str:
+def trigger_ingest(file_path: str, file_hash: str, lane: str | None = None) -> str:
     """
-    Build and dispatch the ingestion chain for a single file.
+    Dispatch the ingestion pipeline for a single file.
+    lane defaults to dispatch.classify(file_path).
     Returns the Celery task result ID.
     """
+    lane = lane or classify(file_path)
+    if PIPELINE_MODE != "chain":
+        return ingest_file.apply_async(
+            (file_path, file_hash), queue=f"ingest.{lane}", priority=LANE_PRIORITY[lane]
+        ).id
+
     ingest_chain = chain(
-        standardize_format.s(file_path),
-        validate_rinex.s(),
-        load_to_postgres.s(file_hash=file_hash),
+        standardize_format.s(file_path, file_hash=file_hash),
+        validate_rinex.s(file_hash=file_hash),
+        load_to_postgres.s(file_hash=file_hash, source_path=file_path),
     )
-    result = ingest_chain.apply_async()
+    result = ingest_chain.apply_async(priority=LANE_PRIORITY[lane])
     return result.id
+
+
+def trigger_ingest_batch(files: list[tuple[str, str]], lane: str | None = None) -> str:
+    """
+    Dispatch one fused task for [(file_path, file_hash), ...].
+    lane defaults to the lane of the first file.
+    Returns the Celery task result ID.
+    """
+    lane = lane or classify(files[0][0])
+    return ingest_batch.apply_async(
+        ([list(item) for item in files],), queue=f"ingest.{lane}", priority=LANE_PRIORITY[lane]
+    ).id
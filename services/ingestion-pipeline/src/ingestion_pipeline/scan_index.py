@@ -0,0 +1,95 @@
+"""
+Local (path, size, mtime, inode) → SHA-256 index for the FileScanner.
+
+Re-scanning a DATAPOOL used to re-read every byte of every file just to find
+out that it had already been ingested. The scanner now asks this index
+first: a file whose size, mtime and inode are unchanged since it was last
+hashed keeps its hash, and only new or modified files are read.
+
+The index is a SQLite file on local disk (INGEST_SCAN_INDEX, default
+~/.cache/pogf-ingest/scan-index.sqlite). It is only a cache — deleting it
+costs one full re-hash, nothing else. It is used from the scanning thread
+only.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "INGEST_SCAN_INDEX",
+    str(Path.home() / ".cache" / "pogf-ingest" / "scan-index.sqlite"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode    INTEGER NOT NULL,
+    hash     TEXT NOT NULL,
+    scan_id  INTEGER NOT NULL
+)
+"""
+
+
+class ScanIndex:
+    """
+    Hashes of files seen by earlier scans, keyed by path.
+
+    lookup() returns the stored hash only if the stat signature still matches;
+    record() stores a fresh one. Every lookup hit or record during a scan
+    stamps the row with that scan's id, so prune() can drop rows for files
+    that have disappeared from the scanned tree.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        row = self._conn.execute("SELECT COALESCE(MAX(scan_id), 0) FROM files").fetchone()
+        self.scan_id = row[0] + 1
+        self._seen: list[tuple[int, str]] = []
+
+    def lookup(self, path: str, st: os.stat_result) -> str | None:
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, inode, hash FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or row[:3] != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return None
+        self._seen.append((self.scan_id, path))
+        return row[3]
+
+    def record(self, path: str, st: os.stat_result, file_hash: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, hash, scan_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, st.st_ino, file_hash, self.scan_id),
+        )
+
+    def commit(self) -> None:
+        if self._seen:
+            self._conn.executemany("UPDATE files SET scan_id = ? WHERE path = ?", self._seen)
+            self._seen.clear()
+        self._conn.commit()
+
+    def prune(self, root: str) -> int:
+        """Forget files under root that this scan did not see. Returns the count."""
+        self.commit()
+        prefix = os.path.join(root, "")
+        cur = self._conn.execute(
+            "DELETE FROM files WHERE substr(path, 1, ?) = ? AND scan_id != ?",
+            (len(prefix), prefix, self.scan_id),
+        )
+        self._conn.commit()
+        return cur.rowcount
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self) -> None:
+        self.commit()
+        self._conn.close()
@@ -3,8 +3,31 @@ FileScanner — discovers GNSS/RINEX files and queues them for ingestion.
 
 Walks a directory tree, identifies RINEX observation files by extension,
 hashes each file (SHA-256), performs an idempotency check against
-ingestion_logs, and triggers the Celery pipeline chain for new or
-previously-failed files.
+ingestion_logs, and triggers the Celery pipeline for new or
+previously-failed files in ingest_batch tasks of INGEST_DISPATCH_BATCH
+files (default 20), so each task's rows reach the database in one loader
+transaction. INGEST_DISPATCH_BATCH=1 sends one task per file, which is
+also the default with INGEST_PIPELINE_MODE=chain: batches always run
+fused and would bypass the chain. Dispatch goes through
+a FairDispatcher (dispatch.py): live files first, then round-robin across
+stations, each on its lane's queue.
+
+Incremental scans:
+  A local ScanIndex (scan_index.py) remembers the hash of every file by
+  (path, size, mtime, inode), so a re-scan only reads files that are new or
+  have changed. Those are hashed on a thread pool (INGEST_HASH_WORKERS,
+  1 MiB reads; hashlib releases the GIL). Files are then checked against
+  ingestion_logs LOOKUP_BATCH at a time with one WHERE file_hash IN (...)
+  query, and the pending rows for the chunk are written with one upsert and
+  one commit. Each pending row carries the time its hash took (hash_sec);
+  files the index vouched for keep the value from their first scan.
+
+Re-dispatch:
+  Every row not yet 'success' is queued again, pending ones included — a
+  one-shot scan cannot tell a lost task from one still waiting in the broker.
+  A scanner that runs repeatedly (the watcher) passes requeue_after_sec:
+  pending rows queued less than that long ago are then left to the task
+  already in flight.
 
 RINEX extensions recognised:
   .rnx              — RINEX 3.x observation
@@ -15,13 +38,27 @@ RINEX extensions recognised:
 
 import hashlib
 import os
-from datetime import datetime, timezone
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
 from .database import SessionLocal
+from .dispatch import FairDispatcher
 from .models import IngestionLog
-from .pipeline import trigger_ingest
+from .pipeline import PIPELINE_MODE, trigger_ingest, trigger_ingest_batch
+from .scan_index import DEFAULT_INDEX_PATH, ScanIndex
 
+DISPATCH_BATCH = int(
+    os.environ.get("INGEST_DISPATCH_BATCH", "1" if PIPELINE_MODE == "chain" else "20")
+)
+HASH_WORKERS = int(os.environ.get("INGEST_HASH_WORKERS", str(min(8, os.cpu_count() or 1))))
+LOOKUP_BATCH = 500
+_HASH_BUFSIZE = 1 << 20
 # RINEX 2.x obs suffix pattern: two-digit year + 'o' (obs) or 'd' (Hatanaka)
 _EXPLICIT_EXTENSIONS = {".rnx", ".crx", ".gz", ".zip"}
 _COMPRESSED_SUFFIX = ".Z"
@@ -50,88 +87,215 @@ def _is_rinex_file(filename: str) -> bool:
 
 
 def _sha256(file_path: str) -> str | None:
-    """SHA-256 hash of file contents, chunked for large files."""
+    """SHA-256 hash of file contents, read in 1 MiB blocks."""
     h = hashlib.sha256()
     try:
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(65536), b""):
+        with open(file_path, "rb", buffering=0) as f:
+            for chunk in iter(lambda: f.read(_HASH_BUFSIZE), b""):
                 h.update(chunk)
         return h.hexdigest()
     except OSError:
         return None
 
 
+def _timed_sha256(file_path: str) -> tuple[str | None, float]:
+    start = time.perf_counter()
+    return _sha256(file_path), time.perf_counter() - start
+
+
+def _iter_rinex_files(root_directory: str) -> Iterator[tuple[str, os.stat_result]]:
+    """(path, stat) for every RINEX candidate under root_directory, depth first."""
+    try:
+        with os.scandir(root_directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_rinex_files(entry.path)
+            elif entry.is_file() and _is_rinex_file(entry.name):
+                yield entry.path, entry.stat()
+        except OSError:
+            continue
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 class FileScanner:
     """
-    Walks root_directory, hashes each RINEX file, and triggers the
-    ingestion pipeline for files not yet successfully ingested.
+    Walks root_directory, hashes each new or changed RINEX file, and triggers
+    the ingestion pipeline for files not yet successfully ingested.
 
     Idempotency: a file with status='success' in ingestion_logs is skipped.
-    Failed files (status='failed') are re-queued automatically.
+    Failed files (status='failed') are re-queued automatically, and so are
+    pending ones unless requeue_after_sec is set and they were queued within
+    it (counted as in_flight).
     """
 
-    def __init__(self, root_directory: str):
+    def __init__(
+        self,
+        root_directory: str,
+        batch_size: int = DISPATCH_BATCH,
+        index_path: str = DEFAULT_INDEX_PATH,
+        hash_workers: int = HASH_WORKERS,
+        requeue_after_sec: float | None = None,
+    ):
         self.root_directory = root_directory
+        self.batch_size = batch_size
+        self.index_path = index_path
+        self.hash_workers = max(1, hash_workers)
+        self.requeue_after_sec = requeue_after_sec
 
     def scan(self) -> dict:
         """
         Execute the scan. Returns a summary dict with counts:
-            queued, skipped, errors
+            queued, skipped, in_flight, errors, hashed
         """
-        counts = {"queued": 0, "skipped": 0, "errors": 0}
-        session = SessionLocal()
-
+        index = ScanIndex(self.index_path)
         try:
-            for root, _dirs, files in os.walk(self.root_directory):
-                for filename in sorted(files):
-                    if not _is_rinex_file(filename):
-                        continue
-
-                    filepath = os.path.join(root, filename)
-                    file_hash = _sha256(filepath)
-
-                    if file_hash is None:
-                        print(f"ERROR: cannot read {filepath}")
-                        counts["errors"] += 1
-                        continue
-
-                    existing = session.get(IngestionLog, file_hash)
-
-                    if existing and existing.status == "success":
-                        print(f"SKIP  {filename} (already ingested)")
-                        counts["skipped"] += 1
-                        continue
-
-                    print(f"QUEUE {filename}")
-
-                    if existing:
-                        # Re-queue a previously failed attempt
-                        existing.status = "pending"
-                        existing.queued_at = datetime.now(timezone.utc)
-                        existing.error_message = None
-                    else:
-                        session.add(IngestionLog(
-                            file_hash=file_hash,
-                            filename=filename,
-                            filepath=filepath,
-                            status="pending",
-                        ))
-
-                    session.commit()
-                    trigger_ingest(filepath, file_hash)
-                    counts["queued"] += 1
+            counts = self.process(_iter_rinex_files(self.root_directory), index)
+            index.prune(self.root_directory)
+        finally:
+            index.close()
+        return counts
 
+    def process(
+        self, candidates: Iterable[tuple[str, os.stat_result]], index: ScanIndex
+    ) -> dict:
+        """Hash (where needed), check and queue (path, stat) pairs."""
+        counts = {"queued": 0, "skipped": 0, "in_flight": 0, "errors": 0, "hashed": 0}
+        dispatcher = FairDispatcher(trigger_ingest, trigger_ingest_batch, self.batch_size)
+        session = SessionLocal()
+        try:
+            with ThreadPoolExecutor(self.hash_workers, thread_name_prefix="scan-hash") as pool:
+                for chunk in _chunks(candidates, LOOKUP_BATCH):
+                    hashed = self._hash_chunk(chunk, index, pool, counts)
+                    self._queue_chunk(session, hashed, counts, dispatcher)
+                    index.commit()
+            dispatcher.drain()
         finally:
             session.close()
-
         return counts
 
+    def _hash_chunk(self, chunk, index, pool, counts) -> list[tuple[str, str, float | None]]:
+        """
+        [(path, hash, seconds)] for chunk, reading only files the index cannot
+        vouch for; seconds is None for those it could.
+        """
+        known = {path: index.lookup(path, st) for path, st in chunk}
+        seconds: dict[str, float] = {}
+        stale = [(path, st) for path, st in chunk if known[path] is None]
+        for (path, st), (file_hash, elapsed) in zip(
+            stale, pool.map(_timed_sha256, [path for path, _ in stale]), strict=True
+        ):
+            if file_hash is None:
+                print(f"ERROR: cannot read {path}")
+                counts["errors"] += 1
+                continue
+            index.record(path, st, file_hash)
+            known[path] = file_hash
+            seconds[path] = elapsed
+            counts["hashed"] += 1
+        return [
+            (path, known[path], seconds.get(path))
+            for path, _ in chunk if known[path] is not None
+        ]
+
+    def _queue_chunk(self, session, hashed, counts: dict, dispatcher: FairDispatcher) -> None:
+        if not hashed:
+            return
+        done = set(session.execute(
+            select(IngestionLog.file_hash).where(
+                IngestionLog.file_hash.in_({h for _, h, _ in hashed}),
+                IngestionLog.status == "success",
+            )
+        ).scalars())
+        in_flight = self._in_flight(session, {h for _, h, _ in hashed} - done)
+
+        todo = []
+        hash_sec = {}
+        for filepath, file_hash, seconds in hashed:
+            if file_hash in done:
+                print(f"SKIP  {os.path.basename(filepath)} (already ingested)")
+                counts["skipped"] += 1
+                continue
+            if file_hash in in_flight:
+                print(f"SKIP  {os.path.basename(filepath)} (queued recently)")
+                counts["in_flight"] += 1
+                continue
+            print(f"QUEUE {os.path.basename(filepath)}")
+            todo.append((filepath, file_hash))
+            hash_sec.setdefault(file_hash, seconds)
+        if not todo:
+            return
+
+        # New rows are inserted pending; failed or pending ones are reset. The
+        # WHERE keeps a row that went to 'success' since the SELECT untouched.
+        # ON CONFLICT may touch a row only once, so identical copies share one.
+        first_path: dict[str, str] = {}
+        for filepath, file_hash in todo:
+            first_path.setdefault(file_hash, filepath)
+        now = datetime.now(UTC)
+        stmt = pg_insert(IngestionLog.__table__).values([
+            {
+                "file_hash": file_hash,
+                "filename": os.path.basename(filepath),
+                "filepath": filepath,
+                "status": "pending",
+                "queued_at": now,
+                "hash_sec": hash_sec[file_hash],
+            }
+            for file_hash, filepath in first_path.items()
+        ])
+        table = IngestionLog.__table__
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["file_hash"],
+            set_={
+                "status": "pending",
+                "queued_at": now,
+                "error_message": None,
+                "hash_sec": func.coalesce(stmt.excluded.hash_sec, table.c.hash_sec),
+            },
+            where=table.c.status != "success",
+        ))
+        session.commit()
+
+        for filepath, file_hash in todo:
+            dispatcher.add(filepath, file_hash)
+        counts["queued"] += len(todo)
+
+    def _in_flight(self, session, hashes: set[str]) -> set[str]:
+        """Those of hashes pending since less than requeue_after_sec ago."""
+        if self.requeue_after_sec is None or not hashes:
+            return set()
+        since = datetime.now(UTC) - timedelta(seconds=self.requeue_after_sec)
+        return set(session.execute(
+            select(IngestionLog.file_hash).where(
+                IngestionLog.file_hash.in_(hashes),
+                IngestionLog.status == "pending",
+                IngestionLog.queued_at >= since,
+            )
+        ).scalars())
+
 
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
         scanner = FileScanner(sys.argv[1])
         result = scanner.scan()
-        print(f"\nDone — queued: {result['queued']}, skipped: {result['skipped']}, errors: {result['errors']}")
+        print(
+            f"\nDone — queued: {result['queued']}, skipped: {result['skipped']}, "
+            f"errors: {result['errors']}, hashed: {result['hashed']}"
+        )
     else:
         print("Usage: python -m ingestion_pipeline.scanner <directory>")
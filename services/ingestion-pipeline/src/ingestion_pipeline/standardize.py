@@ -0,0 +1,271 @@
+"""
+Streaming standardization of incoming RINEX files.
+
+_standardize_format used to copy every file into a fresh temp dir, shell out
+to gunzip for .Z and let crx2rnx write a second copy next to the first. Here
+each compression layer is a stream transform stacked on the source file:
+
+    source → .zip member | .gz | .Z (LZW) → … → Hatanaka (CRINEX) → disk
+
+so the plain RINEX is written exactly once. Files that are already plain
+RINEX are not touched at all — the original path is returned as-is.
+
+.Z layers go through pogf_geodetic_suite.lzw, the streaming LZW decoder
+shared with the IGS downloader and drive-archaeologist. Hatanaka decoding
+runs in-process (pogf_geodetic_suite.rinex.hatanaka, byte-identical to
+crx2rnx), so there is no per-file process spawn and no PATH dependency: a
+.crx/.??d file is always decoded, never passed through.
+
+Scratch space:
+  Each worker process owns <INGEST_SCRATCH_DIR>/pogf_ingest_<pid>/ and every
+  standardized file lives in its own subdirectory there. release() removes it
+  once the file has been loaded (or the chain failed); a worker that starts
+  and finds scratch dirs of dead PIDs removes those as well, so a crashed
+  worker's leftovers are reclaimed on the next start instead of piling up
+  in /tmp.
+
+Cache:
+  When the caller passes the source SHA-256, decoded files go to the
+  content-addressed cache (cache.py) instead, so retries and re-queues of
+  the same file skip decoding entirely. The entry is pinned against
+  eviction until release() is called for it.
+
+Stage statistics:
+  Given a stats dict, standardize() fills in bytes_in / bytes_out and the
+  seconds spent peeling compression layers (decompress_sec) and Hatanaka
+  decoding (hatanaka_sec). The two run interleaved on one stream, so the
+  decoder's input is read through a timing wrapper: time spent inside its
+  reads is decompression, the rest is decoding.
+"""
+
+import gzip
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from contextlib import ExitStack
+from pathlib import Path
+from typing import BinaryIO
+
+from pogf_geodetic_suite.lzw import LZWReader
+from pogf_geodetic_suite.rinex.hatanaka import decompress as _decode_hatanaka
+
+from .cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+SCRATCH_ROOT = os.environ.get("INGEST_SCRATCH_DIR", tempfile.gettempdir())
+_SCRATCH_PREFIX = "pogf_ingest_"
+_COPY_BUFSIZE = 1 << 20
+
+_scratch_dir: Path | None = None
+
+
+# ---------------------------------------------------------------------------
+# Layer detection
+# ---------------------------------------------------------------------------
+
+def is_hatanaka(name: str) -> bool:
+    """True for Hatanaka-compressed names: .crx (RINEX 3) or .yyd (RINEX 2)."""
+    suffix = Path(name).suffix.lower()
+    return suffix == ".crx" or (
+        len(suffix) == 4 and suffix[1:3].isdigit() and suffix[3] == "d"
+    )
+
+
+def _hatanaka_output_name(name: str) -> str:
+    path = Path(name)
+    suffix = path.suffix.lower()
+    return path.with_suffix(".rnx" if suffix == ".crx" else path.suffix[:-1] + "o").name
+
+
+def _open_layers(path: Path, stack: ExitStack) -> tuple[BinaryIO, str]:
+    """
+    Open path and peel every compression wrapper named by its suffixes.
+
+    Returns the decoded byte stream and the name of the innermost file.
+    """
+    stream: BinaryIO = stack.enter_context(open(path, "rb"))
+    name = path.name
+    while True:
+        suffix = Path(name).suffix
+        if suffix.lower() == ".gz":
+            stream = stack.enter_context(gzip.GzipFile(fileobj=stream, mode="rb"))
+            name = Path(name).stem
+        elif suffix == ".Z":
+            stream = stack.enter_context(io.BufferedReader(LZWReader(stream), _COPY_BUFSIZE))
+            name = Path(name).stem
+        elif suffix.lower() == ".zip":
+            zf = stack.enter_context(zipfile.ZipFile(stream))
+            member = zf.namelist()[0]
+            stream = stack.enter_context(zf.open(member))
+            name = Path(member).name
+        else:
+            return stream, name
+
+
+class _TimedReader(io.RawIOBase):
+    """Pass-through reader that adds the time spent in reads to .seconds."""
+
+    def __init__(self, fileobj: BinaryIO):
+        super().__init__()
+        self._src = fileobj
+        self.seconds = 0.0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        start = time.perf_counter()
+        try:
+            return self._src.readinto(buffer)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# Scratch area
+# ---------------------------------------------------------------------------
+
+def scratch_dir() -> Path:
+    """This worker process's scratch directory, created (and stale ones reaped) on first use."""
+    global _scratch_dir
+    if _scratch_dir is None or _scratch_dir.name != f"{_SCRATCH_PREFIX}{os.getpid()}":
+        root = Path(SCRATCH_ROOT)
+        _reap_stale_scratch(root)
+        _scratch_dir = root / f"{_SCRATCH_PREFIX}{os.getpid()}"
+        _scratch_dir.mkdir(parents=True, exist_ok=True)
+    return _scratch_dir
+
+
+def _reap_stale_scratch(root: Path) -> None:
+    if not root.is_dir():
+        return
+    for entry in root.glob(f"{_SCRATCH_PREFIX}*"):
+        pid = entry.name[len(_SCRATCH_PREFIX):]
+        if not pid.isdigit() or not entry.is_dir():
+            continue
+        if int(pid) == os.getpid() or not _pid_alive(int(pid)):
+            shutil.rmtree(entry, ignore_errors=True)
+            logger.info("Removed stale scratch dir %s", entry)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_scratch_file(file_path: str) -> bool:
+    """True if file_path was written by standardize() into some worker's scratch area."""
+    try:
+        rel = Path(file_path).resolve().relative_to(Path(SCRATCH_ROOT).resolve())
+    except ValueError:
+        return False
+    return len(rel.parts) == 3 and rel.parts[0].startswith(_SCRATCH_PREFIX)
+
+
+def release(file_path: str) -> None:
+    """
+    Remove a standardized file and its per-file scratch subdirectory, or
+    unpin it if it came from the cache.
+
+    A no-op for anything else — in particular for plain source files that
+    standardize() returned untouched.
+    """
+    if is_scratch_file(file_path):
+        shutil.rmtree(Path(file_path).parent, ignore_errors=True)
+        return
+    cache = get_cache()
+    if cache is not None:
+        cache.unpin(file_path)
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def standardize(file_path: str, file_hash: str | None = None, stats: dict | None = None) -> str:
+    """
+    Return the path of a plain RINEX observation file for file_path.
+
+    Already-plain files are returned unchanged. Otherwise, with file_hash
+    (the source SHA-256) and the cache enabled, the decoded file comes from
+    or goes into the content-addressed cache (cache.py) and stays there,
+    pinned. Without either, it is streamed into a fresh subdirectory of the
+    worker scratch area. Either way, release() it once it has been loaded:
+    release() deletes scratch copies and unpins cached files, so callers
+    need not care which one they got.
+
+    If stats is given it is updated with bytes_in, bytes_out,
+    decompress_sec and hatanaka_sec (0.0 for work that was not needed).
+    """
+    path = Path(file_path)
+    if stats is not None:
+        stats.update(decompress_sec=0.0, hatanaka_sec=0.0)
+    compressed = path.suffix.lower() in (".gz", ".zip") or path.suffix == ".Z"
+    if not compressed and not is_hatanaka(path.name):
+        _record_sizes(stats, path, path)
+        return file_path
+
+    cache = get_cache() if file_hash else None
+    if cache is not None:
+        cached = cache.get(file_hash)
+        if cached is not None:
+            logger.info("Cache hit: %s → %s", path.name, cached)
+            _record_sizes(stats, path, Path(cached))
+        else:
+            cached = cache.put(file_hash, lambda out_dir: _decode_into(path, out_dir, stats))
+            _record_sizes(stats, path, Path(cached))
+        cache.pin(cached)
+        return cached
+
+    out_dir = Path(tempfile.mkdtemp(dir=scratch_dir()))
+    try:
+        out_path = _decode_into(path, out_dir, stats)
+    except BaseException:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        raise
+    _record_sizes(stats, path, out_path)
+    return str(out_path)
+
+
+def _decode_into(path: Path, out_dir: Path, stats: dict | None = None) -> Path:
+    """Peel every layer off path and write the plain RINEX into out_dir."""
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        stream, name = _open_layers(path, stack)
+        if is_hatanaka(name):
+            timed = _TimedReader(stream)
+            out_path = out_dir / _hatanaka_output_name(name)
+            with open(out_path, "wb") as f_out:
+                _decode_hatanaka(io.BufferedReader(timed, _COPY_BUFSIZE), f_out)
+            logger.info("Hatanaka decompressed: %s → %s", name, out_path.name)
+            read_sec = timed.seconds
+        else:
+            out_path = out_dir / name
+            with open(out_path, "wb") as f_out:
+                shutil.copyfileobj(stream, f_out, _COPY_BUFSIZE)
+            read_sec = None
+    if stats is not None:
+        total = time.perf_counter() - start
+        stats["decompress_sec"] = total if read_sec is None else read_sec
+        stats["hatanaka_sec"] = 0.0 if read_sec is None else total - read_sec
+    return out_path
+
+
+def _record_sizes(stats: dict | None, source: Path, output: Path) -> None:
+    if stats is None:
+        return
+    try:
+        stats["bytes_in"] = source.stat().st_size
+        stats["bytes_out"] = output.stat().st_size
+    except OSError:
+        pass
@@ -7,24 +7,54 @@ Pipeline order (via Celery chain in pipeline.py):
 Each task that feeds into the next returns the output file path so that
 Celery's chain mechanism can pass it as the first positional argument.
 
-teqc integration:
-  teqc is the primary QC backend (gfzrnx not yet acquired).
-  If teqc is not in PATH, validate_rinex logs a warning and continues —
-  the raw header check is still enforced.
+Fused mode (the pipeline.py default) runs the same three stages inside one
+task instead — ingest_file for one file, ingest_batch for a list — so the
+scratch file never leaves the worker that made it and nothing but the
+final result goes through the broker. Each stage is timed, and a failure is
+raised as StageError naming the stage that failed.
+
+Loading:
+  load_to_postgres does not write per file; it hands rows to a per-process
+  BulkLoader (loader.py) that upserts them in batches. A task reports
+  success only once its row is committed: single-file tasks commit at their
+  end, ingest_batch (what the scanner dispatches by default) once for the
+  whole batch, on top of the loader's own size and age flushes.
+
+Stage timings:
+  Each ingestion_logs row records who ingested the file, its size before and
+  after standardization and the seconds spent decompressing, Hatanaka
+  decoding, running QC and writing to the DB (hash_sec comes from the
+  scanner). Fused mode fills in all of them; in chain mode the standardize
+  stage's split is not passed along and those two columns stay NULL.
+  throughput.py summarises them.
+
+RINEX QC:
+  validate_rinex runs pogf_geodetic_suite's native RinexQC in-process (RINEX 2
+  and 3, no teqc binary, no copy of the file). TeqcQC remains available in
+  that module for cross-checks against teqc.
 """
 
-import gzip
 import logging
-import shutil
-import subprocess
-import tempfile
-import zipfile
+import os
+import socket
+import time
 from datetime import UTC, datetime
 from pathlib import Path
 
+from celery import signals
+from pogf_geodetic_suite.rinex.header import read_header
+
+from .cache import get_cache
 from .celery import app
-from .database import SessionLocal
-from .models import IngestionLog
+from .loader import (
+    LoadRecord,
+    commit_loaded,
+    flush_loader,
+    get_loader,
+    get_station_cache,
+    mark_failed,
+)
+from .standardize import release, standardize
 
 logger = logging.getLogger(__name__)
 
@@ -33,58 +63,36 @@ logger = logging.getLogger(__name__)
 # RINEX header parser
 # ---------------------------------------------------------------------------
 
-def _parse_rinex_header(file_path: str) -> dict:
+def _parse_rinex_header(file_path: str, file_hash: str | None = None) -> dict:
     """
     Extract metadata from a RINEX 2.x or 3.x observation file header.
 
-    RINEX header records are fixed-width 80-char lines:
-      columns  1–60: value field
-      columns 61–80: label (right-justified, space-padded)
+    Uses the shared single-pass parser (pogf_geodetic_suite.rinex.header),
+    which reads a bounded prefix of the file and caches the result under
+    file_hash (or the file's path/size/mtime), so validate and load read each
+    header once between them.
 
     Returns a dict with keys present in the header; missing fields are absent.
     """
-    meta: dict = {}
     try:
-        with open(file_path, encoding="ascii", errors="replace") as f:
-            for raw_line in f:
-                line = raw_line.rstrip("\n")
-                if len(line) < 61:
-                    if "END OF HEADER" in line:
-                        break
-                    continue
-                label = line[60:].strip()
-                value = line[:60].strip()
-
-                if label == "MARKER NAME":
-                    # First token is the 4-char station code
-                    parts = value.split()
-                    if parts:
-                        meta["station_code"] = parts[0][:10]
-
-                elif label == "INTERVAL":
-                    try:
-                        meta["sampling_interval"] = float(value)
-                    except ValueError:
-                        pass
-
-                elif label == "REC # / TYPE / VERS":
-                    # cols 21–40 (0-indexed 20–39): receiver type
-                    meta["receiver_type"] = raw_line[20:40].strip()
-
-                elif label == "ANT # / TYPE":
-                    # cols 21–40 (0-indexed 20–39): antenna type
-                    meta["antenna_type"] = raw_line[20:40].strip()
-
-                elif label == "TIME OF FIRST OBS":
-                    meta["start_time_raw"] = value
-
-                elif label == "TIME OF LAST OBS":
-                    meta["end_time_raw"] = value
-
-                elif label == "END OF HEADER":
-                    break
+        header = read_header(file_path, key=file_hash)
     except OSError as e:
         logger.warning("Could not read RINEX header from %s: %s", file_path, e)
+        return {}
+
+    meta: dict = {}
+    if header.station_code:
+        meta["station_code"] = header.station_code[:10]
+    if header.interval is not None:
+        meta["sampling_interval"] = header.interval
+    if header.receiver_type is not None:
+        meta["receiver_type"] = header.receiver_type
+    if header.antenna_type is not None:
+        meta["antenna_type"] = header.antenna_type
+    if header.first_obs is not None:
+        meta["start_time_raw"] = header.first_obs
+    if header.last_obs is not None:
+        meta["end_time_raw"] = header.last_obs
     return meta
 
 
@@ -109,87 +117,48 @@ def _parse_rinex_time(raw: str) -> datetime | None:
 # Task logic — plain functions (independently testable without Celery)
 # ---------------------------------------------------------------------------
 
-def _standardize_format(file_path: str) -> str:
+def _standardize_format(
+    file_path: str, file_hash: str | None = None, stats: dict | None = None
+) -> str:
     """
     Decompress and convert the input file to a plain RINEX observation file.
 
-    Handles:
-      .gz   — gzip (Python stdlib)
-      .zip  — zip archive (Python stdlib), extracts first member
-      .Z    — Unix compress (requires gunzip in PATH)
-      .crx / .??d — Hatanaka compression (requires crx2rnx in PATH)
+    Handles, in-process and stacked in any order (see standardize.py):
+      .gz   — gzip
+      .zip  — zip archive, first member
+      .Z    — Unix compress (LZW)
+      .crx / .??d — Hatanaka compression (in-process CRINEX decoder)
 
-    Returns the path to the standardized file (in a temp directory).
-    The caller is responsible for cleanup; in production the Celery worker
-    temp dir is cleaned by the OS on worker restart.
+    Already-plain files are returned unchanged — no copy. Anything else is
+    streamed once into this worker's scratch area; the load_to_postgres task
+    (or a failed validate_rinex task) releases it. Given file_hash, the
+    decoded file is served from / kept in the content-addressed cache instead
+    (cache.py), so a retry of the same file does not decode it again.
+
+    stats, if given, receives byte counts and decompress/Hatanaka seconds.
     """
     logger.info("standardize_format: %s", file_path)
-    path = Path(file_path)
-    temp_dir = Path(tempfile.mkdtemp(prefix="pogf_ingest_"))
-    out_path = temp_dir / path.name
-
-    # ── Decompression ─────────────────────────────────────────────────────
-    suffix = path.suffix.lower()
-
-    if suffix == ".gz":
-        out_path = temp_dir / path.stem
-        with gzip.open(path, "rb") as f_in, open(out_path, "wb") as f_out:
-            shutil.copyfileobj(f_in, f_out)
-
-    elif suffix == ".zip":
-        with zipfile.ZipFile(path, "r") as zf:
-            first_member = zf.namelist()[0]
-            zf.extract(first_member, temp_dir)
-            out_path = temp_dir / first_member
-
-    elif path.suffix == ".Z":
-        # Unix compress — requires system gunzip
-        out_path = temp_dir / path.stem
-        try:
-            with open(out_path, "wb") as f_out:
-                subprocess.run(["gunzip", "-c", str(path)], stdout=f_out, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            raise RuntimeError(f"gunzip failed for {file_path}: {e}") from e
-
-    else:
-        # Not compressed — copy to temp for uniform downstream handling
-        shutil.copy(path, out_path)
-
-    # ── Hatanaka decompression ─────────────────────────────────────────────
-    # .crx (RINEX 3.x Hatanaka) or .??d (RINEX 2.x Hatanaka)
-    out_suffix = out_path.suffix.lower()
-    is_hatanaka = out_suffix == ".crx" or (
-        len(out_suffix) == 3 and out_suffix[1:2].isdigit() and out_suffix[2] == "d"
-    )
-
-    if is_hatanaka:
-        rnx_path = out_path.with_suffix(
-            ".rnx" if out_suffix == ".crx" else out_suffix[:-1] + "o"
-        )
-        try:
-            subprocess.run(["crx2rnx", str(out_path)], check=True, capture_output=True)
-            out_path = rnx_path
-            logger.info("Hatanaka decompressed: %s → %s", out_path.name, rnx_path.name)
-        except FileNotFoundError:
-            logger.warning("crx2rnx not in PATH — passing Hatanaka file as-is")
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"crx2rnx failed for {out_path}: {e}") from e
-
+    out_path = standardize(file_path, file_hash, stats)
     logger.info("standardize_format done: %s", out_path)
-    return str(out_path)
+    return out_path
 
 
-def _validate_rinex(file_path: str) -> dict:
+def _validate_rinex(file_path: str, file_hash: str | None = None) -> dict:
     """
     Validate that file_path is a well-formed RINEX observation file.
 
     Two-stage validation:
-      1. Header scan — reads first 10 lines looking for 'RINEX VERSION' or
-         'CRINEX VERS'. Fast, no external dependencies.
-      2. teqc QC — runs 'teqc +qc <file>' via RinexQC for deeper quality check.
-         If teqc is not in PATH or times out, logs a warning and skips (non-fatal).
+      1. Header scan — a RINEX VERSION or CRINEX VERS record in the first 10
+         lines, from the shared header parser (cached under file_hash, so the
+         load stage does not read the header again).
+      2. RINEX QC — native in-process RinexQC (obs count, cycle slips, MP1/MP2,
+         per-constellation completeness). A body that cannot be parsed fails
+         the file like a bad header does.
 
-    Returns a dict with file_path and QC metrics for _load_to_postgres.
+    QC metrics of a cached standardized file are kept next to it and reused
+    on a retry.
+
+    Returns a dict with file_path, QC metrics and qc_sec for _load_to_postgres.
     Raises ValueError on invalid header (marks Celery task as FAILED).
     """
     logger.info("validate_rinex: %s", file_path)
@@ -199,130 +168,227 @@ def _validate_rinex(file_path: str) -> dict:
         raise FileNotFoundError(f"File not found: {file_path}")
 
     # ── Stage 1: header scan ──────────────────────────────────────────────
-    is_rinex = False
     try:
-        with open(path, "rb") as f:
-            for _ in range(10):
-                line = f.readline().decode("utf-8", errors="ignore")
-                if "RINEX VERSION" in line or "CRINEX VERS" in line:
-                    is_rinex = True
-                    break
+        is_rinex = read_header(file_path, key=file_hash).is_rinex
     except OSError as e:
         raise ValueError(f"Cannot read {file_path}: {e}") from e
 
     if not is_rinex:
         raise ValueError(f"No RINEX VERSION marker found in first 10 lines of {file_path}")
 
-    # ── Stage 2: teqc QC (optional) ───────────────────────────────────────
-    qc_obs_count = qc_cycle_slips = qc_mp1_rms = qc_mp2_rms = None
-    try:
+    # ── Stage 2: RINEX QC ─────────────────────────────────────────────────
+    start = time.perf_counter()
+    cache = get_cache()
+    metrics = cache.read_json(file_path, "qc") if cache else None
+    if metrics is None:
         from pogf_geodetic_suite.qc.rinex_qc import RinexQC
         qc_result = RinexQC().run_qc(file_path)
-        qc_obs_count = qc_result.obs_count
-        qc_cycle_slips = qc_result.cycle_slips
-        qc_mp1_rms = qc_result.mp1_rms
-        qc_mp2_rms = qc_result.mp2_rms
-        logger.info("teqc QC passed: %s", file_path)
-    except RuntimeError as e:
-        msg = str(e)
-        if "not found" in msg or "timed out" in msg:
-            logger.warning("teqc skipped for %s: %s", file_path, msg[:200])
-        else:
-            raise
+        metrics = {
+            "qc_obs_count": qc_result.obs_count,
+            "qc_cycle_slips": qc_result.cycle_slips,
+            "qc_mp1_rms": qc_result.mp1_rms,
+            "qc_mp2_rms": qc_result.mp2_rms,
+        }
+        if cache:
+            cache.write_json(file_path, "qc", metrics)
+    logger.info(
+        "RINEX QC: %s — %s obs, %s slips, MP1 %s, MP2 %s",
+        file_path, metrics["qc_obs_count"], metrics["qc_cycle_slips"],
+        metrics["qc_mp1_rms"], metrics["qc_mp2_rms"],
+    )
 
-    return {
-        "file_path": file_path,
-        "qc_obs_count": qc_obs_count,
-        "qc_cycle_slips": qc_cycle_slips,
-        "qc_mp1_rms": qc_mp1_rms,
-        "qc_mp2_rms": qc_mp2_rms,
-    }
+    return {"file_path": file_path, **metrics, "qc_sec": time.perf_counter() - start}
+
+
+def _worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
 
 
-def _load_to_postgres(validated: dict, file_hash: str) -> str:
+def _load_to_postgres(
+    validated: dict,
+    file_hash: str,
+    source_path: str | None = None,
+    stats: dict | None = None,
+) -> str:
     """
-    Write a RinexFile row to public.rinex_files and mark IngestionLog success.
+    Queue a RinexFile row for public.rinex_files and mark IngestionLog success.
 
     Accepts the dict returned by _validate_rinex (file_path + QC metrics).
+    source_path is the file the scanner found; it is what rinex_files.filepath
+    records, since file_path may be a scratch copy that is released after
+    loading.
     Parses the RINEX header to extract:
       station_code, sampling_interval, start_time, end_time,
       receiver_type, antenna_type.
 
-    Looks up the station by station_code in public.stations. If the station
-    is not found, raises ValueError (Celery marks task FAILED and the
+    The station FK comes from this process's cache of public.stations. If the
+    station is not found, raises ValueError (Celery marks task FAILED and the
     IngestionLog row is updated to status='failed').
-    """
-    from src.db.models import RinexFile, Station  # central ORM (public schema)
 
+    The row itself is written by the process's BulkLoader (see loader.py),
+    batched with other files in multi-row upserts; a file that fails in its
+    batch is marked failed there. Returns "queued:<path>" — the caller
+    reports success after _commit_loaded. stats carries the standardize stage's byte
+    counts and timings (see _standardize_format); without them the byte
+    counts are taken from the files themselves.
+    """
     file_path = validated["file_path"]
-    qc_obs_count = validated.get("qc_obs_count")
-    qc_cycle_slips = validated.get("qc_cycle_slips")
-    qc_mp1_rms = validated.get("qc_mp1_rms")
-    qc_mp2_rms = validated.get("qc_mp2_rms")
 
     logger.info("load_to_postgres: %s", file_path)
-    meta = _parse_rinex_header(file_path)
+    meta = _parse_rinex_header(file_path, file_hash)
 
     station_code = meta.get("station_code")
-    start_time = _parse_rinex_time(meta.get("start_time_raw", ""))
-    end_time = _parse_rinex_time(meta.get("end_time_raw", ""))
+    station_id = get_station_cache().get(station_code)
+    if station_id is None:
+        error = (
+            f"Station '{station_code}' from RINEX header not found in public.stations. "
+            "Register the station first or correct the MARKER NAME field."
+        )
+        mark_failed(file_hash, error)
+        raise ValueError(error)
+
+    stats = stats or {}
+    now = datetime.now(UTC)
+    get_loader().add(LoadRecord(
+        file_hash=file_hash,
+        filepath=source_path or file_path,
+        station_id=station_id,
+        station_code=station_code,
+        start_time=_parse_rinex_time(meta.get("start_time_raw", "")) or now,
+        end_time=_parse_rinex_time(meta.get("end_time_raw", "")) or now,
+        sampling_interval=meta.get("sampling_interval"),
+        receiver_type=meta.get("receiver_type"),
+        antenna_type=meta.get("antenna_type"),
+        ingested_at=now,
+        qc_obs_count=validated.get("qc_obs_count"),
+        qc_cycle_slips=validated.get("qc_cycle_slips"),
+        qc_mp1_rms=validated.get("qc_mp1_rms"),
+        qc_mp2_rms=validated.get("qc_mp2_rms"),
+        worker=_worker_name(),
+        bytes_in=stats.get("bytes_in", _file_size(source_path or file_path)),
+        bytes_out=stats.get("bytes_out", _file_size(file_path)),
+        decompress_sec=stats.get("decompress_sec"),
+        hatanaka_sec=stats.get("hatanaka_sec"),
+        qc_sec=validated.get("qc_sec"),
+    ))
+    logger.info("Queued %s → station %s", file_path, station_code)
+    return f"queued:{file_path}"
+
+
+def _commit_loaded(file_path: str, file_hash: str) -> str:
+    """Commit the row queued for file_hash; raise if it did not load."""
+    error = commit_loaded([file_hash]).get(file_hash)
+    if error is not None:
+        raise RuntimeError(error)
+    return f"success:{file_path}"
+
+
+def _file_size(path: str) -> int | None:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Fused pipeline — all three stages in one worker process
+# ---------------------------------------------------------------------------
+
+class StageError(Exception):
+    """A fused-pipeline failure, tagged with the stage that raised it."""
+
+    # args holds only the message, so Celery can rebuild it from a result.
+    def __init__(self, message: str, stage: str = "", file_path: str = ""):
+        super().__init__(message)
+        self.stage = stage
+        self.file_path = file_path
 
-    session = SessionLocal()
+
+def _ingest_file(file_path: str, file_hash: str) -> dict:
+    """
+    Standardize, validate and load one file without leaving this process.
+
+    Returns {"file_path", "result", "timings"} where timings maps each stage
+    (standardize, validate, load) to seconds. On failure the IngestionLog row
+    is marked failed with the stage in its error_message, the scratch copy is
+    released, and StageError is raised from the original exception.
+    """
+    timings: dict[str, float] = {}
+    stats: dict = {}
+    local_path = None
+    stage = "standardize"
+    start = time.perf_counter()
     try:
-        # ── Resolve station FK ────────────────────────────────────────────
-        station = None
-        if station_code:
-            station = session.query(Station).filter_by(station_code=station_code).first()
-
-        if station is None:
-            raise ValueError(
-                f"Station '{station_code}' from RINEX header not found in public.stations. "
-                "Register the station first or correct the MARKER NAME field."
-            )
-
-        # ── Insert RinexFile (skip if already catalogued) ─────────────────
-        # file_hash is the SHA-256 computed by the scanner — same key used in
-        # ingestion_logs. No separate hash computation needed.
-        existing_rnx = session.query(RinexFile).filter_by(hash_sha256=file_hash).first()
-        if existing_rnx is None:
-            rnx = RinexFile(
-                station_id=station.id,
-                filepath=file_path,
-                start_time=start_time or datetime.now(UTC),
-                end_time=end_time or datetime.now(UTC),
-                sampling_interval=meta.get("sampling_interval"),
-                receiver_type=meta.get("receiver_type"),
-                antenna_type=meta.get("antenna_type"),
-                hash_sha256=file_hash,
-            )
-            session.add(rnx)
-
-        # ── Update IngestionLog ────────────────────────────────────────────
-        log = session.get(IngestionLog, file_hash)
-        if log:
-            log.status = "success"
-            log.station_code = station_code
-            log.ingested_at = datetime.now(UTC)
-            log.qc_obs_count = qc_obs_count
-            log.qc_cycle_slips = qc_cycle_slips
-            log.qc_mp1_rms = qc_mp1_rms
-            log.qc_mp2_rms = qc_mp2_rms
-
-        session.commit()
-        logger.info("Ingested %s → station %s", file_path, station_code)
-        return f"success:{file_path}"
+        local_path = _standardize_format(file_path, file_hash, stats)
+        timings[stage] = time.perf_counter() - start
 
-    except Exception as exc:
-        session.rollback()
-        log = session.get(IngestionLog, file_hash)
-        if log:
-            log.status = "failed"
-            log.error_message = str(exc)
-            session.commit()
-        raise
+        stage, start = "validate", time.perf_counter()
+        validated = _validate_rinex(local_path, file_hash)
+        timings[stage] = time.perf_counter() - start
 
+        stage, start = "load", time.perf_counter()
+        result = _load_to_postgres(validated, file_hash, source_path=file_path, stats=stats)
+        timings[stage] = time.perf_counter() - start
+    except Exception as exc:
+        timings[stage] = time.perf_counter() - start
+        error = StageError(f"{stage} failed for {file_path}: {exc}", stage, file_path)
+        logger.error("%s (after %.3fs)", error, timings[stage])
+        mark_failed(file_hash, str(error))
+        raise error from exc
     finally:
-        session.close()
+        if local_path is not None:
+            release(local_path)
+
+    logger.info(
+        "Ingested %s in %.3fs (standardize %.3fs, validate %.3fs, load %.3fs)",
+        file_path, sum(timings.values()),
+        timings["standardize"], timings["validate"], timings["load"],
+    )
+    return {"file_path": file_path, "result": result, "timings": timings}
+
+
+def _ingest_batch(files: list) -> dict:
+    """
+    Run _ingest_file over [(file_path, file_hash), ...] in order.
+
+    A failing file is recorded and the batch carries on. The bulk loader is
+    flushed before returning and a row that failed to load there counts as a
+    load failure, so every file reported as ingested has been committed.
+    Returns counts, per-file results and per-stage time totals.
+    """
+    results = []
+    totals = {"standardize": 0.0, "validate": 0.0, "load": 0.0}
+    failed = 0
+    for file_path, file_hash in files:
+        try:
+            outcome = _ingest_file(file_path, file_hash)
+        except StageError as exc:
+            failed += 1
+            results.append({"file_path": file_path, "stage": exc.stage, "error": str(exc)})
+            continue
+        for stage, seconds in outcome["timings"].items():
+            totals[stage] += seconds
+        results.append(outcome)
+    errors = commit_loaded(h for _, h in files)
+    for i, outcome in enumerate(results):
+        if "result" not in outcome:
+            continue
+        outcome["result"] = outcome["result"].replace("queued:", "success:", 1)
+        error = errors.get(files[i][1])
+        if error is not None:
+            failed += 1
+            results[i] = {"file_path": outcome["file_path"], "stage": "load", "error": error}
+    logger.info(
+        "Batch of %d: %d ingested, %d failed (standardize %.3fs, validate %.3fs, load %.3fs)",
+        len(files), len(files) - failed, failed,
+        totals["standardize"], totals["validate"], totals["load"],
+    )
+    return {
+        "ingested": len(files) - failed,
+        "failed": failed,
+        "timings": totals,
+        "results": results,
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -332,15 +398,44 @@ def _load_to_postgres(validated: dict, file_hash: str) -> str:
 # ---------------------------------------------------------------------------
 
 @app.task(name="ingestion_pipeline.tasks.standardize_format")
-def standardize_format(file_path: str) -> str:
-    return _standardize_format(file_path)
+def standardize_format(file_path: str, file_hash: str | None = None) -> str:
+    return _standardize_format(file_path, file_hash)
 
 
 @app.task(name="ingestion_pipeline.tasks.validate_rinex")
-def validate_rinex(file_path: str) -> dict:
-    return _validate_rinex(file_path)
+def validate_rinex(file_path: str, file_hash: str | None = None) -> dict:
+    try:
+        return _validate_rinex(file_path, file_hash)
+    except Exception:
+        release(file_path)  # the chain stops here; nothing downstream will load it
+        raise
 
 
 @app.task(name="ingestion_pipeline.tasks.load_to_postgres")
-def load_to_postgres(validated: dict, file_hash: str) -> str:
-    return _load_to_postgres(validated, file_hash)
+def load_to_postgres(validated: dict, file_hash: str, source_path: str | None = None) -> str:
+    try:
+        _load_to_postgres(validated, file_hash, source_path)
+        return _commit_loaded(validated["file_path"], file_hash)
+    finally:
+        release(validated["file_path"])
+
+
+@app.task(name="ingestion_pipeline.tasks.ingest_file")
+def ingest_file(file_path: str, file_hash: str) -> dict:
+    outcome = _ingest_file(file_path, file_hash)
+    try:
+        outcome["result"] = _commit_loaded(outcome["result"].split(":", 1)[1], file_hash)
+    except RuntimeError as exc:
+        raise StageError(f"load failed for {file_path}: {exc}", "load", file_path) from exc
+    return outcome
+
+
+@app.task(name="ingestion_pipeline.tasks.ingest_batch")
+def ingest_batch(files: list) -> dict:
+    return _ingest_batch(files)
+
+
+@signals.worker_process_shutdown.connect
+def _flush_on_shutdown(**kwargs) -> None:
+    """Write rows still buffered in the bulk loader before the process exits."""
+    flush_loader()
@@ -0,0 +1,165 @@
+"""
+Ingestion throughput summary from the per-stage columns of ingestion_logs.
+
+Every successfully ingested file records its worker (host:pid), its size
+before and after standardization, and the seconds spent in each stage:
+
+    hash        scanner SHA-256
+    decompress  gzip / zip / .Z layers
+    hatanaka    CRINEX decoding
+    qc          RinexQC
+    db          the file's share of its bulk-load batch
+
+summarize() turns those rows into files/hour, bytes/sec and per-stage p95
+latency and total time, overall and per worker or per station — enough to
+tell whether a slow backfill needs more workers (every stage moderate, total
+throughput flat), a faster QC (qc dominates) or database attention (db
+dominates). The dashboard reads throughput(); from a shell:
+
+    python -m ingestion_pipeline.throughput --hours 24 --by station [--json]
+"""
+
+import json
+import math
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select
+
+from .database import SessionLocal
+from .models import IngestionLog
+
+STAGES = ("hash", "decompress", "hatanaka", "qc", "db")
+GROUP_COLUMNS = {"worker": "worker", "station": "station_code"}
+
+
+@dataclass
+class StageSummary:
+    p95_sec: float | None = None
+    total_sec: float = 0.0
+    files: int = 0               # files that recorded this stage
+
+
+@dataclass
+class ThroughputSummary:
+    """Throughput of one group (a worker, a station, or everything) over a window."""
+    key: str
+    files: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    files_per_hour: float = 0.0
+    bytes_per_sec: float = 0.0
+    stages: dict[str, StageSummary] = field(default_factory=dict)
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank q-th percentile (0 < q <= 100) of values; None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def fetch_rows(session, since: datetime, until: datetime) -> list:
+    """Successful ingestion_logs rows with ingested_at in [since, until)."""
+    columns = [IngestionLog.worker, IngestionLog.station_code,
+               IngestionLog.bytes_in, IngestionLog.bytes_out]
+    columns += [getattr(IngestionLog, f"{stage}_sec") for stage in STAGES]
+    return session.execute(
+        select(*columns).where(
+            IngestionLog.status == "success",
+            IngestionLog.ingested_at >= since,
+            IngestionLog.ingested_at < until,
+        )
+    ).all()
+
+
+def _summarize_group(key: str, rows: list, window_sec: float) -> ThroughputSummary:
+    summary = ThroughputSummary(key=key, files=len(rows))
+    summary.bytes_in = sum(r.bytes_in or 0 for r in rows)
+    summary.bytes_out = sum(r.bytes_out or 0 for r in rows)
+    if window_sec > 0:
+        summary.files_per_hour = summary.files * 3600 / window_sec
+        summary.bytes_per_sec = summary.bytes_in / window_sec
+    for stage in STAGES:
+        values = [v for r in rows if (v := getattr(r, f"{stage}_sec")) is not None]
+        summary.stages[stage] = StageSummary(
+            p95_sec=percentile(values, 95), total_sec=sum(values), files=len(values)
+        )
+    return summary
+
+
+def summarize(
+    rows: Iterable, window_sec: float, by: str | None = "worker"
+) -> tuple[ThroughputSummary, list[ThroughputSummary]]:
+    """
+    (overall, per-group) summaries of rows over a window of window_sec.
+
+    by is "worker", "station" or None; groups are sorted busiest first.
+    Rows missing the group column are reported under "unknown".
+    """
+    if by is not None and by not in GROUP_COLUMNS:
+        raise ValueError(f"Cannot group by {by!r}; expected one of {sorted(GROUP_COLUMNS)}")
+    rows = list(rows)
+    overall = _summarize_group("all", rows, window_sec)
+    if by is None:
+        return overall, []
+    groups: dict[str, list] = defaultdict(list)
+    for r in rows:
+        groups[getattr(r, GROUP_COLUMNS[by]) or "unknown"].append(r)
+    per_group = [_summarize_group(key, group, window_sec) for key, group in groups.items()]
+    per_group.sort(key=lambda s: (-s.files, s.key))
+    return overall, per_group
+
+
+def throughput(
+    hours: float = 24,
+    by: str | None = "worker",
+    until: datetime | None = None,
+    session_factory=SessionLocal,
+) -> dict:
+    """Dashboard data for the last `hours` hours, as plain JSON-ready dicts."""
+    until = until or datetime.now(UTC)
+    since = until - timedelta(hours=hours)
+    session = session_factory()
+    try:
+        rows = fetch_rows(session, since, until)
+    finally:
+        session.close()
+    overall, groups = summarize(rows, hours * 3600, by)
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "by": by,
+        "overall": asdict(overall),
+        "groups": [asdict(g) for g in groups],
+    }
+
+
+def _format_table(data: dict) -> str:
+    header = f"{data['by'] or '':<24}{'files':>8}{'files/h':>10}{'MB/s':>9}"
+    header += "".join(f"{'p95 ' + s:>15}" for s in STAGES)
+    lines = [f"{data['since']} → {data['until']}", header]
+    for s in [data["overall"], *data["groups"]]:
+        line = (f"{s['key']:<24}{s['files']:>8}{s['files_per_hour']:>10.1f}"
+                f"{s['bytes_per_sec'] / 1e6:>9.2f}")
+        for stage in STAGES:
+            p95 = s["stages"][stage]["p95_sec"]
+            line += f"{'-' if p95 is None else f'{p95:.3f}s':>15}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingestion throughput summary")
+    parser.add_argument("--hours", type=float, default=24, help="window length (default 24)")
+    parser.add_argument("--by", choices=sorted(GROUP_COLUMNS), default="worker")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+    data = throughput(args.hours, args.by)
+    print(json.dumps(data, indent=2) if args.json else _format_table(data))
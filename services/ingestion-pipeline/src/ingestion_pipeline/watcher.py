@@ -0,0 +1,217 @@
+"""
+Watch mode for the ingestion scanner.
+
+FileScanner is a one-shot crawl, so a file a receiver uploads waits for the
+next scheduled scan. IngestWatcher instead subscribes to filesystem events
+on the DATAPOOL roots (inotify on Linux, via watchdog) and feeds new files
+through the same hash / idempotency / dispatch path as a crawl
+(FileScanner.process), typically seconds after the upload finishes.
+
+Debounce:
+  Uploads arrive as a create followed by many writes. A path is held until
+  it has had no events for INGEST_WATCH_SETTLE_SEC and its size and mtime
+  are the same as when it was last seen; anything still growing is pushed
+  back by another settle period.
+
+Fallback crawl:
+  Events can be lost (queue overflow, NFS/SMB mounts, files that arrived
+  while the watcher was down), so an incremental FileScanner.scan of every
+  root runs at start-up and then every INGEST_WATCH_CRAWL_SEC. Thanks to the
+  scan index that crawl only hashes what is new. Without watchdog installed
+  the watcher logs a warning and runs on the crawl alone.
+
+Re-dispatch:
+  A crawl finds every file not yet ingested, including those it queued last
+  time whose tasks are still waiting in the broker. Pending rows queued
+  less than INGEST_WATCH_REQUEUE_SEC ago are left alone; older ones are
+  taken to be lost and queued again.
+
+Usage:
+  python -m ingestion_pipeline.watcher <directory> [<directory> ...]
+"""
+
+import logging
+import os
+import threading
+import time
+
+from .scan_index import DEFAULT_INDEX_PATH, ScanIndex
+from .scanner import DISPATCH_BATCH, FileScanner, _is_rinex_file
+
+logger = logging.getLogger(__name__)
+
+SETTLE_SEC = float(os.environ.get("INGEST_WATCH_SETTLE_SEC", "30"))
+CRAWL_SEC = float(os.environ.get("INGEST_WATCH_CRAWL_SEC", "3600"))
+REQUEUE_SEC = float(os.environ.get("INGEST_WATCH_REQUEUE_SEC", "21600"))
+_TICK_SEC = 1.0
+
+
+def _signature(st: os.stat_result) -> tuple[int, int]:
+    return st.st_size, st.st_mtime_ns
+
+
+class IngestWatcher:
+    """
+    Long-running watcher over one or more root directories.
+
+    run() blocks until stop() is called (from another thread or a signal
+    handler). note() is what the filesystem event handler calls; it only
+    touches the pending table, so it is safe from the observer threads.
+    """
+
+    def __init__(
+        self,
+        roots: list[str],
+        settle_sec: float = SETTLE_SEC,
+        crawl_sec: float = CRAWL_SEC,
+        requeue_sec: float = REQUEUE_SEC,
+        batch_size: int = DISPATCH_BATCH,
+        index_path: str = DEFAULT_INDEX_PATH,
+        use_events: bool = True,
+    ):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.settle_sec = settle_sec
+        self.crawl_sec = crawl_sec
+        self.index_path = index_path
+        self.use_events = use_events
+        self._scanners = [
+            FileScanner(
+                root, batch_size=batch_size, index_path=index_path,
+                requeue_after_sec=requeue_sec,
+            )
+            for root in self.roots
+        ]
+        # path → (due time, (size, mtime_ns) when last seen)
+        self._pending: dict[str, tuple[float, tuple[int, int] | None]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.counts = {
+            "queued": 0, "skipped": 0, "in_flight": 0, "errors": 0, "hashed": 0, "crawls": 0,
+        }
+
+    # -- events ----------------------------------------------------------------
+
+    def note(self, path: str) -> None:
+        """Record activity on path; it becomes eligible settle_sec from now."""
+        if not _is_rinex_file(os.path.basename(path)):
+            return
+        try:
+            signature = _signature(os.stat(path))
+        except OSError:
+            signature = None
+        with self._lock:
+            self._pending[path] = (time.monotonic() + self.settle_sec, signature)
+
+    def ready(self, now: float | None = None) -> list[tuple[str, os.stat_result]]:
+        """Pop the pending paths that have settled; re-arm the ones still changing."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = [(p, sig) for p, (t, sig) in self._pending.items() if t <= now]
+            for path, _ in due:
+                del self._pending[path]
+        settled = []
+        for path, signature in due:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue                                   # deleted or moved away
+            if _signature(st) == signature:
+                settled.append((path, st))
+                continue
+            with self._lock:
+                # A newer event may have re-armed it meanwhile; keep that one.
+                self._pending.setdefault(path, (now + self.settle_sec, _signature(st)))
+        return settled
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # -- main loop -------------------------------------------------------------
+
+    def run(self) -> None:
+        observer = self._start_observer() if self.use_events else None
+        index = ScanIndex(self.index_path)
+        next_crawl = 0.0
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() >= next_crawl:
+                    self.crawl()
+                    next_crawl = time.monotonic() + self.crawl_sec
+                settled = self.ready()
+                if settled:
+                    self._add(self._scanners[0].process(settled, index))
+                self._stop.wait(min(_TICK_SEC, self.settle_sec or _TICK_SEC))
+        finally:
+            index.close()
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def crawl(self) -> None:
+        """Incremental scan of every root."""
+        for scanner in self._scanners:
+            self._add(scanner.scan())
+        self.counts["crawls"] += 1
+        logger.info("Watch crawl done: %s", self.counts)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _add(self, counts: dict) -> None:
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+        if counts.get("queued"):
+            logger.info("Watch: queued %d file(s)", counts["queued"])
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.warning(
+                "watchdog not installed; watching by crawl every %.0fs only", self.crawl_sec
+            )
+            return None
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    watcher.note(event.src_path)
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    watcher.note(event.src_path)
+
+            def on_closed(self, event):
+                if not event.is_directory:
+                    watcher.note(event.src_path)
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    watcher.note(event.dest_path)
+
+        observer = Observer()
+        handler = _Handler()
+        for root in self.roots:
+            observer.schedule(handler, root, recursive=True)
+        observer.start()
+        logger.info("Watching %s", ", ".join(self.roots))
+        return observer
+
+
+if __name__ == "__main__":
+    import signal
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m ingestion_pipeline.watcher <directory> [<directory> ...]")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    watcher = IngestWatcher(sys.argv[1:])
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
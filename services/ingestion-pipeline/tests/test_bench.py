@@ -0,0 +1,190 @@
+"""Tests for ingestion_pipeline.bench — the synthetic corpus and the in-process harness."""
+
+import json
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from ingestion_pipeline import bench
+from ingestion_pipeline.bench import build_corpus, format_report, main, run_functions
+from ingestion_pipeline.standardize import release
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr("ingestion_pipeline.standardize.SCRATCH_ROOT", str(tmp_path / "scratch"))
+    monkeypatch.setattr("ingestion_pipeline.standardize._scratch_dir", None)
+    monkeypatch.setitem(bench.PROFILES, "tiny", (20, 30.0))
+    # run_functions installs its own header store; put the old one back after
+    monkeypatch.setattr("pogf_geodetic_suite.rinex.header._store", None)
+    out = tmp_path / "corpus"
+    build_corpus(str(out), stations=1, profile="tiny")
+    return out
+
+
+def test_corpus_covers_every_variant(corpus):
+    manifest = json.loads((corpus / "manifest.json").read_text())
+    assert len(manifest["files"]) == len(bench.VARIANTS)
+    names = sorted(f["path"].rsplit("/", 1)[1] for f in manifest["files"])
+    assert any(n.endswith(".23d.Z") for n in names)
+    assert any(n.endswith(".crx.gz") for n in names)
+    assert any(n.endswith(".rnx.zip") for n in names)
+    assert all((corpus / f["path"]).stat().st_size == f["bytes"] for f in manifest["files"])
+
+
+def test_corpus_is_reproducible(corpus, tmp_path):
+    again = tmp_path / "again"
+    build_corpus(str(again), stations=1, profile="tiny")
+    for f in json.loads((corpus / "manifest.json").read_text())["files"]:
+        assert (corpus / f["path"]).read_bytes() == (again / f["path"]).read_bytes()
+
+
+def test_fresh_corpus_has_new_hashes(corpus):
+    run_dir = bench.fresh_corpus(str(corpus))
+    assert run_dir.startswith(str(corpus / bench.RUNS_DIR))
+    old = json.loads((corpus / "manifest.json").read_text())["files"]
+    new = bench.load_manifest(run_dir)["files"]
+    assert [f["variant"] for f in new] == [f["variant"] for f in old]
+    assert all(
+        (corpus / a["path"]).read_bytes() != (corpus / run_dir / b["path"]).read_bytes()
+        for a, b in zip(old, new, strict=True)
+    )
+
+
+def _log(file_hash, status, ingested_at, error=None):
+    return SimpleNamespace(_asdict=lambda: {
+        "file_hash": file_hash, "status": status, "ingested_at": ingested_at,
+        "error_message": error, "hash_sec": 0.1, "decompress_sec": 0.2, "hatanaka_sec": 0.0,
+        "qc_sec": 0.3, "db_sec": 0.01,
+    }, file_hash=file_hash)
+
+
+def test_wait_for_logs_waits_for_fresh_rows(monkeypatch):
+    started = datetime(2024, 1, 1, tzinfo=UTC)
+    stale = _log("h1", "success", started - timedelta(days=1))
+    polls = [
+        [stale, _log("h2", "processing", None)],
+        [_log("h1", "success", started), _log("h2", "failed", started, "load failed")],
+    ]
+    session = MagicMock()
+    session.execute.side_effect = lambda stmt: polls.pop(0)
+    monkeypatch.setattr("ingestion_pipeline.database.SessionLocal", lambda: session)
+    monkeypatch.setattr(bench, "POLL_SEC", 0)
+
+    failures = []
+    rows = bench.wait_for_logs({"/a": "h1", "/b": "h2"}, started, time.monotonic() + 60, failures)
+
+    assert [r["file_hash"] for r in rows] == ["h1"]
+    assert failures == ["/b: load failed"]
+
+
+def test_wait_for_logs_reports_unfinished_rows_at_deadline(monkeypatch):
+    session = MagicMock()
+    session.execute.return_value = []
+    monkeypatch.setattr("ingestion_pipeline.database.SessionLocal", lambda: session)
+
+    failures = ["/b: boom"]
+    rows = bench.wait_for_logs({"/a": "h1", "/b": "h2"}, datetime.now(UTC), 0, failures)
+
+    assert rows == []
+    assert failures == ["/b: boom", "/a: not committed before the timeout"]
+
+
+def test_run_functions_without_db(corpus, tmp_path):
+    report = run_functions(str(corpus), db=False)
+    assert report.failures == []
+    assert set(report.stages) == {"hash", "decompress", "hatanaka", "validate"}
+    assert report.stages["validate"].files == len(bench.VARIANTS)
+    assert report.stages["hatanaka"].p95_sec > 0
+    assert set(report.variants) == {label for label, *_ in bench.VARIANTS}
+    assert not any((tmp_path / "scratch").rglob("*.23o"))       # scratch released
+
+
+def test_run_functions_commits_loads_in_batches(corpus, monkeypatch):
+    monkeypatch.setattr(bench, "ensure_stations", lambda codes: None)
+    monkeypatch.setattr(bench, "_load_to_postgres", MagicMock())
+    committed = []
+
+    def commit_loaded(hashes):
+        hashes = list(hashes)
+        committed.append(len(hashes))
+        return {hashes[0]: "bulk load failed"}
+
+    monkeypatch.setattr("ingestion_pipeline.loader.commit_loaded", commit_loaded)
+
+    report = run_functions(str(corpus), db=True, batch_size=4)
+
+    assert committed == [4, len(bench.VARIANTS) - 4]
+    assert report.stages["load"].files == len(bench.VARIANTS)
+    assert len(report.failures) == 2
+    assert all(f.endswith(": bulk load failed") for f in report.failures)
+
+
+def test_run_celery_does_not_wait_for_failed_files(corpus, monkeypatch):
+    """A file whose task failed never gets a log row; the run must not sit out the timeout."""
+    import ingestion_pipeline.celery
+    from ingestion_pipeline import pipeline
+    from ingestion_pipeline.tasks import _standardize_format, _validate_rinex
+
+    fresh_corpus = bench.fresh_corpus
+    corrupt = []
+
+    def fresh_with_a_corrupt_file(corpus_dir):
+        run_dir = fresh_corpus(corpus_dir)
+        first = bench.load_manifest(run_dir)["files"][0]["path"]
+        corrupt.append(first)
+        (Path(run_dir) / first).write_bytes(b"not a RINEX file\n")
+        return run_dir
+
+    errors, rows = {}, []
+
+    def trigger_ingest(path, file_hash):
+        try:
+            release(_validate_rinex(_standardize_format(path))["file_path"])
+        except Exception as exc:
+            errors[path] = exc
+        else:
+            rows.append(_log(file_hash, "success", datetime.now(UTC)))
+        return path
+
+    def async_result(task_id):
+        def get(timeout):
+            if task_id in errors:
+                raise errors[task_id]
+        return SimpleNamespace(get=get)
+
+    session = MagicMock()
+    session.execute.side_effect = lambda stmt: list(rows)
+    monkeypatch.setattr(bench, "fresh_corpus", fresh_with_a_corrupt_file)
+    monkeypatch.setattr(bench, "ensure_stations", lambda codes: None)
+    monkeypatch.setattr(pipeline, "PIPELINE_MODE", "fused")
+    monkeypatch.setattr(pipeline, "trigger_ingest", trigger_ingest)
+    monkeypatch.setattr(ingestion_pipeline.celery.app, "AsyncResult", async_result)
+    monkeypatch.setattr("ingestion_pipeline.database.SessionLocal", lambda: session)
+
+    start = time.monotonic()
+    report = bench.run_celery(str(corpus), timeout=30)
+
+    assert time.monotonic() - start < 10
+    assert len(report.failures) == 1
+    assert corrupt[0] in report.failures[0]
+    assert report.stages["end-to-end"].files == len(bench.VARIANTS) - 1
+
+
+def test_cli_json_and_compare(corpus, tmp_path, capsys):
+    out = tmp_path / "before.json"
+    assert main(["run", str(corpus), "--no-db", "--json", str(out)]) == 0
+    before = json.loads(out.read_text())
+    assert before["mode"] == "functions"
+
+    assert main(["run", str(corpus), "--no-db", "--compare", str(out)]) == 0
+    assert "Δ files/s" in capsys.readouterr().out
+
+
+def test_format_report_lists_failures():
+    report = bench.BenchReport(mode="functions", files=1, bytes=10, wall_sec=1.0,
+                               failures=["a.23o: boom"])
+    assert "FAILED a.23o: boom" in format_report(report)
@@ -0,0 +1,128 @@
+"""
+Tests for the content-addressed standardized-file cache.
+"""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+from ingestion_pipeline.cache import StandardizedCache
+
+
+def _writer(name: str, data: bytes):
+    def produce(out_dir):
+        path = out_dir / name
+        path.write_bytes(data)
+        return path
+    return produce
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StandardizedCache(str(tmp_path / "cache"), max_bytes=1 << 20, min_age_sec=0)
+
+
+def test_miss_then_hit(cache):
+    assert cache.get("ab12") is None
+    path = cache.put("ab12", _writer("PBIS0010.23o", b"rinex"))
+    assert path.endswith("/ab/ab12/PBIS0010.23o")
+    assert cache.get("ab12") == path
+
+
+def test_failed_produce_publishes_nothing(cache):
+    def broken(out_dir):
+        (out_dir / "half.23o").write_bytes(b"par")
+        raise EOFError("truncated")
+    with pytest.raises(EOFError):
+        cache.put("ab12", broken)
+    assert cache.get("ab12") is None
+    assert list((cache.root / "ab").iterdir()) == []
+
+
+def test_concurrent_put_keeps_first_copy(cache):
+    first = cache.put("ab12", _writer("a.23o", b"first"))
+    second = cache.put("ab12", _writer("a.23o", b"second"))
+    assert second.endswith("a.23o")
+    assert open(first, "rb").read() == b"first"
+    assert len(list((cache.root / "ab").iterdir())) == 1
+
+
+def test_sidecars_round_trip(cache, tmp_path):
+    path = cache.put("ab12", _writer("a.23o", b"x"))
+    assert cache.read_json(path, "qc") is None
+    cache.write_json(path, "qc", {"qc_obs_count": 5})
+    assert cache.read_json(path, "qc") == {"qc_obs_count": 5}
+    assert cache.get("ab12") == path                     # sidecar is not the data file
+    outside = tmp_path / "a.23o"
+    cache.write_json(str(outside), "qc", {"x": 1})
+    assert cache.read_json(str(outside), "qc") is None
+
+
+def test_lru_eviction_keeps_recently_used(cache):
+    paths = {}
+    for n, key in enumerate(("aa01", "bb02", "cc03")):
+        paths[key] = cache.put(key, _writer("f.23o", b"x" * 1000))
+        old = time.time() - 100 + n
+        os.utime(cache.root / key[:2] / key, (old, old))
+    cache.get("aa01")                                    # most recently used now
+    cache.max_bytes = 2500
+    cache.put("dd04", _writer("f.23o", b"x" * 1000))
+    assert cache.get("bb02") is None
+    assert cache.get("cc03") is None
+    assert cache.get("aa01") == paths["aa01"]
+    assert cache.get("dd04") is not None
+
+
+def test_recent_entries_are_never_evicted(tmp_path):
+    cache = StandardizedCache(str(tmp_path / "c"), max_bytes=10, min_age_sec=3600)
+    cache.put("aa01", _writer("f.23o", b"x" * 100))
+    cache.put("bb02", _writer("f.23o", b"x" * 100))
+    assert cache.get("aa01") is not None
+    assert cache.get("bb02") is not None
+
+
+def test_pinned_entries_survive_eviction(cache):
+    pinned = cache.put("aa01", _writer("f.23o", b"x" * 1000))
+    cache.pin(pinned)
+    old = time.time() - 100
+    os.utime(cache.root / "aa" / "aa01", (old, old))
+    cache.max_bytes = 500
+    cache.put("bb02", _writer("f.23o", b"x" * 1000))
+    assert cache.get("aa01") == pinned
+
+    cache.unpin(pinned)
+    os.utime(cache.root / "aa" / "aa01", (old, old))
+    cache.evict()
+    assert cache.get("aa01") is None
+
+
+def test_pins_count_consumers(cache):
+    path = cache.put("aa01", _writer("f.23o", b"x"))
+    cache.pin(path)
+    cache.pin(path)
+    cache.unpin(path)
+    assert cache.pinned(cache.root / "aa" / "aa01")
+    cache.unpin(path)
+    assert not cache.pinned(cache.root / "aa" / "aa01")
+    assert cache.get("aa01") == path                     # pin files are not the data file
+
+
+def test_stale_pins_are_dropped(cache):
+    path = cache.put("aa01", _writer("f.23o", b"x"))
+    cache.pin(path)
+    (pin,) = (cache.root / "aa" / "aa01").glob(".pin-*")
+    old = time.time() - cache.pin_max_sec - 10
+    os.utime(pin, (old, old))
+    assert not cache.pinned(cache.root / "aa" / "aa01")
+    assert not pin.exists()
+
+
+def test_put_does_not_walk_the_cache_every_time(tmp_path):
+    cache = StandardizedCache(str(tmp_path / "c"), max_bytes=1 << 20, evict_sec=3600)
+    with patch.object(cache, "usage", wraps=cache.usage) as usage:
+        for n in range(20):
+            cache.put(f"{n:04d}", _writer("f.23o", b"x" * 100))
+        assert usage.call_count == 1                     # the first put after start-up
+        cache.put("big0", _writer("f.23o", b"x" * (1 << 17)))
+        assert usage.call_count == 2                     # a tenth of the limit added
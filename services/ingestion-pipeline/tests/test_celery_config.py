@@ -51,5 +51,24 @@ class TestCeleryConfig(unittest.TestCase):
 
         self.assertEqual(celery_mod.redis_url, "redis://:p%40ss%3Aword@localhost:6380/0")
 
+    def test_rate_limits_only_for_configured_tasks(self):
+        os.environ["INGEST_STANDARDIZE_RATE"] = "60/m"
+
+        import ingestion_pipeline.celery as celery_mod
+        importlib.reload(celery_mod)
+
+        self.assertEqual(
+            celery_mod.TASK_ANNOTATIONS,
+            {"ingestion_pipeline.tasks.standardize_format": {"rate_limit": "60/m"}},
+        )
+
+    def test_heavy_stages_have_their_own_queues(self):
+        import ingestion_pipeline.celery as celery_mod
+        importlib.reload(celery_mod)
+
+        queues = {route["queue"] for route in celery_mod.TASK_ROUTES.values()}
+        self.assertIn("ingest.standardize", queues)
+        self.assertIn("ingest.validate", queues)
+
 if __name__ == "__main__":
     unittest.main()
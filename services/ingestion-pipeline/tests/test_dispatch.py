@@ -0,0 +1,132 @@
+"""
+Tests for lane classification and FairDispatcher ordering.
+"""
+
+import os
+import time
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+from ingestion_pipeline import pipeline
+from ingestion_pipeline.celery import TASK_ROUTES
+from ingestion_pipeline.dispatch import (
+    BACKFILL,
+    LIVE,
+    FairDispatcher,
+    classify,
+    observation_date,
+    station_of,
+)
+
+TODAY = date(2023, 1, 10)
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("PBIS0010.23o", date(2023, 1, 1)),
+    ("pbis001a.23d.Z", date(2023, 1, 1)),
+    ("mkea365x15.22o.gz", date(2022, 12, 31)),
+    ("abcd001a.99o", date(1999, 1, 1)),
+    ("PBIS00USA_R_20230100000_01D_30S_MO.crx.gz", date(2023, 1, 10)),
+    ("notes.rnx", None),
+    ("PBIS999a.23o", None),
+])
+def test_observation_date(name, expected):
+    assert observation_date(f"/data/{name}") == expected
+
+
+def test_station_of():
+    assert station_of("/data/pbis001a.23o") == "PBIS"
+    assert station_of("MKEA00USA_R_20230010000_01D_30S_MO.rnx") == "MKEA"
+
+
+def test_classify_by_file_name():
+    assert classify("PBIS0090.23o", today=TODAY) == LIVE
+    assert classify("PBIS00USA_R_20221500000_01D_30S_MO.crx", today=TODAY) == BACKFILL
+
+
+def test_classify_undated_name_uses_mtime(tmp_path):
+    path = tmp_path / "upload.rnx"
+    path.write_text("x")
+    assert classify(str(path), today=TODAY) == LIVE
+    old = time.time() - 30 * 86400
+    os.utime(path, (old, old))
+    assert classify(str(path), today=TODAY) == BACKFILL
+    assert classify(str(tmp_path / "missing.rnx"), today=TODAY) == BACKFILL
+
+
+def test_round_robin_across_stations():
+    send, send_batch = MagicMock(), MagicMock()
+    fd = FairDispatcher(send, send_batch, window=1000)
+    for n in range(5):
+        fd.add(f"/bf/BIGS{n:03d}0.10o", f"b{n}")
+    fd.add("/bf/SMAL0010.11o", "s1")
+    fd.add("/bf/TINY0010.12o", "t1")
+    assert fd.drain() == 7
+    order = [c.args[1] for c in send.call_args_list]
+    assert order[:3] == ["b0", "s1", "t1"]
+    assert order[3:] == ["b1", "b2", "b3", "b4"]
+    assert {c.kwargs["lane"] for c in send.call_args_list} == {BACKFILL}
+    send_batch.assert_not_called()
+
+
+def test_live_lane_dispatched_first():
+    send = MagicMock()
+    fd = FairDispatcher(send, MagicMock(), window=1000)
+    fd.add("/bf/BIGS0010.10o", "old")
+    today = date.today()
+    fd.add(f"/live/PBIS{today.timetuple().tm_yday:03d}0.{today.year % 100:02d}o", "new")
+    fd.drain()
+    assert [c.args[1] for c in send.call_args_list] == ["new", "old"]
+    assert [c.kwargs["lane"] for c in send.call_args_list] == [LIVE, BACKFILL]
+
+
+def test_batches_follow_round_robin_order():
+    send_batch = MagicMock()
+    fd = FairDispatcher(MagicMock(), send_batch, batch_size=2, window=1000)
+    for n in range(3):
+        fd.add(f"/bf/AAAA{n:03d}0.10o", f"a{n}")
+        fd.add(f"/bf/BBBB{n:03d}0.10o", f"b{n}")
+    fd.drain()
+    batches = [[h for _, h in c.args[0]] for c in send_batch.call_args_list]
+    assert batches == [["a0", "b0"], ["a1", "b1"], ["a2", "b2"]]
+
+
+def test_window_triggers_drain():
+    send = MagicMock()
+    fd = FairDispatcher(send, MagicMock(), window=3)
+    for n in range(4):
+        fd.add(f"/bf/AAAA{n:03d}0.10o", f"a{n}")
+    assert send.call_count == 3
+    assert len(fd) == 1
+
+
+# ---------------------------------------------------------------------------
+# Stage pools
+# ---------------------------------------------------------------------------
+
+def test_stage_queues_route_only_chain_tasks():
+    tasks = "ingestion_pipeline.tasks."
+    assert set(TASK_ROUTES) == {
+        tasks + name for name in ("standardize_format", "validate_rinex", "load_to_postgres")
+    }
+    assert tasks + "ingest_file" not in TASK_ROUTES
+    assert tasks + "ingest_batch" not in TASK_ROUTES
+
+
+def test_fused_mode_never_uses_stage_queues(monkeypatch):
+    monkeypatch.setattr(pipeline, "PIPELINE_MODE", "fused")
+    with patch.object(pipeline, "ingest_file") as ingest_file, \
+         patch.object(pipeline, "chain") as chain:
+        pipeline.trigger_ingest("/data/PBIS0010.23o", "h1", lane=LIVE)
+    chain.assert_not_called()
+    assert ingest_file.apply_async.call_args.kwargs["queue"] == "ingest.live"
+
+
+def test_chain_mode_dispatches_stage_tasks(monkeypatch):
+    monkeypatch.setattr(pipeline, "PIPELINE_MODE", "chain")
+    with patch.object(pipeline, "ingest_file") as ingest_file, \
+         patch.object(pipeline, "chain") as chain:
+        pipeline.trigger_ingest("/data/PBIS0010.23o", "h1", lane=BACKFILL)
+    ingest_file.apply_async.assert_not_called()
+    chain.return_value.apply_async.assert_called_once()
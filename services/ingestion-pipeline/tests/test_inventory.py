@@ -0,0 +1,193 @@
+"""Tests for ingestion_pipeline.inventory — per-station day availability."""
+
+from datetime import UTC, date, datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from ingestion_pipeline.inventory import (
+    catalog_days,
+    day_ranges,
+    filesystem_days,
+    from_int4ranges,
+    mark_days,
+    to_int4ranges,
+    update_inventory,
+    write_available_days,
+)
+from psycopg2.extras import NumericRange
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import Range
+
+
+def _bits(*days):
+    return sum(1 << (d - 1) for d in days)
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+# ---------------------------------------------------------------------------
+# Bitmaps and ranges
+# ---------------------------------------------------------------------------
+
+def test_day_ranges_are_inclusive_runs():
+    assert day_ranges(_bits(*range(1, 38), *range(141, 366))) == [(1, 37), (141, 365)]
+    assert day_ranges(_bits(200)) == [(200, 200)]
+    assert day_ranges(0) == []
+
+
+def test_int4ranges_round_trip():
+    bits = _bits(1, 2, 3, 10, 366)
+    ranges = to_int4ranges(bits)
+    assert ranges == [Range(1, 4, bounds="[)"), Range(10, 11, bounds="[)"),
+                      Range(366, 367, bounds="[)")]
+    assert from_int4ranges(ranges) == bits
+
+
+def test_from_int4ranges_reads_psycopg2_ranges():
+    ranges = [NumericRange(1, 37, "[]"), NumericRange(140, 366, "(]"), NumericRange(empty=True)]
+    assert from_int4ranges(ranges) == _bits(*range(1, 38), *range(141, 367))
+    assert from_int4ranges(None) == 0
+
+
+def test_mark_days_splits_across_years():
+    bitmaps = {}
+    mark_days(bitmaps, "PBIS", date(2023, 12, 30), date(2024, 1, 2))
+    assert day_ranges(bitmaps[("PBIS", 2023)]) == [(364, 365)]
+    assert day_ranges(bitmaps[("PBIS", 2024)]) == [(1, 2)]
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+def test_catalog_days_expands_file_spans():
+    session = MagicMock()
+    session.execute.return_value = [
+        SimpleNamespace(station_code="pbis", first_day=date(2024, 1, 1),
+                        last_day=date(2024, 1, 1), as_of=datetime(2024, 1, 3, tzinfo=UTC)),
+        SimpleNamespace(station_code="PBIS", first_day=date(2024, 1, 5),
+                        last_day=date(2024, 1, 6), as_of=datetime(2024, 1, 7, tzinfo=UTC)),
+        SimpleNamespace(station_code="BOST", first_day=date(2024, 2, 1),
+                        last_day=date(2024, 1, 31), as_of=None),     # midnight-only file
+    ]
+    since = datetime(2024, 1, 2, tzinfo=UTC)
+
+    bitmaps, as_of = catalog_days(session, since=since)
+
+    assert bitmaps == {("PBIS", 2024): _bits(1, 5, 6), ("BOST", 2024): _bits(32)}
+    assert as_of == datetime(2024, 1, 7, tzinfo=UTC)
+    sql = _sql(session.execute.call_args.args[0])
+    assert "rinex_files.date_added >" in sql
+    assert "GROUP BY stations.station_code" in sql
+
+
+def test_catalog_days_clamps_long_spans():
+    """A file whose end_time fell back to its ingestion time marks two days, not months."""
+    session = MagicMock()
+    session.execute.return_value = [
+        SimpleNamespace(station_code="PBIS", first_day=date(2024, 1, 1),
+                        last_day=date(2024, 6, 30), as_of=None),
+    ]
+    bitmaps, _ = catalog_days(session)
+    assert bitmaps == {("PBIS", 2024): _bits(1, 2)}
+
+
+def test_filesystem_days_walks_subtrees_in_parallel(tmp_path):
+    for rel in [
+        "2024/001/pbis0010.24o",
+        "2024/002/PBIS00PHL_R_20240020000_01D_30S_MO.crx.gz",
+        "2024/002/PBIS00PHL_R_20240020000_01D_MN.rnx",          # navigation
+        "2024/003/bost003a.24d.gz",
+        "legacy/PBIS0030.24o",
+        "notes.txt",
+        "pbis0100.24o",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    bitmaps = filesystem_days([str(tmp_path)], workers=2)
+
+    assert bitmaps == {("PBIS", 2024): _bits(1, 2, 3, 10), ("BOST", 2024): _bits(3)}
+    assert filesystem_days([str(tmp_path)], years=[2023], workers=2) == {}
+
+
+# ---------------------------------------------------------------------------
+# processing_status
+# ---------------------------------------------------------------------------
+
+def test_write_available_days_upserts_ranges_and_watermark():
+    session = MagicMock()
+    as_of = datetime(2024, 1, 7, tzinfo=UTC)
+
+    assert write_available_days(session, {("PBIS", 2024): _bits(1, 2)}, as_of) == 1
+
+    stmt = session.execute.call_args.args[0]
+    sql = _sql(stmt)
+    assert "ON CONFLICT ON CONSTRAINT uq_processing_status DO UPDATE" in sql
+    assert "greatest(excluded.available_days_as_of" in sql
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert params["available_days_m0"] == [Range(1, 3, bounds="[)")]
+
+
+@patch("ingestion_pipeline.inventory.write_available_days", return_value=2)
+@patch("ingestion_pipeline.inventory._stored")
+@patch("ingestion_pipeline.inventory.catalog_days")
+@patch("ingestion_pipeline.inventory._watermark")
+def test_incremental_update_ors_into_stored_days(watermark, catalog, stored, write):
+    session = MagicMock()
+    watermark.return_value = datetime(2024, 1, 7, 12, tzinfo=UTC)
+    as_of = datetime(2024, 1, 8, tzinfo=UTC)
+    catalog.return_value = ({("PBIS", 2024): _bits(8)}, as_of)
+    stored.return_value = {("PBIS", 2024): _bits(1, 2)}
+
+    result = update_inventory(session_factory=lambda: session)
+
+    assert catalog.call_args.args[1] == datetime(2024, 1, 7, 11, tzinfo=UTC)
+    assert write.call_args.args[1] == {("PBIS", 2024): _bits(1, 2, 8)}
+    assert write.call_args.args[2] == as_of
+    assert result["rows_written"] == 2
+    session.commit.assert_called_once()
+    session.close.assert_called_once()
+
+
+@patch("ingestion_pipeline.inventory.write_available_days", return_value=1)
+@patch("ingestion_pipeline.inventory._stored", return_value={})
+@patch("ingestion_pipeline.inventory.catalog_days")
+@patch("ingestion_pipeline.inventory._watermark", return_value=None)
+def test_year_limited_update_keeps_watermark(_, catalog, __, write):
+    catalog.return_value = ({("PBIS", 2023): _bits(8)}, datetime(2024, 1, 8, tzinfo=UTC))
+
+    update_inventory(years=[2023], session_factory=MagicMock)
+
+    assert catalog.call_args.args[2] == [2023]
+    assert write.call_args.args[2] is None
+
+
+@patch("ingestion_pipeline.inventory.write_available_days", return_value=2)
+@patch("ingestion_pipeline.inventory._all_rows", return_value=[("GONE", 2024)])
+@patch("ingestion_pipeline.inventory._stored")
+@patch("ingestion_pipeline.inventory.catalog_days")
+@patch("ingestion_pipeline.inventory._watermark")
+def test_full_update_replaces_and_clears_missing_rows(watermark, catalog, stored, _, write):
+    catalog.return_value = ({("PBIS", 2024): _bits(8)}, None)
+
+    update_inventory(full=True, session_factory=MagicMock)
+
+    watermark.assert_not_called()
+    stored.assert_not_called()
+    assert catalog.call_args.args[1] is None
+    assert write.call_args.args[1] == {("PBIS", 2024): _bits(8), ("GONE", 2024): 0}
+
+
+@patch("ingestion_pipeline.inventory.catalog_days", side_effect=RuntimeError("db down"))
+@patch("ingestion_pipeline.inventory._watermark", return_value=None)
+def test_update_rolls_back_on_error(_, __):
+    session = MagicMock()
+    with pytest.raises(RuntimeError):
+        update_inventory(session_factory=lambda: session)
+    session.rollback.assert_called_once()
+    session.commit.assert_not_called()
@@ -0,0 +1,296 @@
+"""
+Tests for ingestion_pipeline.loader.
+
+A fake session records every statement the loader executes; statements are
+compiled with the PostgreSQL dialect to check the SQL shape. No database.
+"""
+
+from datetime import UTC, datetime
+
+import pytest
+from ingestion_pipeline import loader
+from ingestion_pipeline.loader import BulkLoader, LoadRecord, StationCache
+from sqlalchemy.dialects import postgresql
+
+# ---------------------------------------------------------------------------
+# Fake session
+# ---------------------------------------------------------------------------
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return list(self._rows)
+
+    def scalars(self):
+        return iter(r[0] for r in self._rows)
+
+
+class FakeDB:
+    """Session factory; every session shares this statement log."""
+
+    def __init__(self, stations=None, catalogued=(), fail_on=None, existing_paths=()):
+        self.stations = dict(stations or {})
+        self.catalogued = set(catalogued)
+        self.existing_paths = set(existing_paths)   # filepaths already in rinex_files
+        self.fail_on = fail_on          # substring of a filepath that makes a write fail
+        self.statements: list[str] = []
+        self.params: list[dict] = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def __call__(self):
+        return _FakeSession(self)
+
+
+class _FakeSession:
+    def __init__(self, db: FakeDB):
+        self.db = db
+
+    def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        self.db.statements.append(sql)
+        self.db.params.append(compiled.params)
+        if "FROM public.stations" in sql or "FROM stations" in sql:
+            return _Result(list(self.db.stations.items()))
+        if sql.startswith("SELECT"):
+            return _Result([(h,) for h in self.db.catalogued])
+        if self.db.fail_on and any(
+            isinstance(v, str) and self.db.fail_on in v for v in compiled.params.values()
+        ) and sql.startswith("INSERT"):
+            raise RuntimeError("constraint violation")
+        if "INTO public.rinex_files" in sql or "INTO rinex_files" in sql:
+            # RETURNING: the hashes of rows whose filepath was free
+            p = compiled.params
+            return _Result([
+                (v,) for k, v in p.items() if k.startswith("hash_sha256")
+                and p[k.replace("hash_sha256", "filepath")] not in self.db.existing_paths
+            ])
+        return _Result([])
+
+    def commit(self):
+        self.db.commits += 1
+
+    def rollback(self):
+        self.db.rollbacks += 1
+
+    def close(self):
+        pass
+
+
+def _record(n: int, path: str | None = None) -> LoadRecord:
+    t = datetime(2023, 1, 1, tzinfo=UTC)
+    return LoadRecord(
+        file_hash=f"h{n:03d}",
+        filepath=path or f"/data/PBIS{n:03d}0.23o",
+        station_id=7,
+        station_code="PBIS",
+        start_time=t,
+        end_time=t,
+        sampling_interval=30.0,
+        receiver_type="TRIMBLE NETRS",
+        antenna_type="TRM41249.00     NONE",
+        ingested_at=t,
+        qc_obs_count=100,
+    )
+
+
+def _inserts(db: FakeDB, table: str) -> list[str]:
+    return [s for s in db.statements if s.startswith(f"INSERT INTO {table}")
+            or s.startswith(f"INSERT INTO public.{table}")]
+
+
+# ---------------------------------------------------------------------------
+# Station cache
+# ---------------------------------------------------------------------------
+
+def test_station_cache_loads_once():
+    db = FakeDB(stations={"PBIS": 7, "MKEA": 9})
+    cache = StationCache(db, refresh_sec=60)
+    assert cache.get("PBIS") == 7
+    assert cache.get("MKEA") == 9
+    assert len(db.statements) == 1
+
+
+def test_station_cache_reloads_on_miss_after_refresh():
+    db = FakeDB(stations={"PBIS": 7})
+    cache = StationCache(db, refresh_sec=0)
+    assert cache.get("NEWS") is None
+    db.stations["NEWS"] = 11
+    assert cache.get("NEWS") == 11
+
+
+def test_station_cache_miss_is_rate_limited():
+    db = FakeDB(stations={"PBIS": 7})
+    cache = StationCache(db, refresh_sec=60)
+    cache.get("PBIS")
+    for _ in range(5):
+        assert cache.get("NOPE") is None
+    assert len(db.statements) == 1
+
+
+def test_station_cache_ignores_empty_code():
+    db = FakeDB()
+    assert StationCache(db).get(None) is None
+    assert db.statements == []
+
+
+# ---------------------------------------------------------------------------
+# Bulk loader
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(autouse=True)
+def _no_timer(monkeypatch):
+    # Keep the background timer out of unit tests.
+    monkeypatch.setattr(BulkLoader, "_ensure_timer", lambda self: None)
+
+
+def test_flushes_when_batch_full():
+    db = FakeDB()
+    bl = BulkLoader(db, batch_size=3, flush_sec=3600)
+    bl.add(_record(1))
+    bl.add(_record(2))
+    assert db.statements == []
+    bl.add(_record(3))
+    assert len(bl) == 0
+    assert db.commits == 1
+    # one hash lookup, one rinex_files upsert, one ingestion_logs upsert
+    assert len(db.statements) == 3
+
+
+def test_upserts_are_multi_row_on_conflict():
+    db = FakeDB()
+    bl = BulkLoader(db, batch_size=10, flush_sec=3600)
+    for n in range(4):
+        bl.add(_record(n))
+    assert bl.flush() == 4
+
+    (rinex_sql,) = _inserts(db, "rinex_files")
+    assert "ON CONFLICT (filepath) DO NOTHING RETURNING" in rinex_sql
+    assert rinex_sql.count("), (") == 3          # four VALUES tuples
+
+    (log_sql,) = _inserts(db, "ingestion_logs")
+    assert "ON CONFLICT (file_hash) DO UPDATE" in log_sql
+    assert "status = excluded.status" in log_sql
+    assert log_sql.count("), (") == 3
+
+
+def test_stage_timings_written_to_log():
+    db = FakeDB()
+    bl = BulkLoader(db, batch_size=10, flush_sec=3600)
+    record = _record(1)
+    record.worker, record.bytes_in, record.qc_sec = "host:42", 1234, 0.5
+    bl.add(record)
+    bl.flush()
+
+    (log_sql,) = _inserts(db, "ingestion_logs")
+    assert "db_sec = excluded.db_sec" in log_sql
+    assert "qc_sec = excluded.qc_sec" in log_sql
+    params = db.params[db.statements.index(log_sql)]
+    assert params["worker_m0"] == "host:42"
+    assert params["bytes_in_m0"] == 1234
+    assert params["db_sec_m0"] >= 0
+
+
+def test_flushes_after_flush_sec():
+    db = FakeDB()
+    bl = BulkLoader(db, batch_size=100, flush_sec=0)
+    bl.add(_record(1))
+    assert db.commits == 1
+
+
+def test_batch_size_one_writes_every_file():
+    db = FakeDB()
+    bl = BulkLoader(db, batch_size=1, flush_sec=3600)
+    bl.add(_record(1))
+    bl.add(_record(2))
+    assert db.commits == 2
+
+
+def test_catalogued_hashes_skip_rinex_insert():
+    db = FakeDB(catalogued={"h001", "h002"})
+    bl = BulkLoader(db, batch_size=10, flush_sec=3600)
+    bl.add(_record(1))
+    bl.add(_record(2))
+    bl.flush()
+    assert _inserts(db, "rinex_files") == []
+    assert len(_inserts(db, "ingestion_logs")) == 1
+
+
+def test_duplicate_filepath_in_batch_inserted_once():
+    db = FakeDB()
+    bl = BulkLoader(db, batch_size=10, flush_sec=3600)
+    bl.add(_record(1, path="/data/same.23o"))
+    bl.add(_record(2, path="/data/same.23o"))
+    bl.flush()
+    (rinex_sql,) = _inserts(db, "rinex_files")
+    assert "), (" not in rinex_sql
+
+
+def test_path_conflict_keeps_existing_row_and_fails_log():
+    """A new hash at a catalogued path neither overwrites the row nor reports success."""
+    db = FakeDB(existing_paths={"/data/PBIS0020.23o"})
+    bl = BulkLoader(db, batch_size=10, flush_sec=3600)
+    bl.add(_record(1))
+    bl.add(_record(2, path="/data/PBIS0020.23o"))
+    assert bl.flush() == 1
+
+    (rinex_sql,) = _inserts(db, "rinex_files")
+    assert "DO UPDATE" not in rinex_sql
+    (log_sql,) = _inserts(db, "ingestion_logs")
+    params = db.params[db.statements.index(log_sql)]
+    assert params["status_m0"] == "success"
+    assert params["status_m1"] == "failed"
+    assert "already catalogued" in params["error_message_m1"]
+    assert bl.take_failures(["h001", "h002"]).keys() == {"h002"}
+    assert bl.take_failures(["h002"]) == {}
+
+
+def test_failed_batch_retried_per_record():
+    db = FakeDB(fail_on="BAD")
+    bl = BulkLoader(db, batch_size=10, flush_sec=3600)
+    bl.add(_record(1))
+    bl.add(_record(2, path="/data/BAD0010.23o"))
+    bl.add(_record(3))
+    assert bl.flush() == 2
+    assert db.commits == 3                        # two single-row retries + one mark_failed
+    updates = [(s, p) for s, p in zip(db.statements, db.params, strict=True)
+               if s.startswith("UPDATE")]
+    assert len(updates) == 1
+    sql, params = updates[0]
+    assert "ingestion_logs" in sql
+    assert params["status"] == "failed"
+    assert "h002" in params.values()
+    assert bl.take_failures(["h001", "h002", "h003"]) == {"h002": "constraint violation"}
+
+
+def test_close_flushes_pending():
+    db = FakeDB()
+    bl = BulkLoader(db, batch_size=100, flush_sec=3600)
+    bl.add(_record(1))
+    bl.close()
+    assert len(bl) == 0
+    assert db.commits == 1
+
+
+def test_commit_loaded_flushes_and_reports(monkeypatch):
+    db = FakeDB(existing_paths={"/data/PBIS0020.23o"})
+    bl = BulkLoader(db, batch_size=10, flush_sec=3600)
+    monkeypatch.setattr(loader, "_loader", bl)
+    monkeypatch.setattr(loader, "_loader_pid", loader.os.getpid())
+    bl.add(_record(1))
+    bl.add(_record(2, path="/data/PBIS0020.23o"))
+    errors = loader.commit_loaded(["h001", "h002"])
+    assert db.commits == 1
+    assert set(errors) == {"h002"}
+
+
+def test_get_loader_recreated_after_fork(monkeypatch):
+    monkeypatch.setattr(loader, "_loader", None)
+    first = loader.get_loader()
+    assert loader.get_loader() is first
+    monkeypatch.setattr(loader, "_loader_pid", -1)
+    assert loader.get_loader() is not first
@@ -4,6 +4,8 @@ Tests for FileScanner — directory walking, hashing, idempotency.
 All DB and Celery interactions are mocked so tests run without PostgreSQL or Redis.
 """
 
+import hashlib
+import os
 import shutil
 import tempfile
 from pathlib import Path
@@ -11,7 +13,9 @@ from unittest.mock import MagicMock, call, patch
 
 import pytest
 
+from ingestion_pipeline.scan_index import ScanIndex
 from ingestion_pipeline.scanner import FileScanner, _is_rinex_file, _sha256
+from sqlalchemy.dialects import postgresql
 
 
 # ---------------------------------------------------------------------------
@@ -79,24 +83,33 @@ def scan_dir(tmp_path):
     return tmp_path
 
 
+@pytest.fixture
+def index_path(tmp_path_factory):
+    """Scan index outside the scanned tree."""
+    return str(tmp_path_factory.mktemp("index") / "scan-index.sqlite")
+
+
 def _mock_session_factory(existing_log=None):
     """Return a mock SessionLocal that mimics the DB session interface."""
     session = MagicMock()
-    session.get.return_value = existing_log
+    # The scanner asks for the 'success' rows among a chunk's hashes.
+    success = existing_log is not None and existing_log.status == "success"
+    hashes = [hashlib.sha256(MINIMAL_RINEX.encode()).hexdigest()] if success else []
+    session.execute.return_value.scalars.side_effect = lambda: iter(hashes)
     # Make it usable as a context manager (not used, but defensive)
     session.__enter__ = lambda s: s
     session.__exit__ = MagicMock(return_value=False)
     return session
 
 
-def test_scanner_queues_new_files(scan_dir):
+def test_scanner_queues_new_files(scan_dir, index_path):
     """New files should be queued and trigger_ingest should be called."""
     mock_session = _mock_session_factory(existing_log=None)
 
     with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
          patch("ingestion_pipeline.scanner.trigger_ingest") as mock_trigger:
 
-        scanner = FileScanner(str(scan_dir))
+        scanner = FileScanner(str(scan_dir), batch_size=1, index_path=index_path)
         result = scanner.scan()
 
     assert result["queued"] == 2
@@ -105,7 +118,7 @@ def test_scanner_queues_new_files(scan_dir):
     assert mock_trigger.call_count == 2
 
 
-def test_scanner_skips_already_ingested(scan_dir):
+def test_scanner_skips_already_ingested(scan_dir, index_path):
     """Files with status='success' should be skipped."""
     success_log = MagicMock()
     success_log.status = "success"
@@ -114,7 +127,7 @@ def test_scanner_skips_already_ingested(scan_dir):
     with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
          patch("ingestion_pipeline.scanner.trigger_ingest") as mock_trigger:
 
-        scanner = FileScanner(str(scan_dir))
+        scanner = FileScanner(str(scan_dir), batch_size=1, index_path=index_path)
         result = scanner.scan()
 
     assert result["skipped"] == 2
@@ -122,7 +135,7 @@ def test_scanner_skips_already_ingested(scan_dir):
     mock_trigger.assert_not_called()
 
 
-def test_scanner_requeues_failed_files(scan_dir):
+def test_scanner_requeues_failed_files(scan_dir, index_path):
     """Files with status='failed' should be re-queued."""
     failed_log = MagicMock()
     failed_log.status = "failed"
@@ -131,23 +144,175 @@ def test_scanner_requeues_failed_files(scan_dir):
     with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
          patch("ingestion_pipeline.scanner.trigger_ingest") as mock_trigger:
 
-        scanner = FileScanner(str(scan_dir))
+        scanner = FileScanner(str(scan_dir), batch_size=1, index_path=index_path)
         result = scanner.scan()
 
     assert result["queued"] == 2
-    # status should be reset to 'pending'
-    assert failed_log.status == "pending"
+    assert mock_trigger.call_count == 2
+    # status should be reset to 'pending' — one upsert for the chunk
+    upsert = mock_session.execute.call_args_list[-1].args[0]
+    sql = str(upsert.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (file_hash) DO UPDATE SET status" in sql
+    assert "WHERE ingestion_logs.status !=" in sql
+    assert "hash_sec = coalesce(excluded.hash_sec, ingestion_logs.hash_sec)" in sql
+    mock_session.commit.assert_called_once()
+
+
+def test_scanner_records_hash_time_only_when_hashing(scan_dir, index_path):
+    """Pending rows carry hash_sec on the scan that hashed the file, NULL after."""
+    def upsert_params(session):
+        stmt = session.execute.call_args_list[-1].args[0]
+        return stmt.compile(dialect=postgresql.dialect()).params
+
+    with patch("ingestion_pipeline.scanner.trigger_ingest"):
+        first = _mock_session_factory(existing_log=None)
+        with patch("ingestion_pipeline.scanner.SessionLocal", return_value=first):
+            FileScanner(str(scan_dir), batch_size=1, index_path=index_path).scan()
+        again = _mock_session_factory(existing_log=None)
+        with patch("ingestion_pipeline.scanner.SessionLocal", return_value=again):
+            FileScanner(str(scan_dir), batch_size=1, index_path=index_path).scan()
+
+    assert upsert_params(first)["hash_sec_m0"] >= 0
+    assert upsert_params(again)["hash_sec_m0"] is None
+
+
+def test_scanner_leaves_recently_queued_rows_to_their_task(scan_dir, index_path):
+    """With requeue_after_sec, a pending row queued within it is not dispatched again."""
+    (scan_dir / "BOST001a.23o").write_text(MINIMAL_RINEX.replace("PBIS", "BOST"))
+    pbis = _sha256(str(scan_dir / "PBIS001a.23o"))
+    queries = []
+
+    def execute(stmt):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        queries.append(sql)
+        result = MagicMock()
+        result.scalars.side_effect = lambda: iter([pbis] if "queued_at >=" in sql else [])
+        return result
+
+    mock_session = MagicMock()
+    mock_session.execute.side_effect = execute
+    with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
+         patch("ingestion_pipeline.scanner.trigger_ingest") as mock_trigger:
+        once = FileScanner(str(scan_dir), batch_size=1, index_path=index_path).scan()
+        watched = FileScanner(str(scan_dir), batch_size=1, index_path=index_path, requeue_after_sec=60).scan()
 
+    assert once["queued"] == 2
+    assert not any("queued_at >=" in q for q in queries[:2])
+    assert watched["queued"] == 1
+    assert watched["in_flight"] == 1
+    assert mock_trigger.call_args.args[0].endswith("BOST001a.23o")
+    assert "ingestion_logs.status = " in queries[3]
 
-def test_scanner_ignores_non_rinex(scan_dir):
+
+def test_scanner_ignores_non_rinex(scan_dir, index_path):
     """Non-RINEX files (ignore.txt) should not appear in counts."""
     mock_session = _mock_session_factory(existing_log=None)
 
     with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
          patch("ingestion_pipeline.scanner.trigger_ingest"):
 
-        scanner = FileScanner(str(scan_dir))
+        scanner = FileScanner(str(scan_dir), batch_size=1, index_path=index_path)
         result = scanner.scan()
 
     # Only 2 .23o files — ignore.txt excluded
     assert result["queued"] + result["skipped"] == 2
+
+
+def test_scanner_dispatches_batches(scan_dir, index_path):
+    """With batch_size > 1, files go out through trigger_ingest_batch."""
+    mock_session = _mock_session_factory(existing_log=None)
+
+    with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
+         patch("ingestion_pipeline.scanner.trigger_ingest") as mock_trigger, \
+         patch("ingestion_pipeline.scanner.trigger_ingest_batch") as mock_batch:
+
+        scanner = FileScanner(str(scan_dir), batch_size=10, index_path=index_path)
+        result = scanner.scan()
+
+    assert result["queued"] == 2
+    mock_trigger.assert_not_called()
+    mock_batch.assert_called_once()
+    (files,), _ = mock_batch.call_args
+    assert sorted(Path(p).name for p, _ in files) == ["BOST001a.23o", "PBIS001a.23o"]
+
+
+@pytest.mark.skipif(
+    "INGEST_DISPATCH_BATCH" in os.environ or os.environ.get("INGEST_PIPELINE_MODE") == "chain",
+    reason="dispatch batch size set by the environment",
+)
+def test_scanner_batches_by_default(scan_dir, index_path):
+    """In fused mode a default scanner sends ingest_batch tasks, not one task per file."""
+    mock_session = _mock_session_factory(existing_log=None)
+
+    with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
+         patch("ingestion_pipeline.scanner.trigger_ingest") as mock_trigger, \
+         patch("ingestion_pipeline.scanner.trigger_ingest_batch") as mock_batch:
+
+        scanner = FileScanner(str(scan_dir), index_path=index_path)
+        result = scanner.scan()
+
+    assert scanner.batch_size == 20
+    assert result["queued"] == 2
+    mock_trigger.assert_not_called()
+    mock_batch.assert_called_once()
+
+
+def test_scanner_rescan_skips_hashing_unchanged_files(scan_dir, index_path):
+    """A second scan reuses indexed hashes; a modified file is re-read."""
+    mock_session = _mock_session_factory(existing_log=None)
+
+    with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
+         patch("ingestion_pipeline.scanner.trigger_ingest"):
+
+        first = FileScanner(str(scan_dir), batch_size=1, index_path=index_path).scan()
+        second = FileScanner(str(scan_dir), batch_size=1, index_path=index_path).scan()
+        (scan_dir / "PBIS001a.23o").write_text(MINIMAL_RINEX + "more\n")
+        third = FileScanner(str(scan_dir), batch_size=1, index_path=index_path).scan()
+
+    assert first["hashed"] == 2
+    assert second["hashed"] == 0
+    assert second["queued"] == 2
+    assert third["hashed"] == 1
+
+
+def test_scanner_unreadable_file_counts_error(scan_dir, index_path):
+    mock_session = _mock_session_factory(existing_log=None)
+
+    with patch("ingestion_pipeline.scanner.SessionLocal", return_value=mock_session), \
+         patch("ingestion_pipeline.scanner.trigger_ingest") as mock_trigger, \
+         patch("ingestion_pipeline.scanner._sha256", return_value=None):
+
+        result = FileScanner(str(scan_dir), batch_size=1, index_path=index_path).scan()
+
+    assert result["errors"] == 2
+    mock_trigger.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# ScanIndex
+# ---------------------------------------------------------------------------
+
+def test_scan_index_invalidated_by_stat_change(tmp_path):
+    f = tmp_path / "a.rnx"
+    f.write_bytes(b"one")
+    index = ScanIndex(":memory:")
+    index.record(str(f), f.stat(), "h1")
+    assert index.lookup(str(f), f.stat()) == "h1"
+    f.write_bytes(b"three")
+    assert index.lookup(str(f), f.stat()) is None
+
+
+def test_scan_index_prune_drops_unseen_paths(tmp_path, index_path):
+    a, b = tmp_path / "a.rnx", tmp_path / "b.rnx"
+    a.write_bytes(b"a")
+    b.write_bytes(b"b")
+    index = ScanIndex(index_path)
+    index.record(str(a), a.stat(), "ha")
+    index.record(str(b), b.stat(), "hb")
+    index.close()
+
+    index = ScanIndex(index_path)              # next scan sees only a
+    assert index.lookup(str(a), a.stat()) == "ha"
+    assert index.prune(str(tmp_path)) == 1
+    assert len(index) == 1
+    index.close()
@@ -0,0 +1,245 @@
+"""
+Tests for ingestion_pipeline.standardize — stream transforms and scratch area.
+
+The .Z fixtures come from a minimal LZW encoder below (no `compress` binary
+needed); the Hatanaka fixture is rnx2crx output and its crx2rnx decode.
+"""
+
+import gzip
+import io
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+from ingestion_pipeline import standardize as std
+from ingestion_pipeline.cache import StandardizedCache
+
+RINEX = (
+    "     2.11           OBSERVATION DATA    G (GPS)             RINEX VERSION / TYPE\n"
+    "PBIS                                                        MARKER NAME\n"
+    "                                                            END OF HEADER\n"
+) + "".join(f" 23  1  1  0  0 {s:>2}.0000000  0  8G01G02G03G05G06G07G09G10\n" for s in range(60))
+
+CRINEX = """\
+1.0                 COMPACT RINEX FORMAT                    CRINEX VERS   / TYPE
+RNX2CRX ver.4.1.0                       18-Oct-26 23:26     CRINEX PROG / DATE
+     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE
+PBIS                                                        MARKER NAME
+     5    L1    L2    C1    P2    S1                        # / TYPES OF OBSERV
+    30.0000                                                 INTERVAL
+                                                            END OF HEADER
+&23  1  1  0  0  0.0000000  0  3G01G07R09
+3&123456
+3&120000000125 3&93500000500 3&22800000250 3&22800003750 3&45000          7
+3&-3500000750 3&-2700000500 3&24100000000 3&24100002000 3&38250
+3&110000000000 3&85500000000 3&21900000500 3&21900001500 3&41000
+                3
+-1
+3615000 2797500 682500 682500 0  1
+-25507500 -19875000 -4845000 -4845000 0
+450000 348750 75000 75000 0
+"""
+
+CRINEX_DECODED = """\
+     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE
+PBIS                                                        MARKER NAME
+     5    L1    L2    C1    P2    S1                        # / TYPES OF OBSERV
+    30.0000                                                 INTERVAL
+                                                            END OF HEADER
+ 23  1  1  0  0  0.0000000  0  3G01G07R09                             .000123456
+ 120000000.125    93500000.500    22800000.250    22800003.750          45.000 7
+  -3500000.750    -2700000.500    24100000.000    24100002.000          38.250
+ 110000000.000    85500000.000    21900000.500    21900001.500          41.000
+ 23  1  1  0  0 30.0000000  0  3G01G07R09                             .000123455
+ 120003615.125 1  93502798.000    22800682.750    22800686.250          45.000 7
+  -3525508.250    -2719875.500    24095155.000    24095157.000          38.250
+ 110000450.000    85500348.750    21900075.500    21900076.500          41.000
+"""
+
+
+def _compress_z(data: bytes, max_bits: int = 16) -> bytes:
+    """Unix compress (block mode, no CLEAR) — enough to exercise width changes."""
+    out = bytearray(b"\x1f\x9d" + bytes([0x80 | max_bits]))
+    table = {bytes([i]): i for i in range(256)}
+    next_code, n_bits, group = 257, 9, []
+
+    def flush(pad: bool) -> None:
+        bits = sum(c << (i * n_bits) for i, c in enumerate(group))
+        out.extend(bits.to_bytes(n_bits if pad else (len(group) * n_bits + 7) // 8, "little"))
+        group.clear()
+
+    def emit(code: int) -> None:
+        nonlocal n_bits
+        group.append(code)
+        if len(group) == 8:
+            flush(True)
+        if next_code > (1 << n_bits) - 1 and n_bits < max_bits:
+            if group:
+                flush(True)
+            n_bits += 1
+
+    w = b""
+    for b in data:
+        wc = w + bytes([b])
+        if wc in table:
+            w = wc
+            continue
+        emit(table[w])
+        if next_code < 1 << max_bits:
+            table[wc] = next_code
+            next_code += 1
+        w = bytes([b])
+    if w:
+        emit(table[w])
+    if group:
+        flush(False)
+    return bytes(out)
+
+
+@pytest.fixture(autouse=True)
+def scratch_root(tmp_path, monkeypatch):
+    root = tmp_path / "scratch"
+    root.mkdir()
+    monkeypatch.setattr(std, "SCRATCH_ROOT", str(root))
+    monkeypatch.setattr(std, "_scratch_dir", None)
+    return root
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c = StandardizedCache(str(tmp_path / "cache"), max_bytes=1 << 30, min_age_sec=0)
+    monkeypatch.setattr("ingestion_pipeline.cache._cache", c)
+    return c
+
+
+def test_lzw_reader_round_trip_across_code_widths():
+    data = os.urandom(20000) + RINEX.encode() * 50
+    for max_bits in (12, 16):
+        reader = io.BufferedReader(std.LZWReader(io.BytesIO(_compress_z(data, max_bits))))
+        assert reader.read() == data
+
+
+def test_lzw_reader_rejects_non_compress_data():
+    with pytest.raises(ValueError, match="not a Unix compress"):
+        std.LZWReader(io.BytesIO(b"\x1f\x8b\x08"))
+
+
+def test_plain_file_is_returned_without_copy(tmp_path, scratch_root):
+    src = tmp_path / "PBIS001a.23o"
+    src.write_text(RINEX)
+    assert std.standardize(str(src)) == str(src)
+    assert list(scratch_root.iterdir()) == []
+
+
+@pytest.mark.parametrize("name, encode", [
+    ("PBIS001a.23o.Z", lambda b: _compress_z(b)),
+    ("PBIS001a.23o.gz", gzip.compress),
+])
+def test_compressed_file_decoded_into_scratch(tmp_path, scratch_root, name, encode):
+    src = tmp_path / name
+    src.write_bytes(encode(RINEX.encode()))
+
+    out = Path(std.standardize(str(src)))
+
+    assert out.name == "PBIS001a.23o"
+    assert out.read_text() == RINEX
+    assert out.parent.parent == scratch_root / f"pogf_ingest_{os.getpid()}"
+
+
+def test_stacked_layers_and_hatanaka_filter(tmp_path):
+    inner = tmp_path / "PBIS001a.23d.gz"
+    inner.write_bytes(gzip.compress(CRINEX.encode()))
+    src = tmp_path / "PBIS001a.zip"
+    with zipfile.ZipFile(src, "w") as zf:
+        zf.write(inner, "PBIS001a.23d.gz")
+
+    out = Path(std.standardize(str(src)))
+
+    assert out.name == "PBIS001a.23o"
+    assert out.read_text() == CRINEX_DECODED
+    assert len(list(out.parent.iterdir())) == 1  # written once, no intermediates
+
+
+def test_bare_hatanaka_decoded_without_crx2rnx_on_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    src = tmp_path / "PBIS001a.23d"
+    src.write_text(CRINEX)
+
+    out = Path(std.standardize(str(src)))
+
+    assert out.name == "PBIS001a.23o"
+    assert out.read_text() == CRINEX_DECODED
+
+
+def test_corrupt_hatanaka_leaves_no_scratch(tmp_path):
+    src = tmp_path / "PBIS00PHL_R_20230010000_01D_30S_MO.crx"
+    src.write_text(CRINEX.replace("3&120000000125", "120000000125"))
+    with pytest.raises(ValueError, match="not initialized"):
+        std.standardize(str(src))
+    assert list(std.scratch_dir().iterdir()) == []
+
+
+def test_release_removes_only_scratch_files(tmp_path):
+    src = tmp_path / "PBIS001a.23o.gz"
+    src.write_bytes(gzip.compress(RINEX.encode()))
+    out = std.standardize(str(src))
+
+    std.release(str(src))
+    assert src.exists()
+    std.release(out)
+    assert not Path(out).parent.exists()
+
+
+def test_failed_decode_leaves_no_scratch(tmp_path):
+    src = tmp_path / "PBIS001a.23o.gz"
+    src.write_bytes(gzip.compress(RINEX.encode())[:-20])
+    with pytest.raises(EOFError):
+        std.standardize(str(src))
+    assert list(std.scratch_dir().iterdir()) == []
+
+
+def test_stale_scratch_of_dead_worker_is_reaped(scratch_root):
+    dead = scratch_root / "pogf_ingest_999999999"
+    (dead / "tmp1").mkdir(parents=True)
+    (dead / "tmp1" / "PBIS001a.23o").write_text(RINEX)
+
+    std.scratch_dir()
+
+    assert not dead.exists()
+
+
+def test_hashed_file_decoded_once_into_cache(tmp_path, cache):
+    src = tmp_path / "PBIS001a.23o.gz"
+    src.write_bytes(gzip.compress(RINEX.encode()))
+    out = std.standardize(str(src), "ab12")
+    assert Path(out).read_text() == RINEX
+    assert Path(out).parent == cache.root / "ab" / "ab12"
+    src.unlink()                                          # a hit never touches the source
+    assert std.standardize(str(src), "ab12") == out
+    std.release(out)
+    assert Path(out).exists()
+
+
+def test_stats_split_decompress_and_hatanaka(tmp_path):
+    src = tmp_path / "PBIS001a.23d.gz"
+    src.write_bytes(gzip.compress(CRINEX.encode()))
+    stats = {}
+
+    out = std.standardize(str(src), stats=stats)
+
+    assert stats["bytes_in"] == src.stat().st_size
+    assert stats["bytes_out"] == Path(out).stat().st_size
+    assert stats["decompress_sec"] >= 0
+    assert stats["hatanaka_sec"] > 0
+
+
+def test_stats_for_plain_file(tmp_path):
+    src = tmp_path / "PBIS001a.23o"
+    src.write_text(RINEX)
+    stats = {}
+    std.standardize(str(src), stats=stats)
+    assert stats == {
+        "decompress_sec": 0.0, "hatanaka_sec": 0.0,
+        "bytes_in": len(RINEX), "bytes_out": len(RINEX),
+    }
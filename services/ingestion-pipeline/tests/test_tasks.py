@@ -1,181 +1,355 @@
-"""
-Tests for ingestion_pipeline tasks.
-
-Uses temporary files and mocks — no Celery worker, no PostgreSQL connection.
-Tests cover the core logic: header validation, compression handling, header parsing.
-"""
-
-import gzip
-import os
-import shutil
-import tempfile
-from pathlib import Path
-from unittest.mock import MagicMock, patch
-
-import pytest
-from ingestion_pipeline.tasks import (
-    _parse_rinex_header,
-    _parse_rinex_time,
-    _standardize_format,
-    _validate_rinex,
-)
-
-# ---------------------------------------------------------------------------
-# Fixtures
-# ---------------------------------------------------------------------------
-
-MINIMAL_RINEX_HEADER = """\
-     2.11           OBSERVATION DATA    G (GPS)             RINEX VERSION / TYPE
-PBIS                                                        MARKER NAME
-     5                                                      # / TYPES OF OBSERV
-    30.000                                                  INTERVAL
-  2023     1     1     0     0    0.0000000     GPS         TIME OF FIRST OBS
-  2023     1     1    23    59   30.0000000     GPS         TIME OF LAST OBS
-SN12345678901234567 TRIMBLE NETRS       4.23                REC # / TYPE / VERS
-ANT001              TRM41249.00     NONE                    ANT # / TYPE
-                                                            END OF HEADER
-"""
-# REC # / TYPE / VERS field layout (RINEX 2.x, fixed-width 80 chars):
-#   cols  1-20 (0-indexed  0-19): receiver serial number  → "SN12345678901234567 "
-#   cols 21-40 (0-indexed 20-39): receiver type           → "TRIMBLE NETRS       "
-#   cols 41-60 (0-indexed 40-59): firmware version        → "4.23                "
-# ANT # / TYPE field layout:
-#   cols  1-20: antenna serial  → "ANT001              "
-#   cols 21-40: antenna type    → "TRM41249.00     NONE"
-
-
-@pytest.fixture
-def tmp_dir():
-    d = tempfile.mkdtemp()
-    yield d
-    shutil.rmtree(d)
-
-
-@pytest.fixture
-def rinex_file(tmp_dir):
-    """A minimal valid RINEX observation file."""
-    path = Path(tmp_dir) / "PBIS001a.23o"
-    path.write_text(MINIMAL_RINEX_HEADER, encoding="ascii")
-    return str(path)
-
-
-@pytest.fixture
-def gz_rinex_file(tmp_dir):
-    """A gzip-compressed RINEX file."""
-    rinex_path = Path(tmp_dir) / "PBIS001a.23o"
-    rinex_path.write_text(MINIMAL_RINEX_HEADER, encoding="ascii")
-    gz_path = Path(tmp_dir) / "PBIS001a.23o.gz"
-    with open(rinex_path, "rb") as f_in, gzip.open(gz_path, "wb") as f_out:
-        shutil.copyfileobj(f_in, f_out)
-    return str(gz_path)
-
-
-# ---------------------------------------------------------------------------
-# _parse_rinex_header
-# ---------------------------------------------------------------------------
-
-def test_parse_rinex_header_extracts_station(rinex_file):
-    meta = _parse_rinex_header(rinex_file)
-    assert meta["station_code"] == "PBIS"
-
-
-def test_parse_rinex_header_extracts_interval(rinex_file):
-    meta = _parse_rinex_header(rinex_file)
-    assert meta["sampling_interval"] == pytest.approx(30.0)
-
-
-def test_parse_rinex_header_extracts_receiver(rinex_file):
-    meta = _parse_rinex_header(rinex_file)
-    assert "TRIMBLE" in meta.get("receiver_type", "") or "NETRS" in meta.get("receiver_type", "")
-
-
-def test_parse_rinex_header_missing_file():
-    meta = _parse_rinex_header("/nonexistent/path.rnx")
-    assert meta == {}
-
-
-# ---------------------------------------------------------------------------
-# _parse_rinex_time
-# ---------------------------------------------------------------------------
-
-def test_parse_rinex_time_valid():
-    raw = "  2023     1     1     0     0    0.0000000     GPS"
-    dt = _parse_rinex_time(raw)
-    assert dt is not None
-    assert dt.year == 2023
-    assert dt.month == 1
-    assert dt.day == 1
-
-
-def test_parse_rinex_time_invalid():
-    assert _parse_rinex_time("not a time") is None
-    assert _parse_rinex_time("") is None
-
-
-# ---------------------------------------------------------------------------
-# validate_rinex
-# ---------------------------------------------------------------------------
-
-def test_validate_rinex_valid_header(rinex_file):
-    result = _validate_rinex(rinex_file)
-    assert result["file_path"] == rinex_file
-
-
-def test_validate_rinex_missing_file(tmp_dir):
-    with pytest.raises(FileNotFoundError):
-        _validate_rinex(os.path.join(tmp_dir, "nonexistent.rnx"))
-
-
-def test_validate_rinex_invalid_header(tmp_dir):
-    bad_file = Path(tmp_dir) / "not_rinex.txt"
-    bad_file.write_text("This is not a RINEX file\n" * 10)
-    with pytest.raises(ValueError, match="No RINEX VERSION"):
-        _validate_rinex(str(bad_file))
-
-
-def test_validate_rinex_skips_teqc_if_missing(rinex_file):
-    """If teqc is not in PATH, _validate_rinex should still succeed with None QC fields."""
-    with patch(
-        "pogf_geodetic_suite.qc.rinex_qc.subprocess.run",
-        side_effect=FileNotFoundError("teqc not found"),
-    ):
-        result = _validate_rinex(rinex_file)
-    assert result["file_path"] == rinex_file
-    assert result["qc_obs_count"] is None
-    assert result["qc_cycle_slips"] is None
-
-
-def test_validate_rinex_captures_qc_metrics(rinex_file):
-    """When teqc succeeds, QC metrics are returned in the dict."""
-    mock_proc = MagicMock()
-    mock_proc.returncode = 0
-    mock_proc.stdout = ""
-    mock_proc.stderr = "# obs       :  85321\n# slips  (all)    :    10\nMP1 : 0.30\nMP2 : 0.41\n"
-    with patch("pogf_geodetic_suite.qc.rinex_qc.subprocess.run", return_value=mock_proc):
-        result = _validate_rinex(rinex_file)
-    assert result["file_path"] == rinex_file
-    assert result["qc_obs_count"] == 85321
-    assert result["qc_cycle_slips"] == 10
-    assert abs(result["qc_mp1_rms"] - 0.30) < 1e-6
-    assert abs(result["qc_mp2_rms"] - 0.41) < 1e-6
-
-
-# ---------------------------------------------------------------------------
-# _standardize_format
-# ---------------------------------------------------------------------------
-
-def test_standardize_format_passthrough_plain(rinex_file):
-    """Plain RINEX file should be copied to temp and returned."""
-    out = _standardize_format(rinex_file)
-    assert Path(out).exists()
-    assert Path(out).read_text(encoding="ascii").startswith(" ")
-
-
-def test_standardize_format_decompresses_gz(gz_rinex_file):
-    """Gzip-compressed RINEX file should be decompressed."""
-    out = _standardize_format(gz_rinex_file)
-    out_path = Path(out)
-    assert out_path.exists()
-    assert out_path.suffix.lower() != ".gz"
-    content = out_path.read_text(encoding="ascii")
-    assert "RINEX VERSION" in content
+"""
+Tests for ingestion_pipeline tasks.
+
+Uses temporary files and mocks — no Celery worker, no PostgreSQL connection.
+Tests cover the core logic: header validation, compression handling, header parsing.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from ingestion_pipeline.cache import StandardizedCache
+from ingestion_pipeline.standardize import release
+from ingestion_pipeline.tasks import (
+    StageError,
+    _ingest_batch,
+    _ingest_file,
+    _parse_rinex_header,
+    _parse_rinex_time,
+    _standardize_format,
+    _validate_rinex,
+    ingest_file,
+)
+from pogf_geodetic_suite.rinex.header import HeaderStore
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+MINIMAL_RINEX_HEADER = """\
+     2.11           OBSERVATION DATA    G (GPS)             RINEX VERSION / TYPE
+PBIS                                                        MARKER NAME
+     5                                                      # / TYPES OF OBSERV
+    30.000                                                  INTERVAL
+  2023     1     1     0     0    0.0000000     GPS         TIME OF FIRST OBS
+  2023     1     1    23    59   30.0000000     GPS         TIME OF LAST OBS
+SN12345678901234567 TRIMBLE NETRS       4.23                REC # / TYPE / VERS
+ANT001              TRM41249.00     NONE                    ANT # / TYPE
+                                                            END OF HEADER
+"""
+# REC # / TYPE / VERS field layout (RINEX 2.x, fixed-width 80 chars):
+#   cols  1-20 (0-indexed  0-19): receiver serial number  → "SN12345678901234567 "
+#   cols 21-40 (0-indexed 20-39): receiver type           → "TRIMBLE NETRS       "
+#   cols 41-60 (0-indexed 40-59): firmware version        → "4.23                "
+# ANT # / TYPE field layout:
+#   cols  1-20: antenna serial  → "ANT001              "
+#   cols 21-40: antenna type    → "TRM41249.00     NONE"
+
+
+@pytest.fixture(autouse=True)
+def header_store(monkeypatch):
+    """A private in-memory header cache per test."""
+    store = HeaderStore(":memory:")
+    monkeypatch.setattr("pogf_geodetic_suite.rinex.header._store", store)
+    monkeypatch.setattr("pogf_geodetic_suite.rinex.header._store_pid", os.getpid())
+    return store
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    """A private standardized-file cache per test."""
+    c = StandardizedCache(str(tmp_path / "cache"), max_bytes=1 << 30, min_age_sec=0)
+    monkeypatch.setattr("ingestion_pipeline.cache._cache", c)
+    return c
+
+
+@pytest.fixture(autouse=True)
+def scratch(tmp_path, monkeypatch):
+    """A private scratch root per test, so nothing is left in the system temp dir."""
+    monkeypatch.setattr("ingestion_pipeline.standardize.SCRATCH_ROOT", str(tmp_path / "scratch"))
+    monkeypatch.setattr("ingestion_pipeline.standardize._scratch_dir", None)
+
+
+@pytest.fixture
+def tmp_dir():
+    d = tempfile.mkdtemp()
+    yield d
+    shutil.rmtree(d)
+
+
+@pytest.fixture
+def rinex_file(tmp_dir):
+    """A minimal valid RINEX observation file."""
+    path = Path(tmp_dir) / "PBIS001a.23o"
+    path.write_text(MINIMAL_RINEX_HEADER, encoding="ascii")
+    return str(path)
+
+
+@pytest.fixture
+def gz_rinex_file(tmp_dir):
+    """A gzip-compressed RINEX file."""
+    rinex_path = Path(tmp_dir) / "PBIS001a.23o"
+    rinex_path.write_text(MINIMAL_RINEX_HEADER, encoding="ascii")
+    gz_path = Path(tmp_dir) / "PBIS001a.23o.gz"
+    with open(rinex_path, "rb") as f_in, gzip.open(gz_path, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    return str(gz_path)
+
+
+# ---------------------------------------------------------------------------
+# _parse_rinex_header
+# ---------------------------------------------------------------------------
+
+def test_parse_rinex_header_extracts_station(rinex_file):
+    meta = _parse_rinex_header(rinex_file)
+    assert meta["station_code"] == "PBIS"
+
+
+def test_parse_rinex_header_extracts_interval(rinex_file):
+    meta = _parse_rinex_header(rinex_file)
+    assert meta["sampling_interval"] == pytest.approx(30.0)
+
+
+def test_parse_rinex_header_extracts_receiver(rinex_file):
+    meta = _parse_rinex_header(rinex_file)
+    assert "TRIMBLE" in meta.get("receiver_type", "") or "NETRS" in meta.get("receiver_type", "")
+
+
+def test_parse_rinex_header_missing_file():
+    meta = _parse_rinex_header("/nonexistent/path.rnx")
+    assert meta == {}
+
+
+# ---------------------------------------------------------------------------
+# _parse_rinex_time
+# ---------------------------------------------------------------------------
+
+def test_parse_rinex_time_valid():
+    raw = "  2023     1     1     0     0    0.0000000     GPS"
+    dt = _parse_rinex_time(raw)
+    assert dt is not None
+    assert dt.year == 2023
+    assert dt.month == 1
+    assert dt.day == 1
+
+
+def test_parse_rinex_time_invalid():
+    assert _parse_rinex_time("not a time") is None
+    assert _parse_rinex_time("") is None
+
+
+# ---------------------------------------------------------------------------
+# validate_rinex
+# ---------------------------------------------------------------------------
+
+def test_validate_rinex_valid_header(rinex_file):
+    result = _validate_rinex(rinex_file)
+    assert result["file_path"] == rinex_file
+
+
+def test_validate_rinex_missing_file(tmp_dir):
+    with pytest.raises(FileNotFoundError):
+        _validate_rinex(os.path.join(tmp_dir, "nonexistent.rnx"))
+
+
+def test_validate_rinex_invalid_header(tmp_dir):
+    bad_file = Path(tmp_dir) / "not_rinex.txt"
+    bad_file.write_text("This is not a RINEX file\n" * 10)
+    with pytest.raises(ValueError, match="No RINEX VERSION"):
+        _validate_rinex(str(bad_file))
+
+
+def test_validate_rinex_header_only_file_has_empty_qc(rinex_file):
+    """A header without epochs passes validation with zero counts and no multipath."""
+    result = _validate_rinex(rinex_file)
+    assert result["qc_obs_count"] == 0
+    assert result["qc_cycle_slips"] == 0
+    assert result["qc_mp1_rms"] is None
+
+
+def test_validate_rinex_captures_qc_metrics(rinex_file):
+    """Native QC metrics are returned in the dict — no teqc subprocess."""
+    header = MINIMAL_RINEX_HEADER.replace(f"{'     5':<60}", f"{'     2    C1    L1':<60}")
+    with open(rinex_file, "w", encoding="ascii") as f:
+        f.write(header)
+        f.write(" 23  1  1  0  0  0.0000000  0  1G05\n")
+        f.write("  23000000.500    18000000.250 7\n")
+    with patch("pogf_geodetic_suite.qc.rinex_qc.subprocess.run") as run:
+        result = _validate_rinex(rinex_file)
+    run.assert_not_called()
+    assert result["file_path"] == rinex_file
+    assert result["qc_obs_count"] == 2
+    assert result["qc_cycle_slips"] == 0
+
+
+def test_validate_rinex_corrupt_body_fails(rinex_file):
+    with open(rinex_file, "a", encoding="ascii") as f:
+        f.write(" 23  1  1  0  0  0.0000000  0  2G05G07\n")
+        f.write("  23000000.500\n")
+    with pytest.raises(ValueError, match="ends in the middle"):
+        _validate_rinex(rinex_file)
+
+
+# ---------------------------------------------------------------------------
+# _standardize_format
+# ---------------------------------------------------------------------------
+
+def test_standardize_format_passthrough_plain(rinex_file):
+    """Plain RINEX file should be returned as-is, without a copy."""
+    out = _standardize_format(rinex_file)
+    assert out == rinex_file
+
+
+def test_standardize_format_decompresses_gz(gz_rinex_file):
+    """Gzip-compressed RINEX file should be decompressed."""
+    out = _standardize_format(gz_rinex_file)
+    out_path = Path(out)
+    assert out_path.exists()
+    assert out_path.suffix.lower() != ".gz"
+    content = out_path.read_text(encoding="ascii")
+    assert "RINEX VERSION" in content
+
+
+# ---------------------------------------------------------------------------
+# Fused pipeline
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def fake_db():
+    """Station cache that knows PBIS, a loader that just collects records."""
+    stations = MagicMock()
+    stations.get.side_effect = lambda code: 7 if code == "PBIS" else None
+    loader = MagicMock()
+    with patch("ingestion_pipeline.tasks.get_station_cache", return_value=stations), \
+         patch("ingestion_pipeline.tasks.get_loader", return_value=loader), \
+         patch("ingestion_pipeline.tasks.commit_loaded", return_value={}) as commit, \
+         patch("ingestion_pipeline.tasks.mark_failed") as mark_failed:
+        yield {"loader": loader, "commit": commit, "mark_failed": mark_failed}
+
+
+def test_ingest_file_runs_all_stages_in_process(gz_rinex_file, fake_db, cache):
+    """A compressed file goes through all three stages; the decode is cached."""
+    out = _ingest_file(gz_rinex_file, "abc123")
+    assert set(out["timings"]) == {"standardize", "validate", "load"}
+    (record,), _ = fake_db["loader"].add.call_args
+    assert record.filepath == gz_rinex_file
+    assert record.station_id == 7
+    assert out["result"].split(":", 1)[1] == cache.get("abc123")
+    fake_db["mark_failed"].assert_not_called()
+
+
+def test_cached_file_is_pinned_until_released(gz_rinex_file, fake_db, cache):
+    local = _standardize_format(gz_rinex_file, "abc123")
+    entry = cache.entry_of(local)
+    assert cache.pinned(entry)
+    _ingest_file(gz_rinex_file, "abc123")          # a second consumer pins and releases
+    assert cache.pinned(entry)
+    release(local)
+    assert not cache.pinned(entry)
+
+
+def test_ingest_file_records_stage_stats(gz_rinex_file, fake_db):
+    _ingest_file(gz_rinex_file, "abc123")
+    (record,), _ = fake_db["loader"].add.call_args
+    assert record.worker.endswith(f":{os.getpid()}")
+    assert record.bytes_in == os.path.getsize(gz_rinex_file)
+    assert record.bytes_out > record.bytes_in
+    assert record.decompress_sec >= 0
+    assert record.hatanaka_sec == 0.0
+    assert record.qc_sec >= 0
+
+
+def test_ingest_file_without_cache_releases_scratch(gz_rinex_file, fake_db, monkeypatch):
+    monkeypatch.setattr("ingestion_pipeline.cache._cache", None)
+    monkeypatch.setattr("ingestion_pipeline.cache.CACHE_MAX_BYTES", 0)
+    out = _ingest_file(gz_rinex_file, "abc123")
+    assert not Path(out["result"].split(":", 1)[1]).exists()
+
+
+def test_retry_reuses_cached_decode_qc_and_header(gz_rinex_file, fake_db):
+    """A second attempt at the same hash decodes, QCs and parses nothing."""
+    _ingest_file(gz_rinex_file, "abc123")
+    with patch("ingestion_pipeline.standardize._decode_into") as decode, \
+         patch("pogf_geodetic_suite.qc.rinex_qc.RinexQC.run_qc") as run_qc, \
+         patch("pogf_geodetic_suite.rinex.header._read_prefix") as parse:
+        _ingest_file(gz_rinex_file, "abc123")
+    decode.assert_not_called()
+    run_qc.assert_not_called()
+    parse.assert_not_called()
+    assert fake_db["loader"].add.call_count == 2
+
+
+def test_ingest_file_attributes_failure_to_stage(tmp_dir, fake_db):
+    """A bad header fails in validate and marks the log with that stage."""
+    bad = Path(tmp_dir) / "PBIS001a.23o"
+    bad.write_text("not rinex\n")
+    with pytest.raises(StageError) as excinfo:
+        _ingest_file(str(bad), "abc123")
+    assert excinfo.value.stage == "validate"
+    file_hash, message = fake_db["mark_failed"].call_args.args
+    assert file_hash == "abc123"
+    assert message.startswith("validate failed")
+    fake_db["loader"].add.assert_not_called()
+
+
+def test_ingest_file_unknown_station_fails_in_load(tmp_dir, fake_db):
+    path = Path(tmp_dir) / "BOST001a.23o"
+    path.write_text(MINIMAL_RINEX_HEADER.replace("PBIS", "BOST"), encoding="ascii")
+    with pytest.raises(StageError) as excinfo:
+        _ingest_file(str(path), "abc123")
+    assert excinfo.value.stage == "load"
+
+
+def test_stage_error_survives_rebuild_from_args():
+    """Celery rebuilds exceptions from their args."""
+    err = StageError("load failed for x: boom", "load", "x")
+    assert str(StageError(*err.args)) == str(err)
+
+
+def test_header_read_once_for_validate_and_load(rinex_file, fake_db):
+    with patch(
+        "pogf_geodetic_suite.rinex.header._read_prefix",
+        wraps=__import__("pogf_geodetic_suite.rinex.header", fromlist=["_read_prefix"])._read_prefix,
+    ) as read_prefix:
+        _ingest_file(rinex_file, "abc123")
+    assert read_prefix.call_count == 1
+
+
+def test_ingest_batch_continues_past_failures(rinex_file, tmp_dir, fake_db):
+    bad = Path(tmp_dir) / "BAD0001a.23o"
+    bad.write_text("not rinex\n")
+    out = _ingest_batch([(str(bad), "h1"), (rinex_file, "h2")])
+    assert out["ingested"] == 1
+    assert out["failed"] == 1
+    assert out["results"][0]["stage"] == "validate"
+    assert fake_db["loader"].add.call_count == 1
+    fake_db["commit"].assert_called_once()
+    assert out["results"][1]["result"] == f"success:{rinex_file}"
+
+
+def test_ingest_batch_counts_rows_that_fail_to_commit(rinex_file, fake_db):
+    fake_db["commit"].return_value = {"h2": "already catalogued"}
+    out = _ingest_batch([(rinex_file, "h1"), (rinex_file, "h2")])
+    assert out["ingested"] == 1
+    assert out["results"][1] == {
+        "file_path": rinex_file, "stage": "load", "error": "already catalogued",
+    }
+
+
+def test_ingest_file_task_reports_success_only_after_commit(rinex_file, fake_db):
+    assert _ingest_file(rinex_file, "abc123")["result"].startswith("queued:")
+    fake_db["commit"].assert_not_called()
+
+    out = ingest_file(rinex_file, "abc123")
+    fake_db["commit"].assert_called_once_with(["abc123"])
+    assert out["result"] == f"success:{rinex_file}"
+
+    fake_db["commit"].return_value = {"abc123": "bulk load failed"}
+    with pytest.raises(StageError) as excinfo:
+        ingest_file(rinex_file, "abc123")
+    assert excinfo.value.stage == "load"
@@ -0,0 +1,90 @@
+"""Tests for ingestion_pipeline.throughput — summaries of ingestion_logs stage timings."""
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from ingestion_pipeline.throughput import (
+    STAGES,
+    _format_table,
+    fetch_rows,
+    percentile,
+    summarize,
+    throughput,
+)
+from sqlalchemy.dialects import postgresql
+
+
+def _row(worker="w1:1", station="PBIS", bytes_in=1000, bytes_out=4000, **secs):
+    values = {f"{stage}_sec": secs.get(stage) for stage in STAGES}
+    return SimpleNamespace(
+        worker=worker, station_code=station, bytes_in=bytes_in, bytes_out=bytes_out, **values
+    )
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 95) is None
+
+
+def test_summarize_rates_over_window():
+    rows = [_row(qc=1.0, db=0.1) for _ in range(10)]
+    overall, groups = summarize(rows, window_sec=3600)
+    assert overall.files == 10
+    assert overall.files_per_hour == 10
+    assert overall.bytes_per_sec == pytest.approx(10_000 / 3600)
+    assert overall.stages["qc"].total_sec == pytest.approx(10.0)
+    assert overall.stages["qc"].p95_sec == 1.0
+    assert overall.stages["hatanaka"].p95_sec is None
+    assert overall.stages["hatanaka"].files == 0
+    assert [g.key for g in groups] == ["w1:1"]
+
+
+def test_summarize_p95_ignores_missing_stages():
+    rows = [_row(qc=float(n)) for n in range(1, 21)] + [_row(qc=None)]
+    overall, _ = summarize(rows, window_sec=60, by=None)
+    assert overall.stages["qc"].files == 20
+    assert overall.stages["qc"].p95_sec == 19.0
+
+
+def test_summarize_groups_by_station_busiest_first():
+    rows = [_row(station="BOST")] + [_row(station="PBIS")] * 3 + [_row(station=None)]
+    _, groups = summarize(rows, window_sec=3600, by="station")
+    assert [(g.key, g.files) for g in groups] == [("PBIS", 3), ("BOST", 1), ("unknown", 1)]
+
+
+def test_summarize_rejects_unknown_grouping():
+    with pytest.raises(ValueError, match="Cannot group by"):
+        summarize([], 60, by="receiver")
+
+
+def test_fetch_rows_filters_success_in_window():
+    session = MagicMock()
+    since = datetime(2026, 1, 1, tzinfo=UTC)
+    fetch_rows(session, since, datetime(2026, 1, 2, tzinfo=UTC))
+    stmt = session.execute.call_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ingestion_logs.hatanaka_sec" in sql
+    assert "ingestion_logs.ingested_at >=" in sql
+    assert "ingestion_logs.ingested_at <" in sql
+    assert stmt.compile(dialect=postgresql.dialect()).params["status_1"] == "success"
+
+
+def test_throughput_returns_json_ready_dashboard_data():
+    session = MagicMock()
+    session.execute.return_value.all.return_value = [_row(db=0.2), _row(worker="w2:7", db=0.4)]
+    until = datetime(2026, 1, 2, tzinfo=UTC)
+
+    data = throughput(hours=2, by="worker", until=until, session_factory=lambda: session)
+
+    assert data["since"] == "2026-01-01T22:00:00+00:00"
+    assert data["overall"]["files"] == 2
+    assert data["overall"]["files_per_hour"] == 1.0
+    assert data["overall"]["stages"]["db"]["p95_sec"] == 0.4
+    assert {g["key"] for g in data["groups"]} == {"w1:1", "w2:7"}
+    session.close.assert_called_once()
+    assert "w2:7" in _format_table(data)
@@ -0,0 +1,135 @@
+"""
+Tests for IngestWatcher — debounce, event-driven queueing, fallback crawl.
+
+DB and Celery are mocked as in test_scanner.py.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from ingestion_pipeline.watcher import IngestWatcher
+
+MINIMAL_RINEX = """\
+     2.11           OBSERVATION DATA    G (GPS)             RINEX VERSION / TYPE
+PBIS                                                        MARKER NAME
+                                                            END OF HEADER
+"""
+
+
+@pytest.fixture
+def index_path(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("index") / "scan-index.sqlite")
+
+
+@pytest.fixture
+def mock_db():
+    session = MagicMock()
+    session.execute.return_value.scalars.side_effect = lambda: iter([])
+    with patch("ingestion_pipeline.scanner.SessionLocal", return_value=session), \
+         patch("ingestion_pipeline.scanner.trigger_ingest") as trigger:
+        yield trigger
+
+
+# ---------------------------------------------------------------------------
+# Debounce
+# ---------------------------------------------------------------------------
+
+def test_note_ignores_non_rinex(tmp_path, index_path):
+    watcher = IngestWatcher([str(tmp_path)], settle_sec=5, index_path=index_path)
+    watcher.note(str(tmp_path / "notes.txt"))
+    assert len(watcher) == 0
+
+
+def test_file_released_only_after_settle(tmp_path, index_path):
+    path = tmp_path / "PBIS001a.23o"
+    path.write_text(MINIMAL_RINEX)
+    watcher = IngestWatcher([str(tmp_path)], settle_sec=5, index_path=index_path)
+    watcher.note(str(path))
+    assert watcher.ready(now=time.monotonic()) == []
+    (ready,) = watcher.ready(now=time.monotonic() + 6)
+    assert ready[0] == str(path)
+    assert len(watcher) == 0
+
+
+def test_growing_file_is_held_back(tmp_path, index_path):
+    path = tmp_path / "PBIS001a.23o"
+    path.write_text(MINIMAL_RINEX)
+    watcher = IngestWatcher([str(tmp_path)], settle_sec=5, index_path=index_path)
+    watcher.note(str(path))
+    with open(path, "a") as f:                       # upload still in progress
+        f.write("more data\n" * 100)
+    later = time.monotonic() + 6
+    assert watcher.ready(now=later) == []
+    assert len(watcher) == 1                         # re-armed with the new size
+    assert [p for p, _ in watcher.ready(now=later + 6)] == [str(path)]
+
+
+def test_deleted_file_is_dropped(tmp_path, index_path):
+    path = tmp_path / "PBIS001a.23o"
+    path.write_text(MINIMAL_RINEX)
+    watcher = IngestWatcher([str(tmp_path)], settle_sec=0, index_path=index_path)
+    watcher.note(str(path))
+    path.unlink()
+    assert watcher.ready() == []
+    assert len(watcher) == 0
+
+
+# ---------------------------------------------------------------------------
+# Running watcher
+# ---------------------------------------------------------------------------
+
+def _run(watcher):
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_startup_crawl_queues_existing_files(tmp_path, index_path, mock_db):
+    (tmp_path / "PBIS001a.23o").write_text(MINIMAL_RINEX)
+    watcher = IngestWatcher(
+        [str(tmp_path)], settle_sec=0.1, crawl_sec=3600, batch_size=1, index_path=index_path,
+        use_events=False,
+    )
+    thread = _run(watcher)
+    try:
+        assert _wait_for(lambda: watcher.counts["crawls"] == 1)
+    finally:
+        watcher.stop()
+        thread.join(5)
+    assert mock_db.call_count == 1
+
+
+def test_crawls_leave_recently_queued_files_alone(tmp_path, index_path):
+    watcher = IngestWatcher([str(tmp_path)], requeue_sec=120, index_path=index_path)
+    assert [s.requeue_after_sec for s in watcher._scanners] == [120]
+    assert watcher.counts["in_flight"] == 0
+
+
+def test_new_file_queued_from_filesystem_event(tmp_path, index_path, mock_db):
+    pytest.importorskip("watchdog")
+    watcher = IngestWatcher(
+        [str(tmp_path)], settle_sec=0.2, crawl_sec=3600, batch_size=1, index_path=index_path
+    )
+    thread = _run(watcher)
+    try:
+        assert _wait_for(lambda: watcher.counts["crawls"] == 1)
+        sub = tmp_path / "2023" / "001"
+        sub.mkdir(parents=True)
+        (sub / "PBIS001a.23o").write_text(MINIMAL_RINEX)
+        assert _wait_for(lambda: mock_db.call_count == 1)
+    finally:
+        watcher.stop()
+        thread.join(5)
+    assert watcher.counts["crawls"] == 1             # found by the event, not a crawl
+    assert mock_db.call_args.args[0].endswith("PBIS001a.23o")
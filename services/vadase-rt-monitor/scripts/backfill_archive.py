@@ -0,0 +1,88 @@
+import os
+from pathlib import Path
+
+import structlog
+import typer
+from dotenv import load_dotenv
+from src.backfill import BackfillCheckpoint, BackfillOptions, StationDayResult, run_backfill
+
+# Service-level .env (DB_* credentials etc.) — the TimescaleDBAdapter reads
+# os.environ directly, so the composition root must load the file. Worker
+# processes inherit the environment loaded here.
+load_dotenv(Path(__file__).resolve().parents[1] / ".env")
+
+app = typer.Typer()
+
+
+@app.command()
+def main(
+    archive: Path = typer.Option(..., "--archive", "-a", help="Archive root (per-station/per-day tree of captures)"),
+    checkpoint: Path = typer.Option(
+        Path("backfill_checkpoint.jsonl"), "--checkpoint", "-c",
+        help="Append-only log of finished station-days; reruns resume from it",
+    ),
+    workers: int = typer.Option(os.cpu_count() or 4, "--workers", "-j", help="Worker processes"),
+    db_connections: int = typer.Option(
+        8, "--db-connections", help="Total DB connection budget, split evenly across workers",
+    ),
+    batch_size: int = typer.Option(1000, "--batch-size", help="Rows per executemany flush"),
+    pattern: str = typer.Option("*.rtl", "--pattern", "-p", help="Capture file glob (recursive)"),
+    station: list[str] | None = typer.Option(None, "--station", "-s", help="Only these stations (repeatable)"),
+    threshold: float = typer.Option(15.0, "--threshold", help="Event threshold mm/s"),
+    force_integration: bool = typer.Option(False, "--force-integration", help="Force MANUAL mode"),
+    decay: float = typer.Option(1.0, "--decay", help="Leaky integrator decay factor"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Parse and integrate only; no DB writes"),
+    quiet: bool = typer.Option(False, "--quiet", "-q", help="Suppress per-sentence structlog output"),
+):
+    """
+    Backfill an archive of VADASE captures into TimescaleDB in parallel.
+    """
+    if quiet:
+        structlog.configure(
+            wrapper_class=structlog.make_filtering_bound_logger(40)  # ERROR+ only
+        )
+
+    if not archive.is_dir():
+        typer.echo(f"Error: {archive} is not a directory.")
+        raise typer.Exit(code=1)
+
+    workers = max(1, workers)
+    if not dry_run:
+        # Every worker holds at least one connection: more workers than the
+        # budget would overrun it.
+        db_connections = max(1, db_connections)
+        if workers > db_connections:
+            typer.echo(f"Limiting workers to {db_connections} (the --db-connections budget).")
+            workers = db_connections
+    options = BackfillOptions(
+        threshold_mm_s=threshold,
+        force_integration=force_integration,
+        decay_factor=decay,
+        dry_run=dry_run,
+        batch_size=batch_size,
+        db_connections_per_worker=max(1, db_connections // workers),
+    )
+
+    def report(result: StationDayResult) -> None:
+        typer.echo(
+            f"  {result.key}: {result.files} files, {result.velocities} vel, "
+            f"{result.displacements} disp, {result.events} events ({result.elapsed_s:.1f} s)"
+        )
+
+    summary = run_backfill(
+        archive, BackfillCheckpoint(checkpoint), options,
+        workers=workers, pattern=pattern, stations=station, on_result=report,
+    )
+
+    typer.echo(
+        f"Backfill finished: {len(summary.completed)} station-days ingested, "
+        f"{summary.skipped} already checkpointed, {len(summary.failed)} failed."
+    )
+    for key, error in summary.failed:
+        typer.echo(f"  FAILED {key}: {error}")
+    if summary.failed:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
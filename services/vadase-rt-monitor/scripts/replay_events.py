@@ -92,6 +92,8 @@ async def run_async(
     decay_factor: float,
     window_size: int,
     speed: float,
+    archive_dir: Path | None = None,
+    profile_out: Path | None = None,
 ):
     if mode == "replay":
         strategy = RealTimeStrategy(base_date=base_date, speed=speed)
@@ -123,15 +125,31 @@ async def run_async(
     # CompositeOutputPort handles the single-writer case identically.
     output_port = _DemoEventPort(CompositeOutputPort(writers))
 
+    # --profile wraps the ports so write time is charged to the output stage.
+    profiler = None
+    core_port = output_port
+    if profile_out is not None:
+        from src.utils.profiler import IngestProfiler
+        profiler = IngestProfiler()
+        core_port = profiler.timed_port(output_port)
+
+    archive = None
+    if archive_dir is not None:
+        from src.adapters.outputs.archive import NMEAArchiveWriter
+        archive = NMEAArchiveWriter(archive_dir)
+    archive_port = profiler.timed_port(archive) if profiler and archive else archive
+
     queue = asyncio.Queue(maxsize=1000)
     stop_event = asyncio.Event()
 
     core = IngestionCore(
         station_id=station_id,
-        output_port=output_port,
+        output_port=core_port,
         threshold_mm_s=threshold,
         force_integration=force_integration,
         decay_factor=decay_factor,
+        archive=archive_port,
+        profiler=profiler,
     )
 
     typer.echo(f"Starting {mode.upper()} replay: {path}")
@@ -141,6 +159,10 @@ async def run_async(
     # fails, so a dead consumer (e.g. DB down) surfaces its error instead of
     # leaving the producer blocked forever on the bounded queue.
     await output_port.connect()
+    if archive is not None:
+        await archive.connect()
+    if profiler is not None:
+        await profiler.start()
     try:
         async with asyncio.TaskGroup() as tg:
             tg.create_task(adapter.start(queue, stop_event))
@@ -148,7 +170,13 @@ async def run_async(
         typer.echo("Replay complete.")
     finally:
         stop_event.set()
+        if archive is not None:
+            await archive.close()
         await output_port.close()
+        if profiler is not None:
+            await profiler.stop()
+            typer.echo(profiler.report())
+            typer.echo(f"Folded stacks written to {profiler.write_folded(profile_out)}")
 
 
 @app.command()
@@ -160,12 +188,15 @@ def main(
     threshold: float = typer.Option(15.0, "--threshold", help="Event threshold mm/s"),
     dry_run: bool = typer.Option(False, "--dry-run", help="Discard DB writes (no asyncpg import)"),
     plot: bool = typer.Option(False, "--plot", help="Live matplotlib ENU plot"),
-    pattern: str = typer.Option("*.rtl", "--pattern", "-p", help="File glob inside directory"),
+    pattern: str = typer.Option("*.rtl", "--pattern", "-p", help="File glob inside directory (*.vda replays archives)"),
     force_integration: bool = typer.Option(False, "--force-integration", help="Force MANUAL mode"),
     decay: float = typer.Option(1.0, "--decay", help="Leaky integrator decay factor"),
     window_size: int = typer.Option(600, "--window-size", "-w", help="Plot window size (samples)"),
     quiet: bool = typer.Option(False, "--quiet", "-q", help="Suppress structlog; show banners only"),
     speed: float = typer.Option(1.0, "--speed", help="Playback speed multiplier for --mode replay (e.g. 8 = 8× faster than realtime)"),
+    archive_dir: Path | None = typer.Option(None, "--archive-dir", help="Also archive parsed records as .vda station-day files"),
+    profile: bool = typer.Option(False, "--profile", help="Per-station stage timing + loop sampling; report on exit"),
+    profile_out: Path = typer.Option(Path("replay_profile.folded"), "--profile-out", help="Folded-stack flamegraph dump for --profile"),
 ):
     if quiet:
         structlog.configure(
@@ -189,7 +220,7 @@ def main(
             run_async(
                 file_path, mode, parsed_date, station_id, threshold,
                 dry_run, plot, pattern, force_integration, decay, window_size,
-                speed,
+                speed, archive_dir, profile_out if profile else None,
             )
         )
     except KeyboardInterrupt:
@@ -17,7 +17,12 @@ logger = structlog.get_logger()
 app = typer.Typer()
 
 
-async def run_service(config_path: str, dry_run: bool):
+async def run_service(
+    config_path: str,
+    dry_run: bool,
+    archive_dir: Path | None = None,
+    profile_out: Path | None = None,
+):
     """
     Main entry point for the VADASE RT-Monitor ingestor service.
     Hexagonal Architecture: NTRIP -> Queue -> IngestionCore -> OutputPort.
@@ -45,6 +50,25 @@ async def run_service(config_path: str, dry_run: bool):
 
     await db_writer.connect()
 
+    # --profile: per-station stage timers + event-loop sampler. The writers
+    # are wrapped so output time is charged to the station that wrote.
+    profiler = None
+    output_port = db_writer
+    if profile_out is not None:
+        from src.utils.profiler import IngestProfiler
+        profiler = IngestProfiler()
+        output_port = profiler.timed_port(db_writer)
+        await profiler.start()
+
+    # Raw-record tap: parsed LVM/LDM go to per-station-day .vda files before
+    # any processing, so live streams keep a replayable ground truth.
+    archive = None
+    if archive_dir is not None:
+        from src.adapters.outputs.archive import NMEAArchiveWriter
+        archive = NMEAArchiveWriter(archive_dir)
+        await archive.connect()
+    archive_port = profiler.timed_port(archive) if profiler and archive else archive
+
     tasks = []
     stop_events = []
 
@@ -67,9 +91,11 @@ async def run_service(config_path: str, dry_run: bool):
 
         core = IngestionCore(
             station_id=station_id,
-            output_port=db_writer,
+            output_port=output_port,
             threshold_mm_s=s.get('threshold_mm_s', 15.0),
-            decay_factor=decay
+            decay_factor=decay,
+            archive=archive_port,
+            profiler=profiler,
         )
 
         queue = asyncio.Queue(maxsize=100)
@@ -88,16 +114,25 @@ async def run_service(config_path: str, dry_run: bool):
         for se in stop_events:
             se.set()
         await asyncio.sleep(1)
+        if archive is not None:
+            await archive.close()
         await db_writer.close()
+        if profiler is not None:
+            await profiler.stop()
+            print(profiler.report())
+            print(f"Folded stacks written to {profiler.write_folded(profile_out)}")
 
 
 @app.command()
 def main(
     config: str = typer.Option("config/stations.yml", "--config", "-c", help="Path to station config file"),
-    dry_run: bool = typer.Option(False, "--dry-run", help="Discard all DB writes (no asyncpg import)")
+    dry_run: bool = typer.Option(False, "--dry-run", help="Discard all DB writes (no asyncpg import)"),
+    archive_dir: Path | None = typer.Option(None, "--archive-dir", help="Archive raw records as .vda station-day files"),
+    profile: bool = typer.Option(False, "--profile", help="Per-station stage timing + loop sampling; report on shutdown"),
+    profile_out: Path = typer.Option(Path("ingestor_profile.folded"), "--profile-out", help="Folded-stack flamegraph dump for --profile"),
 ):
     try:
-        asyncio.run(run_service(config, dry_run))
+        asyncio.run(run_service(config, dry_run, archive_dir, profile_out if profile else None))
     except KeyboardInterrupt:
         pass
 
@@ -1,7 +1,8 @@
 import asyncio
 import aiofiles
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+from src.parsers.nmea_archive import ARCHIVE_SUFFIX, read_archive
 from src.ports.inputs import InputPort
 from src.strategies.playback import PlaybackStrategy
 
@@ -9,19 +10,38 @@ class DirectoryAdapter(InputPort):
     """
     Input Adapter that reads NMEA files from a directory.
     Uses a Strategy to control playback speed.
+
+    An explicit `files` list overrides the directory glob — the archive
+    backfill hands each worker one station-day, whose files need not share a
+    directory or a glob-expressible name.
+
+    Binary .vda archives are read directly: their already-parsed records are
+    queued as (kind, record) pairs, so IngestionCore never re-parses them.
     """
-    def __init__(self, directory: Path, strategy: PlaybackStrategy, pattern: str = "*.nmea"):
+    def __init__(
+        self,
+        directory: Path,
+        strategy: PlaybackStrategy,
+        pattern: str = "*.nmea",
+        files: Optional[List[Path]] = None,
+    ):
         self.directory = directory
         self.strategy = strategy
         self.pattern = pattern
+        self.files = files
 
     async def start(self, queue: asyncio.Queue, stop_event: asyncio.Event) -> None:
-        files = sorted(self.directory.glob(self.pattern), key=lambda p: p.name)
+        candidates = self.files if self.files is not None else self.directory.glob(self.pattern)
+        files = sorted(candidates, key=lambda p: p.name)
         
         for file_path in files:
             if stop_event.is_set():
                 break
-                
+
+            if file_path.suffix == ARCHIVE_SUFFIX:
+                await self._replay_archive(file_path, queue, stop_event)
+                continue
+
             async with aiofiles.open(file_path, mode='r') as f:
                 async for line in f:
                     if stop_event.is_set():
@@ -42,5 +62,16 @@ class DirectoryAdapter(InputPort):
         # Let's put a None sentinel to indicate end of all files.
         await queue.put(None)
 
+    async def _replay_archive(
+        self, file_path: Path, queue: asyncio.Queue, stop_event: asyncio.Event
+    ) -> None:
+        # Decoding a station-day is CPU-bound; keep it off the event loop.
+        records = await asyncio.to_thread(lambda: list(read_archive(file_path)))
+        for kind, record in records:
+            if stop_event.is_set():
+                break
+            await self.strategy.wait_timestamp(record["timestamp"])
+            await queue.put((kind, record))
+
     async def stop(self) -> None:
         pass
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import structlog
+from src.parsers.nmea_archive import (
+    ARCHIVE_SUFFIX,
+    KIND_LDM,
+    KIND_LVM,
+    encode_chunk,
+    write_file_header,
+)
+
+logger = structlog.get_logger()
+
+_BufferKey = Tuple[str, str, date]  # (station, kind, UTC day)
+
+
+def archive_path(root: Path, station: str, day: date) -> Path:
+    """<root>/<STATION>/<STATION>_<YYYYMMDD>.vda — one file per station-day."""
+    return Path(root) / station / f"{station}_{day:%Y%m%d}{ARCHIVE_SUFFIX}"
+
+
+class NMEAArchiveWriter:
+    """
+    OutputPort tap that archives raw parsed LVM/LDM records to .vda files.
+
+    Wired in as IngestionCore's `archive` port, so it receives each record as
+    the parser produced it — before Smart Integration overwrites dE/dN/dU or
+    the completeness filter drops it. Records are buffered per station, kind
+    and UTC day and appended as one compressed chunk once `chunk_size`
+    records accumulate or `flush_interval` seconds pass; a crash loses at
+    most the unflushed tail. Chunk encoding and file I/O run in a worker
+    thread so the 1 Hz hot path never waits on the disk.
+    """
+
+    def __init__(self, root: Path, chunk_size: int = 3600, flush_interval: float = 300.0):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self._buffers: Dict[_BufferKey, List[Dict[str, Any]]] = defaultdict(list)
+        self._lock = asyncio.Lock()
+        self._last_flush = time.monotonic()
+        self.log = logger.bind(component="nmea_archive", root=str(self.root))
+
+    async def connect(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._last_flush = time.monotonic()
+
+    async def close(self) -> None:
+        await self.flush()
+
+    async def write_velocity(self, station_id: str, data: Dict[str, Any]) -> None:
+        await self._append(station_id, KIND_LVM, data)
+
+    async def write_displacement(self, station_id: str, data: Dict[str, Any]) -> None:
+        await self._append(station_id, KIND_LDM, data)
+
+    async def write_event_detection(
+        self,
+        station: str,
+        detection_time: datetime,
+        peak_velocity: float,
+        peak_displacement: float,
+        duration: float,
+    ) -> None:
+        # Events are derived products, not ground truth — nothing to archive.
+        pass
+
+    async def _append(self, station_id: str, kind: str, data: Dict[str, Any]) -> None:
+        key = (station_id, kind, data["timestamp"].date())
+        buf = self._buffers[key]
+        buf.append(data)
+        if len(buf) >= self.chunk_size:
+            await self._flush_keys([key])
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Append every non-empty buffer to its station-day file."""
+        await self._flush_keys(list(self._buffers))
+        self._last_flush = time.monotonic()
+
+    async def _flush_keys(self, keys: List[_BufferKey]) -> None:
+        batches = []
+        for key in keys:
+            records = self._buffers.pop(key, None)
+            if records:
+                batches.append((key, records))
+        if not batches:
+            return
+        async with self._lock:
+            for (station, kind, day), records in batches:
+                try:
+                    await asyncio.to_thread(self._append_chunk, station, kind, day, records)
+                except OSError as exc:
+                    self.log.error(
+                        "archive_write_failed", station=station, kind=kind,
+                        day=day.isoformat(), records=len(records), error=str(exc),
+                    )
+
+    def _append_chunk(self, station: str, kind: str, day: date, records: List[Dict[str, Any]]) -> None:
+        path = archive_path(self.root, station, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records.sort(key=lambda r: r["timestamp"])
+        chunk = encode_chunk(kind, records)
+        with open(path, "ab") as f:
+            if f.tell() == 0:
+                write_file_header(f)
+            f.write(chunk)
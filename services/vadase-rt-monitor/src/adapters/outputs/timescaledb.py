@@ -17,6 +17,9 @@ Key design decisions encoded here:
   DL-016  bounded buffers (buffer_max_size=10000): drop-oldest on overflow
   DL-017  hot path never blocks/raises on DB issues; event inserts are synchronous
   DL-018  camelCase->snake_case translation is positional in executemany tuples
+  DL-019  backpressure=True (archive backfill): a full batch is flushed inline and
+          the writer awaits it, so a producer faster than the DB is throttled
+          instead of tripping drop-oldest; flush errors propagate to the caller
 """
 
 import asyncio
@@ -75,6 +78,9 @@ class TimescaleDBAdapter:
         flush_interval: float = 1.0,
         acquire_timeout: float = 5.0,
         buffer_max_size: int = 10_000,
+        pool_min_size: int = 2,
+        pool_max_size: int = 10,
+        backpressure: bool = False,
     ) -> None:
         if dsn is None:
             user = os.environ.get("DB_USER", "pogf_user")
@@ -88,6 +94,9 @@ class TimescaleDBAdapter:
         self._flush_interval = flush_interval
         self._acquire_timeout = acquire_timeout
         self._buffer_max_size = buffer_max_size
+        self._pool_min_size = min(pool_min_size, pool_max_size)
+        self._pool_max_size = pool_max_size
+        self._backpressure = backpressure
 
         self._pool: Optional[asyncpg.Pool] = None
         self._flush_task: Optional[asyncio.Task] = None  # type: ignore[type-arg]
@@ -123,8 +132,8 @@ class TimescaleDBAdapter:
         dsn_host = dsn_parts[-1] if "@" in self._dsn else "<no-host-in-dsn>"
         self._pool = await asyncpg.create_pool(
             dsn=self._dsn,
-            min_size=2,
-            max_size=10,
+            min_size=self._pool_min_size,
+            max_size=self._pool_max_size,
         )
         self._flush_task = asyncio.create_task(self._periodic_flush())
         self.log.info("connected", dsn_host=dsn_host)
@@ -144,12 +153,25 @@ class TimescaleDBAdapter:
             self._pool = None
         self.log.info("closed")
 
+    @property
+    def pending_rows(self) -> int:
+        """Rows still buffered; non-zero after close() means the final flush failed."""
+        return len(self._velocity_buffer) + len(self._displacement_buffer)
+
+    @property
+    def dropped_rows(self) -> int:
+        """Rows discarded by drop-oldest overflow since construction (DL-016)."""
+        return self._velocity_dropped + self._displacement_dropped
+
     # ------------------------------------------------------------------
     # OutputPort Protocol methods
     # ------------------------------------------------------------------
 
     async def write_velocity(self, station_id: str, data: Dict[str, Any]) -> None:
-        """Buffer a velocity row. Flush is fire-and-forget when batch_size reached."""
+        """Buffer a velocity row. Flush is fire-and-forget when batch_size reached.
+
+        With backpressure the flush is awaited instead (DL-019).
+        """
         # Parser returns camelCase keys (vE, vN, vU, vH_magnitude, cq).
         # SQL columns are snake_case (v_east, v_north, v_up, v_horizontal, quality).
         # Translation is positional in this tuple (DL-010, DL-018).
@@ -170,10 +192,16 @@ class TimescaleDBAdapter:
                 and not self._velocity_flushing
             )
         if should_flush:
-            asyncio.create_task(self._flush_velocity())
+            if self._backpressure:
+                await self._flush_velocity()
+            else:
+                asyncio.create_task(self._flush_velocity())
 
     async def write_displacement(self, station_id: str, data: Dict[str, Any]) -> None:
-        """Buffer a displacement row. Flush is fire-and-forget when batch_size reached."""
+        """Buffer a displacement row. Flush is fire-and-forget when batch_size reached.
+
+        With backpressure the flush is awaited instead (DL-019).
+        """
         row: _DispRow = (
             data["timestamp"],
             station_id,
@@ -193,7 +221,10 @@ class TimescaleDBAdapter:
                 and not self._displacement_flushing
             )
         if should_flush:
-            asyncio.create_task(self._flush_displacement())
+            if self._backpressure:
+                await self._flush_displacement()
+            else:
+                asyncio.create_task(self._flush_displacement())
 
     async def write_event_detection(
         self,
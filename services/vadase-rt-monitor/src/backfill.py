@@ -0,0 +1,353 @@
+"""
+Parallel historical backfill of archived VADASE NMEA captures.
+
+An archive is a tree of `.rtl` captures organized per station and day. Each
+station-day is an independent unit of work: a worker process replays its files
+through a fresh IngestionCore (FastImportStrategy — the bulk import path) and
+writes through its own TimescaleDBAdapter, so the pool size is bounded per
+worker and the total connection budget is `workers × db_connections_per_worker`.
+
+Finished station-days are appended to a checkpoint log by the parent process;
+a restarted backfill skips everything already recorded there. A station-day
+that fails is NOT checkpointed, so the next run retries it — ON CONFLICT DO
+NOTHING (DL-006) makes re-ingesting its partial rows harmless.
+
+Integrator state (Smart Integration, event detection) restarts at each day
+boundary: station-days are processed independently and in any order.
+"""
+
+import asyncio
+import json
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from src.adapters.inputs.directory import DirectoryAdapter
+from src.adapters.outputs.null import NullOutputPort
+from src.domain.processor import IngestionCore
+from src.ports.outputs import OutputPort
+from src.strategies.playback import FastImportStrategy
+
+logger = structlog.get_logger()
+
+# "NMEA_DGOS LDM_20260128_000000.rtl" — receiver capture naming.
+_CAPTURE_RE = re.compile(r"NMEA_(?P<station>[A-Za-z0-9]+)\b.*?(?P<day>\d{8})_\d{6}")
+_DAY_RE = re.compile(r"(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?!\d)")
+
+
+@dataclass(frozen=True, order=True)
+class StationDay:
+    """All archived capture files of one station for one UTC day."""
+
+    station: str
+    day: date
+    files: Tuple[Path, ...] = field(default=(), compare=False)
+
+    @property
+    def key(self) -> str:
+        return f"{self.station}/{self.day.isoformat()}"
+
+
+@dataclass(frozen=True)
+class BackfillOptions:
+    """Per-worker processing settings (must stay picklable for the process pool)."""
+
+    threshold_mm_s: float = 15.0
+    force_integration: bool = False
+    decay_factor: float = 1.0
+    dry_run: bool = False
+    batch_size: int = 1000
+    db_connections_per_worker: int = 2
+
+
+@dataclass(frozen=True)
+class StationDayResult:
+    station: str
+    day: date
+    files: int
+    velocities: int
+    displacements: int
+    events: int
+    elapsed_s: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.station}/{self.day.isoformat()}"
+
+
+@dataclass
+class BackfillSummary:
+    completed: List[StationDayResult] = field(default_factory=list)
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    skipped: int = 0
+
+
+def _parse_day(text: str) -> Optional[date]:
+    for m in _DAY_RE.finditer(text):
+        try:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            continue
+    return None
+
+
+def _classify(path: Path, root: Path) -> Optional[Tuple[str, date]]:
+    """Station and day of one capture: filename first, then enclosing directories."""
+    rel_dirs = path.relative_to(root).parts[:-1]
+    m = _CAPTURE_RE.search(path.name)
+    if m:
+        station = m.group("station").upper()
+        day = _parse_day(m.group("day"))
+    else:
+        # <root>/<STATION>/<YYYY-MM-DD>/... layouts carry no station in the name
+        station = rel_dirs[0].upper() if rel_dirs else None
+        day = _parse_day(path.name)
+    if day is None:
+        for part in reversed(rel_dirs):
+            day = _parse_day(part)
+            if day is not None:
+                break
+    if station is None or day is None:
+        return None
+    return station, day
+
+
+def discover_station_days(root: Path, pattern: str = "*.rtl") -> List[StationDay]:
+    """Group every capture under root by (station, day), sorted by station then day."""
+    groups: Dict[Tuple[str, date], List[Path]] = defaultdict(list)
+    for path in root.rglob(pattern):
+        if not path.is_file():
+            continue
+        key = _classify(path, root)
+        if key is None:
+            logger.warning("backfill_unclassified_file", path=str(path))
+            continue
+        groups[key].append(path)
+    return sorted(
+        StationDay(station, day, tuple(sorted(files, key=lambda p: p.name)))
+        for (station, day), files in groups.items()
+    )
+
+
+class BackfillCheckpoint:
+    """
+    Append-only log of finished station-days, one JSON object per line.
+
+    Station-days are coarse (minutes of work each), so every entry is flushed
+    as soon as it is recorded. A torn final line from a crash is skipped on
+    load — that station-day is simply reprocessed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: set[str] = set()
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self.done.add(json.loads(line)["key"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+
+    def is_done(self, station_day: StationDay) -> bool:
+        return station_day.key in self.done
+
+    def mark_done(self, result: StationDayResult) -> None:
+        if result.key in self.done:
+            return
+        entry = {
+            "key": result.key,
+            "files": result.files,
+            "velocities": result.velocities,
+            "displacements": result.displacements,
+            "events": result.events,
+            "elapsed_s": round(result.elapsed_s, 3),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+        self.done.add(result.key)
+
+
+class _CountingPort:
+    """
+    Pass-through OutputPort that tallies writes for the station-day report.
+
+    Failed event inserts are counted before re-raising: IngestionCore logs
+    and swallows them, and the backfill must not checkpoint a day whose
+    event catalog entry never reached the database.
+    """
+
+    def __init__(self, wrapped: OutputPort):
+        self._wrapped = wrapped
+        self.velocities = 0
+        self.displacements = 0
+        self.events = 0
+        self.event_errors = 0
+
+    async def connect(self) -> None:
+        await self._wrapped.connect()
+
+    async def close(self) -> None:
+        await self._wrapped.close()
+
+    async def write_velocity(self, station_id: str, data: Dict[str, Any]) -> None:
+        self.velocities += 1
+        await self._wrapped.write_velocity(station_id, data)
+
+    async def write_displacement(self, station_id: str, data: Dict[str, Any]) -> None:
+        self.displacements += 1
+        await self._wrapped.write_displacement(station_id, data)
+
+    async def write_event_detection(
+        self,
+        station: str,
+        detection_time: datetime,
+        peak_velocity: float,
+        peak_displacement: float,
+        duration: float,
+    ) -> None:
+        self.events += 1
+        try:
+            await self._wrapped.write_event_detection(
+                station, detection_time, peak_velocity, peak_displacement, duration
+            )
+        except Exception:
+            self.event_errors += 1
+            raise
+
+
+def _make_writer(options: BackfillOptions) -> OutputPort:
+    if options.dry_run:
+        return NullOutputPort()
+    # Imported lazily: asyncpg never loads in dry-run workers.
+    from src.adapters.outputs.timescaledb import TimescaleDBAdapter
+
+    return TimescaleDBAdapter(
+        batch_size=options.batch_size,
+        buffer_max_size=max(options.batch_size * 2, 10_000),
+        pool_min_size=1,
+        pool_max_size=options.db_connections_per_worker,
+        backpressure=True,
+    )
+
+
+async def _process_async(station_day: StationDay, options: BackfillOptions) -> StationDayResult:
+    started = time.monotonic()
+    adapter = DirectoryAdapter(
+        directory=station_day.files[0].parent if station_day.files else Path("."),
+        strategy=FastImportStrategy(),
+        files=list(station_day.files),
+    )
+    writer = _make_writer(options)
+    output_port = _CountingPort(writer)
+    core = IngestionCore(
+        station_id=station_day.station,
+        output_port=output_port,
+        threshold_mm_s=options.threshold_mm_s,
+        force_integration=options.force_integration,
+        decay_factor=options.decay_factor,
+    )
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+    stop_event = asyncio.Event()
+
+    await output_port.connect()
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(adapter.start(queue, stop_event))
+            tg.create_task(core.consume(queue, stop_event))
+    finally:
+        stop_event.set()
+        await output_port.close()
+
+    # A flush that failed mid-run restores its batch to the buffer, so the
+    # day is only lost if rows are still undelivered after the final flush.
+    # Raising keeps the station-day out of the checkpoint for the next run.
+    lost = getattr(writer, "pending_rows", 0) + getattr(writer, "dropped_rows", 0)
+    if lost or output_port.event_errors:
+        raise RuntimeError(
+            f"{station_day.key}: {lost} rows and {output_port.event_errors} events "
+            "not written to the database"
+        )
+
+    return StationDayResult(
+        station=station_day.station,
+        day=station_day.day,
+        files=len(station_day.files),
+        velocities=output_port.velocities,
+        displacements=output_port.displacements,
+        events=output_port.events,
+        elapsed_s=time.monotonic() - started,
+    )
+
+
+def process_station_day(station_day: StationDay, options: BackfillOptions) -> StationDayResult:
+    """Worker entry point: ingest one station-day in its own event loop."""
+    return asyncio.run(_process_async(station_day, options))
+
+
+def run_backfill(
+    root: Path,
+    checkpoint: BackfillCheckpoint,
+    options: BackfillOptions,
+    workers: int = 4,
+    pattern: str = "*.rtl",
+    stations: Optional[List[str]] = None,
+    on_result: Optional[Callable[[StationDayResult], None]] = None,
+) -> BackfillSummary:
+    """
+    Ingest every station-day under root not yet recorded in the checkpoint.
+
+    Station-days are spread across a process pool; results are checkpointed in
+    the parent as they complete, so an interrupted run loses only in-flight work.
+    """
+    summary = BackfillSummary()
+    wanted = {s.upper() for s in stations} if stations else None
+    pending = []
+    for sd in discover_station_days(root, pattern):
+        if wanted is not None and sd.station not in wanted:
+            continue
+        if checkpoint.is_done(sd):
+            summary.skipped += 1
+            continue
+        pending.append(sd)
+
+    logger.info(
+        "backfill_starting",
+        pending=len(pending), skipped=summary.skipped, workers=workers,
+        dry_run=options.dry_run,
+    )
+    if not pending:
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_station_day, sd, options): sd for sd in pending}
+        for future in as_completed(futures):
+            sd = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                logger.error("backfill_station_day_failed", key=sd.key, error=str(exc))
+                summary.failed.append((sd.key, str(exc)))
+                continue
+            checkpoint.mark_done(result)
+            summary.completed.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    return summary
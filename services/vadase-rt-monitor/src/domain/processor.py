@@ -1,10 +1,12 @@
 import asyncio
+import time
 import structlog
 from datetime import datetime
 from enum import Enum, auto
 from typing import Optional, Dict, Any
 from src.ports.outputs import OutputPort
 from src.parsers.nmea_parser import parse_lvm, parse_ldm, NMEAChecksumError
+from src.parsers.nmea_archive import KIND_LDM, KIND_LVM
 from src.utils.metrics import compute_horizontal_magnitude, convert_m_to_mm
 
 logger = structlog.get_logger()
@@ -25,6 +27,13 @@ class IngestionCore:
     Hexagonal Core: Consumes NMEA sentences from a queue and drives Output ports.
     Agnostic of where data comes from (File/TCP).
     Includes "Smart Integration" to handle bad receivers (Velocity-as-Displacement).
+
+    Queue items are raw NMEA sentences (str) or already-parsed (kind, record)
+    pairs replayed from a .vda archive, which skip the parser entirely.
+    The optional `archive` port receives every parsed record untouched —
+    before integration or the completeness filter — as the ground-truth tap.
+    An optional `profiler` (src.utils.profiler.IngestProfiler) receives
+    per-sentence parse and total processing times for --profile runs.
     """
     def __init__(
         self,
@@ -33,7 +42,9 @@ class IngestionCore:
         threshold_mm_s: float = 15.0,
         min_completeness: float = 0.5,
         force_integration: bool = False,
-        decay_factor: float = 1.0
+        decay_factor: float = 1.0,
+        archive: Optional[OutputPort] = None,
+        profiler: Optional[Any] = None,
     ):
         self.station_id = station_id
         self.output_port = output_port
@@ -41,6 +52,8 @@ class IngestionCore:
         self.min_completeness = min_completeness
         self.force_integration = force_integration
         self.decay_factor = decay_factor
+        self.archive = archive
+        self.profiler = profiler
         self.logger = logger.bind(station=station_id, component="core")
 
         # Event Detection State
@@ -117,10 +130,14 @@ class IngestionCore:
             if line is None: # Sentinel
                 break
 
-            await self.process_sentence(line)
+            if isinstance(line, tuple):
+                await self.process_record(*line)
+            else:
+                await self.process_sentence(line)
             queue.task_done()
 
     async def process_sentence(self, sentence: str):
+        t0 = time.perf_counter() if self.profiler is not None else 0.0
         try:
             if sentence.startswith('$GNLVM') or sentence.startswith('$GPLVM'):
                 await self.handle_velocity(sentence)
@@ -130,11 +147,33 @@ class IngestionCore:
             self.logger.warning("checksum_error")
         except Exception as e:
             self.logger.error("processing_error", error=str(e))
+        if self.profiler is not None:
+            self.profiler.record(self.station_id, "process", time.perf_counter() - t0)
+
+    async def process_record(self, kind: str, data: Dict[str, Any]):
+        """Drive a pre-parsed archive record through the same path as a sentence."""
+        t0 = time.perf_counter() if self.profiler is not None else 0.0
+        try:
+            if kind == KIND_LVM:
+                await self._on_velocity(data)
+            elif kind == KIND_LDM:
+                await self._on_displacement(data)
+        except Exception as e:
+            self.logger.error("processing_error", error=str(e))
+        if self.profiler is not None:
+            self.profiler.record(self.station_id, "process", time.perf_counter() - t0)
 
     async def handle_velocity(self, sentence: str):
+        t0 = time.perf_counter() if self.profiler is not None else 0.0
         data = parse_lvm(sentence)
+        if self.profiler is not None:
+            self.profiler.record(self.station_id, "parse", time.perf_counter() - t0)
         if not data: return
+        if self.archive is not None:
+            await self.archive.write_velocity(self.station_id, dict(data))
+        await self._on_velocity(data)
 
+    async def _on_velocity(self, data: Dict[str, Any]):
         # Store for displacement comparison/integration
         self.last_velocity_data = data
 
@@ -163,8 +202,16 @@ class IngestionCore:
         self.last_velocity_time = current_time
 
     async def handle_displacement(self, sentence: str):
+        t0 = time.perf_counter() if self.profiler is not None else 0.0
         data = parse_ldm(sentence)
+        if self.profiler is not None:
+            self.profiler.record(self.station_id, "parse", time.perf_counter() - t0)
         if not data: return
+        if self.archive is not None:
+            await self.archive.write_displacement(self.station_id, dict(data))
+        await self._on_displacement(data)
+
+    async def _on_displacement(self, data: Dict[str, Any]):
         if data['overall_completeness'] < self.min_completeness: return
 
         # Smart Integration Detection
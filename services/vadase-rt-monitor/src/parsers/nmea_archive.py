@@ -0,0 +1,262 @@
+"""
+Compact binary archive format (.vda) for parsed VADASE LVM/LDM records.
+
+One file holds one station-day. It is a 6-byte file header followed by
+self-describing chunks, so a live writer can append a chunk at a time and a
+crash mid-write only loses the torn final chunk:
+
+    file   := b"VDAR" version:u8 reserved:u8  chunk*
+    chunk  := kind:u8 count:u32 t_first:i64 t_last:i64 length:u32  payload
+    payload = zlib(columns)
+
+Chunk headers double as the timestamp index: read_index() walks them with
+seeks only, and read_archive() skips every chunk outside the requested window
+without decompressing it.
+
+Columns are stored in record order, one contiguous array per field:
+  - datetimes: epoch microseconds, delta-encoded (first value absolute)
+  - integers:  delta-encoded
+  - floats:    NMEA fields are fixed-point decimals, so a column is stored as
+               delta-encoded integers scaled by the smallest 10**k (k <= 9)
+               that round-trips every value bit-exactly; a column with no such
+               k falls back to float64 bit patterns XOR-ed with the previous
+               value and byte-shuffled
+Integer deltas are narrowed to the smallest int width that holds them. Every
+transform is exactly invertible — decoded records compare equal to the dicts
+parse_lvm/parse_ldm produced.
+"""
+
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from heapq import merge
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ARCHIVE_SUFFIX = ".vda"
+
+_MAGIC = b"VDAR"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sBB")
+_CHUNK_HEADER = struct.Struct("<BIqqI")
+
+_INT_WIDTHS = (1, 2, 4, 8)  # bytes
+_MAX_DECIMALS = 9
+_XOR_FLOAT = 0xFF  # float column encoding tag: no exact decimal scale
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_US = timedelta(microseconds=1)
+
+KIND_LVM = "LVM"
+KIND_LDM = "LDM"
+
+# (datetime columns, int columns, float columns) per record kind — the field
+# names are exactly those returned by the NMEA parser.
+_SCHEMA: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]] = {
+    KIND_LVM: (
+        ("timestamp",),
+        ("n_sats",),
+        ("vE", "vN", "vU", "varE", "varN", "varU", "covEN", "covEU", "covUN", "cq"),
+    ),
+    KIND_LDM: (
+        ("timestamp", "start_time"),
+        ("n_sats", "reset_indicator"),
+        (
+            "dE", "dN", "dU", "varE", "varN", "varU", "covEN", "covEU", "covUN", "cq",
+            "epoch_completeness", "overall_completeness",
+        ),
+    ),
+}
+_KIND_CODES = {KIND_LVM: 0, KIND_LDM: 1}
+_CODE_KINDS = {v: k for k, v in _KIND_CODES.items()}
+
+
+class ArchiveFormatError(ValueError):
+    """Raised when a file is not a .vda archive or uses an unknown version."""
+
+
+@dataclass(frozen=True)
+class ChunkIndexEntry:
+    kind: str
+    count: int
+    t_first: datetime
+    t_last: datetime
+    offset: int  # file offset of the compressed payload
+    length: int
+
+
+def _to_us(ts: datetime) -> int:
+    return (ts - _EPOCH) // _US
+
+
+def _from_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def _delta(values: np.ndarray) -> np.ndarray:
+    out = values.copy()
+    out[1:] = np.diff(values)
+    return out
+
+
+def _pack_ints(values: np.ndarray) -> bytes:
+    """Delta-encode an int64 column into the narrowest width; 1-byte width tag first."""
+    deltas = _delta(values.astype(np.int64))
+    lo, hi = (int(deltas.min()), int(deltas.max())) if len(deltas) else (0, 0)
+    for size in _INT_WIDTHS:
+        info = np.iinfo(f"<i{size}")
+        if info.min <= lo and hi <= info.max:
+            return bytes([size]) + deltas.astype(f"<i{size}").tobytes()
+    raise AssertionError("unreachable: int64 always fits")
+
+
+def _unpack_ints(raw: bytes, pos: int, n: int) -> Tuple[np.ndarray, int]:
+    size = raw[pos]
+    deltas = np.frombuffer(raw, dtype=f"<i{size}", count=n, offset=pos + 1)
+    return np.cumsum(deltas, dtype=np.int64), pos + 1 + size * n
+
+
+def _pack_floats(values: np.ndarray) -> bytes:
+    for k in range(_MAX_DECIMALS + 1):
+        scale = 10.0 ** k
+        scaled = np.round(values * scale)
+        if np.all(np.abs(scaled) < 2 ** 53) and np.array_equal(scaled / scale, values):
+            return bytes([k]) + _pack_ints(scaled.astype(np.int64))
+    return bytes([_XOR_FLOAT]) + _xor_shuffle(values)
+
+
+def _unpack_floats(raw: bytes, pos: int, n: int) -> Tuple[np.ndarray, int]:
+    tag = raw[pos]
+    if tag == _XOR_FLOAT:
+        return _xor_unshuffle(raw[pos + 1:pos + 1 + 8 * n], n), pos + 1 + 8 * n
+    ints, pos = _unpack_ints(raw, pos + 1, n)
+    return ints / (10.0 ** tag), pos
+
+
+def _xor_shuffle(values: np.ndarray) -> bytes:
+    bits = values.astype("<f8").view("<u8")
+    xored = bits.copy()
+    xored[1:] ^= bits[:-1]
+    return xored.view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def _xor_unshuffle(raw: bytes, n: int) -> np.ndarray:
+    xored = np.frombuffer(raw, dtype=np.uint8).reshape(8, n).T.copy().view("<u8").ravel()
+    return np.bitwise_xor.accumulate(xored).view("<f8")
+
+
+def encode_chunk(kind: str, records: Sequence[Dict[str, Any]]) -> bytes:
+    """Encode records of one kind (in time order) into a complete chunk."""
+    dt_cols, int_cols, float_cols = _SCHEMA[kind]
+    n = len(records)
+    parts: List[bytes] = []
+    for name in dt_cols:
+        parts.append(_pack_ints(np.fromiter((_to_us(r[name]) for r in records), dtype=np.int64, count=n)))
+    for name in int_cols:
+        parts.append(_pack_ints(np.fromiter((r[name] for r in records), dtype=np.int64, count=n)))
+    for name in float_cols:
+        parts.append(_pack_floats(np.fromiter((r[name] for r in records), dtype=np.float64, count=n)))
+    payload = zlib.compress(b"".join(parts), 9)
+    header = _CHUNK_HEADER.pack(
+        _KIND_CODES[kind], n,
+        _to_us(records[0]["timestamp"]), _to_us(records[-1]["timestamp"]),
+        len(payload),
+    )
+    return header + payload
+
+
+def decode_chunk(kind: str, count: int, payload: bytes) -> List[Dict[str, Any]]:
+    """Inverse of encode_chunk for one compressed payload."""
+    dt_cols, int_cols, float_cols = _SCHEMA[kind]
+    raw = zlib.decompress(payload)
+    columns: Dict[str, list] = {}
+    pos = 0
+    for name in dt_cols:
+        us, pos = _unpack_ints(raw, pos, count)
+        columns[name] = [_from_us(v) for v in us.tolist()]
+    for name in int_cols:
+        ints, pos = _unpack_ints(raw, pos, count)
+        columns[name] = ints.tolist()
+    for name in float_cols:
+        floats, pos = _unpack_floats(raw, pos, count)
+        columns[name] = floats.tolist()
+    names = list(columns)
+    return [dict(zip(names, row, strict=True)) for row in zip(*columns.values(), strict=True)]
+
+
+def write_file_header(f: BinaryIO) -> None:
+    f.write(_FILE_HEADER.pack(_MAGIC, _VERSION, 0))
+
+
+def _check_file_header(f: BinaryIO, path: Path) -> None:
+    head = f.read(_FILE_HEADER.size)
+    if len(head) < _FILE_HEADER.size:
+        raise ArchiveFormatError(f"{path}: truncated archive header")
+    magic, version, _ = _FILE_HEADER.unpack(head)
+    if magic != _MAGIC:
+        raise ArchiveFormatError(f"{path}: not a VADASE archive")
+    if version != _VERSION:
+        raise ArchiveFormatError(f"{path}: unsupported archive version {version}")
+
+
+def read_index(path: Path) -> List[ChunkIndexEntry]:
+    """Chunk index of an archive, read from the chunk headers without decompressing.
+
+    A torn final chunk (writer crashed mid-append) is left out.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    entries: List[ChunkIndexEntry] = []
+    with open(path, "rb") as f:
+        _check_file_header(f, path)
+        while True:
+            head = f.read(_CHUNK_HEADER.size)
+            if len(head) < _CHUNK_HEADER.size:
+                break
+            code, count, t_first, t_last, length = _CHUNK_HEADER.unpack(head)
+            offset = f.tell()
+            if offset + length > size or code not in _CODE_KINDS:
+                break
+            entries.append(ChunkIndexEntry(
+                _CODE_KINDS[code], count, _from_us(t_first), _from_us(t_last), offset, length,
+            ))
+            f.seek(length, 1)
+    return entries
+
+
+def read_archive(
+    path: Path,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    kinds: Sequence[str] = (KIND_LVM, KIND_LDM),
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (kind, record) pairs in timestamp order, LVM before LDM within an epoch.
+
+    start/end (inclusive, tz-aware) bound the window; chunks entirely outside
+    it are never decompressed.
+    """
+    index = [
+        e for e in read_index(path)
+        if e.kind in kinds
+        and (start is None or e.t_last >= start)
+        and (end is None or e.t_first <= end)
+    ]
+    streams: Dict[str, List[Dict[str, Any]]] = {k: [] for k in kinds}
+    with open(path, "rb") as f:
+        for entry in index:
+            f.seek(entry.offset)
+            streams[entry.kind].extend(decode_chunk(entry.kind, entry.count, f.read(entry.length)))
+
+    def keyed(kind: str) -> Iterator[Tuple[datetime, int, str, Dict[str, Any]]]:
+        order = _KIND_CODES[kind]
+        for rec in sorted(streams[kind], key=lambda r: r["timestamp"]):
+            ts = rec["timestamp"]
+            if (start is None or ts >= start) and (end is None or ts <= end):
+                yield ts, order, kind, rec
+
+    for _, _, kind, rec in merge(*(keyed(k) for k in kinds), key=lambda t: (t[0], t[1])):
+        yield kind, rec
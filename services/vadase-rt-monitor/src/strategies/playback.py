@@ -14,6 +14,12 @@ class PlaybackStrategy(ABC):
         """
         pass
 
+    async def wait_timestamp(self, timestamp: datetime) -> None:
+        """
+        Same as wait(), for pre-parsed archive records that carry a full datetime.
+        """
+        return
+
 class FastImportStrategy(PlaybackStrategy):
     """
     No waiting; process as fast as possible.
@@ -36,16 +42,22 @@ class RealTimeStrategy(PlaybackStrategy):
     async def wait(self, line: str) -> None:
         try:
             current_dt = self._extract_datetime(line)
+        except ValueError:
+            return
+        await self._pace(current_dt)
 
-            if self.last_timestamp is not None:
-                delta = (current_dt - self.last_timestamp).total_seconds()
-                # Sanity check: valid positive delay, not too huge
-                if 0 < delta < 60:
-                    await asyncio.sleep(delta / self.speed)
+    async def wait_timestamp(self, timestamp: datetime) -> None:
+        # Archive records are tz-aware UTC; pacing compares naive datetimes.
+        await self._pace(timestamp.replace(tzinfo=None))
 
-            self.last_timestamp = current_dt
-        except ValueError:
-            pass
+    async def _pace(self, current_dt: datetime) -> None:
+        if self.last_timestamp is not None:
+            delta = (current_dt - self.last_timestamp).total_seconds()
+            # Sanity check: valid positive delay, not too huge
+            if 0 < delta < 60:
+                await asyncio.sleep(delta / self.speed)
+
+        self.last_timestamp = current_dt
 
     def _extract_datetime(self, line: str) -> datetime:
         """
@@ -0,0 +1,281 @@
+"""
+Ingestion profiler for `--profile` runs of run_ingestor / replay_events.
+
+Three independent probes, all off unless a profiler is passed in:
+
+  - Stage timers: IngestionCore reports parse and total processing time per
+    sentence; the composition root wraps its output ports with timed_port()
+    so writes are timed per station. "integrate" is what remains of the
+    total once parse and output are subtracted.
+  - Stack sampler: a daemon thread samples the event-loop thread's Python
+    stack every `sample_interval` seconds. Samples are attributed to the
+    outermost coroutine on the stack (the task's coroutine, e.g.
+    IngestionCore.consume) and kept as folded stacks — the
+    `frame;frame;frame count` text format flamegraph.pl and speedscope read.
+  - Loop lag probe: a task that sleeps a fixed interval and measures how late
+    it wakes. Lateness over `slow_callback` means some callback held the loop;
+    the stack the sampler saw last is logged with it.
+
+GC pauses are timed through gc.callbacks and reported separately — they hit
+whichever station happened to be running and would otherwise be smeared
+across every stage.
+"""
+
+import asyncio
+import gc
+import inspect
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+STAGES = ("parse", "integrate", "output")
+_IDLE = "<idle>"
+
+
+class _StageStats:
+    __slots__ = ("count", "total")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+
+
+class _TimedOutputPort:
+    """OutputPort wrapper charging every write to the calling station's output stage."""
+
+    def __init__(self, wrapped: Any, profiler: "IngestProfiler"):
+        self._wrapped = wrapped
+        self._profiler = profiler
+
+    async def connect(self) -> None:
+        await self._wrapped.connect()
+
+    async def close(self) -> None:
+        await self._wrapped.close()
+
+    async def write_velocity(self, station_id: str, data: Dict[str, Any]) -> None:
+        t0 = time.perf_counter()
+        try:
+            await self._wrapped.write_velocity(station_id, data)
+        finally:
+            self._profiler.record(station_id, "output", time.perf_counter() - t0)
+
+    async def write_displacement(self, station_id: str, data: Dict[str, Any]) -> None:
+        t0 = time.perf_counter()
+        try:
+            await self._wrapped.write_displacement(station_id, data)
+        finally:
+            self._profiler.record(station_id, "output", time.perf_counter() - t0)
+
+    async def write_event_detection(
+        self,
+        station: str,
+        detection_time: datetime,
+        peak_velocity: float,
+        peak_displacement: float,
+        duration: float,
+    ) -> None:
+        t0 = time.perf_counter()
+        try:
+            await self._wrapped.write_event_detection(
+                station, detection_time, peak_velocity, peak_displacement, duration
+            )
+        finally:
+            self._profiler.record(station, "output", time.perf_counter() - t0)
+
+
+class IngestProfiler:
+    """
+    Per-station, per-stage CPU attribution plus event-loop sampling.
+
+    Lifecycle is owned by the composition root: start() inside the running
+    loop, stop() on shutdown, then report() / write_folded().
+    """
+
+    def __init__(self, sample_interval: float = 0.005, slow_callback: float = 0.1):
+        self.sample_interval = sample_interval
+        self.slow_callback = slow_callback
+
+        self._stages: Dict[str, Dict[str, _StageStats]] = defaultdict(
+            lambda: defaultdict(_StageStats)
+        )
+        self.folded: Counter = Counter()
+        self.coroutine_samples: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+
+        self.gc_pauses: Counter = Counter()
+        self.gc_time: Dict[int, float] = defaultdict(float)
+        self._gc_t0 = 0.0
+
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+        self.lag_probes = 0
+        self.slow_callbacks: List[Dict[str, Any]] = []
+
+        self._last_stack = ""
+        self._loop_thread_id: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._sampler_stop = threading.Event()
+        self._lag_task: Optional[asyncio.Task] = None  # type: ignore[type-arg]
+        self._started = 0.0
+        self.wall_time = 0.0
+
+    # ------------------------------------------------------------------
+    # Stage timers
+    # ------------------------------------------------------------------
+
+    def record(self, station: str, stage: str, seconds: float) -> None:
+        stats = self._stages[station][stage]
+        stats.count += 1
+        stats.total += seconds
+
+    def timed_port(self, port: Any) -> _TimedOutputPort:
+        return _TimedOutputPort(port, self)
+
+    def stage_totals(self, station: str) -> Dict[str, float]:
+        """Seconds spent per stage for one station (integrate derived from total)."""
+        stages = self._stages.get(station, {})
+        parse = stages["parse"].total if "parse" in stages else 0.0
+        output = stages["output"].total if "output" in stages else 0.0
+        process = stages["process"].total if "process" in stages else 0.0
+        return {
+            "parse": parse,
+            "integrate": max(process - parse - output, 0.0),
+            "output": output,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        self._started = time.perf_counter()
+        self._loop_thread_id = threading.get_ident()
+        self._sampler_stop.clear()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name="ingest-profiler", daemon=True
+        )
+        self._sampler.start()
+        self._lag_task = asyncio.create_task(self._probe_lag())
+        gc.callbacks.append(self._on_gc)
+
+    async def stop(self) -> None:
+        self.wall_time = time.perf_counter() - self._started
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+        self._sampler_stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1.0)
+
+    # ------------------------------------------------------------------
+    # Probes
+    # ------------------------------------------------------------------
+
+    def _sample_loop(self) -> None:
+        while not self._sampler_stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore[arg-type]
+            if frame is None:
+                continue
+            self._take_sample(frame)
+
+    def _take_sample(self, frame: Any) -> None:
+        names: List[str] = []
+        coroutine = None
+        top = frame.f_code
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            if code.co_flags & inspect.CO_COROUTINE:
+                coroutine = code.co_qualname  # keeps the outermost one
+            frame = frame.f_back
+        names.reverse()
+        self.samples += 1
+        # Blocked in the selector: the loop had nothing to run.
+        if top.co_name == "select" and top.co_filename.endswith("selectors.py"):
+            self.idle_samples += 1
+            self.folded[_IDLE] += 1
+            return
+        stack = ";".join(names)
+        self.folded[stack] += 1
+        self.coroutine_samples[coroutine or "<no coroutine>"] += 1
+        self._last_stack = stack
+
+    async def _probe_lag(self) -> None:
+        interval = 0.05
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = time.perf_counter() - t0 - interval
+            self.lag_probes += 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            if lag >= self.slow_callback:
+                culprit = self._last_stack.rsplit(";", 1)[-1] if self._last_stack else "?"
+                self.slow_callbacks.append({"lag_s": lag, "frame": culprit})
+                logger.warning("slow_callback", lag_ms=round(lag * 1000, 1), frame=culprit)
+
+    def _on_gc(self, phase: str, info: Dict[str, int]) -> None:
+        if phase == "start":
+            self._gc_t0 = time.perf_counter()
+        else:
+            generation = info.get("generation", -1)
+            self.gc_pauses[generation] += 1
+            self.gc_time[generation] += time.perf_counter() - self._gc_t0
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def report(self) -> str:
+        lines = [f"Profile: {self.wall_time:.1f} s wall"]
+        lines.append("")
+        header = " ".join(f"{stage + ' ms':>13}" for stage in STAGES)
+        lines.append(f"{'station':<10} {'sentences':>10} {header} {'µs/sentence':>12}")
+        for station in sorted(self._stages):
+            totals = self.stage_totals(station)
+            n = self._stages[station]["process"].count if "process" in self._stages[station] else 0
+            per = (sum(totals.values()) / n * 1e6) if n else 0.0
+            cells = " ".join(f"{totals[s] * 1000:>13.1f}" for s in STAGES)
+            lines.append(f"{station:<10} {n:>10} {cells} {per:>12.1f}")
+
+        lines.append("")
+        gc_total = sum(self.gc_time.values())
+        pauses = ", ".join(f"gen{g}: {self.gc_pauses[g]}" for g in sorted(self.gc_pauses))
+        lines.append(f"GC: {gc_total * 1000:.1f} ms total ({pauses or 'none'})")
+
+        mean_lag = self.lag_total / self.lag_probes if self.lag_probes else 0.0
+        lines.append(
+            f"Loop lag: mean {mean_lag * 1000:.2f} ms, max {self.lag_max * 1000:.1f} ms, "
+            f"{len(self.slow_callbacks)} callbacks >= {self.slow_callback * 1000:.0f} ms"
+        )
+
+        busy = self.samples - self.idle_samples
+        lines.append(f"Samples: {self.samples} ({busy} busy, {self.idle_samples} idle)")
+        for coroutine, count in self.coroutine_samples.most_common(10):
+            share = count / busy * 100 if busy else 0.0
+            lines.append(f"  {share:5.1f}%  {coroutine}")
+        return "\n".join(lines)
+
+    def write_folded(self, path: Path) -> Path:
+        """Write sampled stacks in folded format (flamegraph.pl / speedscope)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.folded.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
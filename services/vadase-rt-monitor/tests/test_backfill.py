@@ -0,0 +1,98 @@
+"""Tests for the parallel archive backfill (discovery, checkpoint resume, workers)."""
+
+from datetime import date
+from pathlib import Path
+
+from src.backfill import (
+    BackfillCheckpoint,
+    BackfillOptions,
+    StationDay,
+    discover_station_days,
+    process_station_day,
+    run_backfill,
+)
+
+
+def _sentence(body: str) -> str:
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+def _capture(path: Path, mmddyy: str, seconds: int = 5) -> Path:
+    lines = []
+    for s in range(seconds):
+        t = f"0000{s:02d}.00"
+        lines.append(_sentence(
+            f"GNLVM,{t},{mmddyy},0.0010,0.0020,0.0030,0.00007,0.00005,0.0004,"
+            "0.00001,0.000002,0.000005,0.0235,40"
+        ))
+        lines.append(_sentence(
+            f"GNLDM,{t},{mmddyy},000000.00,{mmddyy},0.0010,0.0020,0.0030,0.00007,"
+            "0.00005,0.0004,0.00001,0.000002,0.000005,0.0235,40,2,1.0,1.0,"
+        ))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_discover_groups_by_station_and_day(tmp_path):
+    _capture(tmp_path / "DGOS_NMEA_01282026" / "NMEA_DGOS LDM_20260128_000000.rtl", "012826")
+    _capture(tmp_path / "DGOS_NMEA_01282026" / "NMEA_DGOS LDM_20260128_010000.rtl", "012826")
+    _capture(tmp_path / "DGOS_NMEA_01292026" / "NMEA_DGOS LDM_20260129_000000.rtl", "012926")
+    # Station/day taken from the directory layout when the name carries neither
+    _capture(tmp_path / "pbis" / "2026-01-28" / "hour00.rtl", "012826")
+    (tmp_path / "stray.rtl").write_text("")
+
+    days = discover_station_days(tmp_path)
+
+    assert [d.key for d in days] == ["DGOS/2026-01-28", "DGOS/2026-01-29", "PBIS/2026-01-28"]
+    assert [p.name for p in days[0].files] == [
+        "NMEA_DGOS LDM_20260128_000000.rtl",
+        "NMEA_DGOS LDM_20260128_010000.rtl",
+    ]
+
+
+def test_process_station_day_dry_run_counts_writes(tmp_path):
+    files = (
+        _capture(tmp_path / "NMEA_DGOS LDM_20260128_000000.rtl", "012826", seconds=3),
+        _capture(tmp_path / "NMEA_DGOS LDM_20260128_010000.rtl", "012826", seconds=4),
+    )
+    sd = StationDay("DGOS", date(2026, 1, 28), files)
+
+    result = process_station_day(sd, BackfillOptions(dry_run=True))
+
+    assert result.files == 2
+    assert result.velocities == 7
+    assert result.displacements == 7
+    assert result.events == 0
+
+
+def test_checkpoint_skips_torn_line(tmp_path):
+    path = tmp_path / "ckpt.jsonl"
+    path.write_text('{"key": "DGOS/2026-01-28"}\n{"key": "DGOS/2026-01')
+
+    ckpt = BackfillCheckpoint(path)
+
+    assert ckpt.is_done(StationDay("DGOS", date(2026, 1, 28)))
+    assert not ckpt.is_done(StationDay("DGOS", date(2026, 1, 29)))
+
+
+def test_run_backfill_resumes_from_checkpoint(tmp_path):
+    archive = tmp_path / "archive"
+    _capture(archive / "NMEA_DGOS LDM_20260128_000000.rtl", "012826")
+    _capture(archive / "NMEA_DGOS LDM_20260129_000000.rtl", "012926")
+    ckpt_path = tmp_path / "ckpt.jsonl"
+    options = BackfillOptions(dry_run=True)
+
+    first = run_backfill(archive, BackfillCheckpoint(ckpt_path), options, workers=2)
+    assert sorted(r.key for r in first.completed) == ["DGOS/2026-01-28", "DGOS/2026-01-29"]
+    assert first.failed == []
+
+    # A new day lands in the archive; the rerun only processes that one
+    _capture(archive / "NMEA_DGOS LDM_20260130_000000.rtl", "013026")
+    second = run_backfill(archive, BackfillCheckpoint(ckpt_path), options, workers=2)
+
+    assert [r.key for r in second.completed] == ["DGOS/2026-01-30"]
+    assert second.skipped == 2
@@ -0,0 +1,141 @@
+"""Tests for the .vda binary archive: codec round-trip, index, writer tap, replay."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from src.adapters.inputs.directory import DirectoryAdapter
+from src.adapters.outputs.archive import NMEAArchiveWriter, archive_path
+from src.domain.processor import IngestionCore
+from src.parsers.nmea_archive import (
+    _CHUNK_HEADER,
+    KIND_LDM,
+    KIND_LVM,
+    ArchiveFormatError,
+    decode_chunk,
+    encode_chunk,
+    read_archive,
+    read_index,
+    write_file_header,
+)
+from src.parsers.nmea_parser import parse_ldm, parse_lvm
+from src.strategies.playback import FastImportStrategy
+
+T0 = datetime(2026, 1, 28, 0, 0, 0, tzinfo=UTC)
+
+
+def _sentence(body: str) -> str:
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+def _lvm(i: int) -> str:
+    t = (T0 + timedelta(seconds=i)).strftime("%H%M%S.00")
+    return _sentence(
+        f"GNLVM,{t},012826,{0.0011 * (i % 7):.4f},-0.0021,0.0015,0.000074,0.000058,"
+        f"0.000423,0.000011,0.000002,-0.000005,0.023544,{38 + i % 3}"
+    )
+
+
+def _ldm(i: int) -> str:
+    t = (T0 + timedelta(seconds=i)).strftime("%H%M%S.00")
+    return _sentence(
+        f"GNLDM,{t},012826,073817.00,012026,{-0.0012 + i * 1e-4:.4f},0.0008,-0.0058,"
+        "0.000074,0.000058,0.000423,0.000011,0.000002,0.000005,0.023544,40,2,1.000000,0.987654,"
+    )
+
+
+def test_chunk_round_trip_is_exact():
+    records = [parse_ldm(_ldm(i)) for i in range(50)]
+    # A value with no short decimal form exercises the XOR float fallback.
+    records[3]["cq"] = 1 / 3
+
+    chunk = encode_chunk(KIND_LDM, records)
+    decoded = decode_chunk(KIND_LDM, len(records), chunk[_CHUNK_HEADER.size:])
+
+    assert decoded == records
+
+
+def test_read_archive_interleaves_kinds_and_windows(tmp_path):
+    writer = NMEAArchiveWriter(tmp_path, chunk_size=10)
+    lvm = [parse_lvm(_lvm(i)) for i in range(30)]
+    ldm = [parse_ldm(_ldm(i)) for i in range(30)]
+
+    async def fill():
+        await writer.connect()
+        for v, d in zip(lvm, ldm, strict=True):
+            await writer.write_velocity("DGOS", dict(v))
+            await writer.write_displacement("DGOS", dict(d))
+        await writer.close()
+
+    asyncio.run(fill())
+    path = archive_path(tmp_path, "DGOS", T0.date())
+
+    assert len(read_index(path)) == 6
+    records = list(read_archive(path))
+    assert [k for k, _ in records[:4]] == [KIND_LVM, KIND_LDM, KIND_LVM, KIND_LDM]
+    assert [r for k, r in records if k == KIND_LVM] == lvm
+
+    window = list(read_archive(path, start=T0 + timedelta(seconds=12), end=T0 + timedelta(seconds=14)))
+    assert [r["timestamp"].second for _, r in window] == [12, 12, 13, 13, 14, 14]
+
+
+def test_torn_final_chunk_is_ignored(tmp_path):
+    path = tmp_path / "DGOS_20260128.vda"
+    with open(path, "wb") as f:
+        write_file_header(f)
+        f.write(encode_chunk(KIND_LVM, [parse_lvm(_lvm(i)) for i in range(5)]))
+        f.write(encode_chunk(KIND_LVM, [parse_lvm(_lvm(i)) for i in range(5, 10)])[:-4])
+
+    assert [e.count for e in read_index(path)] == [5]
+
+
+def test_rejects_non_archive(tmp_path):
+    path = tmp_path / "bogus.vda"
+    path.write_bytes(b"$GNLVM,000000.00")
+    with pytest.raises(ArchiveFormatError):
+        read_index(path)
+
+
+class _Recorder:
+    def __init__(self):
+        self.vel, self.disp = [], []
+
+    async def connect(self): pass
+    async def close(self): pass
+    async def write_velocity(self, station_id, data): self.vel.append(dict(data))
+    async def write_displacement(self, station_id, data): self.disp.append(dict(data))
+    async def write_event_detection(self, *args): pass
+
+
+async def _run(core, adapter):
+    queue, stop = asyncio.Queue(maxsize=100), asyncio.Event()
+    await asyncio.gather(adapter.start(queue, stop), core.consume(queue, stop))
+
+
+@pytest.mark.asyncio
+async def test_archive_replay_matches_text_replay(tmp_path):
+    """Archiving a text capture then replaying the .vda gives identical core output."""
+    capture = tmp_path / "text" / "NMEA_DGOS LDM_20260128_000000.rtl"
+    capture.parent.mkdir()
+    capture.write_text("\n".join(s for i in range(20) for s in (_lvm(i), _ldm(i))) + "\n")
+
+    text_out = _Recorder()
+    archive = NMEAArchiveWriter(tmp_path / "vda")
+    await archive.connect()
+    core = IngestionCore("DGOS", text_out, force_integration=True, archive=archive)
+    await _run(core, DirectoryAdapter(capture.parent, FastImportStrategy(), pattern="*.rtl"))
+    await archive.close()
+
+    vda_out = _Recorder()
+    core = IngestionCore("DGOS", vda_out, force_integration=True)
+    await _run(core, DirectoryAdapter(tmp_path / "vda" / "DGOS", FastImportStrategy(), pattern="*.vda"))
+
+    assert vda_out.vel == text_out.vel
+    assert vda_out.disp == text_out.disp
+    # The tap stores receiver values, not the integrator's overrides
+    raw = [r for k, r in read_archive(archive_path(tmp_path / "vda", "DGOS", T0.date())) if k == KIND_LDM]
+    assert raw[5]["dE"] == parse_ldm(_ldm(5))["dE"]
+    assert "displacement_source" not in raw[5]
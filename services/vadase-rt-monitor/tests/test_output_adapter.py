@@ -451,3 +451,36 @@ async def test_write_displacement_positional_mapping():
     assert row[6] == 0.99           # $7 overall_completeness
     assert row[7] == 0.77           # $8 quality <- cq
     assert row[8] == "RECEIVER"     # $9 displacement_source
+
+
+# ---------------------------------------------------------------------------
+# (m) backpressure=True flushes inline and propagates flush errors (DL-019)
+# ---------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_backpressure_flushes_inline_at_batch_size():
+    adapter = TimescaleDBAdapter(dsn="postgresql://fake/db", batch_size=2, backpressure=True)
+    mock_pool, conn = _make_mock_pool()
+    adapter._pool = mock_pool
+
+    await adapter.write_velocity("BOST", _sample_vel_data())
+    await adapter.write_velocity("BOST", _sample_vel_data())
+
+    # No event-loop turn needed: the second write awaited the flush itself.
+    conn.executemany.assert_awaited_once()
+    assert adapter.pending_rows == 0
+
+
+@pytest.mark.asyncio
+async def test_backpressure_flush_error_propagates_and_keeps_rows():
+    adapter = TimescaleDBAdapter(dsn="postgresql://fake/db", batch_size=2, backpressure=True)
+    mock_pool, conn = _make_mock_pool()
+    conn.executemany = AsyncMock(side_effect=OSError("connection reset"))
+    adapter._pool = mock_pool
+
+    await adapter.write_displacement("BOST", _sample_disp_data())
+    with pytest.raises(OSError):
+        await adapter.write_displacement("BOST", _sample_disp_data())
+
+    assert adapter.pending_rows == 2
+    assert adapter.dropped_rows == 0
@@ -0,0 +1,76 @@
+"""Tests for the --profile IngestProfiler (stage attribution, sampler, folded dump)."""
+
+import asyncio
+import time
+
+import pytest
+from src.adapters.outputs.null import NullOutputPort
+from src.domain.processor import IngestionCore
+from src.utils.profiler import IngestProfiler
+
+
+def _sentence(body: str) -> str:
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+LVM = _sentence(
+    "GNLVM,000004.00,012826,0.0022,0.0012,0.0019,0.000075,0.000058,0.000427,"
+    "0.000011,0.000002,0.000005,0.023659,40"
+)
+LDM = _sentence(
+    "GNLDM,000004.00,012826,073817.00,012026,0.0022,0.0012,0.0019,0.000075,0.000058,"
+    "0.000427,0.000011,0.000002,0.000005,0.023659,40,2,1.000000,1.000000,"
+)
+
+
+class _SlowPort(NullOutputPort):
+    async def write_velocity(self, station_id, data):
+        time.sleep(0.002)
+
+
+@pytest.mark.asyncio
+async def test_stage_times_attributed_per_station():
+    profiler = IngestProfiler()
+    port = profiler.timed_port(_SlowPort())
+    cores = {
+        sta: IngestionCore(station_id=sta, output_port=port, profiler=profiler)
+        for sta in ("PBIS", "DGOS")
+    }
+
+    for _ in range(5):
+        await cores["PBIS"].process_sentence(LVM)
+    await cores["DGOS"].process_sentence(LDM)
+
+    pbis = profiler.stage_totals("PBIS")
+    assert pbis["output"] >= 5 * 0.002
+    assert pbis["parse"] > 0
+    assert pbis["output"] > pbis["parse"]
+    assert profiler.stage_totals("DGOS")["output"] < 0.002
+    assert "PBIS" in profiler.report()
+
+
+@pytest.mark.asyncio
+async def test_sampler_attributes_busy_coroutine_and_flags_slow_callbacks(tmp_path):
+    async def hog():
+        for _ in range(5):
+            t0 = time.perf_counter()
+            while time.perf_counter() - t0 < 0.03:
+                pass
+            await asyncio.sleep(0)
+
+    profiler = IngestProfiler(sample_interval=0.002, slow_callback=0.02)
+    await profiler.start()
+    await asyncio.sleep(0.06)  # let the lag probe arm before the loop is hogged
+    await asyncio.create_task(hog())
+    await profiler.stop()
+
+    assert profiler.coroutine_samples.most_common(1)[0][0].endswith("hog")
+    assert profiler.slow_callbacks
+
+    lines = profiler.write_folded(tmp_path / "out.folded").read_text().splitlines()
+    stacks = dict(line.rsplit(" ", 1) for line in lines)
+    assert stacks.pop("<idle>", None) is not None
+    assert any("hog" in stack for stack in stacks)
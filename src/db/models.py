@@ -133,6 +133,9 @@ class ProcessingStatus(Base):
 
     Containment query (is day 200 available?):
         WHERE '[200,200]'::int4range <@ ANY(available_days)
+
+    available_days is maintained by ingestion_pipeline.inventory from the
+    rinex_files catalog (and optionally a filesystem walk).
     """
 
     __tablename__ = "processing_status"
@@ -147,6 +150,8 @@ class ProcessingStatus(Base):
     # valid values: pending | retrieving | processing | data_complete
 
     available_days = Column(ARRAY(INT4RANGE))   # e.g. {[1,37],[141,365]}
+    # Newest rinex_files.date_added folded into available_days (migration 015)
+    available_days_as_of = Column(TIMESTAMP(timezone=True))
     staff_assigned = Column(Text)
     notes = Column(Text)
     updated_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
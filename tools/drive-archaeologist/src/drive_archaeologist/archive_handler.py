@@ -8,11 +8,14 @@ import tempfile
 import zipfile
 from pathlib import Path
 
-# Supported archive extensions
+# Supported archive extensions (".z" is Unix compress, e.g. legacy RINEX .??d.Z)
 SUPPORTED_ARCHIVES = [
-    ".zip", ".tar", ".gz", ".tgz", ".bz2", ".tbz2", ".xz", ".txz", ".7z", ".rar"
+    ".zip", ".tar", ".gz", ".tgz", ".bz2", ".tbz2", ".xz", ".txz", ".7z", ".rar", ".z"
 ]
 
+# Copy size for single-file decompression
+_COPY_BYTES = 1 << 20
+
 
 class ArchiveHandler:
     """
@@ -88,6 +91,17 @@ class ArchiveHandler:
                 # The tarfile module can handle most common tar compressions
                 with tarfile.open(filepath, 'r:*') as tf:
                     self._safe_extract_tar(tf, temp_path)
+            elif lower_path.endswith(".z"):
+                # Unix compress wraps a single file; decode it in-process.
+                try:
+                    from pogf_geodetic_suite import lzw
+                except ImportError:
+                    import logging
+                    logging.warning("pogf-geodetic-suite not installed; skipping .Z file: %s", filepath)
+                    self._cleanup(temp_path)
+                    return None
+                with open(filepath, 'rb') as src, open(temp_path / filepath.stem, 'wb') as dst:
+                    lzw.decompress(src, dst, _COPY_BYTES)
             else:
                 # Simple compression formats like .gz that aren't tarballs.
                 # This logic is more complex as they usually wrap a single file.
@@ -1,6 +1,7 @@
 import zipfile
 from pathlib import Path
 
+import pytest
 from drive_archaeologist.archive_handler import ArchiveHandler
 
 
@@ -61,3 +62,22 @@ def test_is_archive_detection():
     assert h.is_archive(Path("file.rar")) is True
     assert h.is_archive(Path("file.txt")) is False
     assert h.is_archive(Path("file.rnx")) is False
+
+
+def test_extract_unix_compress(tmp_path):
+    lzw = pytest.importorskip("pogf_geodetic_suite.lzw")
+    payload = b"     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE\n" * 200
+    z_path = tmp_path / "pbis0010.24d.Z"
+    z_path.write_bytes(lzw.compress(payload))
+    handler = ArchiveHandler()
+    assert handler.is_archive(z_path) is True
+    result = handler.extract(z_path)
+    assert result is not None
+    assert (result / "pbis0010.24d").read_bytes() == payload
+
+
+def test_corrupt_unix_compress_returns_none(tmp_path):
+    pytest.importorskip("pogf_geodetic_suite.lzw")
+    z_path = tmp_path / "broken.Z"
+    z_path.write_bytes(b"not compressed")
+    assert ArchiveHandler().extract(z_path) is None